@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Benchmark do Content Quality Validator
+Compara o validador de passada única com a implementação original (resultados e tempo)
+e mede o ponto de corte entre validate_batch no processo e no pool de processos (--batch)
+"""
+
+import sys
+import os
+import re
+import time
+import random
+import argparse
+from datetime import datetime
+
+# Adiciona src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from services.content_quality_validator import ContentQualityValidator, HAS_AHOCORASICK
+
+
+class LegacyContentQualityValidator(ContentQualityValidator):
+    """Implementação original: cada verificação re-tokeniza e varre listas"""
+
+    def __init__(self):
+        super().__init__()
+        self.error_indicators = list(self.error_indicators)
+        self.navigation_words = list(self.navigation_words)
+        self.quality_indicators = list(self.quality_indicators)
+        self.portuguese_words = list(self.portuguese_words)
+
+    def validate_content(self, content, url="", context=None):
+        if not content:
+            return {'valid': False, 'score': 0.0, 'reason': 'Conteúdo vazio', 'details': {}}
+
+        validations = {
+            'length_check': self._legacy_length(content),
+            'error_page_check': self._legacy_error_page(content),
+            'navigation_ratio_check': self._legacy_ratio(content, self.navigation_words, 15),
+            'information_density_check': self._legacy_ratio(content, self.quality_indicators, 10),
+            'language_check': self._legacy_ratio(content, self.portuguese_words, 5),
+            'structure_check': self._legacy_structure(content),
+            'relevance_check': self._legacy_relevance(content, context or {})
+        }
+
+        total_score = 0.0
+        max_score = 0.0
+        for result in validations.values():
+            total_score += result['score'] * result['weight']
+            max_score += result['weight']
+        final_score = (total_score / max_score) * 100 if max_score > 0 else 0
+        is_valid = final_score >= 60.0
+
+        return {
+            'valid': is_valid,
+            'score': round(final_score, 2),
+            'details': validations,
+            'content_stats': self._legacy_stats(content),
+            'url': url
+        }
+
+    def _legacy_length(self, content):
+        length = len(content)
+        if length >= self.min_content_length:
+            return {'passed': True, 'score': min(100, (length / 2000) * 100), 'weight': 20, 'value': length}
+        return {'passed': False, 'score': (length / self.min_content_length) * 100, 'weight': 20, 'value': length}
+
+    def _legacy_error_page(self, content):
+        content_lower = content.lower()
+        found_errors = [indicator for indicator in self.error_indicators if indicator in content_lower]
+        if found_errors:
+            return {'passed': False, 'score': 0, 'weight': 30, 'value': found_errors}
+        return {'passed': True, 'score': 100, 'weight': 30, 'value': []}
+
+    def _legacy_ratio(self, content, vocabulary, weight):
+        words = content.lower().split()
+        if len(words) == 0:
+            return {'passed': False, 'score': 0, 'weight': weight, 'value': 0}
+        ratio = sum(1 for word in words if word in vocabulary) / len(words)
+        if weight == 15:
+            if ratio <= self.max_navigation_ratio:
+                return {'passed': True, 'score': (1 - ratio) * 100, 'weight': 15, 'value': ratio}
+            return {'passed': False, 'score': max(0, (self.max_navigation_ratio - ratio) * 100), 'weight': 15, 'value': ratio}
+        if weight == 10:
+            if ratio >= self.min_information_density:
+                return {'passed': True, 'score': min(100, ratio * 1000), 'weight': 10, 'value': ratio}
+            return {'passed': False, 'score': (ratio / self.min_information_density) * 100, 'weight': 10, 'value': ratio}
+        if ratio >= 0.05:
+            return {'passed': True, 'score': min(100, ratio * 500), 'weight': 5, 'value': ratio}
+        return {'passed': False, 'score': ratio * 500, 'weight': 5, 'value': ratio}
+
+    def _legacy_structure(self, content):
+        paragraphs = [line.strip() for line in content.split('\n') if len(line.strip()) > 50]
+        if len(paragraphs) >= 3:
+            return {'passed': True, 'score': min(100, len(paragraphs) * 10), 'weight': 10, 'value': len(paragraphs)}
+        return {'passed': False, 'score': len(paragraphs) * 33, 'weight': 10, 'value': len(paragraphs)}
+
+    def _legacy_relevance(self, content, context):
+        if not context:
+            return {'passed': True, 'score': 50, 'weight': 10, 'value': 0}
+        content_lower = content.lower()
+        relevance_score = 0
+        for field in ('segmento', 'produto', 'publico'):
+            term = str(context[field]).lower() if context.get(field) else ''
+            if term and len(term) > 2:
+                relevance_score += content_lower.count(term) * 10
+        normalized_score = min(100, relevance_score)
+        return {'passed': normalized_score >= 20, 'score': normalized_score, 'weight': 10, 'value': relevance_score}
+
+    def _legacy_stats(self, content):
+        words = content.split()
+        lines = content.split('\n')
+        paragraphs = [line.strip() for line in lines if len(line.strip()) > 50]
+        return {
+            'character_count': len(content),
+            'word_count': len(words),
+            'line_count': len(lines),
+            'paragraph_count': len(paragraphs),
+            'number_count': len(re.findall(r'\d+(?:\.\d+)?%?', content)),
+            'money_value_count': len(re.findall(r'R\$\s*[\d,\.]+', content)),
+            'avg_words_per_paragraph': len(words) / max(len(paragraphs), 1),
+            'avg_chars_per_word': len(content) / max(len(words), 1)
+        }
+
+
+VOCABULARY = (
+    "o mercado de marketing digital cresceu 35% em 2024 segundo pesquisa da empresa com dados de vendas "
+    "para pequenas empresas que investem em tecnologia e inovação com receita de R$ 1.500,00 por cliente "
+    "análise tendência oportunidade estratégia consumidor negócio lucro você não uma como mais mas foi "
+    "home menu login contato sobre blog notícias cookies política privacidade buscar Início Serviços"
+).split()
+
+
+def make_page(size: int, seed: int, kind: str = 'article') -> str:
+    """Gera página sintética de ``size`` caracteres"""
+    rng = random.Random(seed)
+    lines = []
+    total = 0
+    while total < size:
+        if kind == 'navigation' and rng.random() < 0.6:
+            line = ' '.join(rng.choice(VOCABULARY[-14:]) for _ in range(rng.randint(1, 6)))
+        else:
+            line = ' '.join(rng.choice(VOCABULARY) for _ in range(rng.randint(4, 40)))
+        if kind == 'error' and rng.random() < 0.01:
+            line += ' Erro 404 Not Found - Página não encontrada. Enable JavaScript'
+        lines.append(line)
+        total += len(line) + 1
+    return '\n'.join(lines)[:size]
+
+
+def comparable(result):
+    """Remove campos que dependem da implementação (mensagens, horário)"""
+    details = {
+        name: {key: value for key, value in check.items() if key != 'message'}
+        for name, check in result.get('details', {}).items()
+    }
+    return {
+        'valid': result['valid'],
+        'score': result['score'],
+        'details': details,
+        'content_stats': result.get('content_stats')
+    }
+
+
+def benchmark_batch(args) -> int:
+    """Mede validate_batch inline x processos para vários volumes e sugere o corte"""
+    validator = ContentQualityValidator()
+    validator.batch_workers = args.workers or validator.batch_workers
+    context = {'segmento': 'marketing digital', 'produto': 'curso', 'publico': 'empresas'}
+
+    # Aquece o pool para não medir o custo de criação dos processos
+    validator.validate_batch([{'content': make_page(1000, 0), 'url': 'warmup'}] * validator.batch_workers, context, mode='process')
+
+    print(f"🧮 validate_batch com {validator.batch_workers} processos (CPUs: {os.cpu_count()})")
+    print(f"   {'itens':>6} {'caracteres':>12} {'inline ms':>10} {'processos ms':>13}")
+
+    cutoff = None
+    for count in args.batch_sizes:
+        items = [
+            {'content': make_page(args.size, seed, 'article'), 'url': f'item_{seed}'}
+            for seed in range(count)
+        ]
+        total_chars = sum(len(item['content']) for item in items)
+
+        timings = {}
+        for mode in ('inline', 'process'):
+            best = None
+            for _ in range(args.rounds):
+                start = time.perf_counter()
+                result = validator.validate_batch(items, context, mode=mode)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            timings[mode] = best * 1000
+            scores = [r['score'] for r in result['batch_results']]
+            timings[mode + '_scores'] = scores
+
+        if timings['inline_scores'] != timings['process_scores']:
+            print("❌ Resultados divergentes entre inline e processos")
+            return 1
+
+        print(f"   {count:>6} {total_chars:>12,} {timings['inline']:>10.1f} {timings['process']:>13.1f}")
+        if cutoff is None and timings['process'] < timings['inline']:
+            cutoff = total_chars
+
+    validator.shutdown_pool()
+
+    if cutoff:
+        print(f"✅ Processos compensam a partir de ~{cutoff:,} caracteres: VALIDATOR_BATCH_PROCESS_MIN_CHARS={cutoff}")
+    else:
+        print("ℹ️ Processos não compensaram nos volumes medidos (mantenha a validação no processo)")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do validador de qualidade de conteúdo')
+    parser.add_argument('--size', type=int, default=50 * 1024, help='Tamanho das páginas em caracteres')
+    parser.add_argument('--pages', type=int, default=30, help='Número de páginas')
+    parser.add_argument('--rounds', type=int, default=3, help='Repetições de cada medição')
+    parser.add_argument('--batch', action='store_true', help='Mede o corte entre validate_batch inline e em processos')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[2, 5, 10, 20, 40, 80], help='Tamanhos de lote')
+    parser.add_argument('--workers', type=int, default=0, help='Processos do pool (padrão VALIDATOR_BATCH_WORKERS)')
+    args = parser.parse_args()
+
+    if args.batch:
+        return benchmark_batch(args)
+
+    kinds = ['article', 'navigation', 'error']
+    pages = [make_page(args.size, seed, kinds[seed % len(kinds)]) for seed in range(args.pages)]
+    context = {'segmento': 'marketing digital', 'produto': 'curso', 'publico': 'empresas'}
+
+    current = ContentQualityValidator()
+    legacy = LegacyContentQualityValidator()
+
+    # Resultados idênticos (com e sem contexto)
+    for page in pages:
+        for ctx in (None, context):
+            expected = comparable(legacy.validate_content(page, 'bench', ctx))
+            actual = comparable(current.validate_content(page, 'bench', ctx))
+            if expected != actual:
+                print("❌ Resultado divergente da implementação original")
+                print(f"   original: {expected}")
+                print(f"   atual:    {actual}")
+                return 1
+    print(f"✅ {len(pages) * 2} validações idênticas à implementação original")
+
+    def measure(validator):
+        best = None
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            for page in pages:
+                validator.validate_content(page, 'bench', context)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best / len(pages) * 1000
+
+    legacy_ms = measure(legacy)
+    current_ms = measure(current)
+
+    print(f"📄 {len(pages)} páginas de {args.size:,} caracteres (Aho-Corasick: {'sim' if HAS_AHOCORASICK else 'não'})")
+    print(f"   original:      {legacy_ms:8.2f} ms/página")
+    print(f"   passada única: {current_ms:8.2f} ms/página")
+    print(f"   ganho:         {legacy_ms / current_ms:8.1f}x")
+    print(f"   executado em {datetime.now().isoformat()}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -14,7 +14,9 @@ backlog = 2048
 
 # Worker processes
 workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
-worker_class = "sync"
+# gthread: streams SSE de progresso e polling longo ocupam uma thread, não o worker inteiro
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', 8))
 worker_connections = 1000
 timeout = 60
 keepalive = 2
@@ -70,6 +72,29 @@ def post_fork(server, worker):
     """Called just after a worker has been forked"""
     server.log.info("✅ Worker %s forked successfully", worker.pid)
 
+    # Clientes HTTP das IAs herdados do master não podem compartilhar sockets
+    try:
+        from services.provider_clients import provider_clients
+        provider_clients.reset()
+    except Exception as e:
+        server.log.warning("⚠️ Clientes de IA não reiniciados no worker %s: %s", worker.pid, e)
+
+    # Workers de análise em background (threads não sobrevivem ao fork)
+    try:
+        from services.analysis_job_queue import analysis_job_queue
+        analysis_job_queue.start()
+    except Exception as e:
+        server.log.warning("⚠️ Fila de análises não iniciada no worker %s: %s", worker.pid, e)
+
+def worker_exit(server, worker):
+    """Called just after a worker has been exited, in the master process"""
+    # Jobs em execução morrem com o worker (max_requests, timeout, SIGTERM): devolve à fila
+    try:
+        from services.analysis_job_queue import analysis_job_queue
+        analysis_job_queue.release_running_jobs(worker.pid)
+    except Exception as e:
+        server.log.warning("⚠️ Jobs de análise não devolvidos à fila no worker %s: %s", worker.pid, e)
+
 def worker_abort(worker):
     """Called when a worker received the SIGABRT signal"""
     worker.log.info("💥 Worker %s aborted", worker.pid)
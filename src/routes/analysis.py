@@ -18,20 +18,204 @@ from services.production_search_manager import production_search_manager
 from services.robust_content_extractor import robust_content_extractor
 from services.content_quality_validator import content_quality_validator
 from services.attachment_service import attachment_service
+from services.analysis_job_queue import analysis_job_queue, JobContext, JobCancelledError
 from database import db_manager
-from routes.progress import get_progress_tracker, update_analysis_progress
+from routes.progress import get_progress_tracker, update_analysis_progress, get_progress_status, discard_progress, close_analysis_progress
 
 logger = logging.getLogger(__name__)
 
+# Análises executadas em background pela fila de jobs
+JOB_QUEUE_ENABLED = os.getenv('ANALYSIS_JOB_QUEUE_ENABLED', 'true').lower() == 'true'
+TEST_EXTRACTION_MAX_URLS = int(os.getenv('TEST_EXTRACTION_MAX_URLS', 20))
+
 # Cria blueprint
 analysis_bp = Blueprint('analysis', __name__)
 
+class AnalysisFailedError(Exception):
+    """Falha da análise com os detalhes que serão devolvidos ao cliente"""
+
+    def __init__(self, details: dict):
+        super().__init__(details.get('message', details.get('error')))
+        self.details = details
+
+def _parse_flag(value, default: bool) -> bool:
+    """Interpreta flag booleana do JSON aceitando também strings ("false", "0", "no")"""
+    if value is None:
+        return default
+    return str(value).strip().lower() not in ('false', '0', 'no', 'off', '')
+
+def _prepare_analysis_data(data: dict) -> dict:
+    """Completa session_id e query de pesquisa da análise"""
+    
+    # Adiciona session_id se não fornecido
+    if not data.get('session_id'):
+        data['session_id'] = f"session_{int(time.time())}_{os.urandom(4).hex()}"
+    
+    # Prepara query de pesquisa se não fornecida
+    if not data.get('query'):
+        segmento = data.get('segmento', '')
+        produto = data.get('produto', '')
+        if produto:
+            data['query'] = f"mercado {segmento} {produto} Brasil tendências oportunidades 2024"
+        else:
+            data['query'] = f"análise mercado {segmento} Brasil dados estatísticas crescimento"
+    
+    return data
+
+def _run_gigantic_analysis(data: dict, progress_callback=None) -> dict:
+    """Executa a análise GIGANTE, salva no banco e adiciona metadados"""
+    
+    start_time = time.time()
+    session_id = data['session_id']
+    progress_tracker = get_progress_tracker(session_id)
+    
+    # Função de callback para progresso
+    if progress_callback is None:
+        def progress_callback(step: int, message: str, details: str = None):
+            update_analysis_progress(session_id, step, message, details)
+    
+    # Log dos dados recebidos
+    logger.info(f"📊 Dados recebidos: Segmento={data.get('segmento')}, Produto={data.get('produto')}")
+    logger.info(f"🔍 Query de pesquisa: {data['query']}")
+    
+    # Executa análise GIGANTE ultra-detalhada
+    logger.info("🚀 Executando análise GIGANTE ultra-detalhada...")
+    try:
+        analysis_result = ultra_detailed_analysis_engine.generate_gigantic_analysis(
+            data,
+            session_id=session_id,
+            progress_callback=progress_callback
+        )
+    except JobCancelledError:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Análise GIGANTE falhou: {str(e)}")
+        # NÃO GERA FALLBACK - RETORNA ERRO EXPLÍCITO
+        raise AnalysisFailedError({
+            'error': 'Análise falhou por dados insuficientes',
+            'message': str(e),
+            'timestamp': datetime.now().isoformat(),
+            'recommendation': 'Configure todas as APIs necessárias e verifique conectividade',
+            'required_apis': [
+                'GEMINI_API_KEY ou OPENAI_API_KEY (obrigatório)',
+                'GOOGLE_SEARCH_KEY + GOOGLE_CSE_ID (recomendado)',
+                'JINA_API_KEY (recomendado)',
+                'SERPER_API_KEY (opcional)'
+            ],
+            'fallback_available': False
+        })
+    
+    # Verifica se a análise foi bem-sucedida
+    if not analysis_result or not isinstance(analysis_result, dict):
+        raise AnalysisFailedError({
+            'error': 'Análise retornou resultado inválido',
+            'message': 'Sistema não conseguiu gerar análise válida',
+            'timestamp': datetime.now().isoformat(),
+            'recommendation': 'Verifique configuração das APIs e tente novamente'
+        })
+    
+    # Marca progresso como completo
+    progress_tracker.complete()
+    
+    # Salva no banco de dados
+    try:
+        logger.info("💾 Salvando análise no banco de dados...")
+        db_record = db_manager.create_analysis({
+            'segmento': data.get('segmento'),
+            'produto': data.get('produto'),
+            'descricao': data.get('dados_adicionais'),
+            'preco': data.get('preco'),
+            'publico': data.get('publico'),
+            'concorrentes': data.get('concorrentes'),
+            'dados_adicionais': data.get('dados_adicionais'),
+            'objetivo_receita': data.get('objetivo_receita'),
+            'orcamento_marketing': data.get('orcamento_marketing'),
+            'prazo_lancamento': data.get('prazo_lancamento'),
+            'status': 'completed',
+            'avatar_data': analysis_result.get('avatar_ultra_detalhado'),
+            'positioning_data': analysis_result.get('escopo'),
+            'competition_data': analysis_result.get('analise_concorrencia_detalhada'),
+            'marketing_data': analysis_result.get('estrategia_palavras_chave'),
+            'metrics_data': analysis_result.get('metricas_performance_detalhadas'),
+            'funnel_data': analysis_result.get('funil_vendas_detalhado'),
+            'market_intelligence': analysis_result.get('pesquisa_web_massiva'),
+            'action_plan': analysis_result.get('plano_acao_detalhado'),
+            'comprehensive_analysis': analysis_result
+        })
+        
+        if db_record:
+            analysis_result['database_id'] = db_record['id']
+            logger.info(f"✅ Análise salva com ID: {db_record['id']}")
+        else:
+            logger.warning("⚠️ Falha ao salvar no banco, mas análise continua")
+            
+    except Exception as e:
+        logger.error(f"❌ Erro ao salvar no banco: {str(e)}")
+        # Não falha a análise por erro no banco
+        analysis_result['database_warning'] = f"Falha ao salvar no banco: {str(e)}"
+    
+    # Calcula tempo de processamento
+    end_time = time.time()
+    processing_time = end_time - start_time
+    
+    # Adiciona metadados finais
+    if 'metadata' not in analysis_result:
+        analysis_result['metadata'] = {}
+    
+    analysis_result['metadata'].update({
+        'processing_time_seconds': processing_time,
+        'processing_time_formatted': f"{int(processing_time // 60)}m {int(processing_time % 60)}s",
+        'request_timestamp': datetime.now().isoformat(),
+        'session_id': data.get('session_id'),
+        'input_data': {
+            'segmento': data.get('segmento'),
+            'produto': data.get('produto'),
+            'query': data.get('query')
+        }
+    })
+    
+    logger.info(f"✅ Análise concluída em {processing_time:.2f} segundos")
+    
+    return analysis_result
+
+def _execute_analysis_job(data: dict, job: JobContext) -> dict:
+    """Handler da fila: executa a análise em background reportando progresso"""
+    
+    session_id = data['session_id']
+    
+    def progress_callback(step: int, message: str, details: str = None):
+        job.check_cancelled()
+        job.heartbeat()
+        update_analysis_progress(session_id, step, message, details)
+    
+    try:
+        return _run_gigantic_analysis(data, progress_callback)
+    except JobCancelledError:
+        close_analysis_progress(session_id, "🚫 Análise cancelada")
+        raise
+    except AnalysisFailedError as e:
+        # O motor encapsula exceções: cancelamento vira falha genérica
+        try:
+            job.check_cancelled()
+        except JobCancelledError:
+            close_analysis_progress(session_id, "🚫 Análise cancelada")
+            raise
+        close_analysis_progress(session_id, "❌ Análise falhou", e.details.get('message'))
+        raise
+    except Exception as e:
+        close_analysis_progress(session_id, "❌ Análise falhou", str(e))
+        raise
+
+analysis_job_queue.register_handler(_execute_analysis_job)
+
 @analysis_bp.route('/analyze', methods=['POST'])
 def analyze_market():
     """Endpoint principal para análise de mercado"""
     
+    session_id = None
+    data = {}
+    
     try:
-        start_time = time.time()
         logger.info("🚀 Iniciando análise de mercado ultra-detalhada")
         
         # Coleta dados da requisição
@@ -49,127 +233,33 @@ def analyze_market():
                 'message': 'O campo "segmento" é obrigatório para análise'
             }), 400
         
-        # Adiciona session_id se não fornecido
-        if not data.get('session_id'):
-            data['session_id'] = f"session_{int(time.time())}_{os.urandom(4).hex()}"
-        
-        # Inicia rastreamento de progresso
+        data = _prepare_analysis_data(data)
         session_id = data['session_id']
-        progress_tracker = get_progress_tracker(session_id)
-        
-        # Função de callback para progresso
-        def progress_callback(step: int, message: str, details: str = None):
-            update_analysis_progress(session_id, step, message, details)
         
-        # Log dos dados recebidos
-        logger.info(f"📊 Dados recebidos: Segmento={data.get('segmento')}, Produto={data.get('produto')}")
-        
-        # Prepara query de pesquisa se não fornecida
-        if not data.get('query'):
-            segmento = data.get('segmento', '')
-            produto = data.get('produto', '')
-            if produto:
-                data['query'] = f"mercado {segmento} {produto} Brasil tendências oportunidades 2024"
-            else:
-                data['query'] = f"análise mercado {segmento} Brasil dados estatísticas crescimento"
-        
-        logger.info(f"🔍 Query de pesquisa: {data['query']}")
-        
-        # Executa análise GIGANTE ultra-detalhada
-        logger.info("🚀 Executando análise GIGANTE ultra-detalhada...")
-        try:
-            analysis_result = ultra_detailed_analysis_engine.generate_gigantic_analysis(
-                data,
-                session_id=session_id,
-                progress_callback=progress_callback
-            )
-        except Exception as e:
-            logger.error(f"❌ Análise GIGANTE falhou: {str(e)}")
-            # NÃO GERA FALLBACK - RETORNA ERRO EXPLÍCITO
-            return jsonify({
-                'error': 'Análise falhou por dados insuficientes',
-                'message': str(e),
-                'timestamp': datetime.now().isoformat(),
-                'recommendation': 'Configure todas as APIs necessárias e verifique conectividade',
-                'required_apis': [
-                    'GEMINI_API_KEY ou OPENAI_API_KEY (obrigatório)',
-                    'GOOGLE_SEARCH_KEY + GOOGLE_CSE_ID (recomendado)',
-                    'JINA_API_KEY (recomendado)',
-                    'SERPER_API_KEY (opcional)'
-                ],
-                'fallback_available': False
-            }), 500
+        # Inicia rastreamento de progresso
+        get_progress_tracker(session_id)
         
-        # Verifica se a análise foi bem-sucedida
-        if not analysis_result or not isinstance(analysis_result, dict):
+        # Modo assíncrono: enfileira e retorna imediatamente
+        sync = _parse_flag(data.pop('sync', None), default=False)
+        if JOB_QUEUE_ENABLED and not sync:
+            update_analysis_progress(session_id, 0, "⏳ Análise na fila de processamento...")
+            job = analysis_job_queue.enqueue(data, session_id)
+            
             return jsonify({
-                'error': 'Análise retornou resultado inválido',
-                'message': 'Sistema não conseguiu gerar análise válida',
-                'timestamp': datetime.now().isoformat(),
-                'recommendation': 'Verifique configuração das APIs e tente novamente'
-            }), 500
-        
-        # Marca progresso como completo
-        progress_tracker.complete()
+                'success': True,
+                'job_id': job['job_id'],
+                'session_id': session_id,
+                'status': job['status'],
+                'queue_position': job['queue_position'],
+                'status_url': f"/api/analyze/jobs/{job['job_id']}",
+                'cancel_url': f"/api/analyze/jobs/{job['job_id']}/cancel",
+                'timestamp': datetime.now().isoformat()
+            }), 202
         
-        # Salva no banco de dados
         try:
-            logger.info("💾 Salvando análise no banco de dados...")
-            db_record = db_manager.create_analysis({
-                'segmento': data.get('segmento'),
-                'produto': data.get('produto'),
-                'descricao': data.get('dados_adicionais'),
-                'preco': data.get('preco'),
-                'publico': data.get('publico'),
-                'concorrentes': data.get('concorrentes'),
-                'dados_adicionais': data.get('dados_adicionais'),
-                'objetivo_receita': data.get('objetivo_receita'),
-                'orcamento_marketing': data.get('orcamento_marketing'),
-                'prazo_lancamento': data.get('prazo_lancamento'),
-                'status': 'completed',
-                'avatar_data': analysis_result.get('avatar_ultra_detalhado'),
-                'positioning_data': analysis_result.get('escopo'),
-                'competition_data': analysis_result.get('analise_concorrencia_detalhada'),
-                'marketing_data': analysis_result.get('estrategia_palavras_chave'),
-                'metrics_data': analysis_result.get('metricas_performance_detalhadas'),
-                'funnel_data': analysis_result.get('funil_vendas_detalhado'),
-                'market_intelligence': analysis_result.get('pesquisa_web_massiva'),
-                'action_plan': analysis_result.get('plano_acao_detalhado'),
-                'comprehensive_analysis': analysis_result
-            })
-            
-            if db_record:
-                analysis_result['database_id'] = db_record['id']
-                logger.info(f"✅ Análise salva com ID: {db_record['id']}")
-            else:
-                logger.warning("⚠️ Falha ao salvar no banco, mas análise continua")
-                
-        except Exception as e:
-            logger.error(f"❌ Erro ao salvar no banco: {str(e)}")
-            # Não falha a análise por erro no banco
-            analysis_result['database_warning'] = f"Falha ao salvar no banco: {str(e)}"
-        
-        # Calcula tempo de processamento
-        end_time = time.time()
-        processing_time = end_time - start_time
-        
-        # Adiciona metadados finais
-        if 'metadata' not in analysis_result:
-            analysis_result['metadata'] = {}
-        
-        analysis_result['metadata'].update({
-            'processing_time_seconds': processing_time,
-            'processing_time_formatted': f"{int(processing_time // 60)}m {int(processing_time % 60)}s",
-            'request_timestamp': datetime.now().isoformat(),
-            'session_id': data.get('session_id'),
-            'input_data': {
-                'segmento': data.get('segmento'),
-                'produto': data.get('produto'),
-                'query': data.get('query')
-            }
-        })
-        
-        logger.info(f"✅ Análise concluída em {processing_time:.2f} segundos")
+            analysis_result = _run_gigantic_analysis(data)
+        except AnalysisFailedError as e:
+            return jsonify(e.details), 500
         
         return jsonify(analysis_result)
         
@@ -177,8 +267,10 @@ def analyze_market():
         logger.error(f"❌ Erro crítico na análise: {str(e)}", exc_info=True)
         
         # Remove progresso em caso de erro
-        if session_id in get_progress_tracker.__globals__.get('progress_sessions', {}):
-            del get_progress_tracker.__globals__['progress_sessions'][session_id]
+        try:
+            discard_progress(session_id)
+        except Exception as cleanup_error:
+            logger.warning(f"⚠️ Erro ao remover progresso: {cleanup_error}")
         
         return jsonify({
             'error': 'Erro na análise',
@@ -196,6 +288,67 @@ def analyze_market():
             }
         }), 500
 
+@analysis_bp.route('/analyze/jobs/<job_id>', methods=['GET'])
+def get_analysis_job(job_id):
+    """Retorna status (e resultado, quando concluído) de um job de análise"""
+    
+    try:
+        analysis_job_queue.start()
+        job = analysis_job_queue.get_job(job_id)
+        
+        if not job:
+            return jsonify({
+                'error': 'Job não encontrado',
+                'job_id': job_id
+            }), 404
+        
+        job['progress'] = get_progress_status(job['session_id'])
+        
+        return jsonify({
+            'success': True,
+            'job': job,
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        logger.error(f"Erro ao obter job {job_id}: {str(e)}")
+        return jsonify({
+            'error': 'Erro ao obter job',
+            'message': str(e)
+        }), 500
+
+@analysis_bp.route('/analyze/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_analysis_job(job_id):
+    """Cancela um job de análise na fila ou em execução"""
+    
+    try:
+        status = analysis_job_queue.cancel(job_id)
+        
+        if status is None:
+            return jsonify({
+                'error': 'Job não encontrado',
+                'job_id': job_id
+            }), 404
+        
+        # Cancelado ainda na fila: nenhum worker vai encerrar o progresso
+        if status == 'cancelled':
+            job = analysis_job_queue.get_job(job_id, include_result=False)
+            close_analysis_progress(job['session_id'], "🚫 Análise cancelada")
+        
+        return jsonify({
+            'success': status in ('cancelled', 'cancelling'),
+            'job_id': job_id,
+            'status': status,
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        logger.error(f"Erro ao cancelar job {job_id}: {str(e)}")
+        return jsonify({
+            'error': 'Erro ao cancelar job',
+            'message': str(e)
+        }), 500
+
 @analysis_bp.route('/status', methods=['GET'])
 def get_analysis_status():
     """Retorna status dos sistemas de análise"""
@@ -212,7 +365,7 @@ def get_analysis_status():
         
         # Status geral
         total_ai_available = len([p for p in ai_status.values() if p['available']])
-        total_search_available = len([p for p in search_status.values() if p['available']])
+        total_search_available = len([p for p in search_status.values() if p['enabled']])
         
         overall_status = "healthy" if (total_ai_available > 0 and total_search_available > 0 and db_status) else "degraded"
         
@@ -329,9 +482,43 @@ def test_extraction():
     """Testa sistema de extração de conteúdo"""
     
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
+        test_urls = data.get('urls')
+
+        if test_urls is not None:
+            if not isinstance(test_urls, list) or not all(isinstance(url, str) and url.strip() for url in test_urls):
+                return jsonify({
+                    'error': 'URLs inválidas',
+                    'message': 'O campo "urls" deve ser uma lista de URLs (texto)'
+                }), 400
+            if len(test_urls) > TEST_EXTRACTION_MAX_URLS:
+                return jsonify({
+                    'error': 'URLs demais',
+                    'message': f'Envie no máximo {TEST_EXTRACTION_MAX_URLS} URLs por teste'
+                }), 400
+
+        # Várias URLs: extrai em lote, em paralelo
+        if test_urls:
+            logger.info(f"🧪 Testando extração em lote: {len(test_urls)} URLs")
+
+            results = []
+            for result in robust_content_extractor.iter_extract(test_urls, max_workers=min(len(test_urls), 10)):
+                content = result.pop('content')
+                if content:
+                    result['content_preview'] = content[:500] + '...' if len(content) > 500 else content
+                    result['validation'] = content_quality_validator.validate_content(content, result['url'])
+                results.append(result)
+
+            return jsonify({
+                'success': any(result['success'] for result in results),
+                'results': results,
+                'successful_count': sum(1 for result in results if result['success']),
+                'extractor_stats': robust_content_extractor.get_extractor_stats(),
+                'timestamp': datetime.now().isoformat()
+            })
+
         test_url = data.get('url', 'https://g1.globo.com/tecnologia/')
-        
+
         logger.info(f"🧪 Testando extração: {test_url}")
         
         # Testa extração
@@ -463,11 +650,12 @@ def test_ai():
     try:
         data = request.get_json()
         prompt = data.get('prompt', 'Gere um breve resumo sobre o mercado digital brasileiro em 2024.')
+        use_cache = _parse_flag(data.get('use_cache'), default=True)
         
         logger.info("🧪 Testando sistema de IA...")
         
-        # Testa IA
-        response = ai_manager.generate_analysis(prompt, max_tokens=500)
+        # Testa IA (use_cache=false força chamada real ao provedor)
+        response = ai_manager.generate_analysis(prompt, max_tokens=500, use_cache=use_cache)
         
         return jsonify({
             'success': bool(response),
@@ -583,9 +771,13 @@ def get_stats():
             'database_stats': db_stats,
             'ai_providers': ai_status,
             'search_providers': search_status,
+            'search_cache': production_search_manager.get_cache_stats(),
+            'ai_cache': ai_manager.get_cache_stats(),
+            'ai_clients': ai_manager.get_client_stats(),
+            'ai_router': ai_manager.get_router_stats(),
             'system_health': {
                 'ai_available': len([p for p in ai_status.values() if p['available']]),
-                'search_available': len([p for p in search_status.values() if p['available']]),
+                'search_available': len([p for p in search_status.values() if p['enabled']]),
                 'database_connected': db_manager.test_connection()
             },
             'timestamp': datetime.now().isoformat()
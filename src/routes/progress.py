@@ -6,66 +6,94 @@ Endpoints para progresso em tempo real da análise
 """
 
 import os
+import uuid
 import logging
 import time
 import json
 from datetime import datetime
-from flask import Blueprint, request, jsonify, session
-from flask_socketio import SocketIO, emit, join_room, leave_room
-import threading
-from queue import Queue
+from typing import Optional
+from flask import Blueprint, Response, request, jsonify, session, stream_with_context
+from services.progress_store import progress_store
 
 logger = logging.getLogger(__name__)
 
+# Server-Sent Events: cada stream ocupa uma thread do worker por até
+# PROGRESS_SSE_MAX_SECONDS e o navegador reconecta. Só é servido em servidores
+# com threads (gthread/gevent, ou o servidor de desenvolvimento); em workers
+# sync um stream prenderia o processo inteiro, então o cliente volta ao polling
+SSE_ENABLED = os.getenv('PROGRESS_SSE_ENABLED', 'true').lower() == 'true'
+SSE_MAX_SECONDS = float(os.getenv('PROGRESS_SSE_MAX_SECONDS', 45))
+SSE_KEEPALIVE_SECONDS = float(os.getenv('PROGRESS_SSE_KEEPALIVE_SECONDS', 15))
+SSE_RETRY_MS = int(os.getenv('PROGRESS_SSE_RETRY_MS', 1000))
+
 # Cria blueprint
 progress_bp = Blueprint('progress', __name__)
 
-# Sistema de progresso global
-progress_sessions = {}
-progress_queues = {}
-
 class ProgressTracker:
-    """Rastreador de progresso em tempo real"""
-    
-    def __init__(self, session_id: str):
+    """Rastreador de progresso em tempo real (estado no progress_store compartilhado)"""
+
+    total_steps = 13
+    steps = [
+        "🔍 Coletando dados do formulário",
+        "📊 Processando anexos inteligentes",
+        "🌐 Realizando pesquisa profunda massiva",
+        "🧠 Analisando com múltiplas IAs",
+        "👤 Criando avatar arqueológico completo",
+        "🧠 Gerando drivers mentais customizados",
+        "🎭 Desenvolvendo provas visuais instantâneas",
+        "🛡️ Construindo sistema anti-objeção",
+        "🎯 Arquitetando pré-pitch invisível",
+        "⚔️ Mapeando concorrência profunda",
+        "📈 Calculando métricas e projeções",
+        "🔮 Predizendo futuro do mercado",
+        "✨ Consolidando insights exclusivos"
+    ]
+
+    def __init__(self, session_id: str, state: Optional[dict] = None):
         self.session_id = session_id
-        self.current_step = 0
-        self.total_steps = 13
-        self.start_time = time.time()
-        self.steps = [
-            "🔍 Coletando dados do formulário",
-            "📊 Processando anexos inteligentes", 
-            "🌐 Realizando pesquisa profunda massiva",
-            "🧠 Analisando com múltiplas IAs",
-            "👤 Criando avatar arqueológico completo",
-            "🧠 Gerando drivers mentais customizados",
-            "🎭 Desenvolvendo provas visuais instantâneas",
-            "🛡️ Construindo sistema anti-objeção",
-            "🎯 Arquitetando pré-pitch invisível",
-            "⚔️ Mapeando concorrência profunda",
-            "📈 Calculando métricas e projeções",
-            "🔮 Predizendo futuro do mercado",
-            "✨ Consolidando insights exclusivos"
-        ]
-        self.detailed_logs = []
-        
-        # Registra sessão global
-        progress_sessions[session_id] = self
-        progress_queues[session_id] = Queue()
-    
-    def update_progress(self, step: int, message: str, details: str = None):
+
+        # Sem estado existente, registra nova sessão no store
+        if state is None:
+            state = progress_store.create_session(session_id, {
+                "current_step": 0,
+                "total_steps": self.total_steps,
+                "start_time": time.time(),
+                "is_complete": False
+            })
+        self._state = state
+
+    @classmethod
+    def load(cls, session_id: str) -> Optional['ProgressTracker']:
+        """Carrega tracker de uma sessão existente (criada em qualquer worker)"""
+        state = progress_store.get_state(session_id)
+        if state is None:
+            return None
+        return cls(session_id, state)
+
+    @property
+    def start_time(self) -> float:
+        return self._state.get('start_time', time.time())
+
+    @property
+    def current_step(self) -> int:
+        return self._state.get('current_step', 0)
+
+    @property
+    def detailed_logs(self) -> list:
+        return [_event_to_log(event) for event in progress_store.get_events(self.session_id)]
+
+    def update_progress(self, step: int, message: str, details: str = None, is_complete: bool = False):
         """Atualiza progresso da análise"""
-        self.current_step = step
         current_time = time.time()
         elapsed = current_time - self.start_time
-        
+
         # Calcula tempo estimado
         if step > 0:
             estimated_total = (elapsed / step) * self.total_steps
             remaining = max(0, estimated_total - elapsed)
         else:
             remaining = 0
-        
+
         progress_data = {
             "session_id": self.session_id,
             "current_step": step,
@@ -73,57 +101,41 @@ class ProgressTracker:
             "percentage": (step / self.total_steps) * 100,
             "current_message": message,
             "detailed_message": details or message,
+            "details": details,
             "elapsed_time": elapsed,
             "estimated_remaining": remaining,
             "estimated_total": elapsed + remaining,
             "timestamp": datetime.now().isoformat()
         }
-        
-        # Log detalhado
-        log_entry = {
-            "step": step,
-            "message": message,
-            "details": details,
-            "timestamp": datetime.now().isoformat(),
-            "elapsed": elapsed
-        }
-        self.detailed_logs.append(log_entry)
-        
-        # Adiciona à queue para polling
-        if self.session_id in progress_queues:
-            try:
-                progress_queues[self.session_id].put(progress_data)
-            except:
-                pass
-        
+
+        # Evento numerado no store (lido por polling com cursor ou via SSE)
+        state_updates = {"current_step": step, "is_complete": is_complete}
+        seq = progress_store.append_event(self.session_id, progress_data, state_updates)
+        if seq is not None:
+            progress_data["seq"] = seq
+            self._state.update(state_updates, last_seq=seq)
+
         logger.info(f"Progress {self.session_id}: Step {step}/{self.total_steps} - {message}")
-        
+
         return progress_data
-    
+
     def complete(self):
-        """Marca análise como completa"""
-        self.update_progress(self.total_steps, "🎉 Análise concluída! Preparando resultados...")
-        
-        # Remove da sessão após 5 minutos
-        def cleanup():
-            time.sleep(300)  # 5 minutos
-            if self.session_id in progress_sessions:
-                del progress_sessions[self.session_id]
-            if self.session_id in progress_queues:
-                del progress_queues[self.session_id]
-        
-        threading.Thread(target=cleanup, daemon=True).start()
-    
+        """Marca análise como completa (sessão expira após PROGRESS_COMPLETED_TTL)"""
+        self.update_progress(self.total_steps, "🎉 Análise concluída! Preparando resultados...", is_complete=True)
+
     def get_current_status(self):
         """Retorna status atual"""
         elapsed = time.time() - self.start_time
-        
+
         if self.current_step > 0:
             estimated_total = (elapsed / self.current_step) * self.total_steps
             remaining = max(0, estimated_total - elapsed)
         else:
             remaining = 0
-        
+
+        last_seq = self._state.get('last_seq', 0)
+        recent_events = progress_store.get_events(self.session_id, since=max(0, last_seq - 5))
+
         return {
             "session_id": self.session_id,
             "current_step": self.current_step,
@@ -132,33 +144,62 @@ class ProgressTracker:
             "current_message": self.steps[min(self.current_step, len(self.steps) - 1)],
             "elapsed_time": elapsed,
             "estimated_remaining": remaining,
-            "detailed_logs": self.detailed_logs[-5:],  # Últimos 5 logs
+            "detailed_logs": [_event_to_log(event) for event in recent_events],  # Últimos 5 logs
+            "last_seq": last_seq,
             "is_complete": self.current_step >= self.total_steps
         }
 
+def _event_to_log(event: dict) -> dict:
+    """Converte evento de progresso em entrada de log detalhado"""
+    return {
+        "seq": event.get("seq"),
+        "step": event.get("current_step"),
+        "message": event.get("current_message"),
+        "details": event.get("details"),
+        "timestamp": event.get("timestamp"),
+        "elapsed": event.get("elapsed_time")
+    }
+
+def _format_sse(event: str, data: dict, event_id: Optional[int] = None) -> str:
+    """Formata uma mensagem Server-Sent Events"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+def _parse_cursor(value) -> int:
+    """Converte cursor since/Last-Event-ID em inteiro"""
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return 0
+
 @progress_bp.route('/start_tracking', methods=['POST'])
+@progress_bp.route('/progress/start_tracking', methods=['POST'])
 def start_tracking():
     """Inicia rastreamento de progresso"""
     try:
-        data = request.get_json()
-        session_id = data.get('session_id')
-        
+        data = request.get_json() or {}
+        session_id = data.get('session_id') or session.get('session_id')
+
+        # Gera ID de sessão se não existir
         if not session_id:
-            return jsonify({
-                'error': 'Session ID obrigatório'
-            }), 400
-        
+            session_id = str(uuid.uuid4())
+            session['session_id'] = session_id
+
         # Cria novo tracker
         tracker = ProgressTracker(session_id)
         tracker.update_progress(0, "🚀 Iniciando análise ultra-detalhada...")
-        
+
         return jsonify({
             'success': True,
             'session_id': session_id,
             'message': 'Rastreamento iniciado',
             'status': tracker.get_current_status()
         })
-        
+
     except Exception as e:
         logger.error(f"Erro ao iniciar rastreamento: {str(e)}")
         return jsonify({
@@ -167,23 +208,24 @@ def start_tracking():
         }), 500
 
 @progress_bp.route('/get_progress/<session_id>', methods=['GET'])
+@progress_bp.route('/progress/status/<session_id>', methods=['GET'])
 def get_progress(session_id):
     """Obtém progresso atual da análise"""
     try:
-        if session_id not in progress_sessions:
+        tracker = ProgressTracker.load(session_id)
+        if tracker is None:
             return jsonify({
                 'error': 'Sessão não encontrada',
                 'session_id': session_id
             }), 404
-        
-        tracker = progress_sessions[session_id]
+
         status = tracker.get_current_status()
-        
+
         return jsonify({
             'success': True,
             'progress': status
         })
-        
+
     except Exception as e:
         logger.error(f"Erro ao obter progresso: {str(e)}")
         return jsonify({
@@ -193,30 +235,23 @@ def get_progress(session_id):
 
 @progress_bp.route('/poll_updates/<session_id>', methods=['GET'])
 def poll_updates(session_id):
-    """Polling para atualizações de progresso"""
+    """Polling para atualizações de progresso (cursor ?since=<last_seq>)"""
     try:
-        if session_id not in progress_queues:
+        if progress_store.get_state(session_id) is None:
             return jsonify({
                 'error': 'Sessão não encontrada'
             }), 404
-        
-        queue = progress_queues[session_id]
-        updates = []
-        
-        # Coleta todas as atualizações disponíveis
-        while not queue.empty():
-            try:
-                update = queue.get_nowait()
-                updates.append(update)
-            except:
-                break
-        
+
+        since = _parse_cursor(request.args.get('since'))
+        updates = progress_store.get_events(session_id, since=since)
+
         return jsonify({
             'success': True,
             'updates': updates,
-            'has_updates': len(updates) > 0
+            'has_updates': len(updates) > 0,
+            'last_seq': updates[-1]['seq'] if updates else since
         })
-        
+
     except Exception as e:
         logger.error(f"Erro no polling: {str(e)}")
         return jsonify({
@@ -224,29 +259,84 @@ def poll_updates(session_id):
             'message': str(e)
         }), 500
 
+def _sse_supported() -> bool:
+    """SSE habilitado e o worker atende requisições em threads (wsgi.multithread)"""
+    return SSE_ENABLED and bool(request.environ.get('wsgi.multithread'))
+
+@progress_bp.route('/progress/stream/<session_id>', methods=['GET'])
+def stream_progress(session_id):
+    """Stream Server-Sent Events com os eventos update_progress da sessão"""
+    if not _sse_supported():
+        return jsonify({
+            'error': 'Streaming desabilitado',
+            'message': 'Use /api/poll_updates/<session_id>'
+        }), 404
+
+    if progress_store.get_state(session_id) is None:
+        return jsonify({
+            'error': 'Sessão não encontrada',
+            'session_id': session_id
+        }), 404
+
+    # EventSource reenvia o último id recebido ao reconectar
+    since = _parse_cursor(request.headers.get('Last-Event-ID') or request.args.get('since'))
+
+    def generate():
+        cursor = since
+        deadline = time.time() + SSE_MAX_SECONDS
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return
+
+            events = progress_store.wait_for_events(session_id, cursor, min(SSE_KEEPALIVE_SECONDS, remaining))
+            for event in events:
+                cursor = event['seq']
+                yield _format_sse('update_progress', event, cursor)
+
+            state = progress_store.get_state(session_id)
+            if state is None or (state.get('is_complete') and cursor >= state.get('last_seq', 0)):
+                yield _format_sse('complete', {'session_id': session_id, 'last_seq': cursor})
+                return
+
+            if not events:
+                yield ": keepalive\n\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
 @progress_bp.route('/update_progress', methods=['POST'])
+@progress_bp.route('/progress/update', methods=['POST'])
 def update_progress():
     """Atualiza progresso (usado internamente)"""
     try:
-        data = request.get_json()
-        session_id = data.get('session_id')
+        data = request.get_json() or {}
+        session_id = data.get('session_id') or session.get('session_id')
         step = data.get('step')
         message = data.get('message')
         details = data.get('details')
-        
-        if session_id not in progress_sessions:
+
+        tracker = ProgressTracker.load(session_id) if session_id else None
+        if tracker is None:
             return jsonify({
                 'error': 'Sessão não encontrada'
             }), 404
-        
-        tracker = progress_sessions[session_id]
+
         progress_data = tracker.update_progress(step, message, details)
-        
+
         return jsonify({
             'success': True,
             'progress': progress_data
         })
-        
+
     except Exception as e:
         logger.error(f"Erro ao atualizar progresso: {str(e)}")
         return jsonify({
@@ -255,26 +345,27 @@ def update_progress():
         }), 500
 
 @progress_bp.route('/complete_analysis', methods=['POST'])
+@progress_bp.route('/progress/complete', methods=['POST'])
 def complete_analysis():
     """Marca análise como completa"""
     try:
-        data = request.get_json()
-        session_id = data.get('session_id')
-        
-        if session_id not in progress_sessions:
+        data = request.get_json() or {}
+        session_id = data.get('session_id') or session.get('session_id')
+
+        tracker = ProgressTracker.load(session_id) if session_id else None
+        if tracker is None:
             return jsonify({
                 'error': 'Sessão não encontrada'
             }), 404
-        
-        tracker = progress_sessions[session_id]
+
         tracker.complete()
-        
+
         return jsonify({
             'success': True,
             'message': 'Análise marcada como completa',
             'final_status': tracker.get_current_status()
         })
-        
+
     except Exception as e:
         logger.error(f"Erro ao completar análise: {str(e)}")
         return jsonify({
@@ -286,21 +377,22 @@ def complete_analysis():
 def get_detailed_logs(session_id):
     """Obtém logs detalhados da análise"""
     try:
-        if session_id not in progress_sessions:
+        tracker = ProgressTracker.load(session_id)
+        if tracker is None:
             return jsonify({
                 'error': 'Sessão não encontrada'
             }), 404
-        
-        tracker = progress_sessions[session_id]
-        
+
+        logs = tracker.detailed_logs
+
         return jsonify({
             'success': True,
             'session_id': session_id,
-            'logs': tracker.detailed_logs,
-            'total_logs': len(tracker.detailed_logs),
+            'logs': logs,
+            'total_logs': len(logs),
             'analysis_duration': time.time() - tracker.start_time
         })
-        
+
     except Exception as e:
         logger.error(f"Erro ao obter logs: {str(e)}")
         return jsonify({
@@ -314,23 +406,26 @@ def get_active_sessions():
     try:
         active = []
         current_time = time.time()
-        
-        for session_id, tracker in progress_sessions.items():
+
+        for state in progress_store.list_sessions():
+            current_step = state.get('current_step', 0)
+            total_steps = state.get('total_steps', ProgressTracker.total_steps)
             active.append({
-                'session_id': session_id,
-                'current_step': tracker.current_step,
-                'total_steps': tracker.total_steps,
-                'elapsed_time': current_time - tracker.start_time,
-                'is_complete': tracker.current_step >= tracker.total_steps,
-                'last_message': tracker.steps[min(tracker.current_step, len(tracker.steps) - 1)]
+                'session_id': state.get('session_id'),
+                'current_step': current_step,
+                'total_steps': total_steps,
+                'elapsed_time': current_time - state.get('start_time', current_time),
+                'is_complete': current_step >= total_steps,
+                'last_message': ProgressTracker.steps[min(current_step, len(ProgressTracker.steps) - 1)]
             })
-        
+
         return jsonify({
             'success': True,
             'active_sessions': active,
-            'total_active': len(active)
+            'total_active': len(active),
+            'backend': progress_store.name
         })
-        
+
     except Exception as e:
         logger.error(f"Erro ao listar sessões: {str(e)}")
         return jsonify({
@@ -341,169 +436,33 @@ def get_active_sessions():
 # Função helper para usar em outros módulos
 def get_progress_tracker(session_id: str) -> ProgressTracker:
     """Obtém tracker de progresso para uma sessão"""
-    if session_id not in progress_sessions:
+    tracker = ProgressTracker.load(session_id)
+    if tracker is None:
         return ProgressTracker(session_id)
-    return progress_sessions[session_id]
+    return tracker
 
 def update_analysis_progress(session_id: str, step: int, message: str, details: str = None):
     """Função helper para atualizar progresso de qualquer lugar"""
-    if session_id in progress_sessions:
-        tracker = progress_sessions[session_id]
+    tracker = ProgressTracker.load(session_id)
+    if tracker is not None:
         return tracker.update_progress(step, message, details)
     return None
-#!/usr/bin/env python3
-# -*- coding: utf-8 -*-
-"""
-ARQV30 Enhanced v2.0 - Rotas de Progresso
-Tracking de progresso das análises
-"""
-
-import logging
-from flask import Blueprint, request, jsonify, session
-from datetime import datetime
-import uuid
-
-logger = logging.getLogger(__name__)
-
-progress_bp = Blueprint('progress', __name__)
-
-# Armazenamento em memória para progresso (em produção usaria Redis/Database)
-progress_data = {}
-
-@progress_bp.route('/progress/start_tracking', methods=['POST'])
-def start_tracking():
-    """Inicia tracking de progresso"""
-    try:
-        data = request.get_json() or {}
-        
-        # Gerar ID de sessão se não existir
-        session_id = session.get('session_id')
-        if not session_id:
-            session_id = str(uuid.uuid4())
-            session['session_id'] = session_id
-        
-        # Inicializar progresso
-        progress_data[session_id] = {
-            'status': 'iniciado',
-            'progress': 0,
-            'message': 'Preparando análise...',
-            'started_at': datetime.now().isoformat(),
-            'steps': [
-                {'name': 'Validação de dados', 'status': 'pending'},
-                {'name': 'Análise de mercado', 'status': 'pending'},
-                {'name': 'Geração de insights', 'status': 'pending'},
-                {'name': 'Criação de estratégias', 'status': 'pending'},
-                {'name': 'Finalização', 'status': 'pending'}
-            ]
-        }
-        
-        logger.info(f"Tracking iniciado para sessão: {session_id}")
-        
-        return jsonify({
-            'success': True,
-            'session_id': session_id,
-            'message': 'Tracking iniciado'
-        })
-        
-    except Exception as e:
-        logger.error(f"Erro ao iniciar tracking: {str(e)}")
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
 
-@progress_bp.route('/progress/update', methods=['POST'])
-def update_progress():
-    """Atualiza progresso"""
-    try:
-        data = request.get_json()
-        session_id = data.get('session_id') or session.get('session_id')
-        
-        if not session_id or session_id not in progress_data:
-            return jsonify({
-                'success': False,
-                'error': 'Sessão não encontrada'
-            }), 404
-        
-        # Atualizar progresso
-        progress_data[session_id].update({
-            'progress': data.get('progress', 0),
-            'message': data.get('message', ''),
-            'updated_at': datetime.now().isoformat()
-        })
-        
-        # Atualizar step se fornecido
-        step_index = data.get('step_index')
-        if step_index is not None and 0 <= step_index < len(progress_data[session_id]['steps']):
-            progress_data[session_id]['steps'][step_index]['status'] = data.get('step_status', 'completed')
-        
-        return jsonify({
-            'success': True,
-            'message': 'Progresso atualizado'
-        })
-        
-    except Exception as e:
-        logger.error(f"Erro ao atualizar progresso: {str(e)}")
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
+def get_progress_status(session_id: str):
+    """Retorna status atual da sessão, se houver rastreamento ativo"""
+    tracker = ProgressTracker.load(session_id)
+    if tracker is not None:
+        return tracker.get_current_status()
+    return None
 
-@progress_bp.route('/progress/status/<session_id>', methods=['GET'])
-def get_progress(session_id):
-    """Obtém status do progresso"""
-    try:
-        if session_id not in progress_data:
-            return jsonify({
-                'success': False,
-                'error': 'Sessão não encontrada'
-            }), 404
-        
-        return jsonify({
-            'success': True,
-            'data': progress_data[session_id]
-        })
-        
-    except Exception as e:
-        logger.error(f"Erro ao obter progresso: {str(e)}")
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
+def close_analysis_progress(session_id: str, message: str, details: str = None):
+    """Encerra o progresso de uma análise que falhou ou foi cancelada (streams SSE recebem 'complete')"""
+    tracker = ProgressTracker.load(session_id) if session_id else None
+    if tracker is not None:
+        return tracker.update_progress(tracker.current_step, message, details, is_complete=True)
+    return None
 
-@progress_bp.route('/progress/complete', methods=['POST'])
-def complete_progress():
-    """Completa progresso"""
-    try:
-        data = request.get_json()
-        session_id = data.get('session_id') or session.get('session_id')
-        
-        if not session_id or session_id not in progress_data:
-            return jsonify({
-                'success': False,
-                'error': 'Sessão não encontrada'
-            }), 404
-        
-        # Completar progresso
-        progress_data[session_id].update({
-            'status': 'concluido',
-            'progress': 100,
-            'message': 'Análise concluída com sucesso!',
-            'completed_at': datetime.now().isoformat()
-        })
-        
-        # Marcar todos os steps como concluídos
-        for step in progress_data[session_id]['steps']:
-            step['status'] = 'completed'
-        
-        return jsonify({
-            'success': True,
-            'message': 'Progresso concluído'
-        })
-        
-    except Exception as e:
-        logger.error(f"Erro ao completar progresso: {str(e)}")
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
+def discard_progress(session_id: str):
+    """Remove o rastreamento de progresso de uma sessão"""
+    if session_id:
+        progress_store.delete_session(session_id)
@@ -56,6 +56,8 @@ from routes.user import user_bp
 from routes.progress import progress_bp
 from services.production_search_manager import production_search_manager
 from services.production_content_extractor import production_content_extractor
+from services.content_cache import content_cache
+from services.analysis_job_queue import analysis_job_queue
 
 def create_app():
     """Cria e configura a aplicação Flask"""
@@ -273,7 +275,7 @@ def cleanup_on_exit():
     logger.info("🧹 Executando limpeza final...")
     try:
         production_search_manager.cache.cleanup_expired()
-        production_content_extractor.clear_cache()
+        content_cache.cleanup_expired()
     except Exception as e:
         logger.error(f"Erro na limpeza final: {e}")
 def main():
@@ -285,6 +287,9 @@ def main():
 
         app = create_app()
 
+        # Workers de análise em background
+        analysis_job_queue.start()
+
         # Configurações do servidor
         host = os.getenv('HOST', '0.0.0.0')
         port = int(os.getenv('PORT', 5000))
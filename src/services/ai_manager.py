@@ -9,11 +9,13 @@ import os
 import logging
 import time
 import json
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Iterator
 from datetime import datetime
-import google.generativeai as genai
-import openai
-import requests
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from services.ai_response_cache import ai_response_cache
+from services.provider_clients import provider_clients
+from services.provider_router import ProviderRouter
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
 
 logger = logging.getLogger(__name__)
 
@@ -24,7 +26,7 @@ class AIManager:
         """Inicializa o gerenciador de IAs"""
         self.providers = {
             'gemini': {
-                'client': None,
+                'api_key': None,
                 'available': False,
                 'priority': 1,
                 'rate_limit_reset': None,
@@ -32,7 +34,7 @@ class AIManager:
                 'model': 'gemini-1.5-flash'  # Modelo mais eficiente
             },
             'openai': {
-                'client': None,
+                'api_key': None,
                 'available': False,
                 'priority': 2,
                 'rate_limit_reset': None,
@@ -56,6 +58,12 @@ class AIManager:
             }
         }
 
+        # Roteamento por latência/erros/quota e requisição paralela (hedge) opcional
+        self.router = ProviderRouter('ai')
+        self.breaker = CircuitBreaker('ai')
+        self.hedge_enabled = os.getenv('AI_HEDGE_ENABLED', 'false').lower() == 'true'
+        self.hedge_default_delay = float(os.getenv('AI_HEDGE_DEFAULT_DELAY', 0))
+
         self.initialize_providers()
         logger.info(f"AI Manager inicializado com {len([p for p in self.providers.values() if p['available']])} provedores disponíveis")
 
@@ -66,8 +74,7 @@ class AIManager:
         try:
             gemini_key = os.getenv('GEMINI_API_KEY')
             if gemini_key:
-                genai.configure(api_key=gemini_key)
-                self.providers['gemini']['client'] = genai.GenerativeModel("gemini-1.5-flash")
+                self.providers['gemini']['api_key'] = gemini_key
                 self.providers['gemini']['available'] = True
                 logger.info("✅ Gemini Flash inicializado com sucesso")
         except Exception as e:
@@ -77,8 +84,7 @@ class AIManager:
         try:
             openai_key = os.getenv('OPENAI_API_KEY')
             if openai_key:
-                openai.api_key = openai_key
-                self.providers["openai"]["client"] = openai.OpenAI(api_key=openai_key)
+                self.providers["openai"]["api_key"] = openai_key
                 self.providers["openai"]["available"] = True
                 logger.info("✅ OpenAI inicializado com sucesso")
         except Exception as e:
@@ -99,75 +105,185 @@ class AIManager:
 
     def get_best_provider(self) -> Optional[str]:
         """Retorna o melhor provedor disponível"""
-        available_providers = [
-            (name, provider) for name, provider in self.providers.items() 
-            if provider['available'] and provider['error_count'] < 5
-        ]
+        ranked = self.rank_providers()
+        return ranked[0] if ranked else None
 
-        if not available_providers:
-            # Reset error counts se todos falharam
-            for provider in self.providers.values():
-                provider['error_count'] = 0
-            available_providers = [
-                (name, provider) for name, provider in self.providers.items() 
-                if provider['available']
-            ]
+    def rank_providers(self, exclude: List[str] = None) -> List[str]:
+        """Provedores roteáveis, do menor para o maior custo esperado
 
-        if available_providers:
-            # Ordena por prioridade e menor número de erros
-            available_providers.sort(key=lambda x: (x[1]['priority'], x[1]['error_count']))
-            return available_providers[0][0]
+        Ignora provedores com circuito aberto, com rate_limit_reset no futuro
+        ou sem quota diária.
+        """
+        exclude = exclude or []
+        candidates = {
+            name: provider for name, provider in self.providers.items()
+            if provider['available'] and name not in exclude and self.breaker.is_available(name)
+        }
 
-        return None
+        ranked = self.router.rank(candidates)
+        skipped = [name for name in candidates if name not in ranked]
+        if skipped:
+            logger.info(f"⏳ Provedores fora da rota (rate limit/quota): {', '.join(skipped)}")
+        return ranked
 
-    def generate_analysis(self, prompt: str, max_tokens: int = 8192) -> Optional[str]:
-        """Gera análise usando o melhor provedor disponível"""
+    def generate_analysis(self, prompt: str, max_tokens: int = 8192, use_cache: bool = True) -> Optional[str]:
+        """Gera análise usando o melhor provedor disponível
 
-        provider_name = self.get_best_provider()
-        if not provider_name:
+        Com ``use_cache`` (padrão), uma chamada idêntica (provedor, modelo,
+        configuração e prompt normalizado) é servida do cache de respostas.
+        """
+
+        ranked = self.rank_providers()
+        if not ranked:
             logger.error("❌ Nenhum provedor de IA disponível")
-            raise Exception("NENHUM PROVEDOR DE IA DISPONÍVEL: Configure pelo menos uma API de IA")
+            raise Exception("NENHUM PROVEDOR DE IA DISPONÍVEL: Configure pelo menos uma API de IA ou aguarde a recuperação dos circuitos")
 
+        provider_name = ranked[0]
         logger.info(f"🤖 Usando provedor: {provider_name}")
+        tried = [provider_name]
 
         try:
-            if provider_name == 'gemini':
-                return self._generate_with_gemini(prompt, max_tokens)
-            elif provider_name == 'openai':
-                return self._generate_with_openai(prompt, max_tokens)
-            elif provider_name == 'huggingface':
-                return self._generate_with_huggingface(prompt, max_tokens)
+            if self.hedge_enabled and len(ranked) > 1:
+                return self._hedged_call(provider_name, ranked[1], prompt, max_tokens, use_cache, tried)
+            return self._call_provider(provider_name, prompt, max_tokens, use_cache)
         except Exception as e:
             logger.error(f"❌ Erro no provedor {provider_name}: {str(e)}")
             self.providers[provider_name]['error_count'] += 1
 
             # Tenta próximo provedor
-            fallback_result = self._try_fallback(prompt, max_tokens, exclude=[provider_name])
+            fallback_result = self._try_fallback(prompt, max_tokens, exclude=tried, use_cache=use_cache)
             if not fallback_result:
                 raise Exception(f"TODOS OS PROVEDORES DE IA FALHARAM: Último erro - {str(e)}")
             return fallback_result
 
-        raise Exception("ERRO INESPERADO: Nenhum provedor processou a requisição")
+    def _cache_descriptor(self, provider_name: str, max_tokens: int) -> Tuple[Optional[str], Dict[str, Any]]:
+        """Modelo e configuração de geração que compõem a chave do cache"""
+        if provider_name == 'gemini':
+            generation_config, safety_settings = self._gemini_request_options(max_tokens)
+            return self.providers['gemini']['model'], {'generation': generation_config, 'safety': safety_settings}
+        if provider_name == 'openai':
+            params = self._openai_request_params('', max_tokens)
+            return params.pop('model'), params
+        hf_config = self.providers['huggingface']
+        return ','.join(hf_config['models']), {'max_new_tokens': max_tokens, 'temperature': 0.9, 'top_p': 0.95}
+
+    def _call_provider(self, provider_name: str, prompt: str, max_tokens: int, use_cache: bool = True) -> Optional[str]:
+        """Chama o provedor, servindo e gravando no cache de respostas"""
+        if use_cache:
+            model, config = self._cache_descriptor(provider_name, max_tokens)
+            cached = ai_response_cache.get(provider_name, model, config, prompt)
+            if cached is not None:
+                logger.info(f"💾 Resposta de {provider_name} servida do cache ({len(cached)} caracteres)")
+                return cached
+
+        self.breaker.check(provider_name)
+        start = time.time()
+        try:
+            if provider_name == 'gemini':
+                response = self._generate_with_gemini(prompt, max_tokens)
+            elif provider_name == 'openai':
+                response = self._generate_with_openai(prompt, max_tokens)
+            elif provider_name == 'huggingface':
+                response = self._generate_with_huggingface(prompt, max_tokens)
+            else:
+                raise Exception(f"Provedor desconhecido: {provider_name}")
+        except Exception as e:
+            self.router.record(provider_name, time.time() - start, success=False)
+            self.breaker.record_failure(provider_name, e)
+            raise
+        self.router.record(provider_name, time.time() - start, success=bool(response))
+        if response:
+            self.breaker.record_success(provider_name)
+        else:
+            self.breaker.record_failure(provider_name, "Resposta vazia")
+
+        if use_cache and response:
+            ai_response_cache.set(provider_name, model, config, prompt, response)
+        return response
+
+
+    def _hedged_call(
+        self,
+        primary: str,
+        secondary: str,
+        prompt: str,
+        max_tokens: int,
+        use_cache: bool,
+        tried: List[str]
+    ) -> Optional[str]:
+        """Chama o primário e, se passar do p95 dele, dispara o secundário; vence a primeira resposta"""
+        delay = self.router.p95(primary) or self.hedge_default_delay
+        if not delay:
+            return self._call_provider(primary, prompt, max_tokens, use_cache)
+
+        executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='ai-hedge')
+        try:
+            futures = {executor.submit(self._call_provider, primary, prompt, max_tokens, use_cache): primary}
+            done, _ = wait(futures, timeout=delay)
+            if not done:
+                logger.info(f"⏱️ {primary} passou do p95 ({delay:.1f}s), disparando requisição paralela em {secondary}")
+                futures[executor.submit(self._call_provider, secondary, prompt, max_tokens, use_cache)] = secondary
+                tried.append(secondary)
+
+            errors: Dict[str, Exception] = {}
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        errors[name] = e
+                        continue
+                    if result:
+                        if len(futures) > 1:
+                            self.router.record_hedge_win(name)
+                            logger.info(f"🏁 Resposta de {name} chegou primeiro")
+                        return result
+
+            # O erro do primário é contabilizado por quem chamou
+            if secondary in errors:
+                self.providers[secondary]['error_count'] += 1
+            raise errors.get(primary) or errors.get(secondary) or Exception("Resposta vazia dos provedores")
+        finally:
+            executor.shutdown(wait=False)
+
+    def _gemini_request_options(self, max_tokens: int) -> Tuple[Dict[str, Any], List[Dict[str, str]]]:
+        """Configuração de geração e segurança do Gemini"""
+        generation_config = {
+            'temperature': 0.7,
+            'top_p': 0.95,
+            'top_k': 64,
+            'max_output_tokens': min(max_tokens, 2048),  # Reduz para evitar quota
+            'candidate_count': 1
+        }
+
+        safety_settings = [
+            {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
+            {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
+            {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
+            {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"}
+        ]
+
+        return generation_config, safety_settings
+
+    def _note_quota_error(self, provider_name: str, error: Exception):
+        """Marca provedor como limitado por 1 hora em erros de quota"""
+        if "quota" in str(error).lower() or "limit" in str(error).lower():
+            logger.warning(f"⚠️ {provider_name} atingiu limite de quota: {str(error)}")
+            self.providers[provider_name]['rate_limit_reset'] = time.time() + 3600  # 1 hora
+
+    def _gemini_client(self):
+        """Modelo Gemini reutilizado do pool de provedores (recriado após fork)"""
+        provider_clients.record_call('gemini')
+        return provider_clients.gemini_model(self.providers['gemini']['api_key'], self.providers['gemini']['model'])
 
     def _generate_with_gemini(self, prompt: str, max_tokens: int) -> Optional[str]:
         """Gera conteúdo usando Gemini"""
         try:
-            client = self.providers['gemini']['client']
-
-            generation_config = {
-                'temperature': 0.7,
-                'top_p': 0.95,
-                'top_k': 64,
-                'max_output_tokens': min(max_tokens, 2048),  # Reduz para evitar quota
-                'candidate_count': 1
-            }
-
-            safety_settings = [
-                {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"}
-            ]
+            client = self._gemini_client()
+            generation_config, safety_settings = self._gemini_request_options(max_tokens)
 
             response = client.generate_content(
                 prompt,
@@ -182,28 +298,63 @@ class AIManager:
                 raise Exception("Resposta vazia do Gemini")
 
         except Exception as e:
-            if "quota" in str(e).lower() or "limit" in str(e).lower():
-                logger.warning(f"⚠️ Gemini atingiu limite de quota: {str(e)}")
-                self.providers['gemini']['rate_limit_reset'] = time.time() + 3600  # 1 hora
+            self._note_quota_error('gemini', e)
             raise e
 
+    def _stream_with_gemini(self, prompt: str, max_tokens: int) -> Iterator[str]:
+        """Gera conteúdo usando Gemini em streaming"""
+        try:
+            client = self._gemini_client()
+            generation_config, safety_settings = self._gemini_request_options(max_tokens)
+
+            response = client.generate_content(
+                prompt,
+                generation_config=generation_config,
+                safety_settings=safety_settings,
+                stream=True
+            )
+
+            total = 0
+            for chunk in response:
+                text = chunk.text
+                if text:
+                    total += len(text)
+                    yield text
+
+            if not total:
+                raise Exception("Resposta vazia do Gemini")
+            logger.info(f"✅ Gemini (stream) gerou {total} caracteres")
+
+        except Exception as e:
+            self._note_quota_error('gemini', e)
+            raise e
+
+    def _openai_request_params(self, prompt: str, max_tokens: int) -> Dict[str, Any]:
+        """Parâmetros da chamada de chat do OpenAI"""
+        return {
+            'model': "gpt-3.5-turbo",
+            'messages': [
+                {"role": "system", "content": "Você é um especialista em análise de mercado ultra-detalhada."},
+                {"role": "user", "content": prompt}
+            ],
+            'max_tokens': min(max_tokens, 1500),
+            'temperature': 0.7,
+            'top_p': 0.95
+        }
+
+    def _openai_client(self):
+        """Cliente OpenAI reutilizado do pool de provedores (conexões keep-alive)"""
+        openai_key = self.providers['openai']['api_key'] or os.getenv("OPENAI_API_KEY")
+        if not openai_key:
+            raise ValueError("OPENAI_API_KEY not found")
+        provider_clients.record_call('openai')
+        return provider_clients.openai_client(openai_key)
+
     def _generate_with_openai(self, prompt: str, max_tokens: int) -> Optional[str]:
         """Gera conteúdo usando OpenAI"""
         try:
-            openai_key = os.getenv("OPENAI_API_KEY")
-            if not openai_key:
-                raise ValueError("OPENAI_API_KEY not found")
-            client = openai.OpenAI(api_key=openai_key)
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "Você é um especialista em análise de mercado ultra-detalhada."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=min(max_tokens, 1500),
-                temperature=0.7,
-                top_p=0.95
-            )
+            client = self._openai_client()
+            response = client.chat.completions.create(**self._openai_request_params(prompt, max_tokens))
 
             content = response.choices[0].message.content
             if content:
@@ -213,9 +364,30 @@ class AIManager:
                 raise Exception("Resposta vazia do OpenAI")
 
         except Exception as e:
-            if "quota" in str(e).lower() or "limit" in str(e).lower():
-                logger.warning(f"⚠️ OpenAI atingiu limite de quota: {str(e)}")
-                self.providers['openai']['rate_limit_reset'] = time.time() + 3600
+            self._note_quota_error('openai', e)
+            raise e
+
+    def _stream_with_openai(self, prompt: str, max_tokens: int) -> Iterator[str]:
+        """Gera conteúdo usando OpenAI em streaming"""
+        try:
+            client = self._openai_client()
+            stream = client.chat.completions.create(stream=True, **self._openai_request_params(prompt, max_tokens))
+
+            total = 0
+            for event in stream:
+                if not event.choices:
+                    continue
+                text = event.choices[0].delta.content
+                if text:
+                    total += len(text)
+                    yield text
+
+            if not total:
+                raise Exception("Resposta vazia do OpenAI")
+            logger.info(f"✅ OpenAI (stream) gerou {total} caracteres")
+
+        except Exception as e:
+            self._note_quota_error('openai', e)
             raise e
 
     def _generate_with_huggingface(self, prompt: str, max_tokens: int) -> Optional[str]:
@@ -249,7 +421,7 @@ class AIManager:
                     }
                 }
 
-                response = requests.post(url, headers=headers, json=payload, timeout=60)
+                response = provider_clients.post('huggingface', url, headers=headers, json=payload, timeout=60)
 
                 if response.status_code == 200:
                     data = response.json()
@@ -287,29 +459,88 @@ class AIManager:
 
         raise Exception("Todos os modelos HuggingFace falharam")
 
-    def _try_fallback(self, prompt: str, max_tokens: int, exclude: List[str] = None) -> Optional[str]:
-        """Tenta usar provedor de fallback"""
-        exclude = exclude or []
+    def generate_analysis_stream(self, prompt: str, max_tokens: int = 8192, use_cache: bool = True) -> Iterator[str]:
+        """
+        Gera análise em streaming, entregando o texto em pedaços conforme chega
 
-        for provider_name in ['gemini', 'openai', 'huggingface']:
-            if provider_name in exclude:
-                continue
+        Troca de provedor apenas enquanto nada foi entregue; uma falha no meio
+        do stream é propagada, pois o texto parcial não pode ser refeito.
+        HuggingFace não tem streaming e entrega a resposta em um único pedaço.
+        """
+        candidates = self.rank_providers()
+        if not candidates:
+            logger.error("❌ Nenhum provedor de IA disponível")
+            raise Exception("NENHUM PROVEDOR DE IA DISPONÍVEL: Configure pelo menos uma API de IA")
 
-            if not self.providers[provider_name]['available']:
-                continue
+        last_error = None
+        for name in candidates:
+            logger.info(f"🤖 Usando provedor (stream): {name}")
+            if use_cache:
+                model, config = self._cache_descriptor(name, max_tokens)
+                cached = ai_response_cache.get(name, model, config, prompt)
+                if cached is not None:
+                    logger.info(f"💾 Resposta de {name} servida do cache ({len(cached)} caracteres)")
+                    yield cached
+                    return
+
+            delivered = False
+            parts: List[str] = []
+            start = None
+            try:
+                self.breaker.check(name)
+                start = time.time()
+                if name == 'gemini':
+                    chunks = self._stream_with_gemini(prompt, max_tokens)
+                elif name == 'openai':
+                    chunks = self._stream_with_openai(prompt, max_tokens)
+                else:
+                    chunks = iter([self._generate_with_huggingface(prompt, max_tokens)])
 
-            if self.providers[provider_name]['error_count'] >= 5:
-                continue
+                for chunk in chunks:
+                    delivered = True
+                    parts.append(chunk)
+                    yield chunk
 
+                self.router.record(name, time.time() - start, success=bool(parts))
+                if parts:
+                    self.breaker.record_success(name)
+                else:
+                    self.breaker.record_failure(name, "Resposta vazia")
+                if use_cache and parts:
+                    ai_response_cache.set(name, model, config, prompt, ''.join(parts))
+                return
+
+            except GeneratorExit:
+                # Quem consumia desistiu depois de um pedaço (só há yield após a resposta):
+                # o provedor respondeu, a chamada conta na quota e a sonda meio-aberta
+                # é concluída em vez de ficar presa até CIRCUIT_PROBE_TIMEOUT
+                self.router.record(name, time.time() - start, success=True)
+                self.breaker.record_success(name)
+                raise
+            except CircuitOpenError as e:
+                logger.warning(f"⚠️ {str(e)}")
+                last_error = e
+            except Exception as e:
+                logger.error(f"❌ Erro no provedor {name} (stream): {str(e)}")
+                self.providers[name]['error_count'] += 1
+                if start is not None:
+                    self.router.record(name, time.time() - start, success=False)
+                self.breaker.record_failure(name, e)
+                last_error = e
+                if delivered:
+                    raise Exception(f"STREAM DA IA INTERROMPIDO ({name}): {str(e)}")
+
+        raise Exception(f"TODOS OS PROVEDORES DE IA FALHARAM: Último erro - {str(last_error)}")
+
+    def _try_fallback(self, prompt: str, max_tokens: int, exclude: List[str] = None, use_cache: bool = True) -> Optional[str]:
+        """Tenta usar provedor de fallback"""
+        exclude = exclude or []
+
+        for provider_name in self.rank_providers(exclude=exclude):
             logger.info(f"🔄 Tentando fallback para: {provider_name}")
 
             try:
-                if provider_name == 'gemini':
-                    return self._generate_with_gemini(prompt, max_tokens)
-                elif provider_name == 'openai':
-                    return self._generate_with_openai(prompt, max_tokens)
-                elif provider_name == 'huggingface':
-                    return self._generate_with_huggingface(prompt, max_tokens)
+                return self._call_provider(provider_name, prompt, max_tokens, use_cache)
             except Exception as e:
                 logger.warning(f"⚠️ Fallback {provider_name} falhou: {str(e)}")
                 self.providers[provider_name]['error_count'] += 1
@@ -327,24 +558,49 @@ class AIManager:
                 'available': provider['available'],
                 'priority': provider['priority'],
                 'error_count': provider['error_count'],
-                'rate_limited': (provider.get('rate_limit_reset') or 0) > time.time()
+                'rate_limited': (provider.get('rate_limit_reset') or 0) > time.time(),
+                'circuit': self.breaker.state(name)
             }
 
             if name == 'huggingface' and provider['available']:
                 status[name]['current_model'] = provider['models'][provider['current_model_index']]
                 status[name]['available_models'] = len(provider['models'])
 
+            routing = self.router.get_stats().get(name)
+            if routing:
+                status[name]['routing'] = routing
+
         return status
 
+    def get_router_stats(self) -> Dict[str, Any]:
+        """Latência EWMA, p95, taxa de erro e quota por provedor"""
+        return {
+            'hedge_enabled': self.hedge_enabled,
+            'ranking': self.router.rank({
+                name: provider for name, provider in self.providers.items() if provider['available']
+            }),
+            'providers': self.router.get_stats()
+        }
+
+    def get_client_stats(self) -> Dict[str, Any]:
+        """Reuso de clientes e conexões dos provedores neste worker"""
+        return provider_clients.get_stats()
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Estatísticas do cache de respostas"""
+        return ai_response_cache.get_stats()
+
     def reset_provider_errors(self, provider_name: str = None):
         """Reset contadores de erro"""
         if provider_name:
             if provider_name in self.providers:
                 self.providers[provider_name]['error_count'] = 0
+                self.breaker.reset(provider_name)
                 logger.info(f"🔄 Reset erros do provedor: {provider_name}")
         else:
             for provider in self.providers.values():
                 provider['error_count'] = 0
+            self.breaker.reset()
             logger.info("🔄 Reset erros de todos os provedores")
 
     def clean_ai_response(self, response: str) -> str:
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - AI Response Cache
+Cache de respostas das IAs por provedor, modelo, configuração e prompt normalizado
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+from services.lru_cache import LRUCache
+from services.shared_store import ThreadLocalSQLite
+
+logger = logging.getLogger(__name__)
+
+
+class AIResponseCache:
+    """Cache de respostas de IA em dois níveis: LRU em memória (L1) e SQLite (L2)
+
+    A chave é o hash de provedor, modelo, configuração de geração e prompt
+    normalizado, de modo que só uma chamada idêntica reaproveita a resposta.
+    O L2 é limitado em bytes e remove as entradas menos acessadas.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.getenv('AI_CACHE_DB', os.path.join('cache', 'ai_responses.db'))
+        self.enabled = os.getenv('AI_CACHE_ENABLED', 'true').lower() == 'true'
+        self.ttl = int(os.getenv('AI_CACHE_TTL', 24 * 3600))
+        self.max_bytes = int(os.getenv('AI_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+        self.memory = LRUCache(
+            max_entries=int(os.getenv('AI_CACHE_L1_MAX_ENTRIES', 256)),
+            max_bytes=int(os.getenv('AI_CACHE_L1_MAX_BYTES', 16 * 1024 * 1024)),
+            ttl=self.ttl
+        )
+
+        self._db = ThreadLocalSQLite(self.db_path)
+        self._lock = threading.Lock()
+        self._stored_bytes: Optional[int] = None
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'expired': 0,
+            'writes': 0,
+            'evictions': 0,
+            'errors': 0
+        }
+
+        self._init_database()
+
+    def _init_database(self):
+        """Inicializa tabela de respostas"""
+        try:
+            conn = self._db.connection()
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS ai_responses (
+                    key_hash TEXT PRIMARY KEY,
+                    provider TEXT NOT NULL,
+                    model TEXT,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_ai_accessed ON ai_responses(accessed_at)")
+        except Exception as e:
+            logger.error(f"Erro ao inicializar cache de IA: {e}")
+
+    @staticmethod
+    def normalize_prompt(prompt: str) -> str:
+        """Normaliza espaços e quebras de linha sem alterar o conteúdo"""
+        text = prompt.replace('\r\n', '\n').replace('\r', '\n')
+        lines = [re.sub(r'[ \t]+', ' ', line).strip() for line in text.split('\n')]
+        return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip()
+
+    def make_key(self, provider: str, model: Optional[str], config: Dict[str, Any], prompt: str) -> str:
+        """Hash de provedor, modelo, configuração de geração e prompt normalizado"""
+        payload = json.dumps({
+            'provider': provider,
+            'model': model,
+            'config': config,
+            'prompt': self.normalize_prompt(prompt)
+        }, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def get(self, provider: str, model: Optional[str], config: Dict[str, Any], prompt: str) -> Optional[str]:
+        """Resposta armazenada para a chamada idêntica, se ainda válida"""
+        if not self.enabled:
+            return None
+
+        key = self.make_key(provider, model, config, prompt)
+
+        response = self.memory.get(key)
+        if response is not None:
+            self._count('hits')
+            return response
+
+        try:
+            row = self._db.connection().execute(
+                "SELECT response, created_at, accessed_at FROM ai_responses WHERE key_hash = ?", (key,)
+            ).fetchone()
+
+            if not row:
+                self._count('misses')
+                return None
+
+            response, created_at, accessed_at = row
+            now = time.time()
+            remaining = self.ttl - (now - created_at)
+            if remaining <= 0:
+                self._db.connection().execute("DELETE FROM ai_responses WHERE key_hash = ?", (key,))
+                with self._lock:
+                    self._stored_bytes = None
+                self._count('expired')
+                self._count('misses')
+                return None
+
+            # Atualiza uso para a evicção LRU (no máximo uma escrita por minuto por chave)
+            if now - accessed_at > 60:
+                self._db.connection().execute(
+                    "UPDATE ai_responses SET accessed_at = ? WHERE key_hash = ?", (now, key)
+                )
+
+            self.memory.set(key, response, size=len(response), ttl=remaining)
+            self._count('hits')
+            return response
+
+        except Exception as e:
+            self._count('errors')
+            logger.error(f"Erro ao ler cache de IA: {e}")
+            return None
+
+    def set(self, provider: str, model: Optional[str], config: Dict[str, Any], prompt: str, response: str):
+        """Armazena resposta nos dois níveis"""
+        if not self.enabled or not response:
+            return
+
+        try:
+            key = self.make_key(provider, model, config, prompt)
+            size = len(response.encode('utf-8'))
+            now = time.time()
+
+            self.memory.set(key, response, size=size, ttl=self.ttl)
+            self._db.connection().execute("""
+                INSERT OR REPLACE INTO ai_responses
+                (key_hash, provider, model, response, size, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (key, provider, model, response, size, now, now))
+            self._count('writes')
+            self._evict_if_needed(size)
+
+        except Exception as e:
+            self._count('errors')
+            logger.error(f"Erro ao salvar cache de IA: {e}")
+
+    def _evict_if_needed(self, added_bytes: int):
+        """Remove respostas expiradas e as menos acessadas quando passa do limite de bytes"""
+        conn = self._db.connection()
+
+        with self._lock:
+            if self._stored_bytes is None:
+                self._stored_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM ai_responses").fetchone()[0]
+            else:
+                self._stored_bytes += added_bytes
+            if self._stored_bytes <= self.max_bytes:
+                return
+
+        conn.execute("DELETE FROM ai_responses WHERE created_at < ?", (time.time() - self.ttl,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM ai_responses").fetchone()[0]
+        target = int(self.max_bytes * 0.9)
+        victims = []
+
+        if total > self.max_bytes:
+            for key_hash, size in conn.execute("SELECT key_hash, size FROM ai_responses ORDER BY accessed_at"):
+                if total <= target:
+                    break
+                victims.append((key_hash,))
+                total -= size
+            conn.executemany("DELETE FROM ai_responses WHERE key_hash = ?", victims)
+
+        with self._lock:
+            self._stored_bytes = total
+            self.stats['evictions'] += len(victims)
+
+        if victims:
+            logger.info(f"🗑️ {len(victims)} respostas removidas do cache de IA (limite {self.max_bytes} bytes)")
+
+    def clear(self):
+        """Limpa os dois níveis"""
+        self.memory.clear()
+        self._db.connection().execute("DELETE FROM ai_responses")
+        with self._lock:
+            self._stored_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores e ocupação do cache"""
+        with self._lock:
+            stats = dict(self.stats)
+
+        try:
+            row = self._db.connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ai_responses"
+            ).fetchone()
+            stats.update({'entries': row[0], 'stored_bytes': row[1]})
+        except Exception as e:
+            stats['error'] = str(e)
+
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['enabled'] = self.enabled
+        stats['ttl'] = self.ttl
+        stats['max_bytes'] = self.max_bytes
+        stats['l1_memory'] = self.memory.get_stats()
+        return stats
+
+
+# Instância global
+ai_response_cache = AIResponseCache()
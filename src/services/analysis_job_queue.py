@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Analysis Job Queue
+Fila de análises em background persistida em SQLite e compartilhada entre workers
+"""
+
+import os
+import json
+import uuid
+import time
+import socket
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Callable
+
+from services.shared_store import ThreadLocalSQLite
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+
+FINISHED_STATUSES = (JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED)
+
+
+class JobCancelledError(Exception):
+    """Levantada dentro do job quando o cancelamento é solicitado"""
+
+
+class JobContext:
+    """Contexto entregue ao handler para heartbeat e verificação de cancelamento"""
+
+    def __init__(self, queue: 'AnalysisJobQueue', job_id: str, session_id: str, worker_id: str, attempt: int):
+        self.queue = queue
+        self.job_id = job_id
+        self.session_id = session_id
+        self.worker_id = worker_id
+        self.attempt = attempt
+
+    def heartbeat(self):
+        """Sinaliza que o job continua ativo"""
+        self.queue._touch(self)
+
+    def check_cancelled(self):
+        """Interrompe o job se o cancelamento foi solicitado"""
+        if self.queue._is_cancel_requested(self.job_id):
+            raise JobCancelledError(f"Job {self.job_id} cancelado")
+
+
+class AnalysisJobQueue:
+    """Fila de jobs de análise com pool de workers em background"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.getenv('ANALYSIS_JOB_DB', os.path.join('cache', 'analysis_jobs.db'))
+        self.max_workers = int(os.getenv('ANALYSIS_JOB_WORKERS', 2))          # Threads por processo
+        self.max_running = int(os.getenv('ANALYSIS_JOB_MAX_RUNNING', 4))      # Limite global entre processos
+        self.max_attempts = int(os.getenv('ANALYSIS_JOB_MAX_ATTEMPTS', 2))
+        self.poll_interval = float(os.getenv('ANALYSIS_JOB_POLL_INTERVAL', 1.0))
+        self.stale_after = int(os.getenv('ANALYSIS_JOB_STALE_SECONDS', 900))
+        self.heartbeat_interval = float(os.getenv('ANALYSIS_JOB_HEARTBEAT_SECONDS', 30))
+        self.job_ttl = int(os.getenv('ANALYSIS_JOB_TTL', 86400))
+
+        self._handler: Optional[Callable[[Dict[str, Any], JobContext], Dict[str, Any]]] = None
+        self._db = ThreadLocalSQLite(self.db_path, sqlite3.Row)
+        self._start_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._workers: List[threading.Thread] = []
+        self._pid: Optional[int] = None
+        self._last_cleanup = 0.0
+
+        self._init_database()
+
+        logger.info(f"📋 Analysis Job Queue inicializada ({self.max_workers} workers/processo, {self.max_running} simultâneos)")
+
+    def _init_database(self):
+        """Inicializa tabela de jobs"""
+        try:
+            conn = self._db.connection()
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS analysis_jobs (
+                    job_id TEXT PRIMARY KEY,
+                    session_id TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    worker TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    heartbeat_at REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON analysis_jobs(status, created_at)")
+        except Exception as e:
+            logger.error(f"Erro ao inicializar fila de jobs: {e}")
+
+    def register_handler(self, handler: Callable[[Dict[str, Any], JobContext], Dict[str, Any]]):
+        """Define a função que executa cada job"""
+        self._handler = handler
+
+    def start(self):
+        """Inicia os workers deste processo (seguro após fork do gunicorn)"""
+        with self._start_lock:
+            if self._pid == os.getpid() and any(worker.is_alive() for worker in self._workers):
+                return
+
+            self._pid = os.getpid()
+            self._workers = []
+            for i in range(self.max_workers):
+                worker = threading.Thread(
+                    target=self._worker_loop,
+                    name=f"analysis-job-worker-{i}",
+                    daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+
+            logger.info(f"🚀 {self.max_workers} workers de análise iniciados no processo {self._pid}")
+
+    def enqueue(self, payload: Dict[str, Any], session_id: str) -> Dict[str, Any]:
+        """Enfileira uma análise e retorna o job criado"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+
+        self._db.connection().execute(
+            """
+            INSERT INTO analysis_jobs (job_id, session_id, status, payload, created_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (job_id, session_id, JOB_QUEUED, json.dumps(payload, ensure_ascii=False), now)
+        )
+
+        logger.info(f"📥 Job {job_id} enfileirado (sessão {session_id})")
+
+        self.start()
+        self._wakeup.set()
+        return self.get_job(job_id, include_result=False)
+
+    def get_job(self, job_id: str, include_result: bool = True) -> Optional[Dict[str, Any]]:
+        """Retorna o estado de um job"""
+        row = self._db.connection().execute(
+            "SELECT * FROM analysis_jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+
+        if not row:
+            return None
+
+        job = {
+            'job_id': row['job_id'],
+            'session_id': row['session_id'],
+            'status': row['status'],
+            'attempts': row['attempts'],
+            'cancel_requested': bool(row['cancel_requested']),
+            'created_at': self._format_time(row['created_at']),
+            'started_at': self._format_time(row['started_at']),
+            'finished_at': self._format_time(row['finished_at']),
+            'queue_position': self._queue_position(row) if row['status'] == JOB_QUEUED else None
+        }
+
+        if row['error']:
+            job['error'] = json.loads(row['error'])
+
+        if include_result and row['result']:
+            job['result'] = json.loads(row['result'])
+
+        return job
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """Cancela um job na fila ou solicita a interrupção de um job em execução"""
+        conn = self._db.connection()
+        now = time.time()
+
+        cursor = conn.execute(
+            "UPDATE analysis_jobs SET status = ?, finished_at = ? WHERE job_id = ? AND status = ?",
+            (JOB_CANCELLED, now, job_id, JOB_QUEUED)
+        )
+        if cursor.rowcount:
+            logger.info(f"🚫 Job {job_id} cancelado antes de iniciar")
+            return JOB_CANCELLED
+
+        cursor = conn.execute(
+            "UPDATE analysis_jobs SET cancel_requested = 1 WHERE job_id = ? AND status = ?",
+            (job_id, JOB_RUNNING)
+        )
+        if cursor.rowcount:
+            logger.info(f"🚫 Cancelamento solicitado para job em execução {job_id}")
+            return 'cancelling'
+
+        job = self.get_job(job_id, include_result=False)
+        return job['status'] if job else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Contagem de jobs por status"""
+        rows = self._db.connection().execute(
+            "SELECT status, COUNT(*) AS total FROM analysis_jobs GROUP BY status"
+        ).fetchall()
+        return {
+            'jobs': {row['status']: row['total'] for row in rows},
+            'workers_per_process': self.max_workers,
+            'max_running': self.max_running
+        }
+
+    def _worker_loop(self):
+        """Loop de cada worker: reivindica e executa jobs"""
+        while True:
+            try:
+                job = self._claim_next_job()
+            except Exception as e:
+                logger.error(f"❌ Erro ao buscar próximo job: {e}")
+                job = None
+
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            self._run_job(job)
+
+    @staticmethod
+    def _process_prefix(pid: Optional[int] = None) -> str:
+        return f"{socket.gethostname()}:{pid or os.getpid()}:"
+
+    def _worker_id(self) -> str:
+        return f"{self._process_prefix()}{threading.current_thread().name}"
+
+    def _claim_next_job(self) -> Optional[sqlite3.Row]:
+        """Reivindica atomicamente o próximo job respeitando o limite global"""
+        conn = self._db.connection()
+        now = time.time()
+        worker_id = self._worker_id()
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._recover_stale_jobs(conn, now)
+
+            running = conn.execute(
+                "SELECT COUNT(*) FROM analysis_jobs WHERE status = ?", (JOB_RUNNING,)
+            ).fetchone()[0]
+            if running >= self.max_running:
+                conn.execute("COMMIT")
+                return None
+
+            row = conn.execute(
+                "SELECT * FROM analysis_jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                (JOB_QUEUED,)
+            ).fetchone()
+            if not row:
+                conn.execute("COMMIT")
+                return None
+
+            conn.execute(
+                """
+                UPDATE analysis_jobs
+                SET status = ?, started_at = ?, heartbeat_at = ?, worker = ?, attempts = attempts + 1
+                WHERE job_id = ?
+                """,
+                (JOB_RUNNING, now, now, worker_id, row['job_id'])
+            )
+            conn.execute("COMMIT")
+            return row
+
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _recover_stale_jobs(self, conn: sqlite3.Connection, now: float):
+        """Recoloca na fila (ou falha) jobs cujo worker morreu"""
+        stale_before = now - self.stale_after
+        error = json.dumps({'error': 'Worker interrompido', 'message': 'O processo que executava a análise foi encerrado'})
+
+        conn.execute(
+            "UPDATE analysis_jobs SET status = ?, worker = NULL WHERE status = ? AND heartbeat_at < ? AND attempts < ?",
+            (JOB_QUEUED, JOB_RUNNING, stale_before, self.max_attempts)
+        )
+        conn.execute(
+            "UPDATE analysis_jobs SET status = ?, error = ?, finished_at = ? WHERE status = ? AND heartbeat_at < ?",
+            (JOB_FAILED, error, now, JOB_RUNNING, stale_before)
+        )
+
+        # Limpeza periódica de jobs antigos
+        if now - self._last_cleanup > 3600:
+            conn.execute(
+                f"DELETE FROM analysis_jobs WHERE status IN ({','.join('?' * len(FINISHED_STATUSES))}) AND finished_at < ?",
+                (*FINISHED_STATUSES, now - self.job_ttl)
+            )
+            self._last_cleanup = now
+
+    def _run_job(self, row: sqlite3.Row):
+        """Executa um job e persiste o resultado"""
+        job_id = row['job_id']
+        # attempts lido antes do UPDATE que reivindicou o job
+        context = JobContext(self, job_id, row['session_id'], self._worker_id(), row['attempts'] + 1)
+
+        logger.info(f"⚙️ Executando job {job_id} (sessão {row['session_id']})")
+
+        # Heartbeat durante todo o job, não só quando uma etapa reporta progresso
+        stop_heartbeat = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat_loop,
+            args=(context, stop_heartbeat),
+            name=f"analysis-job-heartbeat-{job_id[:8]}",
+            daemon=True
+        )
+        heartbeat.start()
+
+        try:
+            if self._handler is None:
+                raise RuntimeError("Nenhum handler de análise registrado")
+
+            result = self._handler(json.loads(row['payload']), context)
+            if self._finish(context, JOB_COMPLETED, result=result):
+                logger.info(f"✅ Job {job_id} concluído")
+
+        except JobCancelledError:
+            if self._finish(context, JOB_CANCELLED):
+                logger.info(f"🚫 Job {job_id} cancelado durante a execução")
+
+        except Exception as e:
+            error = getattr(e, 'details', None) or {'error': 'Erro na análise', 'message': str(e)}
+            if self._finish(context, JOB_FAILED, error=error):
+                logger.error(f"❌ Job {job_id} falhou: {str(e)}")
+
+        finally:
+            stop_heartbeat.set()
+
+    def _heartbeat_loop(self, context: JobContext, stop: threading.Event):
+        """Mantém o heartbeat do job enquanto ele executa"""
+        while not stop.wait(self.heartbeat_interval):
+            try:
+                self._touch(context)
+            except Exception as e:
+                logger.warning(f"⚠️ Heartbeat do job {context.job_id} falhou: {e}")
+
+    def _finish(self, context: JobContext, status: str, result: Any = None, error: Any = None) -> bool:
+        """Registra o estado final do job (só se esta execução ainda for a dona dele)"""
+        cursor = self._db.connection().execute(
+            """
+            UPDATE analysis_jobs SET status = ?, result = ?, error = ?, finished_at = ?
+            WHERE job_id = ? AND status = ? AND worker = ? AND attempts = ?
+            """,
+            (
+                status,
+                json.dumps(result, ensure_ascii=False, default=str) if result is not None else None,
+                json.dumps(error, ensure_ascii=False, default=str) if error is not None else None,
+                time.time(),
+                context.job_id,
+                JOB_RUNNING,
+                context.worker_id,
+                context.attempt
+            )
+        )
+        if not cursor.rowcount:
+            logger.warning(f"⚠️ Job {context.job_id} foi reatribuído; resultado desta execução descartado")
+            return False
+        return True
+
+    def _touch(self, context: JobContext):
+        """Atualiza o heartbeat do job"""
+        self._db.connection().execute(
+            "UPDATE analysis_jobs SET heartbeat_at = ? WHERE job_id = ? AND worker = ? AND attempts = ?",
+            (time.time(), context.job_id, context.worker_id, context.attempt)
+        )
+
+    def release_running_jobs(self, pid: Optional[int] = None) -> int:
+        """
+        Devolve à fila os jobs em execução no processo ``pid`` (padrão: o atual)
+
+        O worker_exit do gunicorn roda no master depois que o worker saiu, então
+        é chamado com ``worker.pid``. A tentativa interrompida não conta para
+        ANALYSIS_JOB_MAX_ATTEMPTS: o job não falhou, o worker é que foi
+        reciclado ou encerrado.
+        """
+        pid = pid or os.getpid()
+        prefix = self._process_prefix(pid).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        cursor = self._db.connection().execute(
+            """
+            UPDATE analysis_jobs SET status = ?, worker = NULL, attempts = MAX(attempts - 1, 0)
+            WHERE status = ? AND worker LIKE ? ESCAPE '\\'
+            """,
+            (JOB_QUEUED, JOB_RUNNING, prefix + '%')
+        )
+        if cursor.rowcount:
+            logger.warning(f"♻️ {cursor.rowcount} jobs em execução devolvidos à fila (processo {pid} encerrado)")
+        return cursor.rowcount
+
+    def _is_cancel_requested(self, job_id: str) -> bool:
+        row = self._db.connection().execute(
+            "SELECT cancel_requested FROM analysis_jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        return bool(row and row['cancel_requested'])
+
+    def _queue_position(self, row: sqlite3.Row) -> int:
+        return self._db.connection().execute(
+            "SELECT COUNT(*) FROM analysis_jobs WHERE status = ? AND created_at <= ?",
+            (JOB_QUEUED, row['created_at'])
+        ).fetchone()[0]
+
+    @staticmethod
+    def _format_time(timestamp: Optional[float]) -> Optional[str]:
+        return datetime.fromtimestamp(timestamp).isoformat() if timestamp else None
+
+
+# Instância global
+analysis_job_queue = AnalysisJobQueue()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Circuit Breaker
+Circuit breaker por provedor (fechado, aberto, meio-aberto) compartilhado entre workers
+"""
+
+import os
+import time
+import logging
+from typing import Any, Callable, Dict, Optional
+
+from services.shared_store import AtomicStore, create_store
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Provedor com circuito aberto (ou sonda meio-aberta já em andamento)"""
+
+    def __init__(self, name: str, retry_at: Optional[float] = None):
+        self.name = name
+        self.retry_at = retry_at
+        wait = f" (nova tentativa em {max(retry_at - time.time(), 0):.0f}s)" if retry_at else ""
+        super().__init__(f"Circuito aberto para {name}{wait}")
+
+
+def _new_record() -> Dict[str, Any]:
+    return {
+        'state': CLOSED,
+        'failures': 0,
+        'opened_at': None,
+        'retry_at': None,
+        'open_count': 0,
+        'probe_until': None,
+        'last_error': None,
+        'updated_at': None
+    }
+
+
+def create_breaker_backend() -> AtomicStore:
+    """Armazenamento configurado em CIRCUIT_BREAKER_BACKEND (memory, sqlite ou redis)"""
+    return create_store(
+        'circuit breaker',
+        os.getenv('CIRCUIT_BREAKER_BACKEND', 'sqlite'),
+        os.getenv('CIRCUIT_BREAKER_DB', os.path.join('cache', 'circuit_breakers.db')),
+        'circuit_breakers',
+        os.getenv('CIRCUIT_BREAKER_REDIS_PREFIX', 'arqv30:circuit')
+    )
+
+
+class CircuitBreaker:
+    """Circuit breakers de um grupo de provedores
+
+    Fechado: chamadas passam; ``failure_threshold`` falhas consecutivas abrem
+    o circuito. Aberto: chamadas são recusadas até ``retry_at``; o tempo de
+    recuperação dobra a cada reabertura seguida, até ``max_recovery_timeout``.
+    Meio-aberto: só uma chamada (a sonda) passa; sucesso fecha o circuito,
+    falha reabre. Se a sonda não reportar em ``probe_timeout``, outra é liberada.
+    """
+
+    def __init__(self, namespace: str, backend: Optional[AtomicStore] = None):
+        self.namespace = namespace
+        self.backend = backend if backend is not None else circuit_breaker_backend
+        self.failure_threshold = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', 5))
+        self.recovery_timeout = float(os.getenv('CIRCUIT_RECOVERY_TIMEOUT', 60))
+        self.max_recovery_timeout = float(os.getenv('CIRCUIT_MAX_RECOVERY_TIMEOUT', 1800))
+        self.probe_timeout = float(os.getenv('CIRCUIT_PROBE_TIMEOUT', 120))
+
+    def _key(self, name: str) -> str:
+        return f"{self.namespace}:{name}"
+
+    def _get(self, name: str) -> Dict[str, Any]:
+        return self.backend.get(self._key(name)) or _new_record()
+
+    def _update(self, name: str, mutate: Callable[[Dict[str, Any]], Any]) -> Any:
+        return self.backend.update(self._key(name), lambda record: mutate(record or _new_record()))
+
+    def _recovery_for(self, open_count: int) -> float:
+        return min(self.recovery_timeout * (2 ** max(open_count - 1, 0)), self.max_recovery_timeout)
+
+    def _safe(self, operation: Callable[[], Any], default: Any) -> Any:
+        """Falha no armazenamento nunca derruba a chamada ao provedor"""
+        try:
+            return operation()
+        except Exception as e:
+            logger.warning(f"⚠️ Erro no circuit breaker {self.namespace}: {e}")
+            return default
+
+    def is_available(self, name: str) -> bool:
+        """Consulta sem efeitos: True se uma chamada agora seria permitida"""
+        def check():
+            record = self._get(name)
+            now = time.time()
+            if record['state'] == CLOSED:
+                return True
+            if record['state'] == OPEN:
+                return now >= (record['retry_at'] or 0)
+            return now >= (record['probe_until'] or 0)
+        return self._safe(check, True)
+
+    def allow(self, name: str) -> bool:
+        """Pede permissão para chamar o provedor; em meio-aberto, só a sonda recebe True"""
+        record = self._safe(lambda: self._get(name), None)
+        if record is None or record['state'] == CLOSED:
+            return True
+
+        def mutate(record):
+            now = time.time()
+            if record['state'] == CLOSED:
+                return None, True
+            if record['state'] == OPEN and now < (record['retry_at'] or 0):
+                return None, False
+            if record['state'] == HALF_OPEN and now < (record['probe_until'] or 0):
+                return None, False
+            # Recuperação venceu (ou a sonda anterior sumiu): esta chamada é a sonda
+            record.update(state=HALF_OPEN, probe_until=now + self.probe_timeout, updated_at=now)
+            return record, True
+
+        allowed = self._safe(lambda: self._update(name, mutate), True)
+        if allowed:
+            logger.info(f"🟡 Circuito {self.namespace}:{name} meio-aberto, enviando sonda")
+        return allowed
+
+    def retry_at(self, name: str) -> Optional[float]:
+        record = self._safe(lambda: self._get(name), None)
+        return record.get('retry_at') if record and record['state'] != CLOSED else None
+
+    def check(self, name: str):
+        """Como ``allow``, mas levanta CircuitOpenError quando recusado"""
+        if not self.allow(name):
+            raise CircuitOpenError(name, self.retry_at(name))
+
+    def record_success(self, name: str):
+        """Chamada bem-sucedida: fecha o circuito e zera as falhas"""
+        record = self._safe(lambda: self._get(name), None)
+        if record is not None and record['state'] == CLOSED and not record['failures']:
+            return
+
+        def mutate(record):
+            previous = record['state']
+            record.update(state=CLOSED, failures=0, opened_at=None, retry_at=None,
+                          open_count=0, probe_until=None, updated_at=time.time())
+            return record, previous
+
+        previous = self._safe(lambda: self._update(name, mutate), CLOSED)
+        if previous != CLOSED:
+            logger.info(f"🟢 Circuito {self.namespace}:{name} fechado, provedor recuperado")
+
+    def release(self, name: str):
+        """Devolve a sonda meio-aberta sem desfecho (429, erro 4xx do cliente...)
+
+        A próxima chamada vira a sonda sem esperar ``probe_timeout``.
+        """
+        record = self._safe(lambda: self._get(name), None)
+        if record is None or record['state'] != HALF_OPEN:
+            return
+
+        def mutate(record):
+            if record['state'] != HALF_OPEN:
+                return None, False
+            record.update(probe_until=None, updated_at=time.time())
+            return record, True
+
+        if self._safe(lambda: self._update(name, mutate), False):
+            logger.info(f"🟡 Sonda de {self.namespace}:{name} devolvida sem desfecho")
+
+    def record_failure(self, name: str, error: Any = None):
+        """Falha na chamada: conta no estado fechado, reabre no meio-aberto"""
+        def mutate(record):
+            now = time.time()
+            record['last_error'] = str(error)[:500] if error is not None else None
+            record['updated_at'] = now
+            if record['state'] == OPEN:
+                return record, None
+            if record['state'] == CLOSED:
+                record['failures'] += 1
+                if record['failures'] < self.failure_threshold:
+                    return record, None
+            return self._open(record, now), record['retry_at']
+
+        retry_at = self._safe(lambda: self._update(name, mutate), None)
+        if retry_at:
+            logger.error(
+                f"🔴 Circuito {self.namespace}:{name} aberto até "
+                f"{time.strftime('%H:%M:%S', time.localtime(retry_at))}: {error}"
+            )
+
+    def trip(self, name: str, error: Any = None, recovery: Optional[float] = None):
+        """Abre o circuito imediatamente (quota esgotada, acesso negado...)"""
+        def mutate(record):
+            now = time.time()
+            record['last_error'] = str(error)[:500] if error is not None else None
+            record['failures'] = max(record['failures'], self.failure_threshold)
+            return self._open(record, now, recovery), record['retry_at']
+
+        retry_at = self._safe(lambda: self._update(name, mutate), None)
+        if retry_at:
+            logger.error(
+                f"🔴 Circuito {self.namespace}:{name} aberto até "
+                f"{time.strftime('%H:%M:%S', time.localtime(retry_at))}: {error}"
+            )
+
+    def _open(self, record: Dict[str, Any], now: float, recovery: Optional[float] = None) -> Dict[str, Any]:
+        record['open_count'] += 1
+        record.update(
+            state=OPEN,
+            opened_at=now,
+            retry_at=now + (recovery if recovery is not None else self._recovery_for(record['open_count'])),
+            probe_until=None,
+            updated_at=now
+        )
+        return record
+
+    def state(self, name: str) -> Dict[str, Any]:
+        """Estado atual do circuito do provedor"""
+        record = self._safe(lambda: self._get(name), _new_record())
+        return {
+            'state': record['state'],
+            'failures': record['failures'],
+            'open_count': record['open_count'],
+            'retry_at': record['retry_at'],
+            'last_error': record['last_error']
+        }
+
+    def reset(self, name: Optional[str] = None):
+        """Fecha o circuito de um provedor (ou de todos do grupo)"""
+        if name:
+            keys = [self._key(name)]
+        else:
+            keys = self._safe(lambda: self.backend.keys(f"{self.namespace}:"), [])
+        for key in keys:
+            self._safe(lambda: self.backend.delete(key), None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estado de todos os circuitos conhecidos do grupo"""
+        prefix = f"{self.namespace}:"
+        names = [key[len(prefix):] for key in self._safe(lambda: self.backend.keys(prefix), [])]
+        return {
+            'backend': self.backend.name,
+            'circuits': {name: self.state(name) for name in names}
+        }
+
+
+# Backend compartilhado
+circuit_breaker_backend = create_breaker_backend()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Concurrency Limiter
+Limites de concorrência global e por domínio para coleta web paralela
+"""
+
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+
+class HostConcurrencyLimiter:
+    """Limita requisições simultâneas no total e por host"""
+
+    def __init__(self, max_total: int = 8, max_per_host: int = 2):
+        self.max_total = max(1, int(max_total))
+        self.max_per_host = max(1, int(max_per_host))
+        self._global = threading.BoundedSemaphore(self.max_total)
+        self._hosts: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        """Normaliza o host de uma URL (sem www.)"""
+        try:
+            host = (urlparse(url).hostname or '').lower()
+        except Exception:
+            host = ''
+        if host.startswith('www.'):
+            host = host[4:]
+        return host or url
+
+    def _host_semaphore(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            semaphore = self._hosts.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.max_per_host)
+                self._hosts[host] = semaphore
+            return semaphore
+
+    @contextmanager
+    def slot(self, url: str, timeout: Optional[float] = None):
+        """Reserva uma vaga global e uma vaga no host da URL"""
+        host_semaphore = self._host_semaphore(self.host_of(url))
+
+        # Reserva o host primeiro para não prender vagas globais esperando host ocupado
+        if not host_semaphore.acquire(timeout=timeout if timeout is not None else -1):
+            raise TimeoutError(f"Tempo esgotado aguardando vaga para {url}")
+        try:
+            if not self._global.acquire(timeout=timeout if timeout is not None else -1):
+                raise TimeoutError(f"Tempo esgotado aguardando vaga global para {url}")
+            try:
+                yield
+            finally:
+                self._global.release()
+        finally:
+            host_semaphore.release()
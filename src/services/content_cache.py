@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Content Cache
+Cache persistente URL -> conteúdo extraído, comprimido, com revalidação condicional
+"""
+
+import os
+import time
+import zlib
+import hashlib
+import logging
+import sqlite3
+import threading
+from typing import Dict, Optional, Any
+
+from services.shared_store import ThreadLocalSQLite
+
+logger = logging.getLogger(__name__)
+
+
+class ContentCache:
+    """Cache em SQLite do conteúdo extraído por URL resolvida
+
+    Entradas recentes (até CONTENT_CACHE_FRESH_SECONDS) são servidas direto.
+    Entradas mais antigas são revalidadas com GET condicional usando ETag /
+    Last-Modified e o hash do HTML, evitando nova extração de páginas inalteradas.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.getenv('CONTENT_CACHE_DB', os.path.join('cache', 'content_cache.db'))
+        self.enabled = os.getenv('CONTENT_CACHE_ENABLED', 'true').lower() == 'true'
+        self.fresh_seconds = int(os.getenv('CONTENT_CACHE_FRESH_SECONDS', 3600))
+        self.max_age = int(os.getenv('CONTENT_CACHE_MAX_AGE', 7 * 86400))
+        self.max_bytes = int(os.getenv('CONTENT_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+        self.compression_level = int(os.getenv('CONTENT_CACHE_COMPRESSION_LEVEL', 6))
+
+        self._db = ThreadLocalSQLite(self.db_path, sqlite3.Row)
+        self._lock = threading.Lock()
+        self._stored_bytes: Optional[int] = None
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'revalidated': 0,
+            'unchanged': 0,
+            'stores': 0,
+            'evictions': 0,
+            'errors': 0
+        }
+
+        self._init_database()
+
+    def _init_database(self):
+        """Inicializa tabela de conteúdo"""
+        try:
+            conn = self._db.connection()
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS content_cache (
+                    url_hash TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    content BLOB NOT NULL,
+                    extractor TEXT,
+                    etag TEXT,
+                    last_modified TEXT,
+                    html_hash TEXT,
+                    content_length INTEGER NOT NULL,
+                    stored_size INTEGER NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    validated_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_content_accessed ON content_cache(accessed_at)")
+        except Exception as e:
+            logger.error(f"Erro ao inicializar cache de conteúdo: {e}")
+
+    @staticmethod
+    def url_hash(url: str) -> str:
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def html_hash(html: str) -> str:
+        """Hash do HTML baixado, usado para detectar páginas inalteradas"""
+        return hashlib.sha256(html.encode('utf-8', errors='replace')).hexdigest()
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Retorna a entrada da URL com ``fresh`` indicando se dispensa revalidação"""
+        if not self.enabled:
+            return None
+
+        try:
+            row = self._db.connection().execute(
+                "SELECT * FROM content_cache WHERE url_hash = ?", (self.url_hash(url),)
+            ).fetchone()
+
+            now = time.time()
+            if row is None or now - row['fetched_at'] > self.max_age:
+                return None
+
+            entry = {
+                'url': row['url'],
+                'content': zlib.decompress(row['content']).decode('utf-8'),
+                'extractor': row['extractor'],
+                'etag': row['etag'],
+                'last_modified': row['last_modified'],
+                'html_hash': row['html_hash'],
+                'fetched_at': row['fetched_at'],
+                'validated_at': row['validated_at'],
+                'fresh': now - row['validated_at'] < self.fresh_seconds
+            }
+
+            # Atualiza uso para a evicção LRU (no máximo uma escrita por minuto por URL)
+            if now - row['accessed_at'] > 60:
+                self._db.connection().execute(
+                    "UPDATE content_cache SET accessed_at = ? WHERE url_hash = ?",
+                    (now, row['url_hash'])
+                )
+            return entry
+
+        except Exception as e:
+            self._count('errors')
+            logger.error(f"Erro ao ler cache de conteúdo: {e}")
+            return None
+
+    def record(self, kind: str):
+        """Contabiliza o desfecho: hits, revalidated (304), unchanged (mesmo hash) ou misses"""
+        self._count(kind)
+
+    def set(self, url: str, content: str, extractor: Optional[str], etag: Optional[str] = None,
+            last_modified: Optional[str] = None, html_hash: Optional[str] = None):
+        """Armazena conteúdo extraído (comprimido) da URL"""
+        if not self.enabled or not content:
+            return
+
+        try:
+            blob = zlib.compress(content.encode('utf-8'), self.compression_level)
+            now = time.time()
+            self._db.connection().execute("""
+                INSERT OR REPLACE INTO content_cache
+                (url_hash, url, content, extractor, etag, last_modified, html_hash,
+                 content_length, stored_size, fetched_at, validated_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (self.url_hash(url), url, blob, extractor, etag, last_modified, html_hash,
+                  len(content), len(blob), now, now, now))
+            self._count('stores')
+            self._evict_if_needed(len(blob))
+
+        except Exception as e:
+            self._count('errors')
+            logger.error(f"Erro ao salvar cache de conteúdo: {e}")
+
+    def mark_validated(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """Renova a validade após 304 ou HTML idêntico, atualizando validadores"""
+        if not self.enabled:
+            return
+
+        try:
+            now = time.time()
+            self._db.connection().execute("""
+                UPDATE content_cache
+                SET validated_at = ?, accessed_at = ?,
+                    etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified)
+                WHERE url_hash = ?
+            """, (now, now, etag, last_modified, self.url_hash(url)))
+        except Exception as e:
+            self._count('errors')
+            logger.error(f"Erro ao revalidar cache de conteúdo: {e}")
+
+    def _evict_if_needed(self, added_bytes: int):
+        """Remove entradas menos acessadas quando o tamanho passa do limite"""
+        conn = self._db.connection()
+
+        with self._lock:
+            if self._stored_bytes is None:
+                self._stored_bytes = conn.execute(
+                    "SELECT COALESCE(SUM(stored_size), 0) FROM content_cache"
+                ).fetchone()[0]
+            else:
+                self._stored_bytes += added_bytes
+            if self._stored_bytes <= self.max_bytes:
+                return
+
+        # Estimativa local excedida: recalcula (outros workers também escrevem) e poda até 90%
+        total = conn.execute("SELECT COALESCE(SUM(stored_size), 0) FROM content_cache").fetchone()[0]
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+
+        if total > self.max_bytes:
+            rows = conn.execute(
+                "SELECT url_hash, stored_size FROM content_cache ORDER BY accessed_at"
+            ).fetchall()
+            victims = []
+            for row in rows:
+                if total <= target:
+                    break
+                victims.append((row['url_hash'],))
+                total -= row['stored_size']
+            conn.executemany("DELETE FROM content_cache WHERE url_hash = ?", victims)
+            removed = len(victims)
+
+        with self._lock:
+            self._stored_bytes = total
+            self.stats['evictions'] += removed
+
+        if removed:
+            logger.info(f"🗑️ {removed} páginas removidas do cache de conteúdo (limite {self.max_bytes} bytes)")
+
+    def cleanup_expired(self) -> int:
+        """Remove entradas mais antigas que CONTENT_CACHE_MAX_AGE"""
+        try:
+            cursor = self._db.connection().execute(
+                "DELETE FROM content_cache WHERE fetched_at < ?", (time.time() - self.max_age,)
+            )
+            with self._lock:
+                self._stored_bytes = None
+            return max(cursor.rowcount, 0)
+        except Exception as e:
+            logger.error(f"Erro na limpeza do cache de conteúdo: {e}")
+            return 0
+
+    def clear(self):
+        """Remove todo o conteúdo e devolve o espaço em disco"""
+        conn = self._db.connection()
+        conn.execute("DELETE FROM content_cache")
+        conn.execute("VACUUM")
+        with self._lock:
+            self._stored_bytes = 0
+        logger.info("🗑️ Cache de conteúdo limpo completamente")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores e ocupação do cache"""
+        with self._lock:
+            stats = dict(self.stats)
+
+        try:
+            row = self._db.connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(stored_size), 0), COALESCE(SUM(content_length), 0) FROM content_cache"
+            ).fetchone()
+            stats.update({'entries': row[0], 'stored_bytes': row[1], 'content_chars': row[2]})
+        except Exception as e:
+            stats['error'] = str(e)
+
+        served = stats['hits'] + stats['revalidated'] + stats['unchanged']
+        lookups = served + stats['misses']
+        stats['hit_rate'] = round(served / lookups, 4) if lookups else 0.0
+        stats['enabled'] = self.enabled
+        stats['max_bytes'] = self.max_bytes
+        return stats
+
+
+# Instância global
+content_cache = ContentCache()
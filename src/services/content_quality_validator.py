@@ -5,16 +5,90 @@ ARQV30 Enhanced v2.0 - Content Quality Validator
 Validador de qualidade de conteúdo extraído
 """
 
+import os
+import math
+import atexit
 import logging
 import re
+import threading
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
+_NUMBER_PATTERN = re.compile(r'\d+(?:\.\d+)?%?')
+_MONEY_PATTERN = re.compile(r'R\$\s*[\d,\.]+')
+
+
+class PhraseMatcher:
+    """Encontra quais frases de uma lista aparecem no texto
+
+    Com pyahocorasick, um único autômato Aho-Corasick varre o texto uma vez
+    para todas as frases; sem ele, cada frase é buscada com ``in`` (busca
+    em C, mais rápida que qualquer autômato em Python puro).
+    """
+
+    def __init__(self, phrases: List[str]):
+        self.phrases = list(phrases)
+        self._automaton = None
+
+        if HAS_AHOCORASICK:
+            automaton = ahocorasick.Automaton()
+            for phrase in self.phrases:
+                automaton.add_word(phrase, phrase)
+            automaton.make_automaton()
+            self._automaton = automaton
+
+    def find_all(self, text: str) -> List[str]:
+        """Frases presentes no texto, na ordem da lista original"""
+        if self._automaton is None:
+            return [phrase for phrase in self.phrases if phrase in text]
+
+        found = {phrase for _, phrase in self._automaton.iter(text)}
+        return [phrase for phrase in self.phrases if phrase in found]
+
+
+class _ContentProfile:
+    """Tokenização e contagens do conteúdo, calculadas uma única vez"""
+
+    __slots__ = ('content', 'lower', 'word_count', 'word_counts', 'line_count', 'paragraph_count')
+
+    def __init__(self, content: str):
+        self.content = content
+        self.lower = content.lower()
+        words = self.lower.split()
+        self.word_count = len(words)
+        self.word_counts = Counter(words)
+
+        lines = content.split('\n')
+        self.line_count = len(lines)
+        self.paragraph_count = sum(1 for line in lines if len(line.strip()) > 50)
+
+    def count_in(self, vocabulary: frozenset) -> int:
+        """Ocorrências de palavras do vocabulário (percorre o menor dos dois)"""
+        counts = self.word_counts
+        if len(vocabulary) < len(counts):
+            return sum(counts[word] for word in vocabulary if word in counts)
+        return sum(count for word, count in counts.items() if word in vocabulary)
+
+
 class ContentQualityValidator:
-    """Validador de qualidade de conteúdo"""
-    
+    """Validador de qualidade de conteúdo
+
+    O conteúdo é tokenizado uma só vez (``_ContentProfile``) e todas as
+    verificações e estatísticas usam essas contagens; vocabulários são
+    frozensets e os indicadores de erro ficam num único ``PhraseMatcher``.
+    """
+
     def __init__(self):
         """Inicializa o validador"""
         self.min_content_length = 500
@@ -22,6 +96,16 @@ class ContentQualityValidator:
         self.max_navigation_ratio = 0.3
         self.min_information_density = 0.1
         
+        # Palavras comuns em português
+        self.portuguese_words = frozenset([
+            'que', 'não', 'uma', 'para', 'com', 'mais', 'como',
+            'mas', 'foi', 'pelo', 'pela', 'até', 'isso', 'ela',
+            'entre', 'depois', 'sem', 'mesmo', 'aos', 'seus',
+            'quem', 'nas', 'me', 'esse', 'eles', 'você', 'tinha',
+            'foram', 'essa', 'num', 'nem', 'suas', 'meu', 'às',
+            'minha', 'numa', 'pelos', 'elas', 'qual', 'nós', 'deles'
+        ])
+        
         # Indicadores de páginas de erro
         self.error_indicators = [
             'página não encontrada', 'page not found', '404 error', '404 not found',
@@ -35,9 +119,10 @@ class ContentQualityValidator:
             'service unavailable', 'serviço indisponível',
             'bad gateway', 'gateway timeout'
         ]
+        self.error_matcher = PhraseMatcher(self.error_indicators)
         
         # Palavras de navegação/menu
-        self.navigation_words = [
+        self.navigation_words = frozenset([
             'home', 'início', 'sobre', 'about', 'contato', 'contact',
             'menu', 'navegação', 'navigation', 'login', 'entrar',
             'cadastro', 'register', 'produtos', 'products', 'serviços',
@@ -45,17 +130,27 @@ class ContentQualityValidator:
             'suporte', 'support', 'faq', 'termos', 'terms', 'privacidade',
             'privacy', 'política', 'policy', 'cookies', 'sitemap',
             'mapa do site', 'buscar', 'search', 'pesquisar'
-        ]
+        ])
         
         # Palavras que indicam conteúdo de qualidade
-        self.quality_indicators = [
+        self.quality_indicators = frozenset([
             'análise', 'pesquisa', 'estudo', 'relatório', 'dados',
             'estatística', 'mercado', 'tendência', 'oportunidade',
             'estratégia', 'crescimento', 'inovação', 'tecnologia',
             'business', 'marketing', 'vendas', 'cliente', 'consumidor',
             'empresa', 'negócio', 'investimento', 'receita', 'lucro'
-        ]
-        
+        ])
+        
+        # Lotes grandes: validação em processos separados (CPU-bound, não segura a GIL do worker)
+        self.batch_workers = int(os.getenv('VALIDATOR_BATCH_WORKERS', min(os.cpu_count() or 1, 4)))
+        self.batch_process_min_chars = int(os.getenv('VALIDATOR_BATCH_PROCESS_MIN_CHARS', 2 * 1024 * 1024))
+        self.batch_chunks_per_worker = int(os.getenv('VALIDATOR_BATCH_CHUNKS_PER_WORKER', 4))
+        self.batch_start_method = os.getenv('VALIDATOR_BATCH_START_METHOD', 'spawn')
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_pid: Optional[int] = None
+        self._pool_lock = threading.Lock()
+        atexit.register(self.shutdown_pool)
+
         logger.info("Content Quality Validator inicializado")
     
     def validate_content(self, content: str, url: str = "", context: Dict[str, Any] = None) -> Dict[str, Any]:
@@ -69,15 +164,17 @@ class ContentQualityValidator:
                 'details': {}
             }
         
+        profile = _ContentProfile(content)
+
         # Executa todas as validações
         validations = {
-            'length_check': self._check_content_length(content),
-            'error_page_check': self._check_error_page(content),
-            'navigation_ratio_check': self._check_navigation_ratio(content),
-            'information_density_check': self._check_information_density(content),
-            'language_check': self._check_language(content),
-            'structure_check': self._check_content_structure(content),
-            'relevance_check': self._check_relevance(content, context or {})
+            'length_check': self._check_content_length(profile),
+            'error_page_check': self._check_error_page(profile),
+            'navigation_ratio_check': self._check_navigation_ratio(profile),
+            'information_density_check': self._check_information_density(profile),
+            'language_check': self._check_language(profile),
+            'structure_check': self._check_content_structure(profile),
+            'relevance_check': self._check_relevance(profile, context or {})
         }
         
         # Calcula score geral
@@ -105,14 +202,14 @@ class ContentQualityValidator:
             'score': round(final_score, 2),
             'reason': main_reason,
             'details': validations,
-            'content_stats': self._get_content_stats(content),
+            'content_stats': self._get_content_stats(profile),
             'url': url,
             'validated_at': datetime.now().isoformat()
         }
     
-    def _check_content_length(self, content: str) -> Dict[str, Any]:
+    def _check_content_length(self, profile: _ContentProfile) -> Dict[str, Any]:
         """Verifica comprimento do conteúdo"""
-        length = len(content)
+        length = len(profile.content)
         
         if length >= self.min_content_length:
             score = min(100, (length / 2000) * 100)  # Score baseado em 2000 chars como ideal
@@ -133,14 +230,9 @@ class ContentQualityValidator:
                 'value': length
             }
     
-    def _check_error_page(self, content: str) -> Dict[str, Any]:
+    def _check_error_page(self, profile: _ContentProfile) -> Dict[str, Any]:
         """Verifica se é página de erro"""
-        content_lower = content.lower()
-        
-        found_errors = []
-        for indicator in self.error_indicators:
-            if indicator in content_lower:
-                found_errors.append(indicator)
+        found_errors = self.error_matcher.find_all(profile.lower)
         
         if found_errors:
             return {
@@ -159,11 +251,9 @@ class ContentQualityValidator:
                 'value': []
             }
     
-    def _check_navigation_ratio(self, content: str) -> Dict[str, Any]:
+    def _check_navigation_ratio(self, profile: _ContentProfile) -> Dict[str, Any]:
         """Verifica proporção de palavras de navegação"""
-        words = content.lower().split()
-        
-        if len(words) == 0:
+        if profile.word_count == 0:
             return {
                 'passed': False,
                 'score': 0,
@@ -172,8 +262,8 @@ class ContentQualityValidator:
                 'value': 0
             }
         
-        navigation_count = sum(1 for word in words if word in self.navigation_words)
-        navigation_ratio = navigation_count / len(words)
+        navigation_count = profile.count_in(self.navigation_words)
+        navigation_ratio = navigation_count / profile.word_count
         
         if navigation_ratio <= self.max_navigation_ratio:
             score = (1 - navigation_ratio) * 100
@@ -194,11 +284,9 @@ class ContentQualityValidator:
                 'value': navigation_ratio
             }
     
-    def _check_information_density(self, content: str) -> Dict[str, Any]:
+    def _check_information_density(self, profile: _ContentProfile) -> Dict[str, Any]:
         """Verifica densidade de informação"""
-        words = content.lower().split()
-        
-        if len(words) == 0:
+        if profile.word_count == 0:
             return {
                 'passed': False,
                 'score': 0,
@@ -208,8 +296,8 @@ class ContentQualityValidator:
             }
         
         # Conta palavras informativas
-        info_count = sum(1 for word in words if word in self.quality_indicators)
-        info_density = info_count / len(words)
+        info_count = profile.count_in(self.quality_indicators)
+        info_density = info_count / profile.word_count
         
         if info_density >= self.min_information_density:
             score = min(100, info_density * 1000)  # Amplifica score
@@ -230,21 +318,9 @@ class ContentQualityValidator:
                 'value': info_density
             }
     
-    def _check_language(self, content: str) -> Dict[str, Any]:
+    def _check_language(self, profile: _ContentProfile) -> Dict[str, Any]:
         """Verifica se o conteúdo está em português"""
-        # Palavras comuns em português
-        portuguese_words = [
-            'que', 'não', 'uma', 'para', 'com', 'mais', 'como',
-            'mas', 'foi', 'pelo', 'pela', 'até', 'isso', 'ela',
-            'entre', 'depois', 'sem', 'mesmo', 'aos', 'seus',
-            'quem', 'nas', 'me', 'esse', 'eles', 'você', 'tinha',
-            'foram', 'essa', 'num', 'nem', 'suas', 'meu', 'às',
-            'minha', 'numa', 'pelos', 'elas', 'qual', 'nós', 'deles'
-        ]
-        
-        words = content.lower().split()
-        
-        if len(words) == 0:
+        if profile.word_count == 0:
             return {
                 'passed': False,
                 'score': 0,
@@ -253,8 +329,8 @@ class ContentQualityValidator:
                 'value': 0
             }
         
-        portuguese_count = sum(1 for word in words if word in portuguese_words)
-        portuguese_ratio = portuguese_count / len(words)
+        portuguese_count = profile.count_in(self.portuguese_words)
+        portuguese_ratio = portuguese_count / profile.word_count
         
         if portuguese_ratio >= 0.05:  # Pelo menos 5% de palavras em português
             score = min(100, portuguese_ratio * 500)
@@ -274,32 +350,31 @@ class ContentQualityValidator:
                 'value': portuguese_ratio
             }
     
-    def _check_content_structure(self, content: str) -> Dict[str, Any]:
+    def _check_content_structure(self, profile: _ContentProfile) -> Dict[str, Any]:
         """Verifica estrutura do conteúdo"""
-        lines = content.split('\n')
-        paragraphs = [line.strip() for line in lines if len(line.strip()) > 50]
+        paragraph_count = profile.paragraph_count
         
         # Verifica se tem parágrafos substanciais
-        if len(paragraphs) >= 3:
-            score = min(100, len(paragraphs) * 10)
+        if paragraph_count >= 3:
+            score = min(100, paragraph_count * 10)
             return {
                 'passed': True,
                 'score': score,
                 'weight': 10,
-                'message': f'Boa estrutura: {len(paragraphs)} parágrafos',
-                'value': len(paragraphs)
+                'message': f'Boa estrutura: {paragraph_count} parágrafos',
+                'value': paragraph_count
             }
         else:
-            score = len(paragraphs) * 33
+            score = paragraph_count * 33
             return {
                 'passed': False,
                 'score': score,
                 'weight': 10,
-                'message': f'Estrutura pobre: {len(paragraphs)} parágrafos',
-                'value': len(paragraphs)
+                'message': f'Estrutura pobre: {paragraph_count} parágrafos',
+                'value': paragraph_count
             }
     
-    def _check_relevance(self, content: str, context: Dict[str, Any]) -> Dict[str, Any]:
+    def _check_relevance(self, profile: _ContentProfile, context: Dict[str, Any]) -> Dict[str, Any]:
         """Verifica relevância do conteúdo para o contexto"""
         if not context:
             return {
@@ -310,7 +385,6 @@ class ContentQualityValidator:
                 'value': 0
             }
         
-        content_lower = content.lower()
         relevance_score = 0
         
         # Verifica termos do contexto
@@ -328,7 +402,7 @@ class ContentQualityValidator:
         # Conta ocorrências dos termos
         for term in context_terms:
             if term and len(term) > 2:
-                occurrences = content_lower.count(term)
+                occurrences = profile.lower.count(term)
                 relevance_score += occurrences * 10
         
         # Normaliza score
@@ -351,40 +425,103 @@ class ContentQualityValidator:
                 'value': relevance_score
             }
     
-    def _get_content_stats(self, content: str) -> Dict[str, Any]:
+    def _get_content_stats(self, profile: _ContentProfile) -> Dict[str, Any]:
         """Obtém estatísticas do conteúdo"""
-        words = content.split()
-        lines = content.split('\n')
-        paragraphs = [line.strip() for line in lines if len(line.strip()) > 50]
+        content = profile.content
+        word_count = profile.word_count
+        paragraph_count = profile.paragraph_count
         
         # Conta números e percentuais
-        numbers = re.findall(r'\d+(?:\.\d+)?%?', content)
+        number_count = sum(1 for _ in _NUMBER_PATTERN.finditer(content))
         
         # Conta valores monetários
-        money_values = re.findall(r'R\$\s*[\d,\.]+', content)
+        money_value_count = sum(1 for _ in _MONEY_PATTERN.finditer(content))
         
         return {
             'character_count': len(content),
-            'word_count': len(words),
-            'line_count': len(lines),
-            'paragraph_count': len(paragraphs),
-            'number_count': len(numbers),
-            'money_value_count': len(money_values),
-            'avg_words_per_paragraph': len(words) / max(len(paragraphs), 1),
-            'avg_chars_per_word': len(content) / max(len(words), 1)
+            'word_count': word_count,
+            'line_count': profile.line_count,
+            'paragraph_count': paragraph_count,
+            'number_count': number_count,
+            'money_value_count': money_value_count,
+            'avg_words_per_paragraph': word_count / max(paragraph_count, 1),
+            'avg_chars_per_word': len(content) / max(word_count, 1)
         }
     
-    def validate_batch(self, content_list: List[Dict[str, Any]], context: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Valida múltiplos conteúdos em lote"""
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Pool de processos do worker atual (criado sob demanda e recriado após fork)"""
+        with self._pool_lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.batch_workers,
+                    mp_context=multiprocessing.get_context(self.batch_start_method)
+                )
+                self._pool_pid = os.getpid()
+                logger.info(f"🧮 Pool de validação iniciado: {self.batch_workers} processos ({self.batch_start_method})")
+            return self._pool
+
+    def shutdown_pool(self):
+        """Encerra o pool de processos deste worker"""
+        with self._pool_lock:
+            if self._pool is not None and self._pool_pid == os.getpid():
+                self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            self._pool_pid = None
+
+    def _use_process_pool(self, items: List[tuple], mode: str) -> bool:
+        if mode == 'inline' or self.batch_workers < 1:
+            return False
+        if mode == 'process':
+            return True
+        # auto: só compensa com mais de um processo e volume acima do limite medido no benchmark
+        total_chars = sum(len(content) for content, _ in items)
+        return self.batch_workers > 1 and len(items) > 1 and total_chars >= self.batch_process_min_chars
+
+    def _validate_in_processes(self, items: List[tuple], context: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Distribui o lote em blocos pelo pool, mantendo a ordem dos itens"""
+        chunk_count = max(1, min(len(items), self.batch_workers * self.batch_chunks_per_worker))
+        chunk_size = math.ceil(len(items) / chunk_count)
+        chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
         results = []
-        
-        for i, content_item in enumerate(content_list):
-            content = content_item.get('content', '')
-            url = content_item.get('url', f'item_{i}')
-            
-            validation = self.validate_content(content, url, context)
+        for chunk_results in self._get_pool().map(_validate_chunk, chunks, [context] * len(chunks)):
+            results.extend(chunk_results)
+        return results
+
+    def validate_batch(
+        self,
+        content_list: List[Dict[str, Any]],
+        context: Dict[str, Any] = None,
+        mode: str = 'auto'
+    ) -> Dict[str, Any]:
+        """
+        Valida múltiplos conteúdos em lote
+
+        Args:
+            content_list: Itens com 'content' e 'url'
+            context: Contexto do projeto para a verificação de relevância
+            mode: 'auto' (processos só para lotes grandes), 'process' ou 'inline'
+        """
+        items = [
+            (content_item.get('content', ''), content_item.get('url', f'item_{i}'))
+            for i, content_item in enumerate(content_list)
+        ]
+
+        results = None
+        execution = 'inline'
+        if items and self._use_process_pool(items, mode):
+            try:
+                results = self._validate_in_processes(items, context)
+                execution = 'process'
+            except Exception as e:
+                logger.warning(f"⚠️ Pool de validação falhou ({e}), validando no processo atual")
+                self.shutdown_pool()
+
+        if results is None:
+            results = [self.validate_content(content, url, context) for content, url in items]
+
+        for i, validation in enumerate(results):
             validation['item_index'] = i
-            results.append(validation)
         
         # Estatísticas do lote
         valid_count = sum(1 for r in results if r['valid'])
@@ -398,7 +535,8 @@ class ContentQualityValidator:
                 'valid_items': valid_count,
                 'invalid_items': total_count - valid_count,
                 'success_rate': (valid_count / max(total_count, 1)) * 100,
-                'average_score': round(avg_score, 2)
+                'average_score': round(avg_score, 2),
+                'execution': execution
             },
             'validated_at': datetime.now().isoformat()
         }
@@ -439,4 +577,9 @@ class ContentQualityValidator:
         return '\n'.join(report)
 
 # Instância global
-content_quality_validator = ContentQualityValidator()
\ No newline at end of file
+content_quality_validator = ContentQualityValidator()
+
+
+def _validate_chunk(items: List[tuple], context: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Executado nos processos do pool: valida um bloco de (conteúdo, url)"""
+    return [content_quality_validator.validate_content(content, url, context) for content, url in items]
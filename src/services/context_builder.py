@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Context Builder
+Compressão do contexto de pesquisa: passagens ranqueadas por BM25 dentro de um orçamento de tokens
+"""
+
+import os
+import re
+import math
+import hashlib
+import logging
+import unicodedata
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+STOPWORDS = frozenset("""
+a ao aos as ate com como da das de dela dele deles do dos e ela elas ele eles em entre era essa esse
+esta este eu foi for ha isso isto ja la lhe mais mas me mesmo meu minha muito na nas nem no nos nossa
+nosso num numa o os ou para pela pelas pelo pelos por qual quando que quem se sem ser seu sua suas seus
+so sobre tambem te tem tu um uma umas uns voce voces the and of to in for on with is are
+""".split())
+
+_TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+_PARAGRAPH_SPLIT = re.compile(r'\n\s*\n|\n(?=[-•*\d])')
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+')
+
+
+def normalize(text: str) -> str:
+    """Minúsculas e sem acentos"""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text: str) -> List[str]:
+    """Termos para ranqueamento (sem acentos, stopwords e números isolados curtos)"""
+    return [
+        token for token in _TOKEN_PATTERN.findall(normalize(text))
+        if len(token) > 2 and token not in STOPWORDS and not (token.isdigit() and len(token) < 3)
+    ]
+
+
+class ResearchContextBuilder:
+    """Monta o contexto de pesquisa do prompt dentro de um orçamento de tokens
+
+    As páginas são divididas em passagens; passagens quase idênticas entre
+    fontes são descartadas, as restantes são ranqueadas por BM25 contra a
+    consulta (segmento, produto, público...) e as melhores entram no contexto
+    agrupadas por fonte, com título e URL para atribuição.
+    """
+
+    def __init__(self):
+        self.token_budget = int(os.getenv('CONTEXT_TOKEN_BUDGET', 4000))
+        self.chars_per_token = float(os.getenv('CONTEXT_CHARS_PER_TOKEN', 4.0))
+        self.passage_chars = int(os.getenv('CONTEXT_PASSAGE_CHARS', 700))
+        self.min_passage_chars = int(os.getenv('CONTEXT_MIN_PASSAGE_CHARS', 80))
+        self.max_passages_per_source = int(os.getenv('CONTEXT_MAX_PASSAGES_PER_SOURCE', 4))
+        self.duplicate_threshold = float(os.getenv('CONTEXT_DUPLICATE_THRESHOLD', 0.7))
+        self.k1 = 1.5
+        self.b = 0.75
+
+    def estimate_tokens(self, text: str) -> int:
+        return int(math.ceil(len(text) / self.chars_per_token))
+
+    def split_passages(self, text: str) -> List[str]:
+        """Divide em passagens de até ``passage_chars`` respeitando parágrafos e frases"""
+        passages: List[str] = []
+        current = ''
+
+        for paragraph in _PARAGRAPH_SPLIT.split(text or ''):
+            paragraph = ' '.join(paragraph.split())
+            if not paragraph:
+                continue
+
+            pieces = [paragraph]
+            if len(paragraph) > self.passage_chars:
+                pieces = []
+                sentence_group = ''
+                for sentence in _SENTENCE_SPLIT.split(paragraph):
+                    if sentence_group and len(sentence_group) + len(sentence) + 1 > self.passage_chars:
+                        pieces.append(sentence_group)
+                        sentence_group = ''
+                    sentence_group = f"{sentence_group} {sentence}".strip()
+                if sentence_group:
+                    pieces.append(sentence_group)
+
+            for piece in pieces:
+                if current and len(current) + len(piece) + 1 > self.passage_chars:
+                    passages.append(current)
+                    current = ''
+                current = f"{current} {piece}".strip()
+
+        if current:
+            passages.append(current)
+
+        return [passage[:self.passage_chars * 2] for passage in passages if len(passage) >= self.min_passage_chars]
+
+    @staticmethod
+    def _shingles(tokens: List[str]) -> frozenset:
+        return frozenset(' '.join(tokens[i:i + 3]) for i in range(max(len(tokens) - 2, 1)))
+
+    def _bm25_scores(self, query_terms: List[str], documents: List[List[str]]) -> List[float]:
+        """BM25 de cada passagem contra a consulta"""
+        total = len(documents)
+        if not total or not query_terms:
+            return [0.0] * total
+
+        avg_length = sum(len(doc) for doc in documents) / total or 1.0
+        frequencies = [Counter(doc) for doc in documents]
+        document_frequency = Counter(term for counts in frequencies for term in counts)
+        query = Counter(query_terms)
+
+        scores = []
+        for doc, counts in zip(documents, frequencies):
+            length_norm = self.k1 * (1 - self.b + self.b * len(doc) / avg_length)
+            score = 0.0
+            for term, query_count in query.items():
+                tf = counts.get(term)
+                if not tf:
+                    continue
+                idf = math.log(1 + (total - document_frequency[term] + 0.5) / (document_frequency[term] + 0.5))
+                score += query_count * idf * tf * (self.k1 + 1) / (tf + length_norm)
+            scores.append(score)
+        return scores
+
+    def build(self, query: str, sources: List[Dict[str, Any]], token_budget: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Seleciona as passagens mais relevantes das fontes dentro do orçamento
+
+        Args:
+            query: Texto da consulta (segmento, produto, público...)
+            sources: Itens com 'title', 'url', 'content' e opcionalmente 'relevance_score'
+            token_budget: Limite de tokens do contexto (padrão CONTEXT_TOKEN_BUDGET)
+
+        Returns:
+            Dict com 'context' (texto), 'passages' (selecionadas, com fonte) e 'stats'
+        """
+        budget = token_budget or self.token_budget
+
+        passages: List[Dict[str, Any]] = []
+        seen_hashes = set()
+        exact_duplicates = 0
+        original_chars = 0
+
+        for source_index, source in enumerate(sources):
+            content = source.get('content') or ''
+            original_chars += len(content)
+            for position, text in enumerate(self.split_passages(content)):
+                digest = hashlib.md5(normalize(' '.join(text.split())).encode('utf-8')).hexdigest()
+                if digest in seen_hashes:
+                    exact_duplicates += 1
+                    continue
+                seen_hashes.add(digest)
+                tokens = tokenize(text)
+                if not tokens:
+                    continue
+                passages.append({
+                    'source': source_index,
+                    'position': position,
+                    'text': text,
+                    'tokens': tokens
+                })
+
+        scores = self._bm25_scores(tokenize(query), [passage['tokens'] for passage in passages])
+        for passage, score in zip(passages, scores):
+            relevance = float(sources[passage['source']].get('relevance_score') or 0.0)
+            # Relevância da fonte desempata; passagens do início da página ganham leve vantagem
+            passage['score'] = score * (1 + 0.1 * relevance) + 0.01 / (1 + passage['position'])
+
+        ranked = sorted(passages, key=lambda passage: passage['score'], reverse=True)
+
+        selected: List[Dict[str, Any]] = []
+        selected_shingles: List[frozenset] = []
+        per_source: Counter = Counter()
+        near_duplicates = 0
+        used_tokens = 0
+
+        for passage in ranked:
+            if per_source[passage['source']] >= self.max_passages_per_source:
+                continue
+
+            shingles = self._shingles(passage['tokens'])
+            if any(
+                len(shingles & other) / (len(shingles | other) or 1) >= self.duplicate_threshold
+                for other in selected_shingles
+            ):
+                near_duplicates += 1
+                continue
+
+            cost = self.estimate_tokens(passage['text']) + 2
+            if not per_source[passage['source']]:
+                source = sources[passage['source']]
+                cost += self.estimate_tokens(f"--- FONTE {passage['source'] + 1}: {source.get('title', '')} ---\nURL: {source.get('url', '')}\n")
+            if used_tokens + cost > budget:
+                continue
+
+            used_tokens += cost
+            per_source[passage['source']] += 1
+            selected.append(passage)
+            selected_shingles.append(shingles)
+
+        context = self._render(sources, selected)
+
+        stats = {
+            'sources': len(sources),
+            'sources_used': len(per_source),
+            'passages_total': len(passages),
+            'passages_selected': len(selected),
+            'exact_duplicates': exact_duplicates,
+            'near_duplicates': near_duplicates,
+            'original_tokens': int(math.ceil(original_chars / self.chars_per_token)),
+            'context_tokens': self.estimate_tokens(context),
+            'token_budget': budget
+        }
+        logger.info(
+            f"📉 Contexto comprimido: {stats['passages_selected']}/{stats['passages_total']} passagens de "
+            f"{stats['sources_used']} fontes, ~{stats['context_tokens']:,} tokens (de ~{stats['original_tokens']:,})"
+        )
+
+        return {
+            'context': context,
+            'passages': [
+                {
+                    'source_index': passage['source'] + 1,
+                    'title': sources[passage['source']].get('title', ''),
+                    'url': sources[passage['source']].get('url', ''),
+                    'score': round(passage['score'], 4),
+                    'text': passage['text']
+                }
+                for passage in selected
+            ],
+            'stats': stats
+        }
+
+    @staticmethod
+    def _render(sources: List[Dict[str, Any]], selected: List[Dict[str, Any]]) -> str:
+        """Agrupa as passagens por fonte (na ordem das fontes) e na ordem da página"""
+        by_source: Dict[int, List[Dict[str, Any]]] = {}
+        for passage in selected:
+            by_source.setdefault(passage['source'], []).append(passage)
+
+        blocks = []
+        for source_index in sorted(by_source):
+            source = sources[source_index]
+            lines = [
+                f"--- FONTE {source_index + 1}: {source.get('title', '')} ---",
+                f"URL: {source.get('url', '')}"
+            ]
+            for passage in sorted(by_source[source_index], key=lambda item: item['position']):
+                lines.append(f"• {passage['text']}")
+            blocks.append('\n'.join(lines))
+
+        return '\n\n'.join(blocks)
+
+
+# Instância global
+research_context_builder = ResearchContextBuilder()
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Crawl Scheduler
+Agendamento de downloads com fila por host, intervalo mínimo por host e limite global
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+from services.concurrency_limiter import HostConcurrencyLimiter
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlScheduler:
+    """Executa downloads de páginas sendo educado com cada site
+
+    Cada host tem sua própria fila: no máximo um download por host por vez,
+    com CRAWL_HOST_MIN_INTERVAL segundos entre inícios. Hosts diferentes
+    rodam em paralelo até CRAWL_MAX_CONCURRENCY. Respostas 429/503 informadas
+    via ``observe`` adiam o host pelo Retry-After (ou CRAWL_THROTTLE_BACKOFF)
+    e a URL volta para a fila. Os intervalos valem entre execuções do mesmo
+    processo, então pesquisas simultâneas também não sobrecarregam um site.
+    Tarefas que buscam a página por outro host (proxy de leitura como o Jina)
+    reservam esse host com ``slot``.
+    """
+
+    def __init__(self):
+        self.max_concurrency = int(os.getenv('CRAWL_MAX_CONCURRENCY', 8))
+        self.min_interval = float(os.getenv('CRAWL_HOST_MIN_INTERVAL', 1.0))
+        self.throttle_backoff = float(os.getenv('CRAWL_THROTTLE_BACKOFF', 10))
+        self.max_retry_after = float(os.getenv('CRAWL_MAX_RETRY_AFTER', 120))
+        self.max_retries = int(os.getenv('CRAWL_MAX_RETRIES', 1))
+
+        self._lock = threading.Lock()
+        self._next_allowed: Dict[str, float] = {}
+        self._gates: Dict[str, threading.BoundedSemaphore] = {}
+        self._local = threading.local()
+        self.stats = {'tasks': 0, 'errors': 0, 'throttled': 0, 'retries': 0, 'runs': 0, 'slots': 0, 'slots_skipped': 0}
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        return HostConcurrencyLimiter.host_of(url)
+
+    def _retry_after_seconds(self, value: Optional[str]) -> float:
+        """Retry-After em segundos ou data HTTP; padrão CRAWL_THROTTLE_BACKOFF"""
+        seconds = self.throttle_backoff
+        if value:
+            value = value.strip()
+            if value.isdigit():
+                seconds = float(value)
+            else:
+                try:
+                    seconds = parsedate_to_datetime(value).timestamp() - time.time()
+                except (TypeError, ValueError, IndexError):
+                    pass
+        return min(max(seconds, self.min_interval), self.max_retry_after)
+
+    def observe(self, url: str, response: Any, retry: bool = True):
+        """
+        Registra a resposta de um download; 429/503 adiam o host
+
+        Com ``retry`` a URL da tarefa volta para a fila; use False quando a
+        tarefa já tem outro caminho (ex.: proxy limitado, extração direta).
+        """
+        status = getattr(response, 'status_code', None)
+        if status not in (429, 503):
+            return
+        if status == 503 and not response.headers.get('Retry-After'):
+            return
+
+        delay = self._retry_after_seconds(response.headers.get('Retry-After'))
+        host = self.host_of(url)
+        with self._lock:
+            self._next_allowed[host] = max(self._next_allowed.get(host, 0.0), time.monotonic() + delay)
+            self.stats['throttled'] += 1
+        if retry:
+            self._local.throttled = True
+        logger.warning(f"🐢 {host} pediu para desacelerar ({status}): próximo acesso em {delay:.0f}s")
+
+    def _ready_at(self, host: str) -> float:
+        with self._lock:
+            return self._next_allowed.get(host, 0.0)
+
+    def _claim(self, host: str) -> bool:
+        """Reserva o próximo início do host se já liberado"""
+        now = time.monotonic()
+        with self._lock:
+            if self._next_allowed.get(host, 0.0) > now:
+                return False
+            self._next_allowed[host] = now + self.min_interval
+            self.stats['tasks'] += 1
+            return True
+
+    @contextmanager
+    def slot(
+        self,
+        url: str,
+        min_interval: Optional[float] = None,
+        concurrency: int = 1,
+        max_wait: Optional[float] = None
+    ) -> Iterator[bool]:
+        """
+        Reserva o host de ``url`` para uma chamada feita de dentro de uma tarefa
+
+        ``run`` agenda pelo host da página; quando a tarefa a busca por outro
+        host (ex.: r.jina.ai), as chamadas a ele passam por aqui: no máximo
+        ``concurrency`` simultâneas, inícios espaçados por ``min_interval`` e
+        Retry-After informado via ``observe`` respeitado. Entrega False se a
+        vaga não sair em ``max_wait`` segundos (padrão CRAWL_MAX_RETRY_AFTER).
+        """
+        host = self.host_of(url)
+        interval = self.min_interval if min_interval is None else min_interval
+        max_wait = self.max_retry_after if max_wait is None else max_wait
+        deadline = time.monotonic() + max_wait
+
+        with self._lock:
+            gate = self._gates.setdefault(host, threading.BoundedSemaphore(max(concurrency, 1)))
+
+        held = gate.acquire(timeout=max_wait)
+        try:
+            acquired = held and self._wait_turn(host, interval, deadline)
+            with self._lock:
+                self.stats['slots' if acquired else 'slots_skipped'] += 1
+            if not acquired:
+                logger.warning(f"🐢 {host} indisponível por mais de {max_wait:.0f}s, seguindo sem ele")
+            yield acquired
+        finally:
+            if held:
+                gate.release()
+
+    def _wait_turn(self, host: str, interval: float, deadline: float) -> bool:
+        """Espera o próximo início liberado do host e o reserva (False após ``deadline``)"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                ready_at = self._next_allowed.get(host, 0.0)
+                if ready_at <= now:
+                    self._next_allowed[host] = now + interval
+                    return True
+            if ready_at > deadline:
+                return False
+            time.sleep(ready_at - now)
+
+    def _execute(self, fn: Callable[[str], Any], url: str):
+        """Roda a tarefa na thread do pool; retorna (resultado, foi limitada)"""
+        self._local.throttled = False
+        try:
+            return fn(url), self._local.throttled
+        except Exception as e:
+            with self._lock:
+                self.stats['errors'] += 1
+            logger.error(f"❌ Erro no download agendado de {url}: {e}")
+            return None, self._local.throttled
+
+    def run(
+        self,
+        fn: Callable[[str], Any],
+        urls: List[str],
+        max_concurrency: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Executa ``fn(url)`` para cada URL respeitando os limites por host
+
+        Args:
+            fn: Função de download/extração (chame ``observe`` com a resposta HTTP)
+            urls: URLs a processar (duplicadas são processadas uma vez)
+            max_concurrency: Limite global de downloads simultâneos desta execução
+
+        Returns:
+            Dict: URL -> resultado de ``fn`` (None em caso de erro)
+        """
+        queues: 'OrderedDict[str, Deque[str]]' = OrderedDict()
+        for url in dict.fromkeys(url for url in urls if url):
+            queues.setdefault(self.host_of(url), deque()).append(url)
+        if not queues:
+            return {}
+
+        cap = max(1, min(max_concurrency or self.max_concurrency, sum(len(queue) for queue in queues.values())))
+        results: Dict[str, Any] = {}
+        attempts: Dict[str, int] = {}
+        in_flight: Dict[Any, tuple] = {}
+        active_hosts = set()
+        started = time.monotonic()
+
+        executor = ThreadPoolExecutor(max_workers=cap, thread_name_prefix='crawl')
+        try:
+            while queues or in_flight:
+                # Dispara um download por host liberado, até o limite global
+                for host in list(queues):
+                    if len(in_flight) >= cap:
+                        break
+                    if host in active_hosts or not self._claim(host):
+                        continue
+                    url = queues[host].popleft()
+                    if not queues[host]:
+                        del queues[host]
+                    active_hosts.add(host)
+                    in_flight[executor.submit(self._execute, fn, url)] = (host, url)
+
+                if not in_flight:
+                    # Todos os hosts pendentes estão no intervalo: espera o primeiro liberar
+                    delay = min(self._ready_at(host) for host in queues) - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                    continue
+
+                waiting = [host for host in queues if host not in active_hosts]
+                timeout = None
+                if waiting and len(in_flight) < cap:
+                    timeout = max(0.0, min(self._ready_at(host) for host in waiting) - time.monotonic())
+
+                done, _ = wait(list(in_flight), timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    host, url = in_flight.pop(future)
+                    active_hosts.discard(host)
+                    result, throttled = future.result()
+
+                    if throttled and attempts.get(url, 0) < self.max_retries:
+                        # Host pediu para esperar: a URL volta para o fim da fila dele
+                        attempts[url] = attempts.get(url, 0) + 1
+                        queues.setdefault(host, deque()).append(url)
+                        with self._lock:
+                            self.stats['retries'] += 1
+                        continue
+
+                    results[url] = result
+        finally:
+            for future in in_flight:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+        elapsed = time.monotonic() - started
+        with self._lock:
+            self.stats['runs'] += 1
+            # Hosts já liberados não precisam mais de registro
+            now = time.monotonic()
+            for host in [host for host, ready_at in self._next_allowed.items() if ready_at <= now]:
+                del self._next_allowed[host]
+        logger.info(f"🗓️ {len(results)} URLs de {len({self.host_of(url) for url in results})} hosts em {elapsed:.2f}s (até {cap} simultâneas)")
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            now = time.monotonic()
+            stats['hosts_throttled'] = sum(1 for ready_at in self._next_allowed.values() if ready_at - now > self.min_interval)
+        stats['max_concurrency'] = self.max_concurrency
+        stats['min_interval'] = self.min_interval
+        return stats
+
+
+# Instância global
+crawl_scheduler = CrawlScheduler()
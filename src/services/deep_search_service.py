@@ -8,12 +8,14 @@ Pesquisa avançada REAL na internet - SEM SIMULAÇÃO OU CACHE
 import os
 import logging
 import time
-import requests
 from typing import Dict, List, Optional, Any
 from urllib.parse import quote_plus
 import json
 from datetime import datetime
 from bs4 import BeautifulSoup
+from services.fetch_engine import fetch_engine
+from services.near_duplicate import near_duplicate_detector
+from services.crawl_scheduler import crawl_scheduler
 import re
 
 logger = logging.getLogger(__name__)
@@ -30,6 +32,10 @@ class DeepSearchService:
         # URLs das APIs REAIS
         self.google_search_url = "https://www.googleapis.com/customsearch/v1"
         self.jina_reader_url = "https://r.jina.ai/"
+        # Todas as páginas passam pelo mesmo host do Jina: limite e espaçamento próprios
+        self.jina_max_concurrency = int(os.getenv('JINA_MAX_CONCURRENCY', 1))
+        self.jina_min_interval = float(os.getenv('JINA_MIN_INTERVAL', 0.5))
+        self.jina_max_wait = float(os.getenv('JINA_MAX_WAIT', 30))
         
         # Headers REAIS para requisições
         self.headers = {
@@ -63,27 +69,30 @@ class DeepSearchService:
                 logger.info("🌐 Executando Google Custom Search REAL...")
                 google_results = self._google_search_real(query, max_results // 2)
                 search_results.extend(google_results)
-                time.sleep(1)  # Rate limiting
             
             # 2. BUSCA REAL COM BING
             logger.info("🔍 Executando Bing Search REAL...")
             bing_results = self._bing_search_real(query, max_results // 3)
             search_results.extend(bing_results)
-            time.sleep(1)
             
             # 3. BUSCA REAL COM DUCKDUCKGO
             logger.info("🦆 Executando DuckDuckGo Search REAL...")
             ddg_results = self._duckduckgo_search_real(query, max_results // 3)
             search_results.extend(ddg_results)
-            time.sleep(1)
             
             # 4. EXTRAI CONTEÚDO REAL DAS PÁGINAS ENCONTRADAS
+            # Hosts diferentes em paralelo; cada host respeita intervalo mínimo e Retry-After
             content_results = []
-            logger.info(f"📄 Extraindo conteúdo REAL de {len(search_results)} páginas...")
+            top_results = search_results[:15]  # Top 15 páginas
+            logger.info(f"📄 Extraindo conteúdo REAL de {len(top_results)} páginas...")
             
-            for i, result in enumerate(search_results[:15]):  # Top 15 páginas
-                logger.info(f"📖 Extraindo página {i+1}/15: {result.get('title', 'Sem título')}")
-                content = self._extract_real_page_content(result.get('url', ''))
+            page_contents = crawl_scheduler.run(
+                self._extract_real_page_content,
+                [result.get('url', '') for result in top_results]
+            )
+            
+            for result in top_results:
+                content = page_contents.get(result.get('url', ''))
                 if content and len(content) > 200:  # Só conteúdo substancial
                     content_results.append({
                         'title': result.get('title', ''),
@@ -92,8 +101,10 @@ class DeepSearchService:
                         'relevance_score': self._calculate_real_relevance(content, query, context_data),
                         'source_engine': result.get('source', 'unknown')
                     })
-                    time.sleep(0.5)  # Rate limiting
             
+            # Remove páginas quase idênticas (matérias replicadas)
+            content_results, _ = near_duplicate_detector.deduplicate(content_results)
+
             # 5. PROCESSA COM ANÁLISE REAL
             processed_content = self._process_real_content(query, context_data, content_results)
             
@@ -125,7 +136,7 @@ class DeepSearchService:
                 'sort': 'date'
             }
             
-            response = requests.get(
+            response = fetch_engine.get(
                 self.google_search_url, 
                 params=params, 
                 headers=self.headers,
@@ -160,7 +171,7 @@ class DeepSearchService:
         try:
             search_url = f"https://www.bing.com/search?q={quote_plus(query)}&cc=br&setlang=pt-br&count={max_results}"
             
-            response = requests.get(
+            response = fetch_engine.get(
                 search_url,
                 headers=self.headers,
                 timeout=15
@@ -205,7 +216,7 @@ class DeepSearchService:
         try:
             search_url = f"https://html.duckduckgo.com/html/?q={quote_plus(query)}"
             
-            response = requests.get(
+            response = fetch_engine.get(
                 search_url,
                 headers=self.headers,
                 timeout=15
@@ -272,11 +283,22 @@ class DeepSearchService:
             
             jina_url = f"{self.jina_reader_url}{url}"
             
-            response = requests.get(
+            # O scheduler enfileira pelo host da página; o host contatado é o do Jina
+            with crawl_scheduler.slot(
                 jina_url,
-                headers=headers,
-                timeout=30
-            )
+                min_interval=self.jina_min_interval,
+                concurrency=self.jina_max_concurrency,
+                max_wait=self.jina_max_wait
+            ) as acquired:
+                if not acquired:
+                    return None
+                response = fetch_engine.get(
+                    jina_url,
+                    headers=headers,
+                    timeout=30
+                )
+            # 429 adia o Jina para todas as tarefas; esta segue pela extração direta
+            crawl_scheduler.observe(jina_url, response, retry=False)
             
             if response.status_code == 200:
                 content = response.text
@@ -295,15 +317,16 @@ class DeepSearchService:
             return None
     
     def _extract_direct_real(self, url: str) -> Optional[str]:
-        """Extração REAL direta usando requests + BeautifulSoup"""
+        """Extração REAL direta usando fetch engine + BeautifulSoup"""
         
         try:
-            response = requests.get(
+            response = fetch_engine.get(
                 url,
                 headers=self.headers,
                 timeout=20,
                 allow_redirects=True
             )
+            crawl_scheduler.observe(url, response)
             
             if response.status_code == 200:
                 soup = BeautifulSoup(response.content, "html.parser")
@@ -7,9 +7,9 @@ Cliente para integração com DeepSeek API para análise complementar
 
 import os
 import logging
-import requests
 import json
 from typing import Optional, Dict, Any
+from services.provider_clients import provider_clients
 
 logger = logging.getLogger(__name__)
 
@@ -65,7 +65,8 @@ class DeepSeekClient:
                 "stream": False
             }
             
-            response = requests.post(
+            response = provider_clients.post(
+                'deepseek',
                 f"{self.base_url}/chat/completions",
                 headers=self.headers,
                 json=payload,
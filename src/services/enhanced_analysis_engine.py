@@ -603,7 +603,7 @@ CRÍTICO: Use APENAS dados REAIS da pesquisa fornecida. NUNCA invente ou simule
         search_status = production_search_manager.get_provider_status()
         
         available_ai = len([p for p in ai_status.values() if p['available']])
-        available_search = len([p for p in search_status.values() if p['available']])
+        available_search = len([p for p in search_status.values() if p['enabled']])
         
         insights.append(f"🤖 Sistema Robusto: {available_ai} provedores de IA e {available_search} provedores de busca disponíveis com fallback automático")
         
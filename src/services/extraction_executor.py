@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Extraction Executor
+Pool de processos opcional para a extração de HTML (trafilatura, readability, newspaper)
+"""
+
+import os
+import time
+import atexit
+import logging
+import threading
+import multiprocessing
+from typing import Any, Dict, List, Optional
+
+from services.html_extractors import run_cascade
+
+logger = logging.getLogger(__name__)
+
+_WARMUP_HTML = (
+    "<html><head><title>aquecimento</title></head><body><article><p>"
+    + "O mercado de marketing digital cresce com dados de pesquisa e análise de tendências. " * 20
+    + "</p></article></body></html>"
+)
+
+
+class _PoolRestarted(Exception):
+    """O pool foi reiniciado por outra thread enquanto a tarefa esperava"""
+
+
+def _default_workers() -> int:
+    """Núcleos da máquina divididos entre os workers do gunicorn (mínimo 1)"""
+    cpus = os.cpu_count() or 1
+    web_workers = int(os.getenv('GUNICORN_WORKERS', cpus * 2 + 1))
+    return max(1, cpus // max(web_workers, 1))
+
+
+def _warm_worker():
+    """Inicializador dos processos: importa os extratores e roda uma extração de aquecimento"""
+    logging.getLogger('services.html_extractors').setLevel(logging.ERROR)
+    try:
+        run_cascade(_WARMUP_HTML, 'https://warmup.local/', ['trafilatura', 'readability', 'newspaper', 'beautifulsoup'], 0, 1000)
+    except Exception:
+        pass
+
+
+class ExtractionExecutor:
+    """Executa a cascata de extratores em processos separados
+
+    O download continua na thread que chamou; só o HTML bruto vai para o pool,
+    então enquanto um processo analisa uma página a thread seguinte já está
+    baixando outra, e a análise (CPU pura) deixa de disputar a GIL do worker.
+    Os processos são recriados após ``max_tasks_per_child`` extrações para
+    devolver a memória acumulada pelas bibliotecas de parsing. Cada worker do
+    gunicorn tem seu pool, então o padrão de processos divide os núcleos entre
+    os workers; uma tarefa que estoura o tempo derruba o pool (o processo
+    travado não volta sozinho) e o próximo uso cria outro.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv('EXTRACTION_PROCESS_POOL', 'false').lower() == 'true'
+        self.workers = int(os.getenv('EXTRACTION_PROCESS_WORKERS', _default_workers()))
+        self.max_tasks_per_child = int(os.getenv('EXTRACTION_MAX_TASKS_PER_CHILD', 200))
+        self.task_timeout = float(os.getenv('EXTRACTION_TASK_TIMEOUT', 60))
+        self.start_method = os.getenv('EXTRACTION_START_METHOD', 'spawn')
+
+        self._pool = None
+        self._pool_pid: Optional[int] = None
+        self._pool_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats = {'process_tasks': 0, 'inline_tasks': 0, 'timeouts': 0, 'pool_errors': 0, 'pools_started': 0, 'restarted_tasks': 0}
+
+        atexit.register(self.shutdown)
+
+        if self.enabled:
+            logger.info(f"🧵 Extraction Executor: pool de {self.workers} processos (recicla a cada {self.max_tasks_per_child} tarefas)")
+
+    def _get_pool(self):
+        """Pool do worker atual (criado sob demanda e recriado após fork)"""
+        with self._pool_lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                context = multiprocessing.get_context(self.start_method)
+                self._pool = context.Pool(
+                    processes=self.workers,
+                    initializer=_warm_worker,
+                    maxtasksperchild=self.max_tasks_per_child
+                )
+                self._pool_pid = os.getpid()
+                with self._stats_lock:
+                    self.stats['pools_started'] += 1
+                logger.info(f"🧵 Pool de extração iniciado: {self.workers} processos ({self.start_method})")
+            return self._pool
+
+    def shutdown(self, pool=None):
+        """Encerra o pool deste worker (se informado, só se ainda for ``pool``)"""
+        with self._pool_lock:
+            if pool is not None and self._pool is not pool:
+                return
+            if self._pool is not None and self._pool_pid == os.getpid():
+                self._pool.terminate()
+            self._pool = None
+            self._pool_pid = None
+
+    def _record(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _wait(self, pool, result) -> Dict[str, Any]:
+        """Aguarda o resultado até ``task_timeout``, desistindo se o pool for reiniciado"""
+        deadline = time.monotonic() + self.task_timeout
+        while not result.ready():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise multiprocessing.TimeoutError()
+            if self._pool is not pool:
+                raise _PoolRestarted()
+            result.wait(min(remaining, 0.5))
+        return result.get()
+
+    def run(self, html: str, url: str, order: List[str], min_length: int, max_length: int) -> Dict[str, Any]:
+        """
+        Roda a cascata de extratores (ver html_extractors.run_cascade)
+
+        No pool quando habilitado; no processo atual se desabilitado ou se o pool
+        falhar. Uma página que estoura ``task_timeout`` não é reprocessada.
+        """
+        if self.enabled:
+            pool = None
+            try:
+                pool = self._get_pool()
+                result = pool.apply_async(run_cascade, (html, url, order, min_length, max_length))
+                outcome = self._wait(pool, result)
+                self._record('process_tasks')
+                return outcome
+            except multiprocessing.TimeoutError:
+                self._record('timeouts')
+                logger.error(f"⏱️ Extração de {url} excedeu {self.task_timeout:.0f}s no pool de processos, reiniciando o pool")
+                self.shutdown(pool)
+                return {'content': None, 'extractor': None, 'attempts': [], 'error': 'extraction_timeout'}
+            except _PoolRestarted:
+                self._record('restarted_tasks')
+                logger.warning(f"♻️ Pool de extração reiniciado durante {url}, extraindo no processo atual")
+            except Exception as e:
+                self._record('pool_errors')
+                logger.warning(f"⚠️ Pool de extração falhou ({e}), extraindo no processo atual")
+                self.shutdown(pool)
+
+        self._record('inline_tasks')
+        return run_cascade(html, url, order, min_length, max_length)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats['enabled'] = self.enabled
+        stats['workers'] = self.workers
+        stats['max_tasks_per_child'] = self.max_tasks_per_child
+        return stats
+
+
+# Instância global
+extraction_executor = ExtractionExecutor()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Extractor Selector
+Ordem dos extratores aprendida por domínio, persistida em SQLite
+"""
+
+import os
+import time
+import logging
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+from services.concurrency_limiter import HostConcurrencyLimiter
+from services.shared_store import ThreadLocalSQLite
+
+logger = logging.getLogger(__name__)
+
+
+class DomainExtractorSelector:
+    """Aprende qual extrator funciona em cada domínio
+
+    Cada tentativa da cascata é registrada por host (sucesso/falha e latência
+    média móvel). Na próxima página do mesmo host, os extratores que já
+    venceram ali vêm primeiro, ordenados por taxa de sucesso e latência;
+    os nunca tentados seguem a ordem padrão e os que só falharam vão para
+    o fim. Hosts em que todos os extratores falham repetidamente ficam em
+    quarentena por EXTRACTOR_DOMAIN_COOLDOWN segundos.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.getenv('EXTRACTOR_SELECTOR_DB', os.path.join('cache', 'extractor_domains.db'))
+        self.enabled = os.getenv('EXTRACTOR_SELECTOR_ENABLED', 'true').lower() == 'true'
+        self.failure_threshold = int(os.getenv('EXTRACTOR_DOMAIN_FAILURE_THRESHOLD', 3))
+        self.cooldown = int(os.getenv('EXTRACTOR_DOMAIN_COOLDOWN', 3600))
+        self.min_failures_to_demote = int(os.getenv('EXTRACTOR_SELECTOR_MIN_FAILURES', 3))
+        self.max_samples = float(os.getenv('EXTRACTOR_SELECTOR_MAX_SAMPLES', 50))
+        self.latency_alpha = 0.3
+
+        self._db = ThreadLocalSQLite(self.db_path, sqlite3.Row)
+        self._lock = threading.Lock()
+        self.stats = {'reordered': 0, 'skipped': 0, 'recorded': 0, 'cooldowns': 0, 'errors': 0}
+
+        self._init_database()
+
+    def _init_database(self):
+        """Inicializa tabelas de desempenho por domínio"""
+        try:
+            conn = self._db.connection()
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS domain_extractors (
+                    host TEXT NOT NULL,
+                    extractor TEXT NOT NULL,
+                    successes REAL NOT NULL DEFAULT 0,
+                    failures REAL NOT NULL DEFAULT 0,
+                    avg_latency REAL NOT NULL DEFAULT 0,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (host, extractor)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS domain_failures (
+                    host TEXT PRIMARY KEY,
+                    consecutive_failures INTEGER NOT NULL DEFAULT 0,
+                    blocked_until REAL NOT NULL DEFAULT 0,
+                    updated_at REAL NOT NULL
+                )
+            """)
+        except Exception as e:
+            logger.error(f"Erro ao inicializar seletor de extratores: {e}")
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        return HostConcurrencyLimiter.host_of(url)
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def cooldown_remaining(self, url: str) -> float:
+        """Segundos restantes de quarentena do domínio (0 se liberado)"""
+        if not self.enabled:
+            return 0.0
+
+        try:
+            row = self._db.connection().execute(
+                "SELECT blocked_until FROM domain_failures WHERE host = ?", (self.host_of(url),)
+            ).fetchone()
+        except Exception as e:
+            self._count('errors')
+            logger.error(f"Erro ao consultar quarentena de domínio: {e}")
+            return 0.0
+
+        remaining = (row['blocked_until'] - time.time()) if row else 0.0
+        if remaining > 0:
+            self._count('skipped')
+            return remaining
+        return 0.0
+
+    def order_for(self, url: str, default_order: List[str]) -> List[str]:
+        """Ordem de extratores para a URL a partir do histórico do domínio"""
+        if not self.enabled or len(default_order) < 2:
+            return list(default_order)
+
+        try:
+            rows = self._db.connection().execute(
+                "SELECT extractor, successes, failures, avg_latency FROM domain_extractors WHERE host = ?",
+                (self.host_of(url),)
+            ).fetchall()
+        except Exception as e:
+            self._count('errors')
+            logger.error(f"Erro ao consultar histórico de extratores: {e}")
+            return list(default_order)
+
+        history = {row['extractor']: row for row in rows if row['extractor'] in default_order}
+        if not history:
+            return list(default_order)
+
+        winners = sorted(
+            (name for name, row in history.items() if row['successes'] > 0),
+            key=lambda name: (
+                -(history[name]['successes'] + 1) / (history[name]['successes'] + history[name]['failures'] + 2),
+                history[name]['avg_latency']
+            )
+        )
+        losers = [
+            name for name in default_order
+            if name in history and not history[name]['successes'] and history[name]['failures'] >= self.min_failures_to_demote
+        ]
+        untried = [name for name in default_order if name not in winners and name not in losers]
+        order = winners + untried + losers
+
+        if order != list(default_order):
+            self._count('reordered')
+        return order
+
+    def record(self, url: str, attempts: List[Dict[str, Any]]):
+        """
+        Registra o desfecho da cascata para o domínio
+
+        Args:
+            url: URL extraída
+            attempts: Tentativas da cascata ({'extractor', 'success', 'elapsed'})
+        """
+        if not self.enabled or not attempts:
+            return
+
+        host = self.host_of(url)
+        now = time.time()
+        succeeded = any(attempt['success'] for attempt in attempts)
+
+        try:
+            conn = self._db.connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for attempt in attempts:
+                    conn.execute("""
+                        INSERT INTO domain_extractors (host, extractor, successes, failures, avg_latency, updated_at)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                        ON CONFLICT(host, extractor) DO UPDATE SET
+                            successes = successes + excluded.successes,
+                            failures = failures + excluded.failures,
+                            avg_latency = avg_latency * ? + excluded.avg_latency * ?,
+                            updated_at = excluded.updated_at
+                    """, (host, attempt['extractor'], 1 if attempt['success'] else 0, 0 if attempt['success'] else 1,
+                          attempt.get('elapsed') or 0.0, now, 1 - self.latency_alpha, self.latency_alpha))
+
+                # Histórico limitado: o domínio pode mudar de layout
+                conn.execute("""
+                    UPDATE domain_extractors SET successes = successes / 2, failures = failures / 2
+                    WHERE host = ? AND successes + failures > ?
+                """, (host, self.max_samples))
+
+                if succeeded:
+                    conn.execute("DELETE FROM domain_failures WHERE host = ?", (host,))
+                    blocked = False
+                else:
+                    conn.execute("""
+                        INSERT INTO domain_failures (host, consecutive_failures, blocked_until, updated_at)
+                        VALUES (?, 1, 0, ?)
+                        ON CONFLICT(host) DO UPDATE SET
+                            consecutive_failures = consecutive_failures + 1,
+                            updated_at = excluded.updated_at
+                    """, (host, now))
+                    blocked = conn.execute("""
+                        UPDATE domain_failures SET blocked_until = ?
+                        WHERE host = ? AND consecutive_failures >= ?
+                    """, (now + self.cooldown, host, self.failure_threshold)).rowcount > 0
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        except Exception as e:
+            self._count('errors')
+            logger.error(f"Erro ao registrar desempenho de extratores: {e}")
+            return
+
+        self._count('recorded')
+        if blocked:
+            self._count('cooldowns')
+            logger.warning(f"🧊 Todos os extratores falham em {host}: domínio em quarentena por {self.cooldown}s")
+
+    def reset(self, url: Optional[str] = None):
+        """Esquece o histórico de um domínio (ou de todos)"""
+        conn = self._db.connection()
+        if url:
+            host = self.host_of(url)
+            conn.execute("DELETE FROM domain_extractors WHERE host = ?", (host,))
+            conn.execute("DELETE FROM domain_failures WHERE host = ?", (host,))
+        else:
+            conn.execute("DELETE FROM domain_extractors")
+            conn.execute("DELETE FROM domain_failures")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores e tamanho da tabela aprendida"""
+        with self._lock:
+            stats = dict(self.stats)
+
+        try:
+            conn = self._db.connection()
+            stats['domains'] = conn.execute("SELECT COUNT(DISTINCT host) FROM domain_extractors").fetchone()[0]
+            stats['domains_in_cooldown'] = conn.execute(
+                "SELECT COUNT(*) FROM domain_failures WHERE blocked_until > ?", (time.time(),)
+            ).fetchone()[0]
+        except Exception as e:
+            stats['error'] = str(e)
+
+        stats['enabled'] = self.enabled
+        stats['cooldown'] = self.cooldown
+        return stats
+
+
+# Instância global
+extractor_selector = DomainExtractorSelector()
@@ -0,0 +1,783 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Fetch Engine
+Motor HTTP assíncrono compartilhado (httpx) com fachada síncrona estilo requests
+"""
+
+import os
+import re
+import time
+import codecs
+import random
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from services.concurrency_limiter import HostConcurrencyLimiter
+
+logger = logging.getLogger(__name__)
+
+try:
+    import httpx
+    HAS_HTTPX = True
+except ImportError:
+    HAS_HTTPX = False
+
+try:
+    import h2  # noqa: F401 - habilita HTTP/2 no httpx
+    HAS_HTTP2 = True
+except ImportError:
+    HAS_HTTP2 = False
+
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+TimeoutType = Union[None, float, Tuple[float, float]]
+
+_META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w.:-]+)', re.IGNORECASE)
+
+# Páginas grandes demais ainda rendem texto útil no início: são lidas até o limite
+_TRUNCATABLE_TYPES = frozenset(['text/html', 'application/xhtml+xml'])
+
+
+class FetchError(requests.exceptions.RequestException):
+    """Falha de requisição do motor de fetch"""
+
+
+class FetchTimeout(FetchError, requests.exceptions.Timeout):
+    """Tempo esgotado (por tentativa ou orçamento total)"""
+
+
+class FetchConnectionError(FetchError, requests.exceptions.ConnectionError):
+    """Falha de conexão/rede"""
+
+
+class FetchHTTPError(FetchError, requests.exceptions.HTTPError):
+    """Status HTTP de erro em raise_for_status"""
+
+
+class FetchRejected(FetchError):
+    """Resposta recusada antes do download completo (tipo de conteúdo ou tamanho)"""
+
+    def __init__(self, message: str, reason: str, url: str = ''):
+        super().__init__(message)
+        self.reason = reason
+        self.url = url
+
+
+class FetchResponse:
+    """Resposta com a interface usada pelos serviços (subconjunto de requests.Response)"""
+
+    def __init__(
+        self,
+        url: str,
+        status_code: int,
+        headers: Any,
+        content: bytes,
+        encoding: Optional[str] = None,
+        http_version: str = 'HTTP/1.1',
+        elapsed: float = 0.0,
+        reason: str = '',
+        text: Optional[str] = None,
+        truncated: bool = False
+    ):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding
+        self.http_version = http_version
+        self.elapsed = elapsed
+        self.reason = reason
+        self.truncated = truncated
+        self._text: Optional[str] = text
+        self._text_encoding: Optional[str] = (encoding or 'utf-8') if text is not None else None
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        """Corpo decodificado (charset do header ou UTF-8)"""
+        encoding = self.encoding or 'utf-8'
+        if self._text is None or self._text_encoding != encoding:
+            try:
+                self._text = self.content.decode(encoding, errors='replace')
+            except LookupError:
+                self._text = self.content.decode('utf-8', errors='replace')
+            self._text_encoding = encoding
+        return self._text
+
+    def json(self, **kwargs) -> Any:
+        import json
+        return json.loads(self.text, **kwargs)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            kind = 'Client' if self.status_code < 500 else 'Server'
+            raise FetchHTTPError(
+                f"{self.status_code} {kind} Error: {self.reason} for url: {self.url}",
+                response=self
+            )
+
+    def __repr__(self) -> str:
+        return f"<FetchResponse [{self.status_code}]>"
+
+
+class _LimitedBodyReader:
+    """Leitura incremental do corpo com limite de bytes e decodificação progressiva
+
+    Confere Content-Type e Content-Length antes de ler qualquer byte: HTML
+    maior que o limite é lido só até ``max_bytes`` (truncado), outros tipos
+    são recusados. Sem charset no header, o encoding é detectado (BOM ou <meta charset>) apenas
+    nos primeiros ``sniff_bytes`` e o restante é decodificado à medida que chega.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        status_code: int,
+        headers: Any,
+        header_encoding: Optional[str],
+        max_bytes: Optional[int],
+        content_types: Optional[Tuple[str, ...]],
+        sniff_bytes: int
+    ):
+        self.url = url
+        self.max_bytes = max_bytes
+        self.sniff_bytes = sniff_bytes
+        self.encoding = header_encoding
+        self.truncated = False
+        self._chunks: List[bytes] = []
+        self._size = 0
+        self._parts: List[str] = []
+        self._decoder = None
+
+        # Tipo e tamanho só importam para respostas de sucesso com corpo
+        if 200 <= status_code < 300:
+            mime = (headers.get('Content-Type') or '').split(';')[0].strip().lower()
+            if content_types and mime and mime not in content_types:
+                raise FetchRejected(f"Tipo de conteúdo recusado ({mime}) para {url}", 'content_type', url)
+
+            declared = (headers.get('Content-Length') or '').strip()
+            if max_bytes and declared.isdigit() and int(declared) > max_bytes and mime not in _TRUNCATABLE_TYPES:
+                raise FetchRejected(f"Conteúdo grande demais ({int(declared):,} bytes) para {url}", 'too_large', url)
+
+    def feed(self, chunk: bytes) -> bool:
+        """Acumula um bloco; False quando o limite de bytes foi atingido"""
+        if self.max_bytes and self._size + len(chunk) > self.max_bytes:
+            chunk = chunk[:self.max_bytes - self._size]
+            self.truncated = True
+
+        if chunk:
+            self._chunks.append(chunk)
+            self._size += len(chunk)
+            if self._decoder is not None:
+                self._parts.append(self._decoder.decode(chunk))
+            elif self._size >= self.sniff_bytes:
+                self._start_decoder()
+
+        return not self.truncated
+
+    def _start_decoder(self):
+        head = b''.join(self._chunks)
+        if not self.encoding:
+            self.encoding = self._sniff(head[:self.sniff_bytes])
+        try:
+            self._decoder = codecs.getincrementaldecoder(self.encoding)(errors='replace')
+        except LookupError:
+            self.encoding = 'utf-8'
+            self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._parts.append(self._decoder.decode(head))
+
+    @staticmethod
+    def _sniff(head: bytes) -> str:
+        if head.startswith(codecs.BOM_UTF8):
+            return 'utf-8-sig'
+        match = _META_CHARSET.search(head)
+        if match:
+            candidate = match.group(1).decode('ascii', errors='ignore')
+            try:
+                return codecs.lookup(candidate).name
+            except LookupError:
+                pass
+        return 'utf-8'
+
+    def finish(self) -> Tuple[bytes, str]:
+        """Corpo lido e texto decodificado (bytes multibyte cortados pelo limite são descartados)"""
+        if self._decoder is None:
+            self._start_decoder()
+        if not self.truncated:
+            self._parts.append(self._decoder.decode(b'', final=True))
+        return b''.join(self._chunks), ''.join(self._parts)
+
+
+class FetchEngine:
+    """Motor HTTP compartilhado por todos os serviços de busca e extração
+
+    Com httpx instalado, as requisições rodam em um event loop dedicado
+    (uma thread por processo) com pool de conexões único, HTTP/2 quando
+    disponível e limite de conexões por host. Sem httpx, usa sessões
+    requests por thread com os mesmos limites, retries e orçamento de tempo.
+    """
+
+    def __init__(self):
+        self.max_connections = int(os.getenv('FETCH_MAX_CONNECTIONS', 200))
+        self.max_keepalive = int(os.getenv('FETCH_MAX_KEEPALIVE', 50))
+        self.max_per_host = int(os.getenv('FETCH_MAX_PER_HOST', 8))
+        self.default_timeout = float(os.getenv('FETCH_TIMEOUT', 30))
+        self.default_budget = float(os.getenv('FETCH_TIMEOUT_BUDGET', 0)) or None
+        self.max_retries = int(os.getenv('FETCH_MAX_RETRIES', 2))
+        self.backoff_base = float(os.getenv('FETCH_BACKOFF_BASE', 0.5))
+        self.retry_statuses = tuple(
+            int(code) for code in os.getenv('FETCH_RETRY_STATUSES', '502,503,504').split(',') if code.strip()
+        )
+        self.http2 = HAS_HTTP2 and os.getenv('FETCH_HTTP2', 'true').lower() == 'true'
+        self.use_async = HAS_HTTPX and os.getenv('FETCH_ASYNC_ENABLED', 'true').lower() == 'true'
+        self.sniff_bytes = int(os.getenv('FETCH_CHARSET_SNIFF_BYTES', 4096))
+        self.stream_chunk_size = int(os.getenv('FETCH_STREAM_CHUNK_SIZE', 16384))
+
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._clients: Dict[bool, Any] = {}
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+        # Fallback síncrono
+        self._local = threading.local()
+        self._limiter = HostConcurrencyLimiter(self.max_connections, self.max_per_host)
+        self._fallback_pool: Optional[ThreadPoolExecutor] = None
+
+        self.stats = {
+            'requests': 0,
+            'responses': 0,
+            'errors': 0,
+            'timeouts': 0,
+            'retries': 0,
+            'bytes_received': 0,
+            'rejected': 0,
+            'truncated': 0,
+            'in_flight': 0,
+            'http_versions': {}
+        }
+
+        backend = 'httpx' + (' (HTTP/2)' if self.http2 else '') if self.use_async else 'requests'
+        logger.info(f"🌐 Fetch Engine inicializado: {backend}, {self.max_connections} conexões, {self.max_per_host}/host")
+
+    # ------------------------------------------------------------------
+    # Fachada síncrona
+    # ------------------------------------------------------------------
+
+    def get(self, url: str, **kwargs) -> FetchResponse:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> FetchResponse:
+        return self.request('POST', url, **kwargs)
+
+    def head(self, url: str, **kwargs) -> FetchResponse:
+        kwargs.setdefault('allow_redirects', False)
+        return self.request('HEAD', url, **kwargs)
+
+    def request(self, method: str, url: str, **kwargs) -> FetchResponse:
+        """
+        Executa requisição bloqueando a thread chamadora
+
+        Args:
+            method: Método HTTP
+            url: URL
+            params, headers, data, json: Como em requests
+            timeout: Segundos por tentativa ou tupla (connect, read)
+            budget: Tempo total máximo incluindo retries e backoff
+            retries: Número de novas tentativas (padrão só para métodos idempotentes)
+            allow_redirects: Segue redirects
+            verify: Verifica certificado TLS
+            max_bytes: Lê o corpo em streaming e para após este número de bytes
+            content_types: Tipos MIME aceitos; outros são recusados antes do download
+
+        Raises:
+            FetchTimeout, FetchConnectionError, FetchRejected, FetchError (subclasses de requests.exceptions)
+        """
+        if not self.use_async:
+            return self._request_sync(method, url, **kwargs)
+
+        if threading.current_thread() is self._loop_thread:
+            raise RuntimeError("FetchEngine.request não pode ser chamado de dentro do event loop do motor")
+
+        return self.submit(method, url, **kwargs).result()
+
+    def submit(self, method: str, url: str, **kwargs) -> Future:
+        """Agenda requisição sem bloquear; retorna Future com FetchResponse"""
+        if not self.use_async:
+            return self._fallback_executor().submit(self._request_sync, method, url, **kwargs)
+
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(self.request_async(method, url, **kwargs), loop)
+
+    def fetch_many(
+        self,
+        requests_specs: List[Union[str, Dict[str, Any]]],
+        max_concurrency: Optional[int] = None,
+        **common_kwargs
+    ) -> List[Union[FetchResponse, Exception]]:
+        """
+        Executa muitas requisições simultâneas a partir de uma única thread
+
+        Args:
+            requests_specs: URLs ou dicts com url, method e demais argumentos de request
+            max_concurrency: Limite de requisições simultâneas deste lote
+
+        Returns:
+            Lista na mesma ordem com FetchResponse ou a exceção de cada requisição
+        """
+        specs = [
+            dict(common_kwargs, url=spec) if isinstance(spec, str) else dict(common_kwargs, **spec)
+            for spec in requests_specs
+        ]
+        if not specs:
+            return []
+
+        concurrency = max(1, min(max_concurrency or self.max_connections, len(specs)))
+
+        if not self.use_async:
+            executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='fetch-many')
+            try:
+                futures = [executor.submit(self._run_spec_sync, spec) for spec in specs]
+                return [self._future_outcome(future) for future in futures]
+            finally:
+                executor.shutdown(wait=True)
+
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(self._fetch_many_async(specs, concurrency), loop).result()
+
+    @staticmethod
+    def _future_outcome(future: Future) -> Union[FetchResponse, Exception]:
+        try:
+            return future.result()
+        except Exception as e:
+            return e
+
+    def _run_spec_sync(self, spec: Dict[str, Any]) -> FetchResponse:
+        spec = dict(spec)
+        return self._request_sync(spec.pop('method', 'GET'), spec.pop('url'), **spec)
+
+    # ------------------------------------------------------------------
+    # Núcleo assíncrono (httpx)
+    # ------------------------------------------------------------------
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Event loop dedicado por processo (recriado após fork)"""
+        if self._pid == os.getpid() and self._loop_thread and self._loop_thread.is_alive():
+            return self._loop
+
+        with self._lock:
+            if self._pid == os.getpid() and self._loop_thread and self._loop_thread.is_alive():
+                return self._loop
+
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            self._clients = {}
+            self._host_semaphores = {}
+            self._loop = loop
+            self._pid = os.getpid()
+            self._loop_thread = threading.Thread(target=run, name='fetch-engine-loop', daemon=True)
+            self._loop_thread.start()
+            ready.wait()
+
+            logger.info(f"🌐 Event loop do Fetch Engine iniciado no processo {self._pid}")
+            return loop
+
+    def _client(self, verify: bool):
+        """Cliente httpx por configuração de TLS (executa no event loop)"""
+        client = self._clients.get(verify)
+        if client is None:
+            client = httpx.AsyncClient(
+                http2=self.http2,
+                verify=verify,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive
+                ),
+                # Sem persistência de cookies entre requisições (como requests.get)
+                cookies=CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+            )
+            self._clients[verify] = client
+        return client
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        """Semáforo por host (executa no event loop)"""
+        host = HostConcurrencyLimiter.host_of(url)
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_per_host)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    async def request_async(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        data: Any = None,
+        json: Any = None,
+        timeout: TimeoutType = None,
+        budget: Optional[float] = None,
+        retries: Optional[int] = None,
+        allow_redirects: bool = True,
+        verify: bool = True,
+        max_bytes: Optional[int] = None,
+        content_types: Optional[Tuple[str, ...]] = None
+    ) -> FetchResponse:
+        """Requisição com retries, backoff e orçamento de tempo (corrotina do event loop do motor)"""
+        method = method.upper()
+        connect_timeout, read_timeout = self._split_timeout(timeout)
+        retries = self._retries_for(method, retries)
+        deadline = time.monotonic() + self._budget_for(read_timeout, budget)
+
+        body: Dict[str, Any] = {}
+        if json is not None:
+            body['json'] = json
+        elif isinstance(data, (str, bytes)):
+            body['content'] = data
+        elif data is not None:
+            body['data'] = data
+
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._count('timeouts')
+                raise FetchTimeout(f"Orçamento de tempo esgotado para {url}")
+
+            attempt_timeout = min(read_timeout, remaining)
+            self._begin_request()
+            start = time.monotonic()
+            try:
+                async with self._host_semaphore(url):
+                    client = self._client(verify)
+                    request = client.build_request(
+                        method,
+                        url,
+                        params=params,
+                        headers=headers,
+                        timeout=httpx.Timeout(attempt_timeout, connect=min(connect_timeout, attempt_timeout)),
+                        **body
+                    )
+                    response = await client.send(request, stream=True, follow_redirects=allow_redirects)
+                    try:
+                        if max_bytes or content_types:
+                            reader = _LimitedBodyReader(
+                                str(response.url), response.status_code, response.headers,
+                                response.charset_encoding, max_bytes, content_types, self.sniff_bytes
+                            )
+                            async for chunk in response.aiter_bytes(self.stream_chunk_size):
+                                if not reader.feed(chunk):
+                                    break
+                            content, text = reader.finish()
+                            encoding, truncated = reader.encoding, reader.truncated
+                        else:
+                            content = await response.aread()
+                            text, encoding, truncated = None, response.charset_encoding, False
+                    finally:
+                        await response.aclose()
+                error = None
+            except FetchRejected:
+                self._end_request(rejected=True)
+                raise
+            except httpx.TimeoutException as e:
+                error = FetchTimeout(f"Timeout em {url}: {e}")
+            except (httpx.TooManyRedirects, httpx.InvalidURL, httpx.UnsupportedProtocol) as e:
+                self._end_request(error=True)
+                raise FetchError(f"Requisição inválida para {url}: {e}")
+            except httpx.HTTPError as e:
+                error = FetchConnectionError(f"Erro de conexão em {url}: {e}")
+            finally:
+                elapsed = time.monotonic() - start
+
+            if error is None:
+                wrapped = FetchResponse(
+                    url=str(response.url),
+                    status_code=response.status_code,
+                    headers=response.headers,
+                    content=content,
+                    encoding=encoding,
+                    http_version=response.http_version,
+                    elapsed=elapsed,
+                    reason=response.reason_phrase,
+                    text=text,
+                    truncated=truncated
+                )
+                self._end_request(response=wrapped)
+                delay = self._retry_delay(wrapped, attempt, retries, deadline)
+                if delay is None:
+                    return wrapped
+            else:
+                self._end_request(error=True, timeout=isinstance(error, FetchTimeout))
+                delay = self._retry_delay(None, attempt, retries, deadline)
+                if delay is None:
+                    raise error
+
+            self._count('retries')
+            logger.debug(f"🔁 Nova tentativa {attempt + 1}/{retries} para {url} em {delay:.2f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _fetch_many_async(self, specs: List[Dict[str, Any]], concurrency: int) -> List[Union[FetchResponse, Exception]]:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(spec: Dict[str, Any]) -> FetchResponse:
+            spec = dict(spec)
+            async with semaphore:
+                return await self.request_async(spec.pop('method', 'GET'), spec.pop('url'), **spec)
+
+        return await asyncio.gather(*(run(spec) for spec in specs), return_exceptions=True)
+
+    # ------------------------------------------------------------------
+    # Fallback síncrono (requests)
+    # ------------------------------------------------------------------
+
+    def _session(self) -> requests.Session:
+        """Sessão requests por thread com pool dimensionado"""
+        session = getattr(self._local, 'session', None)
+        if session is None or getattr(self._local, 'pid', None) != os.getpid():
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.max_per_host * 4, pool_maxsize=self.max_per_host)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+            self._local.session = session
+            self._local.pid = os.getpid()
+        return session
+
+    def _fallback_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._fallback_pool is None or self._pid != os.getpid():
+                self._fallback_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix='fetch-engine')
+                self._pid = os.getpid()
+            return self._fallback_pool
+
+    def _request_sync(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        data: Any = None,
+        json: Any = None,
+        timeout: TimeoutType = None,
+        budget: Optional[float] = None,
+        retries: Optional[int] = None,
+        allow_redirects: bool = True,
+        verify: bool = True,
+        max_bytes: Optional[int] = None,
+        content_types: Optional[Tuple[str, ...]] = None
+    ) -> FetchResponse:
+        method = method.upper()
+        connect_timeout, read_timeout = self._split_timeout(timeout)
+        retries = self._retries_for(method, retries)
+        deadline = time.monotonic() + self._budget_for(read_timeout, budget)
+
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._count('timeouts')
+                raise FetchTimeout(f"Orçamento de tempo esgotado para {url}")
+
+            attempt_timeout = min(read_timeout, remaining)
+            self._begin_request()
+            start = time.monotonic()
+            try:
+                with self._limiter.slot(url, timeout=remaining):
+                    response = self._session().request(
+                        method,
+                        url,
+                        params=params,
+                        headers=headers,
+                        data=data,
+                        json=json,
+                        timeout=(min(connect_timeout, attempt_timeout), attempt_timeout),
+                        allow_redirects=allow_redirects,
+                        verify=verify,
+                        stream=True
+                    )
+                    try:
+                        header_encoding = requests.utils.get_encoding_from_headers(response.headers) \
+                            if 'charset' in response.headers.get('Content-Type', '').lower() else None
+                        if max_bytes or content_types:
+                            reader = _LimitedBodyReader(
+                                response.url, response.status_code, response.headers,
+                                header_encoding, max_bytes, content_types, self.sniff_bytes
+                            )
+                            for chunk in response.iter_content(self.stream_chunk_size):
+                                if not reader.feed(chunk):
+                                    break
+                            content, text = reader.finish()
+                            encoding, truncated = reader.encoding, reader.truncated
+                        else:
+                            content = response.content
+                            text, encoding, truncated = None, header_encoding, False
+                    finally:
+                        response.close()
+                error = None
+            except FetchRejected:
+                self._end_request(rejected=True)
+                raise
+            except (requests.exceptions.Timeout, TimeoutError) as e:
+                error = FetchTimeout(f"Timeout em {url}: {e}")
+            except (requests.exceptions.TooManyRedirects, requests.exceptions.InvalidURL,
+                    requests.exceptions.MissingSchema, requests.exceptions.InvalidSchema) as e:
+                self._end_request(error=True)
+                raise FetchError(f"Requisição inválida para {url}: {e}")
+            except requests.exceptions.RequestException as e:
+                error = FetchConnectionError(f"Erro de conexão em {url}: {e}")
+            finally:
+                elapsed = time.monotonic() - start
+
+            if error is None:
+                wrapped = FetchResponse(
+                    url=response.url,
+                    status_code=response.status_code,
+                    headers=response.headers,
+                    content=content,
+                    encoding=encoding,
+                    http_version='HTTP/1.1',
+                    elapsed=elapsed,
+                    reason=response.reason or '',
+                    text=text,
+                    truncated=truncated
+                )
+                self._end_request(response=wrapped)
+                delay = self._retry_delay(wrapped, attempt, retries, deadline)
+                if delay is None:
+                    return wrapped
+            else:
+                self._end_request(error=True, timeout=isinstance(error, FetchTimeout))
+                delay = self._retry_delay(None, attempt, retries, deadline)
+                if delay is None:
+                    raise error
+
+            self._count('retries')
+            time.sleep(delay)
+            attempt += 1
+
+    # ------------------------------------------------------------------
+    # Políticas comuns
+    # ------------------------------------------------------------------
+
+    def _split_timeout(self, timeout: TimeoutType) -> Tuple[float, float]:
+        """Normaliza timeout em (connect, read)"""
+        if timeout is None:
+            return min(10.0, self.default_timeout), self.default_timeout
+        if isinstance(timeout, (tuple, list)):
+            return float(timeout[0]), float(timeout[1])
+        return min(10.0, float(timeout)), float(timeout)
+
+    def _retries_for(self, method: str, retries: Optional[int]) -> int:
+        """Retries automáticos apenas para métodos idempotentes"""
+        if retries is not None:
+            return max(0, int(retries))
+        return self.max_retries if method in IDEMPOTENT_METHODS else 0
+
+    def _budget_for(self, read_timeout: float, budget: Optional[float]) -> float:
+        if budget is not None:
+            return budget
+        return self.default_budget or read_timeout * 2
+
+    def _retry_delay(
+        self,
+        response: Optional[FetchResponse],
+        attempt: int,
+        retries: int,
+        deadline: float
+    ) -> Optional[float]:
+        """Espera antes da próxima tentativa, ou None se não deve tentar de novo"""
+        if attempt >= retries:
+            return None
+        if response is not None and response.status_code not in self.retry_statuses:
+            return None
+
+        delay = self.backoff_base * (2 ** attempt) + random.uniform(0, self.backoff_base)
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after and retry_after.strip().isdigit():
+                delay = max(delay, float(retry_after))
+
+        # Só tenta de novo se sobrar tempo útil no orçamento
+        if time.monotonic() + delay + 1.0 >= deadline:
+            return None
+        return delay
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def _begin_request(self):
+        with self._lock:
+            self.stats['requests'] += 1
+            self.stats['in_flight'] += 1
+
+    def _end_request(self, response: Any = None, error: bool = False, timeout: bool = False, rejected: bool = False):
+        with self._lock:
+            self.stats['in_flight'] -= 1
+            if error:
+                self.stats['errors'] += 1
+            if timeout:
+                self.stats['timeouts'] += 1
+            if rejected:
+                self.stats['rejected'] += 1
+            if response is not None:
+                self.stats['responses'] += 1
+                if getattr(response, 'truncated', False):
+                    self.stats['truncated'] += 1
+                self.stats['bytes_received'] += len(response.content or b'')
+                version = getattr(response, 'http_version', None) or 'HTTP/1.1'
+                self.stats['http_versions'][version] = self.stats['http_versions'].get(version, 0) + 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas do motor"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['http_versions'] = dict(self.stats['http_versions'])
+        stats.update({
+            'backend': 'httpx' if self.use_async else 'requests',
+            'http2': self.http2,
+            'max_connections': self.max_connections,
+            'max_per_host': self.max_per_host
+        })
+        return stats
+
+    def close(self):
+        """Fecha clientes e encerra o event loop deste processo"""
+        with self._lock:
+            loop, clients = self._loop, list(self._clients.values())
+            owned = self._pid == os.getpid() and self._loop_thread and self._loop_thread.is_alive()
+
+        if owned and loop:
+            async def shutdown():
+                for client in clients:
+                    await client.aclose()
+
+            try:
+                asyncio.run_coroutine_threadsafe(shutdown(), loop).result(timeout=5)
+            except Exception as e:
+                logger.warning(f"⚠️ Erro ao fechar clientes HTTP: {e}")
+            loop.call_soon_threadsafe(loop.stop)
+
+
+# Instância global
+fetch_engine = FetchEngine()
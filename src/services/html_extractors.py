@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - HTML Extractors
+Extratores de conteúdo sem estado que compartilham uma única análise lxml da página
+"""
+
+import re
+import copy
+import time
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+# Imports condicionais para não quebrar se não estiver instalado
+try:
+    import lxml.html
+    from lxml import etree
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+try:
+    import trafilatura
+    HAS_TRAFILATURA = True
+except ImportError:
+    HAS_TRAFILATURA = False
+
+try:
+    from readability import Document
+    HAS_READABILITY = True
+except ImportError:
+    HAS_READABILITY = False
+
+try:
+    from newspaper import Article
+    HAS_NEWSPAPER = True
+except ImportError:
+    HAS_NEWSPAPER = False
+
+try:
+    from bs4 import BeautifulSoup
+    HAS_BEAUTIFULSOUP = True
+except ImportError:
+    HAS_BEAUTIFULSOUP = False
+
+logger = logging.getLogger(__name__)
+
+# Removidos uma única vez na análise; nenhum extrator aproveita esses blocos
+BOILERPLATE_TAGS = ('script', 'style', 'noscript', 'template', 'iframe', 'nav', 'header', 'footer', 'aside')
+
+
+def _class_xpath(name: str) -> str:
+    return f"//*[contains(concat(' ', normalize-space(@class), ' '), ' {name} ')]"
+
+
+# Mesmos seletores do fallback BeautifulSoup original, em XPath (lxml sem cssselect)
+CONTENT_XPATHS = [
+    '//article', '//main', _class_xpath('content'), "//*[@id='content']", _class_xpath('post'),
+    _class_xpath('article'), _class_xpath('entry'), _class_xpath('text'), _class_xpath('body'),
+    _class_xpath('container'), "//div[@role='main']"
+]
+CONTENT_SELECTORS = [
+    'article', 'main', '.content', '#content', '.post', '.article',
+    '.entry', '.text', '.body', '.container', 'div[role="main"]'
+]
+
+
+def parse_html(html: str):
+    """Analisa o HTML com lxml e remove o boilerplate; None se lxml indisponível ou falhar"""
+    if not HAS_LXML or not html:
+        return None
+
+    try:
+        # Bytes + encoding explícito: lxml recusa str com declaração <?xml encoding?>
+        parser = lxml.html.HTMLParser(encoding='utf-8', remove_comments=True, remove_pis=True)
+        tree = lxml.html.document_fromstring(html.encode('utf-8', 'replace'), parser=parser)
+    except (etree.ParserError, ValueError) as e:
+        logger.debug(f"Falha ao analisar HTML com lxml: {e}")
+        return None
+
+    # with_tail=False preserva o texto que segue o elemento removido
+    etree.strip_elements(tree, *BOILERPLATE_TAGS, with_tail=False)
+    return tree
+
+
+class ParsedPage:
+    """HTML bruto e a árvore lxml analisada uma única vez para toda a cascata de extratores"""
+
+    __slots__ = ('html', 'url', 'tree')
+
+    def __init__(self, html: str, url: str = ''):
+        self.html = html
+        self.url = url
+        self.tree = parse_html(html)
+
+    def tree_copy(self):
+        """Cópia da árvore para extratores que a modificam (copiar é bem mais barato que reanalisar)"""
+        return copy.deepcopy(self.tree) if self.tree is not None else None
+
+
+def clean_content(content: str, max_length: int) -> str:
+    """Limpa e normaliza o conteúdo extraído"""
+    if not content:
+        return ""
+
+    # Remove quebras de linha excessivas
+    content = re.sub(r'\n\s*\n\s*\n', '\n\n', content)
+
+    # Remove espaços excessivos
+    content = re.sub(r'[ \t]+', ' ', content)
+
+    # Remove caracteres de controle
+    content = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', content)
+
+    # Normaliza
+    content = content.strip()
+
+    # Limita tamanho
+    if len(content) > max_length:
+        content = content[:max_length] + "..."
+
+    return content
+
+
+def is_valid_content(content: Optional[str], url: str, min_length: int) -> bool:
+    """Valida se o conteúdo extraído é válido"""
+    if not content:
+        return False
+
+    # Verifica tamanho mínimo
+    if len(content) < min_length:
+        logger.warning(f"⚠️ Conteúdo muito pequeno para {url}: {len(content)} < {min_length}")
+        return False
+
+    # Verifica se não é só lixo
+    words = content.split()
+    if len(words) < 50:  # Mínimo 50 palavras
+        logger.warning(f"⚠️ Muito poucas palavras para {url}: {len(words)}")
+        return False
+
+    # Verifica se tem conteúdo real (não só navegação)
+    common_words = ['o', 'a', 'de', 'da', 'do', 'e', 'em', 'um', 'uma', 'com', 'não', 'para', 'que', 'se']
+    real_words = sum(1 for word in words if any(common in word.lower() for common in common_words))
+
+    if real_words / len(words) < 0.1:  # Pelo menos 10% de palavras comuns
+        logger.warning(f"⚠️ Conteúdo suspeito para {url}: poucos conectivos")
+        return False
+
+    logger.info(f"✅ Conteúdo válido para {url}: {len(content)} caracteres, {len(words)} palavras")
+    return True
+
+
+def _html_to_text(html: str) -> str:
+    if HAS_LXML:
+        return lxml.html.fromstring(html).text_content()
+    if HAS_BEAUTIFULSOUP:
+        return BeautifulSoup(html, 'html.parser').get_text()
+    return re.sub(r'<[^>]+>', '', html)
+
+
+def extract_with_trafilatura(page: ParsedPage) -> Optional[str]:
+    """Trafilatura (prioridade 1) sobre a árvore compartilhada"""
+    if not HAS_TRAFILATURA:
+        return None
+
+    source = page.tree_copy() if page.tree is not None else page.html
+    return trafilatura.extract(
+        source,
+        include_comments=False,
+        include_tables=True,
+        include_formatting=False,
+        favor_precision=True,
+        url=page.url
+    )
+
+
+def extract_with_readability(page: ParsedPage) -> Optional[str]:
+    """Readability (prioridade 2) sobre a árvore compartilhada"""
+    if not HAS_READABILITY:
+        return None
+
+    source = page.tree_copy() if page.tree is not None else page.html
+    summary = Document(source).summary()
+    return _html_to_text(summary) if summary else None
+
+
+def extract_with_newspaper(page: ParsedPage) -> Optional[str]:
+    """Newspaper3k (prioridade 3); só aceita HTML em texto, então analisa por conta própria"""
+    if not HAS_NEWSPAPER:
+        return None
+
+    article = Article(page.url)
+    article.set_html(page.html)
+    article.parse()
+    return article.text or None
+
+
+def extract_main_text(page: ParsedPage) -> Optional[str]:
+    """Fallback final: texto do container principal (ou do body) da árvore já limpa"""
+    if page.tree is not None:
+        for xpath in CONTENT_XPATHS:
+            elements = page.tree.xpath(xpath)
+            if elements:
+                text = elements[0].text_content()
+                if text:
+                    return text
+                break
+
+        body = page.tree.find('body')
+        return (body if body is not None else page.tree).text_content() or None
+
+    if not HAS_BEAUTIFULSOUP:
+        return None
+
+    soup = BeautifulSoup(page.html, 'html.parser')
+    for element in soup(list(BOILERPLATE_TAGS)):
+        element.decompose()
+
+    for selector in CONTENT_SELECTORS:
+        element = soup.select_one(selector)
+        if element:
+            text = element.get_text()
+            if text:
+                return text
+            break
+
+    body = soup.find('body')
+    return (body or soup).get_text() or None
+
+
+# Cascata padrão: nome (chave das estatísticas) -> extrator
+EXTRACTORS: Dict[str, Callable[[ParsedPage], Optional[str]]] = {
+    'trafilatura': extract_with_trafilatura,
+    'readability': extract_with_readability,
+    'newspaper': extract_with_newspaper,
+    'beautifulsoup': extract_main_text
+}
+
+AVAILABILITY: Dict[str, bool] = {
+    'trafilatura': HAS_TRAFILATURA,
+    'readability': HAS_READABILITY,
+    'newspaper': HAS_NEWSPAPER,
+    'beautifulsoup': HAS_LXML or HAS_BEAUTIFULSOUP
+}
+
+
+def available_extractors() -> List[str]:
+    """Extratores disponíveis, na ordem padrão da cascata"""
+    return [name for name in EXTRACTORS if AVAILABILITY[name]]
+
+
+def run_cascade(html: str, url: str, order: List[str], min_length: int, max_length: int) -> Dict[str, Any]:
+    """
+    Analisa o HTML uma vez e tenta os extratores na ordem dada até um conteúdo válido
+
+    Returns:
+        Dict com 'content' e 'extractor' (None se todos falharem) e 'attempts'
+        ({'extractor', 'success', 'elapsed', 'error'} de cada extrator tentado)
+    """
+    page = ParsedPage(html, url)
+    attempts: List[Dict[str, Any]] = []
+
+    for extractor_name in order:
+        if not AVAILABILITY.get(extractor_name):
+            continue
+
+        started = time.time()
+        try:
+            logger.info(f"🔍 Tentando extração com {extractor_name}...")
+            content = EXTRACTORS[extractor_name](page)
+            content = clean_content(content, max_length) if content else None
+        except Exception as e:
+            logger.error(f"❌ Erro com {extractor_name}: {str(e)}")
+            attempts.append({'extractor': extractor_name, 'success': False, 'elapsed': time.time() - started, 'error': str(e)})
+            continue
+
+        if is_valid_content(content, url, min_length):
+            attempts.append({'extractor': extractor_name, 'success': True, 'elapsed': time.time() - started, 'error': None})
+            return {'content': content, 'extractor': extractor_name, 'attempts': attempts}
+
+        logger.warning(f"⚠️ Conteúdo insuficiente com {extractor_name}: {len(content) if content else 0} caracteres")
+        attempts.append({'extractor': extractor_name, 'success': False, 'elapsed': time.time() - started, 'error': 'insufficient_content'})
+
+    return {'content': None, 'extractor': None, 'attempts': attempts}
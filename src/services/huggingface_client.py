@@ -7,9 +7,9 @@ Cliente REAL para integração com HuggingFace API - SEM SIMULAÇÃO
 
 import os
 import logging
-import requests
 import json
 from typing import Optional, Dict, Any
+from services.provider_clients import provider_clients
 
 logger = logging.getLogger(__name__)
 
@@ -84,7 +84,8 @@ class HuggingFaceClient:
                         }
                     }
                     
-                    response = requests.post(
+                    response = provider_clients.post(
+                        'huggingface',
                         model_url,
                         headers=self.headers,
                         json=payload,
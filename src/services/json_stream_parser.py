@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - JSON Stream Parser
+Parser incremental que emite as seções de primeiro nível de um JSON em streaming
+"""
+
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class JSONSectionStreamParser:
+    """Recebe o texto da IA em pedaços e emite cada seção de primeiro nível assim que fecha
+
+    Ignora qualquer texto antes da primeira ``{`` (como cercas ```json) e depois
+    do fechamento do objeto. Cada caractere é examinado uma única vez; o valor
+    de uma seção só é decodificado com ``json.loads`` quando ela termina.
+    """
+
+    def __init__(self):
+        self._buffer: List[str] = []
+        self._text = ''
+        self._pos = 0
+
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start: Optional[int] = None
+
+        self._key: Optional[str] = None
+        self._expect_key = False
+        self._value_start: Optional[int] = None
+        self._value_emitted = False
+
+        self.started = False
+        self.complete = False
+        self.sections: Dict[str, Any] = {}
+
+    @property
+    def text(self) -> str:
+        """Texto completo recebido até agora"""
+        if self._buffer:
+            self._text += ''.join(self._buffer)
+            self._buffer = []
+        return self._text
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        Processa mais um pedaço do texto
+
+        Returns:
+            Lista de (nome da seção, valor) concluídas neste pedaço
+        """
+        if not chunk:
+            return []
+
+        self._buffer.append(chunk)
+        text = self.text
+        emitted: List[Tuple[str, Any]] = []
+
+        while self._pos < len(text) and not self.complete:
+            char = text[self._pos]
+
+            if not self.started:
+                if char == '{':
+                    self.started = True
+                    self._depth = 1
+                    self._expect_key = True
+                self._pos += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._expect_key and self._string_start is not None:
+                        self._key = json.loads(text[self._string_start:self._pos + 1])
+                        self._expect_key = False
+                    self._string_start = None
+                self._pos += 1
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expect_key:
+                    self._string_start = self._pos
+            elif char in '{[':
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth == 1 and self._value_start is not None and not self._value_emitted:
+                    # Objeto/lista da seção acabou de fechar
+                    self._emit(text[self._value_start:self._pos + 1], emitted)
+                    self._value_emitted = True
+                elif self._depth == 0:
+                    self._finish_value(text, emitted)
+                    self.complete = True
+            elif self._depth == 1:
+                if char == ':' and self._key is not None and self._value_start is None:
+                    self._value_start = self._pos + 1
+                elif char == ',':
+                    self._finish_value(text, emitted)
+
+            self._pos += 1
+
+        return emitted
+
+    def _finish_value(self, text: str, emitted: List[Tuple[str, Any]]):
+        """Fecha a seção atual na vírgula ou no fim do objeto (valores escalares)"""
+        if self._value_start is not None and not self._value_emitted:
+            self._emit(text[self._value_start:self._pos], emitted)
+        self._key = None
+        self._value_start = None
+        self._value_emitted = False
+        self._expect_key = True
+
+    def _emit(self, raw_value: str, emitted: List[Tuple[str, Any]]):
+        raw_value = raw_value.strip()
+        if not raw_value:
+            return
+        try:
+            value = json.loads(raw_value)
+        except json.JSONDecodeError as e:
+            logger.warning(f"⚠️ Seção '{self._key}' com JSON inválido no streaming: {e}")
+            return
+        self.sections[self._key] = value
+        emitted.append((self._key, value))
+
+    def result(self) -> Optional[Dict[str, Any]]:
+        """Objeto completo, se o JSON já fechou"""
+        if not self.complete:
+            return None
+        return dict(self.sections)
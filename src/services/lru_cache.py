@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - LRU Cache
+Cache em memória limitado por entradas, bytes e TTL, seguro entre threads
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """Cache LRU com limite de entradas, de bytes e expiração por entrada"""
+
+    def __init__(self, max_entries: int = 1000, max_bytes: int = 32 * 1024 * 1024, ttl: Optional[float] = None):
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self.ttl = ttl
+
+        # key -> (value, size, expires_at)
+        self._data: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'rejected': 0
+        }
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Retorna o valor e o marca como usado recentemente"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return default
+
+            value, size, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                self._remove(key)
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return default
+
+            self._data.move_to_end(key)
+            self._stats['hits'] += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, size: int = 1, ttl: Optional[float] = None) -> bool:
+        """Armazena valor com tamanho estimado em bytes; retorna False se não couber"""
+        size = max(1, int(size))
+        if size > self.max_bytes:
+            with self._lock:
+                self._stats['rejected'] += 1
+                self._remove(key)
+            return False
+
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl is not None else None
+
+        with self._lock:
+            self._remove(key)
+            self._data[key] = (value, size, expires_at)
+            self._bytes += size
+
+            # Remove os menos usados até respeitar os limites
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self._stats['evictions'] += 1
+        return True
+
+    def delete(self, key: Hashable):
+        """Remove uma entrada"""
+        with self._lock:
+            self._remove(key)
+
+    def clear(self):
+        """Remove todas as entradas"""
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def _remove(self, key: Hashable):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and (entry[2] is None or entry[2] > time.time())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores de uso e ocupação"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                'entries': len(self._data),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes
+            })
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
+
+    def reset_stats(self):
+        """Zera contadores (mantém entradas)"""
+        with self._lock:
+            for key in self._stats:
+                self._stats[key] = 0
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Near Duplicate Detector
+Detecção de páginas quase idênticas (matérias replicadas) por MinHash com LSH em bandas
+"""
+
+import os
+import re
+import random
+import hashlib
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+_WORD_PATTERN = re.compile(r'\w+', re.UNICODE)
+_MASK64 = (1 << 64) - 1
+_MIX64 = 0x9E3779B97F4A7C15
+
+
+def shingle_set(text: str, shingle_size: int = 3) -> Tuple[Set[int], int]:
+    """
+    Conjunto de shingles de palavras do texto (hash de 64 bits de cada um)
+
+    Returns:
+        (shingles, número de palavras)
+    """
+    words = _WORD_PATTERN.findall(text.lower())
+    if len(words) < shingle_size:
+        grams = [' '.join(words)] if words else []
+    else:
+        grams = (' '.join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1))
+    shingles = {
+        int.from_bytes(hashlib.blake2b(gram.encode('utf-8'), digest_size=8).digest(), 'big')
+        for gram in grams
+    }
+    return shingles, len(words)
+
+
+def containment(shingles: Set[int], other: Set[int]) -> float:
+    """Fração dos shingles de ``shingles`` presentes em ``other``"""
+    if not shingles:
+        return 0.0
+    return len(shingles & other) / len(shingles)
+
+
+class MinHashIndex:
+    """Índice LSH de assinaturas MinHash
+
+    A assinatura tem ``num_perm`` mínimos (um por permutação dos hashes dos
+    shingles) e é dividida em ``bands`` bandas de ``num_perm // bands``
+    linhas. Dois textos com similaridade de Jaccard s coincidem em alguma
+    banda com probabilidade 1 - (1 - s^linhas)^bandas: com 64 permutações em
+    32 bandas, s = 0,3 já vira candidato em 95% dos casos, e a confirmação
+    fica com a comparação exata dos shingles.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 32, seed: int = 1):
+        rng = random.Random(seed)
+        self.seeds = [rng.getrandbits(64) for _ in range(num_perm)]
+        self.bands = max(1, min(bands, num_perm))
+        self.rows = num_perm // self.bands
+        self._buckets: List[Dict[Tuple[int, ...], List[Any]]] = [{} for _ in range(self.bands)]
+        self._size = 0
+
+    def signature(self, shingles: Set[int]) -> List[int]:
+        # XOR com a semente seguido de multiplicação ímpar é uma permutação de 64 bits
+        return [min(((value ^ seed) * _MIX64) & _MASK64 for value in shingles) for seed in self.seeds]
+
+    def _band_keys(self, signature: List[int]) -> List[Tuple[int, ...]]:
+        return [tuple(signature[band * self.rows:(band + 1) * self.rows]) for band in range(self.bands)]
+
+    def candidates(self, signature: List[int]) -> List[Any]:
+        """Itens indexados que coincidem em ao menos uma banda (ordem de inserção)"""
+        found: Dict[Any, None] = {}
+        for band, key in enumerate(self._band_keys(signature)):
+            for item in self._buckets[band].get(key, ()):
+                found[item] = None
+        return list(found)
+
+    def add(self, key: Any, signature: List[int]):
+        for band, band_key in enumerate(self._band_keys(signature)):
+            self._buckets[band].setdefault(band_key, []).append(key)
+        self._size += 1
+
+    def __len__(self) -> int:
+        return self._size
+
+
+class NearDuplicateDetector:
+    """Remove páginas quase idênticas de uma lista de conteúdos extraídos
+
+    Quando várias páginas trazem a mesma matéria (g1, valor, exame...), só a
+    cópia de melhor qualidade é mantida; as demais são registradas como
+    duplicatas dela. Os candidatos do LSH são confirmados pelos shingles: uma
+    página só cai se ao menos NEAR_DUPLICATE_MIN_CONTAINMENT dos seus shingles
+    estiverem na cópia mantida, então cabeçalhos e rodapés diferentes não
+    salvam uma matéria replicada, e uma página maior que apenas cita outra não
+    perde o conteúdo próprio. Textos curtos demais nunca são descartados.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv('NEAR_DUPLICATE_ENABLED', 'true').lower() == 'true'
+        self.min_containment = float(os.getenv('NEAR_DUPLICATE_MIN_CONTAINMENT', 0.6))
+        self.num_perm = int(os.getenv('NEAR_DUPLICATE_PERMUTATIONS', 64))
+        self.bands = int(os.getenv('NEAR_DUPLICATE_BANDS', 32))
+        self.min_words = int(os.getenv('NEAR_DUPLICATE_MIN_WORDS', 50))
+
+        self._lock = threading.Lock()
+        self.stats = {'checked': 0, 'duplicates': 0}
+
+    @staticmethod
+    def default_quality(item: Dict[str, Any]) -> Tuple[float, int]:
+        """Relevância e, em empate, a cópia mais completa"""
+        return (float(item.get('relevance_score') or 0.0), len(item.get('content') or ''))
+
+    def deduplicate(
+        self,
+        items: List[Dict[str, Any]],
+        text_key: str = 'content',
+        quality: Optional[Callable[[Dict[str, Any]], Any]] = None
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Separa itens únicos e quase duplicados
+
+        Args:
+            items: Conteúdos extraídos (dicts com ``text_key`` e 'url')
+            text_key: Campo com o texto comparado
+            quality: Função de qualidade; a maior cópia de cada grupo é mantida
+
+        Returns:
+            (itens mantidos na ordem original, [{'url', 'duplicate_of', 'similarity'}])
+        """
+        if not self.enabled or len(items) < 2:
+            return list(items), []
+
+        quality = quality or self.default_quality
+        index = MinHashIndex(self.num_perm, self.bands)
+        kept_shingles: Dict[int, Set[int]] = {}
+        dropped: Dict[int, Tuple[int, float]] = {}
+
+        # A melhor cópia entra primeiro no índice e as demais caem como duplicatas dela
+        order = sorted(range(len(items)), key=lambda i: quality(items[i]), reverse=True)
+        for position in order:
+            shingles, words = shingle_set(items[position].get(text_key) or '')
+            if words < self.min_words:
+                continue
+            signature = index.signature(shingles)
+
+            best = None
+            for candidate in index.candidates(signature):
+                similarity = containment(shingles, kept_shingles[candidate])
+                if similarity >= self.min_containment and (best is None or similarity > best[1]):
+                    best = (candidate, similarity)
+
+            if best is not None:
+                dropped[position] = best
+            else:
+                index.add(position, signature)
+                kept_shingles[position] = shingles
+
+        kept = [item for position, item in enumerate(items) if position not in dropped]
+        duplicates = [
+            {
+                'url': items[position].get('url'),
+                'duplicate_of': items[original].get('url'),
+                'similarity': round(similarity, 3)
+            }
+            for position, (original, similarity) in sorted(dropped.items())
+        ]
+
+        with self._lock:
+            self.stats['checked'] += len(items)
+            self.stats['duplicates'] += len(duplicates)
+
+        if duplicates:
+            logger.info(f"🧬 {len(duplicates)} páginas quase idênticas descartadas de {len(items)}")
+            for duplicate in duplicates:
+                logger.debug(f"   {duplicate['url']} ≈ {duplicate['duplicate_of']} (similaridade {duplicate['similarity']:.0%})")
+
+        return kept, duplicates
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        stats['enabled'] = self.enabled
+        stats['min_containment'] = self.min_containment
+        return stats
+
+
+# Instância global
+near_duplicate_detector = NearDuplicateDetector()
@@ -6,7 +6,7 @@ ARQV30 Enhanced v2.0 - Production Content Extractor (DEPRECATED)
 ESTE MÓDULO FOI SUBSTITUÍDO POR robust_content_extractor.py
 Mantido apenas para compatibilidade
 """
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Callable, Iterator
 import os
 import logging
 from .robust_content_extractor import robust_content_extractor
@@ -30,10 +30,10 @@ class ProductionContentExtractor:
         """Redireciona para RobustContentExtractor"""
         # RobustContentExtractor não tem extract_metadata, então mantém funcionalidade básica
         try:
-            import requests
+            from services.fetch_engine import fetch_engine
             from bs4 import BeautifulSoup
 
-            response = requests.get(url, timeout=15)
+            response = fetch_engine.get(url, timeout=15)
             if response.status_code == 200:
                 soup = BeautifulSoup(response.content, "html.parser")
                 title_tag = soup.find('title')
@@ -45,9 +45,26 @@ class ProductionContentExtractor:
         except Exception as e:
             return {'error': str(e)}
 
-    def batch_extract(self, urls: List[str], max_workers: int = 5) -> Dict[str, Optional[str]]:
+    def batch_extract(
+        self,
+        urls: List[str],
+        max_workers: int = 5,
+        max_per_host: Optional[int] = None,
+        callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        limiter: Optional[Any] = None
+    ) -> Dict[str, Optional[str]]:
         """Redireciona para RobustContentExtractor"""
-        return self.extractor.batch_extract(urls, max_workers)
+        return self.extractor.batch_extract(urls, max_workers, max_per_host, callback, limiter)
+
+    def iter_extract(
+        self,
+        urls: List[str],
+        max_workers: int = 5,
+        max_per_host: Optional[int] = None,
+        limiter: Optional[Any] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Redireciona para RobustContentExtractor"""
+        return self.extractor.iter_extract(urls, max_workers, max_per_host, limiter)
 
     def clear_cache(self):
         """Método de compatibilidade para limpar cache"""
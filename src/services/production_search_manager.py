@@ -18,11 +18,15 @@ from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
 import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
-import pickle
-import sqlite3
 from dataclasses import dataclass
 from services.robust_content_extractor import robust_content_extractor
+from services.lru_cache import LRUCache
+from services.shared_store import ThreadLocalSQLite
+from services.single_flight import SingleFlight, flight_lock_backend
+from services.circuit_breaker import CircuitBreaker
+from services.token_bucket import TokenBucketLimiter
 from services.url_resolver import resolve_url
+from services.fetch_engine import fetch_engine
 from services.content_quality_validator import content_quality_validator
 
 logger = logging.getLogger(__name__)
@@ -42,32 +46,56 @@ class SearchResult:
             self.timestamp = datetime.now()
 
 class ProductionSearchCache:
-    """Sistema de cache robusto para produção"""
+    """Cache de busca em dois níveis: LRU em memória (L1) na frente do SQLite (L2)"""
 
     def __init__(self, cache_dir: str = "cache", ttl: int = 3600):
         self.cache_dir = cache_dir
-        self.ttl = ttl
+        self.ttl = int(os.getenv('SEARCH_CACHE_TTL', ttl))
         self.db_path = os.path.join(cache_dir, "search_cache.db")
+        self.enabled = os.getenv('SEARCH_CACHE_ENABLED', 'true').lower() == 'true'
+        self.cleanup_interval = int(os.getenv('SEARCH_CACHE_CLEANUP_INTERVAL', 3600))
+
+        # L1: memória do processo, limitado por entradas, bytes e TTL
+        self.memory = LRUCache(
+            max_entries=int(os.getenv('SEARCH_CACHE_L1_MAX_ENTRIES', 512)),
+            max_bytes=int(os.getenv('SEARCH_CACHE_L1_MAX_BYTES', 16 * 1024 * 1024)),
+            ttl=self.ttl
+        )
+
+        # L2: SQLite compartilhado, conexão persistente por thread
+        self._db = ThreadLocalSQLite(self.db_path)
+        self._lock = threading.Lock()
+        self._cleanup_thread: Optional[threading.Thread] = None
+        self._cleanup_pid: Optional[int] = None
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'expired': 0,
+            'legacy_skipped': 0,
+            'writes': 0,
+            'errors': 0,
+            'cleaned': 0
+        }
+
         os.makedirs(cache_dir, exist_ok=True)
         self._init_database()
 
     def _init_database(self):
         """Inicializa banco de dados SQLite para cache"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute("""
-                    CREATE TABLE IF NOT EXISTS search_cache (
-                        query_hash TEXT PRIMARY KEY,
-                        query TEXT NOT NULL,
-                        results BLOB NOT NULL,
-                        timestamp REAL NOT NULL,
-                        ttl INTEGER NOT NULL
-                    )
-                """)
-                conn.execute("""
-                    CREATE INDEX IF NOT EXISTS idx_timestamp ON search_cache(timestamp)
-                """)
-                conn.commit()
+            conn = self._db.connection()
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS search_cache (
+                    query_hash TEXT PRIMARY KEY,
+                    query TEXT NOT NULL,
+                    results BLOB NOT NULL,
+                    timestamp REAL NOT NULL,
+                    ttl INTEGER NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_timestamp ON search_cache(timestamp)
+            """)
         except Exception as e:
             logger.error(f"Erro ao inicializar cache: {e}")
 
@@ -76,84 +104,143 @@ class ProductionSearchCache:
         combined = f"{query}:{provider}".encode('utf-8')
         return hashlib.sha256(combined).hexdigest()
 
-    def get(self, query: str, provider: str = "") -> Optional[List[SearchResult]]:
-        """Recupera resultados do cache"""
-        if not os.getenv('SEARCH_CACHE_ENABLED', 'true').lower() == 'true':
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def get(self, query: str, provider: str = "") -> Optional[List[Dict[str, Any]]]:
+        """Recupera resultados do cache (L1, depois L2)"""
+        if not self.enabled:
             return None
 
+        query_hash = self._get_query_hash(query, provider)
+
+        results = self.memory.get(query_hash)
+        if results is not None:
+            logger.info(f"✅ Cache L1 hit para query: {query[:50]}...")
+            return [dict(result) for result in results]
+
+        self._ensure_cleanup_thread()
+
         try:
-            query_hash = self._get_query_hash(query, provider)
+            row = self._db.connection().execute(
+                "SELECT results, timestamp, ttl FROM search_cache WHERE query_hash = ?",
+                (query_hash,)
+            ).fetchone()
 
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.execute(
-                    "SELECT results, timestamp, ttl FROM search_cache WHERE query_hash = ?",
-                    (query_hash,)
-                )
-                row = cursor.fetchone()
+            if not row:
+                self._count('misses')
+                return None
 
-                if row:
-                    results_blob, timestamp, ttl = row
+            payload, timestamp, ttl = row
+            remaining = ttl - (time.time() - timestamp)
 
-                    # Verifica se não expirou
-                    if time.time() - timestamp < ttl:
-                        results = pickle.loads(results_blob)
-                        logger.info(f"✅ Cache hit para query: {query[:50]}...")
-                        return results
-                    else:
-                        # Remove entrada expirada
-                        conn.execute("DELETE FROM search_cache WHERE query_hash = ?", (query_hash,))
-                        conn.commit()
-                        logger.info(f"🗑️ Cache expirado removido para: {query[:50]}...")
+            # Expirado: a limpeza em background remove a linha
+            if remaining <= 0:
+                self._count('expired')
+                self._count('misses')
+                return None
 
+            # Entradas antigas em pickle são ignoradas (regravadas no próximo set)
+            if not isinstance(payload, str):
+                self._count('legacy_skipped')
+                self._count('misses')
                 return None
 
+            results = json.loads(payload)
+            self._count('hits')
+            self.memory.set(query_hash, results, size=len(payload), ttl=remaining)
+
+            logger.info(f"✅ Cache L2 hit para query: {query[:50]}...")
+            return [dict(result) for result in results]
+
         except Exception as e:
+            self._count('errors')
             logger.error(f"Erro ao recuperar cache: {e}")
             return None
 
-    def set(self, query: str, results: List[SearchResult], provider: str = ""):
-        """Armazena resultados no cache"""
-        if not os.getenv('SEARCH_CACHE_ENABLED', 'true').lower() == 'true':
+    def set(self, query: str, results: List[Dict[str, Any]], provider: str = ""):
+        """Armazena resultados (dicts serializáveis em JSON) nos dois níveis"""
+        if not self.enabled:
             return
 
         try:
             query_hash = self._get_query_hash(query, provider)
-            results_blob = pickle.dumps(results)
-            timestamp = time.time()
-            ttl = int(os.getenv('SEARCH_CACHE_TTL', self.ttl))
-
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute("""
-                    INSERT OR REPLACE INTO search_cache 
-                    (query_hash, query, results, timestamp, ttl) 
-                    VALUES (?, ?, ?, ?, ?)
-                """, (query_hash, query, results_blob, timestamp, ttl))
-                conn.commit()
+            results = [dict(result) for result in results]
+            payload = json.dumps(results, ensure_ascii=False, default=str)
+
+            self.memory.set(query_hash, results, size=len(payload), ttl=self.ttl)
+            self._db.connection().execute("""
+                INSERT OR REPLACE INTO search_cache
+                (query_hash, query, results, timestamp, ttl)
+                VALUES (?, ?, ?, ?, ?)
+            """, (query_hash, query, payload, time.time(), self.ttl))
+            self._count('writes')
 
             logger.info(f"💾 Cache salvo para query: {query[:50]}...")
 
         except Exception as e:
+            self._count('errors')
             logger.error(f"Erro ao salvar cache: {e}")
 
-    def cleanup_expired(self):
+    def cleanup_expired(self) -> int:
         """Remove entradas expiradas do cache"""
         try:
-            current_time = time.time()
-
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.execute(
-                    "SELECT COUNT(*) FROM search_cache WHERE ? - timestamp > ttl",
-                    (current_time,)
-                )
-                expired_count = cursor.fetchone()[0]
+            cursor = self._db.connection().execute(
+                "DELETE FROM search_cache WHERE ? - timestamp > ttl",
+                (time.time(),)
+            )
+            expired_count = max(cursor.rowcount, 0)
 
-                if expired_count > 0:
-                    conn.execute("DELETE FROM search_cache WHERE ? - timestamp > ttl", (current_time,))
-                    conn.commit()
-                    logger.info(f"🗑️ {expired_count} entradas expiradas removidas do cache")
+            if expired_count > 0:
+                self._count('cleaned', expired_count)
+                logger.info(f"🗑️ {expired_count} entradas expiradas removidas do cache")
+            return expired_count
 
         except Exception as e:
             logger.error(f"Erro na limpeza do cache: {e}")
+            return 0
+
+    def _ensure_cleanup_thread(self):
+        """Inicia a limpeza periódica em background (uma thread por processo)"""
+        if self._cleanup_pid == os.getpid() and self._cleanup_thread and self._cleanup_thread.is_alive():
+            return
+
+        with self._lock:
+            if self._cleanup_pid == os.getpid() and self._cleanup_thread and self._cleanup_thread.is_alive():
+                return
+            self._cleanup_pid = os.getpid()
+            self._cleanup_thread = threading.Thread(
+                target=self._cleanup_loop,
+                name="search-cache-cleanup",
+                daemon=True
+            )
+            self._cleanup_thread.start()
+
+    def _cleanup_loop(self):
+        while True:
+            self.cleanup_expired()
+            time.sleep(self.cleanup_interval)
+
+    def clear(self):
+        """Limpa os dois níveis do cache"""
+        self.memory.clear()
+        self._db.connection().execute("DELETE FROM search_cache")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores de hit/miss/eviction por nível"""
+        with self._lock:
+            l2_stats = dict(self.stats)
+        lookups = l2_stats['hits'] + l2_stats['misses']
+        l2_stats['hit_rate'] = round(l2_stats['hits'] / lookups, 4) if lookups else 0.0
+
+        # Sem chave 'enabled' para não ser contado como provedor pelos consumidores
+        return {
+            'active': self.enabled,
+            'ttl': self.ttl,
+            'l1_memory': self.memory.get_stats(),
+            'l2_sqlite': l2_stats
+        }
 
 class ProductionSearchManager:
     """Gerenciador de busca robusto para produção"""
@@ -161,9 +248,9 @@ class ProductionSearchManager:
     def __init__(self):
         """Inicializa o gerenciador de busca para produção"""
         self.cache = ProductionSearchCache()
-        self.rate_limiter = {}
-        self.error_counts = {}
-        self.last_cleanup = time.time()
+        self.search_flight = SingleFlight('search', flight_lock_backend)
+        self.rate_limiter = TokenBucketLimiter('search')
+        self.breaker = CircuitBreaker('search')
         self.content_extractor = robust_content_extractor
 
         # Configurações de produção
@@ -187,37 +274,38 @@ class ProductionSearchManager:
             'google': {
                 'enabled': bool(os.getenv('GOOGLE_SEARCH_KEY') and os.getenv('GOOGLE_CSE_ID')),
                 'priority': 1,
-                'rate_limit': 100,  # requests per day
+                'rate_limits': '1/second,100/day',
                 'error_count': 0,
-                'last_error': None,
-                'quota_reset': None
+                'last_error': None
             },
             'serper': {
                 'enabled': bool(os.getenv('SERPER_API_KEY')),
                 'priority': 2,
-                'rate_limit': 2500,  # requests per month
+                'rate_limits': '5/second,2500/month',
                 'error_count': 0,
-                'last_error': None,
-                'quota_reset': None
+                'last_error': None
             },
             'bing': {
                 'enabled': True,  # Sempre disponível via scraping
                 'priority': 3,
-                'rate_limit': 1000,  # requests per hour
+                'rate_limits': f'1/{self.rate_limit_delay}s,1000/hour',
                 'error_count': 0,
-                'last_error': None,
-                'quota_reset': None
+                'last_error': None
             },
             'duckduckgo': {
                 'enabled': True,  # Sempre disponível via scraping
                 'priority': 4,
-                'rate_limit': 500,  # requests per hour
+                'rate_limits': f'1/{self.rate_limit_delay}s,500/hour',
                 'error_count': 0,
-                'last_error': None,
-                'quota_reset': None
+                'last_error': None
             }
         }
 
+        # Janelas de rate limit (token bucket compartilhado entre workers)
+        for name, config in self.providers.items():
+            config['rate_limits'] = os.getenv(f'SEARCH_RATE_LIMITS_{name.upper()}', config['rate_limits'])
+            self.rate_limiter.configure(name, config['rate_limits'])
+
         logger.info("🚀 Production Search Manager inicializado")
         self._log_provider_status()
 
@@ -275,67 +363,52 @@ class ProductionSearchManager:
         return base_headers
 
     def _check_rate_limit(self, provider: str) -> bool:
-        """Verifica rate limiting"""
-        current_time = time.time()
-
-        if provider not in self.rate_limiter:
-            self.rate_limiter[provider] = []
-
-        # Remove requisições antigas (última hora)
-        self.rate_limiter[provider] = [
-            req_time for req_time in self.rate_limiter[provider]
-            if current_time - req_time < 3600
-        ]
-
-        # Verifica limite
-        limit = self.providers[provider]['rate_limit']
-        if len(self.rate_limiter[provider]) >= limit:
-            logger.warning(f"⚠️ Rate limit atingido para {provider}")
-            return False
-
-        return True
-
-    def _record_request(self, provider: str):
-        """Registra requisição para rate limiting"""
-        if provider not in self.rate_limiter:
-            self.rate_limiter[provider] = []
-
-        self.rate_limiter[provider].append(time.time())
+        """Consome um token do provedor, aguardando só o necessário (até RATE_LIMIT_MAX_WAIT)"""
+        return self.rate_limiter.acquire(provider)
+
+    def _handle_rate_limited(self, provider: str, response, default_delay: float):
+        """429 do provedor: suspende todos os workers pelo Retry-After (ou ``default_delay``)"""
+        retry_after = response.headers.get('Retry-After', '')
+        delay = float(retry_after) if retry_after.strip().isdigit() else default_delay
+        self.rate_limiter.block(provider, delay)
+        self.breaker.release(provider)
+
+    def _handle_status_error(self, provider: str, status_code: int):
+        """Status inesperado: 5xx conta como falha; 4xx devolve a sonda do circuito"""
+        if status_code >= 500:
+            self._handle_provider_error(provider, Exception(f"Status {status_code}"))
+        else:
+            self.breaker.release(provider)
 
     def _handle_provider_error(self, provider: str, error: Exception):
-        """Gerencia erros de provedores"""
-        self.error_counts[provider] = self.error_counts.get(provider, 0) + 1
-        self.providers[provider]['error_count'] = self.error_counts[provider]
+        """Registra a falha no circuit breaker do provedor"""
+        self.providers[provider]['error_count'] += 1
         self.providers[provider]['last_error'] = str(error)
+        self.breaker.record_failure(provider, error)
 
-        # Desabilita temporariamente se muitos erros
-        if self.error_counts[provider] >= 5:
-            logger.error(f"❌ Provedor {provider} desabilitado temporariamente (muitos erros)")
-            self.providers[provider]['enabled'] = False
-            # Reabilita após 1 hora
-            self.providers[provider]['quota_reset'] = time.time() + 3600
+    def _handle_provider_success(self, provider: str):
+        """Resposta válida: fecha o circuito do provedor"""
+        self.breaker.record_success(provider)
 
-    def _reset_provider_if_needed(self, provider: str):
-        """Reabilita provedor se tempo de reset passou"""
-        if (not self.providers[provider]['enabled'] and 
-            self.providers[provider]['quota_reset'] and
-            time.time() > self.providers[provider]['quota_reset']):
+    def _provider_allowed(self, provider: str) -> bool:
+        """
+        Provedor configurado, com token de rate limit e circuito liberando a chamada
 
-            logger.info(f"🔄 Reabilitando provedor {provider}")
-            self.providers[provider]['enabled'] = True
-            self.providers[provider]['quota_reset'] = None
-            self.error_counts[provider] = 0
+        O token é consumido antes de ``breaker.allow``: a sonda meio-aberta só é
+        reservada quando a chamada vai mesmo acontecer. Quem recebe True precisa
+        registrar sucesso, falha ou ``breaker.release`` em todo caminho de saída.
+        """
+        if not self.providers[provider]['enabled'] or not self.breaker.is_available(provider):
+            return False
+        if not self._check_rate_limit(provider):
+            return False
+        return self.breaker.allow(provider)
 
     def search_google_custom(self, query: str, max_results: int = 10) -> List[SearchResult]:
         """Busca usando Google Custom Search API com validação robusta"""
         provider = 'google'
 
-        if not self.providers[provider]['enabled']:
-            self._reset_provider_if_needed(provider)
-            if not self.providers[provider]['enabled']:
-                return []
-
-        if not self._check_rate_limit(provider):
+        if not self._provider_allowed(provider):
             return []
 
         try:
@@ -345,6 +418,7 @@ class ProductionSearchManager:
             if not api_key or not cse_id:
                 logger.error("❌ Google Search API não configurada corretamente")
                 self.providers[provider]['enabled'] = False
+                self.breaker.release(provider)
                 return []
 
             url = "https://www.googleapis.com/customsearch/v1"
@@ -363,9 +437,7 @@ class ProductionSearchManager:
 
             headers = self._get_headers('google')
 
-            self._record_request(provider)
-
-            response = requests.get(
+            response = fetch_engine.get(
                 url, 
                 params=params, 
                 headers=headers, 
@@ -384,8 +456,10 @@ class ProductionSearchManager:
 
                     # Verifica se é erro de quota
                     if 'quota' in error_msg.lower() or 'limit' in error_msg.lower():
-                        self.providers[provider]['quota_reset'] = time.time() + 86400  # 24h
-                        self.providers[provider]['enabled'] = False
+                        self.rate_limiter.block(provider, 86400)
+                        self.breaker.trip(provider, error_msg, recovery=86400)
+                    else:
+                        self._handle_provider_error(provider, Exception(error_msg))
 
                     # Retorna vazio em vez de tentar novamente
                     return []
@@ -405,24 +479,27 @@ class ProductionSearchManager:
                         results.append(result)
 
                 logger.info(f"✅ Google Custom Search: {len(results)} resultados válidos")
+                self._handle_provider_success(provider)
                 return results
 
             elif response.status_code == 403:
                 logger.error("❌ Google API: Acesso negado (403) - Verifique chaves e quotas")
-                self.providers[provider]['enabled'] = False
+                self.breaker.trip(provider, "Acesso negado (403)", recovery=3600)
                 return []
 
             elif response.status_code == 429:
                 logger.warning("⚠️ Google API: Rate limit (429) - Aguardando reset")
-                self.providers[provider]['quota_reset'] = time.time() + 3600
+                self._handle_rate_limited(provider, response, 3600)
                 return []
 
             else:
                 logger.error(f"❌ Google API: Status {response.status_code}")
+                self._handle_status_error(provider, response.status_code)
                 return []
 
-        except requests.exceptions.Timeout:
+        except requests.exceptions.Timeout as e:
             logger.error(f"⏰ Timeout na requisição Google Search")
+            self._handle_provider_error(provider, e)
             return []
         except requests.exceptions.RequestException as e:
             logger.error(f"❌ Erro de rede Google Search: {e}")
@@ -437,12 +514,7 @@ class ProductionSearchManager:
         """Busca usando Serper API com validação robusta"""
         provider = 'serper'
 
-        if not self.providers[provider]['enabled']:
-            self._reset_provider_if_needed(provider)
-            if not self.providers[provider]['enabled']:
-                return []
-
-        if not self._check_rate_limit(provider):
+        if not self._provider_allowed(provider):
             return []
 
         try:
@@ -451,6 +523,7 @@ class ProductionSearchManager:
             if not api_key or len(api_key) < 30:
                 logger.error("❌ SERPER_API_KEY não configurada ou inválida")
                 self.providers[provider]['enabled'] = False
+                self.breaker.release(provider)
                 return []
 
             url = "https://google.serper.dev/search"
@@ -469,9 +542,7 @@ class ProductionSearchManager:
                 'page': 1
             }
 
-            self._record_request(provider)
-
-            response = requests.post(
+            response = fetch_engine.post(
                 url, 
                 json=payload, 
                 headers=headers, 
@@ -494,15 +565,22 @@ class ProductionSearchManager:
                         results.append(result)
 
                 logger.info(f"✅ Serper Search: {len(results)} resultados")
+                self._handle_provider_success(provider)
                 return results
 
             elif response.status_code == 429:
                 logger.warning("⚠️ Serper API: Rate limit atingido")
-                self.providers[provider]['quota_reset'] = time.time() + 3600
+                self._handle_rate_limited(provider, response, 3600)
+                return []
+
+            elif response.status_code in (401, 403):
+                logger.error(f"❌ Serper API: Acesso negado ({response.status_code})")
+                self.breaker.trip(provider, f"Acesso negado ({response.status_code})", recovery=3600)
                 return []
 
             else:
                 logger.error(f"❌ Serper API: Status {response.status_code}")
+                self._handle_status_error(provider, response.status_code)
                 return []
 
         except Exception as e:
@@ -514,10 +592,9 @@ class ProductionSearchManager:
         """Busca Bing via scraping robusto com anti-detecção"""
         provider = 'bing'
 
-        if not self.providers[provider]['enabled']:
-            self._reset_provider_if_needed(provider)
-            if not self.providers[provider]['enabled']:
-                return []
+        # Espaçamento anti-detecção compartilhado entre workers (token antes da sonda)
+        if not self._provider_allowed(provider):
+            return []
 
         try:
             # URL com parâmetros otimizados
@@ -533,12 +610,7 @@ class ProductionSearchManager:
 
             headers = self._get_headers('bing')
 
-            # Adiciona delay para evitar detecção
-            time.sleep(random.uniform(1.0, 2.0))
-
-            self._record_request(provider)
-
-            response = requests.get(
+            response = fetch_engine.get(
                 search_url,
                 params=params,
                 headers=headers,
@@ -604,15 +676,17 @@ class ProductionSearchManager:
                         continue
 
                 logger.info(f"✅ Bing Scraping: {len(results)} resultados válidos")
+                self._handle_provider_success(provider)
                 return results
 
             elif response.status_code == 429:
                 logger.warning("⚠️ Bing: Rate limit detectado")
-                time.sleep(5)
+                self._handle_rate_limited(provider, response, 60)
                 return []
 
             else:
                 logger.warning(f"⚠️ Bing retornou status {response.status_code}")
+                self._handle_status_error(provider, response.status_code)
                 return []
 
         except Exception as e:
@@ -634,8 +708,9 @@ class ProductionSearchManager:
             session = requests.Session()
             session.headers.update(self._get_headers('duckduckgo'))
 
-            # Delay anti-detecção
-            time.sleep(random.uniform(1.5, 3.0))
+            # Espaçamento anti-detecção compartilhado entre workers
+            if not self._check_rate_limit(provider):
+                return []
 
             # Primeira requisição
             initial_url = "https://duckduckgo.com/"
@@ -650,8 +725,6 @@ class ProductionSearchManager:
                 'df': 'm'
             }
 
-            self._record_request(provider)
-
             response = session.get(
                 search_url,
                 params=params,
@@ -738,14 +811,25 @@ class ProductionSearchManager:
             self._handle_provider_error(provider, e)
             return []
 
-    def search_with_fallback(self, query: str, max_results: int = 10) -> List[SearchResult]:
+    def search_with_fallback(self, query: str, max_results: int = 10) -> List[Dict[str, Any]]:
         """Busca com sistema de fallback robusto"""
 
         # Verifica cache primeiro
         cached_results = self.cache.get(query, "combined")
         if cached_results:
             logger.info(f"📦 Usando resultados do cache para: {query[:50]}...")
-            return cached_results
+            return cached_results[:max_results]
+
+        # Buscas idênticas simultâneas (neste ou em outro worker) compartilham uma execução
+        results = self.search_flight.do(
+            f"{query}:{max_results}",
+            lambda: self._search_providers(query, max_results),
+            cache_lookup=lambda: self.cache.get(query, "combined")
+        )
+        return results[:max_results]
+
+    def _search_providers(self, query: str, max_results: int) -> List[Dict[str, Any]]:
+        """Consulta os provedores em paralelo e grava o resultado no cache"""
 
         all_results = []
         successful_providers = []
@@ -753,7 +837,7 @@ class ProductionSearchManager:
         # Ordena provedores por prioridade e disponibilidade
         available_providers = [
             (name, config) for name, config in self.providers.items()
-            if config['enabled'] and config['error_count'] < 5 and name != 'duckduckgo'  # Exclui DuckDuckGo
+            if config['enabled'] and self.breaker.is_available(name) and name != 'duckduckgo'  # Exclui DuckDuckGo
         ]
         available_providers.sort(key=lambda x: x[1]['priority'])
 
@@ -820,27 +904,12 @@ class ProductionSearchManager:
             else:
                 dict_results.append(result)
 
-        # Salva no cache se obteve resultados
+        # Salva no cache se obteve resultados (mesmo formato dict do retorno)
         if dict_results:
-            # Converte para SearchResult para cache
-            cache_results = []
-            for result_dict in dict_results:
-                cache_result = SearchResult(
-                    title=result_dict['title'],
-                    url=result_dict['url'],
-                    snippet=result_dict['snippet'],
-                    source=result_dict['source']
-                )
-                cache_results.append(cache_result)
-            self.cache.set(query, cache_results, "combined")
+            self.cache.set(query, dict_results, "combined")
 
         logger.info(f"🎯 Busca final: {len(dict_results)} resultados únicos de {len(successful_providers)} provedores")
 
-        # Limpeza periódica do cache
-        if time.time() - self.last_cleanup > 3600:  # 1 hora
-            self.cache.cleanup_expired()
-            self.last_cleanup = time.time()
-
         return dict_results
 
     def get_provider_status(self) -> Dict[str, Any]:
@@ -853,38 +922,40 @@ class ProductionSearchManager:
                 'priority': config['priority'],
                 'error_count': config['error_count'],
                 'last_error': config.get('last_error'),
-                'rate_limited': (config.get('quota_reset') or 0) > time.time(),
-                'requests_today': len(self.rate_limiter.get(name, [])),
-                'rate_limit': config['rate_limit']
+                'rate_limited': self.rate_limiter.is_limited(name),
+                'rate_limits': config['rate_limits'],
+                'rate_limit_status': self.rate_limiter.status(name),
+                'circuit': self.breaker.state(name)
             }
 
         return status
 
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Estatísticas do cache de buscas (L1/L2) e do single-flight"""
+        stats = self.cache.get_stats()
+        stats['single_flight'] = self.search_flight.get_stats()
+        return stats
+
     def reset_provider_errors(self, provider_name: str = None):
-        """Reset contadores de erro        """
+        """Reset contadores de erro e fecha os circuitos"""
         if provider_name:
             if provider_name in self.providers:
                 self.providers[provider_name]['error_count'] = 0
-                self.providers[provider_name]['enabled'] = True
-                self.providers[provider_name]['quota_reset'] = None
-                self.error_counts[provider_name] = 0
+                self.rate_limiter.reset(provider_name)
+                self.breaker.reset(provider_name)
                 logger.info(f"🔄 Reset erros do provedor: {provider_name}")
         else:
             for name in self.providers:
                 self.providers[name]['error_count'] = 0
-                self.providers[name]['enabled'] = True
-                self.providers[name]['quota_reset'] = None
-                self.error_counts[name] = 0
+            self.rate_limiter.reset()
+            self.breaker.reset()
             logger.info("🔄 Reset erros de todos os provedores")
 
     def clear_cache(self):
         """Limpa todo o cache"""
         try:
-            if os.path.exists(self.cache.db_path):
-                with sqlite3.connect(self.cache.db_path) as conn:
-                    conn.execute("DELETE FROM search_cache")
-                    conn.commit()
-                logger.info("🗑️ Cache limpo completamente")
+            self.cache.clear()
+            logger.info("🗑️ Cache limpo completamente")
         except Exception as e:
             logger.error(f"Erro ao limpar cache: {e}")
 
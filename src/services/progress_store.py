@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Progress Store
+Armazenamento de progresso compartilhado entre workers (memória, SQLite ou Redis)
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Any
+
+from services.shared_store import ThreadLocalSQLite
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis
+    HAS_REDIS = True
+except ImportError:
+    HAS_REDIS = False
+
+
+class ProgressBackend:
+    """Interface dos backends de progresso
+
+    Cada sessão tem um estado (dict) e uma sequência de eventos numerados
+    a partir de 1, permitindo leitura incremental com cursor ``since``.
+    """
+
+    name = 'base'
+
+    def __init__(self):
+        self.max_events = int(os.getenv('PROGRESS_MAX_EVENTS', 500))
+        self.session_ttl = int(os.getenv('PROGRESS_SESSION_TTL', 3600))
+        self.completed_ttl = int(os.getenv('PROGRESS_COMPLETED_TTL', 300))
+        self.wait_interval = float(os.getenv('PROGRESS_WAIT_INTERVAL', 0.5))
+        self._last_cleanup = 0.0
+
+    def create_session(self, session_id: str, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Cria (ou reinicia) a sessão com o estado inicial"""
+        raise NotImplementedError
+
+    def get_state(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Retorna o estado da sessão ou None"""
+        raise NotImplementedError
+
+    def append_event(self, session_id: str, event: Dict[str, Any],
+                     state_updates: Optional[Dict[str, Any]] = None) -> Optional[int]:
+        """Adiciona evento e atualiza estado; retorna a sequência ou None se a sessão não existe"""
+        raise NotImplementedError
+
+    def get_events(self, session_id: str, since: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Eventos com sequência maior que ``since`` em ordem crescente"""
+        raise NotImplementedError
+
+    def delete_session(self, session_id: str):
+        """Remove a sessão e seus eventos"""
+        raise NotImplementedError
+
+    def list_sessions(self) -> List[Dict[str, Any]]:
+        """Estados de todas as sessões ativas"""
+        raise NotImplementedError
+
+    def cleanup(self) -> int:
+        """Remove sessões expiradas; retorna quantas foram removidas"""
+        return 0
+
+    def wait_for_events(self, session_id: str, since: int, timeout: float) -> List[Dict[str, Any]]:
+        """Aguarda até ``timeout`` segundos por eventos novos"""
+        deadline = time.time() + timeout
+        while True:
+            events = self.get_events(session_id, since)
+            remaining = deadline - time.time()
+            if events or remaining <= 0:
+                return events
+            time.sleep(min(self.wait_interval, remaining))
+
+    def _maybe_cleanup(self):
+        """Limpeza oportunista, no máximo uma vez por minuto"""
+        now = time.time()
+        if now - self._last_cleanup < 60:
+            return
+        self._last_cleanup = now
+        try:
+            removed = self.cleanup()
+            if removed:
+                logger.info(f"🧹 {removed} sessões de progresso expiradas removidas")
+        except Exception as e:
+            logger.warning(f"⚠️ Erro na limpeza de progresso: {e}")
+
+    def _is_expired(self, state: Dict[str, Any], now: float) -> bool:
+        ttl = self.completed_ttl if state.get('is_complete') else self.session_ttl
+        return now - state.get('updated_at', 0) > ttl
+
+
+class MemoryProgressBackend(ProgressBackend):
+    """Backend em memória (apenas um processo)"""
+
+    name = 'memory'
+
+    def __init__(self):
+        super().__init__()
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+        self._condition = threading.Condition()
+
+    def create_session(self, session_id: str, state: Dict[str, Any]) -> Dict[str, Any]:
+        self._maybe_cleanup()
+        state = dict(state, session_id=session_id, last_seq=0, updated_at=time.time())
+        with self._condition:
+            self._sessions[session_id] = {
+                'state': state,
+                'events': deque(maxlen=self.max_events)
+            }
+        return dict(state)
+
+    def get_state(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._condition:
+            entry = self._sessions.get(session_id)
+            return dict(entry['state']) if entry else None
+
+    def append_event(self, session_id: str, event: Dict[str, Any],
+                     state_updates: Optional[Dict[str, Any]] = None) -> Optional[int]:
+        with self._condition:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+
+            state = entry['state']
+            seq = state['last_seq'] + 1
+            state.update(state_updates or {})
+            state['last_seq'] = seq
+            state['updated_at'] = time.time()
+            entry['events'].append(dict(event, seq=seq))
+            self._condition.notify_all()
+            return seq
+
+    def get_events(self, session_id: str, since: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        with self._condition:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return []
+            events = [dict(event) for event in entry['events'] if event['seq'] > since]
+        return events[:limit] if limit else events
+
+    def delete_session(self, session_id: str):
+        with self._condition:
+            self._sessions.pop(session_id, None)
+            self._condition.notify_all()
+
+    def list_sessions(self) -> List[Dict[str, Any]]:
+        with self._condition:
+            return [dict(entry['state']) for entry in self._sessions.values()]
+
+    def cleanup(self) -> int:
+        now = time.time()
+        with self._condition:
+            expired = [sid for sid, entry in self._sessions.items() if self._is_expired(entry['state'], now)]
+            for session_id in expired:
+                del self._sessions[session_id]
+        return len(expired)
+
+    def wait_for_events(self, session_id: str, since: int, timeout: float) -> List[Dict[str, Any]]:
+        deadline = time.time() + timeout
+        with self._condition:
+            while True:
+                events = self.get_events(session_id, since)
+                remaining = deadline - time.time()
+                if events or remaining <= 0 or session_id not in self._sessions:
+                    return events
+                self._condition.wait(remaining)
+
+
+class SQLiteProgressBackend(ProgressBackend):
+    """Backend em SQLite (WAL), compartilhado pelos workers da mesma máquina"""
+
+    name = 'sqlite'
+
+    def __init__(self, db_path: Optional[str] = None):
+        super().__init__()
+        self.db_path = db_path or os.getenv('PROGRESS_DB', os.path.join('cache', 'progress.db'))
+        self._db = ThreadLocalSQLite(self.db_path)
+
+        self._init_database()
+
+    def _init_database(self):
+        """Inicializa tabelas de sessões e eventos"""
+        try:
+            conn = self._db.connection()
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS progress_sessions (
+                    session_id TEXT PRIMARY KEY,
+                    state TEXT NOT NULL,
+                    last_seq INTEGER NOT NULL DEFAULT 0,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS progress_events (
+                    session_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (session_id, seq)
+                )
+            """)
+        except Exception as e:
+            logger.error(f"Erro ao inicializar banco de progresso: {e}")
+
+    def create_session(self, session_id: str, state: Dict[str, Any]) -> Dict[str, Any]:
+        self._maybe_cleanup()
+        now = time.time()
+        state = dict(state, session_id=session_id, last_seq=0, updated_at=now)
+
+        conn = self._db.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM progress_events WHERE session_id = ?", (session_id,))
+            conn.execute(
+                "INSERT OR REPLACE INTO progress_sessions (session_id, state, last_seq, updated_at) VALUES (?, ?, 0, ?)",
+                (session_id, json.dumps(state, ensure_ascii=False), now)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return state
+
+    def get_state(self, session_id: str) -> Optional[Dict[str, Any]]:
+        row = self._db.connection().execute(
+            "SELECT state FROM progress_sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def append_event(self, session_id: str, event: Dict[str, Any],
+                     state_updates: Optional[Dict[str, Any]] = None) -> Optional[int]:
+        conn = self._db.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT state, last_seq FROM progress_sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                conn.execute("ROLLBACK")
+                return None
+
+            now = time.time()
+            seq = row[1] + 1
+            state = json.loads(row[0])
+            state.update(state_updates or {})
+            state['last_seq'] = seq
+            state['updated_at'] = now
+
+            conn.execute(
+                "UPDATE progress_sessions SET state = ?, last_seq = ?, updated_at = ? WHERE session_id = ?",
+                (json.dumps(state, ensure_ascii=False), seq, now, session_id)
+            )
+            conn.execute(
+                "INSERT INTO progress_events (session_id, seq, data) VALUES (?, ?, ?)",
+                (session_id, seq, json.dumps(dict(event, seq=seq), ensure_ascii=False))
+            )
+            if seq > self.max_events:
+                conn.execute(
+                    "DELETE FROM progress_events WHERE session_id = ? AND seq <= ?",
+                    (session_id, seq - self.max_events)
+                )
+            conn.execute("COMMIT")
+            return seq
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get_events(self, session_id: str, since: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        rows = self._db.connection().execute(
+            "SELECT data FROM progress_events WHERE session_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+            (session_id, since, limit or -1)
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def delete_session(self, session_id: str):
+        conn = self._db.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM progress_events WHERE session_id = ?", (session_id,))
+            conn.execute("DELETE FROM progress_sessions WHERE session_id = ?", (session_id,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def list_sessions(self) -> List[Dict[str, Any]]:
+        rows = self._db.connection().execute(
+            "SELECT state FROM progress_sessions ORDER BY updated_at DESC"
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def cleanup(self) -> int:
+        now = time.time()
+        expired = [
+            state['session_id'] for state in self.list_sessions()
+            if self._is_expired(state, now)
+        ]
+        for session_id in expired:
+            self.delete_session(session_id)
+        return len(expired)
+
+
+class RedisProgressBackend(ProgressBackend):
+    """Backend em Redis, compartilhado entre máquinas, com notificação via pub/sub"""
+
+    name = 'redis'
+
+    def __init__(self, url: Optional[str] = None):
+        super().__init__()
+        self.url = url or os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+        self.prefix = os.getenv('PROGRESS_REDIS_PREFIX', 'arqv30:progress')
+        self.client = redis.Redis.from_url(self.url, decode_responses=True)
+        self.client.ping()
+
+    def _key(self, session_id: str, suffix: str) -> str:
+        return f"{self.prefix}:{session_id}:{suffix}"
+
+    def create_session(self, session_id: str, state: Dict[str, Any]) -> Dict[str, Any]:
+        state = dict(state, session_id=session_id, last_seq=0, updated_at=time.time())
+
+        pipe = self.client.pipeline()
+        pipe.delete(self._key(session_id, 'state'), self._key(session_id, 'events'), self._key(session_id, 'seq'))
+        pipe.set(self._key(session_id, 'state'), json.dumps(state, ensure_ascii=False), ex=self.session_ttl)
+        pipe.execute()
+        return state
+
+    def get_state(self, session_id: str) -> Optional[Dict[str, Any]]:
+        raw = self.client.get(self._key(session_id, 'state'))
+        return json.loads(raw) if raw else None
+
+    def append_event(self, session_id: str, event: Dict[str, Any],
+                     state_updates: Optional[Dict[str, Any]] = None) -> Optional[int]:
+        state_key = self._key(session_id, 'state')
+        events_key = self._key(session_id, 'events')
+        seq_key = self._key(session_id, 'seq')
+
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(state_key)
+                    raw = pipe.get(state_key)
+                    if not raw:
+                        return None
+
+                    seq = int(pipe.get(seq_key) or 0) + 1
+                    state = json.loads(raw)
+                    state.update(state_updates or {})
+                    state['last_seq'] = seq
+                    state['updated_at'] = time.time()
+                    ttl = self.completed_ttl if state.get('is_complete') else self.session_ttl
+
+                    pipe.multi()
+                    pipe.set(seq_key, seq, ex=ttl)
+                    pipe.set(state_key, json.dumps(state, ensure_ascii=False), ex=ttl)
+                    pipe.rpush(events_key, json.dumps(dict(event, seq=seq), ensure_ascii=False))
+                    pipe.ltrim(events_key, -self.max_events, -1)
+                    pipe.expire(events_key, ttl)
+                    pipe.publish(self._key(session_id, 'notify'), seq)
+                    pipe.execute()
+                    return seq
+                except redis.WatchError:
+                    continue
+
+    def get_events(self, session_id: str, since: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        events = [json.loads(raw) for raw in self.client.lrange(self._key(session_id, 'events'), 0, -1)]
+        events = [event for event in events if event['seq'] > since]
+        return events[:limit] if limit else events
+
+    def delete_session(self, session_id: str):
+        self.client.delete(
+            self._key(session_id, 'state'),
+            self._key(session_id, 'events'),
+            self._key(session_id, 'seq')
+        )
+
+    def list_sessions(self) -> List[Dict[str, Any]]:
+        sessions = []
+        for key in self.client.scan_iter(match=self._key('*', 'state')):
+            raw = self.client.get(key)
+            if raw:
+                sessions.append(json.loads(raw))
+        return sessions
+
+    def wait_for_events(self, session_id: str, since: int, timeout: float) -> List[Dict[str, Any]]:
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(self._key(session_id, 'notify'))
+
+            # Verifica depois de inscrever para não perder eventos publicados no intervalo
+            deadline = time.time() + timeout
+            while True:
+                events = self.get_events(session_id, since)
+                remaining = deadline - time.time()
+                if events or remaining <= 0:
+                    return events
+                pubsub.get_message(timeout=remaining)
+        finally:
+            pubsub.close()
+
+
+def create_progress_backend(name: Optional[str] = None) -> ProgressBackend:
+    """Cria o backend configurado em PROGRESS_BACKEND (memory, sqlite ou redis)"""
+    name = (name or os.getenv('PROGRESS_BACKEND', 'sqlite')).lower()
+
+    if name == 'redis':
+        if HAS_REDIS:
+            try:
+                backend = RedisProgressBackend()
+                logger.info("✅ Progresso compartilhado via Redis")
+                return backend
+            except Exception as e:
+                logger.warning(f"⚠️ Redis indisponível para progresso ({e}), usando SQLite")
+        else:
+            logger.warning("⚠️ Biblioteca redis não instalada, usando SQLite para progresso")
+        name = 'sqlite'
+
+    if name == 'sqlite':
+        try:
+            backend = SQLiteProgressBackend()
+            logger.info(f"✅ Progresso compartilhado via SQLite ({backend.db_path})")
+            return backend
+        except Exception as e:
+            logger.warning(f"⚠️ SQLite indisponível para progresso ({e}), usando memória")
+
+    logger.info("✅ Progresso em memória (processo único)")
+    return MemoryProgressBackend()
+
+
+# Instância global
+progress_store = create_progress_backend()
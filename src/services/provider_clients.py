@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Provider Clients
+Clientes HTTP de longa duração (keep-alive) por provedor de IA e por worker
+"""
+
+import os
+import logging
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from typing import Any, Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+try:
+    import openai
+    HAS_OPENAI = True
+except ImportError:
+    HAS_OPENAI = False
+
+try:
+    import google.generativeai as genai
+    HAS_GEMINI = True
+except ImportError:
+    HAS_GEMINI = False
+
+
+class ProviderClientPool:
+    """Mantém um cliente reutilizável por provedor em cada processo
+
+    Sessões requests (HuggingFace, DeepSeek) e clientes OpenAI/Gemini são
+    criados na primeira chamada do worker e reaproveitados, mantendo as
+    conexões TLS abertas entre chamadas. Ao detectar outro PID (fork do
+    gunicorn com preload_app), descarta os clientes herdados e recria.
+    """
+
+    def __init__(self):
+        self.pool_connections = int(os.getenv('AI_POOL_CONNECTIONS', 4))
+        self.pool_maxsize = int(os.getenv('AI_POOL_MAXSIZE', 16))
+
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._sessions: Dict[str, requests.Session] = {}
+        self._openai_clients: Dict[str, Any] = {}
+        self._gemini_models: Dict[tuple, Any] = {}
+        self._calls: Dict[str, int] = {}
+        self._clients_created: Dict[str, int] = {}
+
+    def _ensure_process(self):
+        """Descarta clientes herdados do processo pai (sockets não podem ser compartilhados)"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._discard()
+                self._pid = os.getpid()
+
+    def _discard(self):
+        self._sessions = {}
+        self._openai_clients = {}
+        self._gemini_models = {}
+        self._calls = {}
+        self._clients_created = {}
+
+    def reset(self):
+        """Recria todos os clientes (chamado no post_fork do gunicorn)"""
+        with self._lock:
+            self._discard()
+            self._pid = os.getpid()
+        logger.info(f"🔌 Clientes de provedores reiniciados no processo {self._pid}")
+
+    def _created(self, provider: str):
+        self._clients_created[provider] = self._clients_created.get(provider, 0) + 1
+
+    def record_call(self, provider: str):
+        """Contabiliza uma chamada ao provedor"""
+        with self._lock:
+            self._calls[provider] = self._calls.get(provider, 0) + 1
+
+    def session(self, provider: str) -> requests.Session:
+        """Sessão keep-alive do provedor neste processo"""
+        self._ensure_process()
+        session = self._sessions.get(provider)
+        if session is not None:
+            return session
+
+        with self._lock:
+            session = self._sessions.get(provider)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+                self._sessions[provider] = session
+                self._created(provider)
+                logger.info(f"🔌 Sessão HTTP criada para {provider} (processo {os.getpid()})")
+            return session
+
+    def post(self, provider: str, url: str, **kwargs) -> requests.Response:
+        """POST pela sessão do provedor"""
+        self.record_call(provider)
+        return self.session(provider).post(url, **kwargs)
+
+    def openai_client(self, api_key: str):
+        """Cliente OpenAI reutilizável (pool httpx interno) por chave e processo"""
+        if not HAS_OPENAI:
+            raise RuntimeError("Biblioteca openai não instalada")
+
+        self._ensure_process()
+        client = self._openai_clients.get(api_key)
+        if client is not None:
+            return client
+
+        with self._lock:
+            client = self._openai_clients.get(api_key)
+            if client is None:
+                client = openai.OpenAI(api_key=api_key)
+                self._openai_clients[api_key] = client
+                self._created('openai')
+            return client
+
+    def gemini_model(self, api_key: str, model_name: str):
+        """GenerativeModel reutilizável por processo (canal gRPC não sobrevive ao fork)"""
+        if not HAS_GEMINI:
+            raise RuntimeError("Biblioteca google-generativeai não instalada")
+
+        self._ensure_process()
+        key = (api_key, model_name)
+        model = self._gemini_models.get(key)
+        if model is not None:
+            return model
+
+        with self._lock:
+            model = self._gemini_models.get(key)
+            if model is None:
+                # configure() recria o gerenciador de clientes do SDK neste processo
+                genai.configure(api_key=api_key)
+                model = genai.GenerativeModel(model_name)
+                self._gemini_models[key] = model
+                self._created('gemini')
+            return model
+
+    @staticmethod
+    def _connection_stats(session: requests.Session) -> Dict[str, int]:
+        """Conexões abertas x requisições feitas nos pools urllib3 da sessão"""
+        connections = requests_made = 0
+        for adapter in session.adapters.values():
+            pools = getattr(getattr(adapter, 'poolmanager', None), 'pools', None)
+            if pools is None:
+                continue
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                connections += getattr(pool, 'num_connections', 0)
+                requests_made += getattr(pool, 'num_requests', 0)
+        return {
+            'connections_opened': connections,
+            'requests': requests_made,
+            'connections_reused': max(requests_made - connections, 0)
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Chamadas, clientes criados e reuso de conexões por provedor"""
+        self._ensure_process()
+        with self._lock:
+            calls = dict(self._calls)
+            created = dict(self._clients_created)
+            sessions = dict(self._sessions)
+
+        stats: Dict[str, Any] = {}
+        for provider in set(calls) | set(created):
+            provider_stats = {
+                'calls': calls.get(provider, 0),
+                'clients_created': created.get(provider, 0)
+            }
+            if provider in sessions:
+                provider_stats.update(self._connection_stats(sessions[provider]))
+                made = provider_stats['requests']
+                provider_stats['reuse_rate'] = round(provider_stats['connections_reused'] / made, 4) if made else 0.0
+            stats[provider] = provider_stats
+
+        return {'pid': os.getpid(), 'providers': stats}
+
+
+# Instância global
+provider_clients = ProviderClientPool()
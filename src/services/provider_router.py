@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Provider Router
+Roteamento de provedores por latência (EWMA), taxa de erro e quota restante
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from services.shared_store import AtomicStore
+from services.token_bucket import token_bucket_backend
+
+logger = logging.getLogger(__name__)
+
+
+class _ProviderMetrics:
+    """Métricas observadas de um provedor"""
+
+    def __init__(self, window: int):
+        self.ewma_latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.samples: deque = deque(maxlen=window)
+        self.successes = 0
+        self.failures = 0
+        self.hedges_won = 0
+
+
+class ProviderRouter:
+    """Ordena provedores pelo custo esperado de uma chamada
+
+    O custo é a latência EWMA dividida pela taxa de sucesso EWMA; provedores
+    sem amostras usam a latência inicial (``initial_latency``) escalada pela
+    prioridade estática. Provedores com ``rate_limit_reset`` no futuro ou
+    com a quota diária esgotada ficam fora da rota. Latência e erros são
+    do processo; o consumo da quota fica no armazenamento compartilhado do
+    rate limiter, para que todos os workers gastem a mesma quota.
+    """
+
+    def __init__(self, namespace: str, alpha: Optional[float] = None, quota_store: Optional[AtomicStore] = None):
+        self.namespace = namespace
+        self.quota_store = quota_store if quota_store is not None else token_bucket_backend
+        self.alpha = alpha if alpha is not None else float(os.getenv('ROUTER_EWMA_ALPHA', 0.3))
+        self.window = int(os.getenv('ROUTER_LATENCY_WINDOW', 100))
+        self.initial_latency = float(os.getenv('ROUTER_INITIAL_LATENCY', 10.0))
+        self.min_samples_for_p95 = int(os.getenv('ROUTER_MIN_SAMPLES_P95', 10))
+
+        self._metrics: Dict[str, _ProviderMetrics] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, provider: str) -> _ProviderMetrics:
+        metrics = self._metrics.get(provider)
+        if metrics is None:
+            metrics = _ProviderMetrics(self.window)
+            self._metrics[provider] = metrics
+        return metrics
+
+    @staticmethod
+    def daily_quota(provider: str) -> Optional[int]:
+        """Quota diária configurada em <PROVIDER>_DAILY_QUOTA (sem limite se ausente)"""
+        value = os.getenv(f"{provider.upper()}_DAILY_QUOTA")
+        return int(value) if value else None
+
+    def _quota_key(self, provider: str) -> str:
+        return f"quota:{self.namespace}:{provider}"
+
+    def remaining_quota(self, provider: str) -> Optional[int]:
+        quota = self.daily_quota(provider)
+        if quota is None:
+            return None
+        try:
+            record = self.quota_store.get(self._quota_key(provider))
+        except Exception as e:
+            # Sem leitura da quota o provedor continua na rota
+            logger.warning(f"⚠️ Erro ao consultar quota de {provider}: {e}")
+            return quota
+        used = record['used'] if record and record['day'] == date.today().isoformat() else 0
+        return max(quota - used, 0)
+
+    def _consume_quota(self, provider: str):
+        """Conta uma chamada na quota do dia, atomicamente entre workers"""
+        if self.daily_quota(provider) is None:
+            return
+
+        def mutate(record):
+            today = date.today().isoformat()
+            if not record or record['day'] != today:
+                record = {'day': today, 'used': 0}
+            record['used'] += 1
+            return record, record['used']
+
+        try:
+            self.quota_store.update(self._quota_key(provider), mutate)
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao registrar quota de {provider}: {e}")
+
+    def record(self, provider: str, latency: float, success: bool):
+        """Registra o resultado de uma chamada real ao provedor"""
+        self._consume_quota(provider)
+        with self._lock:
+            metrics = self._get(provider)
+            metrics.error_rate = (1 - self.alpha) * metrics.error_rate + self.alpha * (0.0 if success else 1.0)
+            if success:
+                metrics.successes += 1
+                metrics.samples.append(latency)
+                if metrics.ewma_latency is None:
+                    metrics.ewma_latency = latency
+                else:
+                    metrics.ewma_latency = (1 - self.alpha) * metrics.ewma_latency + self.alpha * latency
+            else:
+                metrics.failures += 1
+
+    def record_hedge_win(self, provider: str):
+        with self._lock:
+            self._get(provider).hedges_won += 1
+
+    def p95(self, provider: str) -> Optional[float]:
+        """Percentil 95 das latências recentes (None com poucas amostras)"""
+        with self._lock:
+            samples = sorted(self._get(provider).samples)
+        if len(samples) < self.min_samples_for_p95:
+            return None
+        index = min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))
+        return samples[index]
+
+    def expected_cost(self, provider: str, priority: int = 1) -> float:
+        with self._lock:
+            metrics = self._get(provider)
+            latency = metrics.ewma_latency if metrics.ewma_latency is not None else self.initial_latency * priority
+            success_rate = max(1.0 - metrics.error_rate, 0.05)
+        return latency / success_rate
+
+    def is_routable(self, provider: str, rate_limit_reset: Optional[float] = None) -> bool:
+        """Fora da rota enquanto limitado pelo provedor ou sem quota diária"""
+        if rate_limit_reset and rate_limit_reset > time.time():
+            return False
+        remaining = self.remaining_quota(provider)
+        return remaining is None or remaining > 0
+
+    def rank(self, candidates: Dict[str, Dict[str, Any]]) -> List[str]:
+        """
+        Ordena provedores roteáveis pelo custo esperado
+
+        Args:
+            candidates: nome -> {'priority': int, 'rate_limit_reset': float|None}
+        """
+        routable = [
+            name for name, info in candidates.items()
+            if self.is_routable(name, info.get('rate_limit_reset'))
+        ]
+        return sorted(
+            routable,
+            key=lambda name: (self.expected_cost(name, candidates[name].get('priority', 1)), candidates[name].get('priority', 1))
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Métricas por provedor"""
+        with self._lock:
+            providers = list(self._metrics)
+
+        stats = {}
+        for name in providers:
+            with self._lock:
+                metrics = self._get(name)
+                entry = {
+                    'ewma_latency': round(metrics.ewma_latency, 3) if metrics.ewma_latency is not None else None,
+                    'error_rate': round(metrics.error_rate, 4),
+                    'successes': metrics.successes,
+                    'failures': metrics.failures,
+                    'hedges_won': metrics.hedges_won,
+                    'samples': len(metrics.samples)
+                }
+            p95 = self.p95(name)
+            entry['p95_latency'] = round(p95, 3) if p95 is not None else None
+            entry['remaining_quota'] = self.remaining_quota(name)
+            stats[name] = entry
+        return stats
@@ -9,38 +9,19 @@ Extrator multicamadas sem dependências pagas
 import os
 import logging
 import time
-import requests
-from typing import Dict, List, Optional, Any, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Any, Tuple, Iterator, Callable
 from urllib.parse import urljoin, urlparse
-import re
-
-# Imports condicionais para não quebrar se não estiver instalado
-try:
-    import trafilatura
-    HAS_TRAFILATURA = True
-except ImportError:
-    HAS_TRAFILATURA = False
-
-try:
-    from readability import Document
-    HAS_READABILITY = True
-except ImportError:
-    HAS_READABILITY = False
-
-try:
-    import newspaper
-    from newspaper import Article
-    HAS_NEWSPAPER = True
-except ImportError:
-    HAS_NEWSPAPER = False
-
-try:
-    from bs4 import BeautifulSoup
-    HAS_BEAUTIFULSOUP = True
-except ImportError:
-    HAS_BEAUTIFULSOUP = False
 
+from services.html_extractors import AVAILABILITY, available_extractors, clean_content, is_valid_content
 from services.url_resolver import url_resolver
+from services.concurrency_limiter import HostConcurrencyLimiter
+from services.single_flight import SingleFlight, flight_lock_backend
+from services.content_cache import content_cache
+from services.fetch_engine import fetch_engine, FetchRejected
+from services.extraction_executor import extraction_executor
+from services.extractor_selector import extractor_selector
 
 logger = logging.getLogger(__name__)
 
@@ -48,19 +29,27 @@ class RobustContentExtractor:
     """Extrator de conteúdo multicamadas e robusto"""
     
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+        # Conexões vêm do pool compartilhado do fetch engine (keep-alive gerenciado por ele)
+        self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'pt-BR,pt;q=0.9,en;q=0.8',
             'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1'
-        })
+        }
         
         self.timeout = 30
         self.min_content_length = 500
         self.max_content_length = 50000  # 50K chars max
+        self.max_per_host = int(os.getenv('EXTRACTOR_MAX_PER_HOST', 2))
+        
+        # Download em streaming: recusa não-HTML pelos headers e para de ler após o limite
+        self.max_html_bytes = int(os.getenv('EXTRACTOR_MAX_HTML_BYTES', 2 * 1024 * 1024))
+        self.accepted_content_types = tuple(
+            content_type.strip().lower()
+            for content_type in os.getenv('EXTRACTOR_ACCEPTED_CONTENT_TYPES', 'text/html,application/xhtml+xml').split(',')
+            if content_type.strip()
+        )
         
         # Estatísticas dos extratores
         self.stats = {
@@ -69,8 +58,24 @@ class RobustContentExtractor:
             'newspaper': {'success': 0, 'failed': 0, 'total_time': 0},
             'beautifulsoup': {'success': 0, 'failed': 0, 'total_time': 0},
             'total_extractions': 0,
-            'successful_extractions': 0
+            'successful_extractions': 0,
+            'rejected': {'content_type': 0, 'too_large': 0},
+            'truncated': 0,
+            'last_batch': None
         }
+        self._stats_lock = threading.Lock()
+        
+        # Conteúdo extraído persistido por URL resolvida
+        self.content_cache = content_cache
+        
+        # Downloads simultâneos da mesma URL compartilham uma única extração
+        self.extraction_flight = SingleFlight('extraction', flight_lock_backend)
+        
+        # Parsing (CPU) opcionalmente em processos separados; o download fica nesta thread
+        self.extraction_executor = extraction_executor
+        
+        # Ordem dos extratores aprendida por domínio (e quarentena de domínios sem extração)
+        self.extractor_selector = extractor_selector
         
         logger.info("🔧 Robust Content Extractor inicializado")
         logger.info(f"📚 Extratores disponíveis: {self._get_available_extractors()}")
@@ -82,291 +87,358 @@ class RobustContentExtractor:
         Returns:
             str: Conteúdo extraído (mínimo 500 chars) ou None se falhar
         """
+        return self.extract_content_detailed(url)['content']
+    
+    def extract_content_detailed(self, url: str) -> Dict[str, Any]:
+        """
+        Extrai conteúdo e retorna detalhes da extração
+        
+        Returns:
+            Dict: url, resolved_url, success, content, extractor, elapsed e error
+        """
+        start_time = time.time()
+        
+        # 1. Resolve URL de redirecionamento
+        resolved_url = self._resolve_url(url)
+        return self._extract_resolved(url, resolved_url, start_time)
+    
+    def batch_extract(
+        self,
+        urls: List[str],
+        max_workers: int = 5,
+        max_per_host: Optional[int] = None,
+        callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        limiter: Optional[HostConcurrencyLimiter] = None
+    ) -> Dict[str, Optional[str]]:
+        """
+        Extrai várias URLs em paralelo
+        
+        Args:
+            urls: URLs a extrair
+            max_workers: Máximo de extrações simultâneas
+            max_per_host: Máximo de extrações simultâneas por host
+            callback: Chamado com o resultado de cada URL assim que concluída
+            limiter: Limitador compartilhado entre lotes (opcional)
+        
+        Returns:
+            Dict: URL original -> conteúdo extraído (None se falhar)
+        """
+        contents = {}
+        for result in self.iter_extract(urls, max_workers, max_per_host, limiter):
+            contents[result['url']] = result['content']
+            if callback:
+                try:
+                    callback(result)
+                except Exception as e:
+                    logger.error(f"❌ Erro no callback de extração para {result['url']}: {str(e)}")
+        return contents
+    
+    def iter_extract(
+        self,
+        urls: List[str],
+        max_workers: int = 5,
+        max_per_host: Optional[int] = None,
+        limiter: Optional[HostConcurrencyLimiter] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Extrai várias URLs em paralelo e entrega cada resultado assim que concluído
+        
+        Yields:
+            Dict: Resultado detalhado de cada URL (ver extract_content_detailed)
+        """
+        unique_urls = list(dict.fromkeys(url for url in urls if url))
+        if not unique_urls:
+            return
+        
+        limiter = limiter or HostConcurrencyLimiter(
+            max_total=max_workers,
+            max_per_host=max_per_host or self.max_per_host
+        )
+        batch_start = time.time()
+        batch_stats = {'urls': len(unique_urls), 'successful': 0, 'failed': 0, 'total_url_time': 0.0}
+        
+        logger.info(f"📦 Extração em lote: {len(unique_urls)} URLs ({max_workers} simultâneas)")
+        
+        # Encurtadores do lote seguem redirects em paralelo; as threads abaixo acham tudo no cache
+        url_resolver.resolve_many(unique_urls, max_concurrency=max_workers * 2)
+        
+        executor = ThreadPoolExecutor(
+            max_workers=min(max_workers, len(unique_urls)),
+            thread_name_prefix='batch-extract'
+        )
+        futures = {
+            executor.submit(self._extract_with_limiter, url, limiter): url
+            for url in unique_urls
+        }
         try:
-            start_time = time.time()
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    url = futures[future]
+                    result = self._build_result(url, url, None, None, 0.0, str(e))
+                
+                batch_stats['successful' if result['success'] else 'failed'] += 1
+                batch_stats['total_url_time'] += result['elapsed']
+                yield result
+        finally:
+            # Consumidor interrompeu a iteração: descarta o que ainda não começou
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+            
+            batch_stats['elapsed'] = time.time() - batch_start
+            batch_stats['avg_url_time'] = batch_stats['total_url_time'] / max(batch_stats['successful'] + batch_stats['failed'], 1)
+            with self._stats_lock:
+                self.stats['last_batch'] = batch_stats
+            logger.info(f"📦 Lote concluído: {batch_stats['successful']}/{len(unique_urls)} em {batch_stats['elapsed']:.2f}s")
+    
+    def _extract_with_limiter(self, url: str, limiter: HostConcurrencyLimiter) -> Dict[str, Any]:
+        """Resolve a URL e extrai respeitando o limite do host final"""
+        start_time = time.time()
+        resolved_url = self._resolve_url(url)
+        
+        with limiter.slot(resolved_url):
+            return self._extract_resolved(url, resolved_url, start_time)
+    
+    def _resolve_url(self, url: str) -> str:
+        """Resolve URL de redirecionamento"""
+        resolved_url = url_resolver.resolve_redirect_url(url)
+        if resolved_url != url:
+            logger.info(f"🔄 URL resolvida: {url} -> {resolved_url}")
+        return resolved_url
+    
+    def _extract_resolved(self, original_url: str, url: str, start_time: float) -> Dict[str, Any]:
+        """Extrai uma URL já resolvida, coalescendo extrações simultâneas da mesma URL"""
+        result = self.extraction_flight.do(
+            url,
+            lambda: self._download_and_extract(original_url, url, start_time),
+            cache_lookup=lambda: self._fresh_cached_result(original_url, url, start_time)
+        )
+        # Cópia própria deste solicitante (ver SingleFlight.do)
+        result['url'] = original_url
+        return result
+    
+    def _fresh_cached_result(self, original_url: str, url: str, start_time: float) -> Optional[Dict[str, Any]]:
+        """Resultado do cache de conteúdo se a entrada ainda dispensa revalidação"""
+        cached = self.content_cache.get(url)
+        if cached and cached['fresh']:
+            return self._cached_result(original_url, url, cached, start_time, 'hits')
+        return None
+    
+    def _cached_result(
+        self,
+        original_url: str,
+        url: str,
+        cached: Dict[str, Any],
+        start_time: float,
+        cache_status: str
+    ) -> Dict[str, Any]:
+        """Monta resultado a partir do cache de conteúdo"""
+        self.content_cache.record(cache_status)
+        with self._stats_lock:
             self.stats['total_extractions'] += 1
+            self.stats['successful_extractions'] += 1
+        
+        logger.info(f"📦 Conteúdo do cache ({cache_status}) para {url}: {len(cached['content'])} caracteres")
+        result = self._build_result(original_url, url, cached['content'], cached['extractor'], time.time() - start_time)
+        result['cache_status'] = cache_status
+        return result
+    
+    def _download_and_extract(self, original_url: str, url: str, start_time: float) -> Dict[str, Any]:
+        """Baixa e extrai conteúdo de uma URL já resolvida"""
+        try:
+            # 2. Cache de conteúdo: entrada recente é servida sem rede
+            cached = self.content_cache.get(url)
+            if cached and cached['fresh']:
+                return self._cached_result(original_url, url, cached, start_time, 'hits')
+            
+            # Domínio em que todos os extratores vêm falhando: nem baixa
+            cooldown = self.extractor_selector.cooldown_remaining(url)
+            if cooldown:
+                with self._stats_lock:
+                    self.stats['total_extractions'] += 1
+                logger.info(f"🧊 Domínio em quarentena ({cooldown:.0f}s restantes), pulando {url}")
+                return self._build_result(original_url, url, None, None, time.time() - start_time, 'domain_cooldown')
             
-            # 1. Resolve URL de redirecionamento
-            resolved_url = url_resolver.resolve_redirect_url(url)
-            if resolved_url != url:
-                logger.info(f"🔄 URL resolvida: {url} -> {resolved_url}")
-                url = resolved_url
+            # 3. Baixa HTML (condicional quando há validadores em cache)
+            page = self._fetch_page(url, cached)
             
-            # 2. Baixa conteúdo HTML
-            html_content = self._fetch_html(url)
+            if page and page['not_modified'] and cached:
+                self.content_cache.mark_validated(url, page['etag'], page['last_modified'])
+                return self._cached_result(original_url, url, cached, start_time, 'revalidated')
+            
+            if page and page.get('rejected'):
+                with self._stats_lock:
+                    self.stats['total_extractions'] += 1
+                return self._build_result(original_url, url, None, None, time.time() - start_time, f"rejected_{page['rejected']}")
+            
+            html_content = page['html'] if page else None
             if not html_content:
+                with self._stats_lock:
+                    self.stats['total_extractions'] += 1
                 logger.error(f"❌ Falha ao baixar HTML para {url}")
-                return None
+                return self._build_result(original_url, url, None, None, time.time() - start_time, 'download_failed')
             
             logger.info(f"📥 HTML baixado: {len(html_content)} caracteres")
             
-            # 3. Tenta extratores em ordem de prioridade
-            extractors = [
-                ('trafilatura', self._extract_with_trafilatura),
-                ('readability', self._extract_with_readability),
-                ('newspaper', self._extract_with_newspaper),
-                ('beautifulsoup', self._extract_with_beautifulsoup)
-            ]
+            # HTML idêntico ao da última extração: reaproveita sem reprocessar
+            html_hash = self.content_cache.html_hash(html_content)
+            if cached and cached['html_hash'] == html_hash:
+                self.content_cache.mark_validated(url, page['etag'], page['last_modified'])
+                return self._cached_result(original_url, url, cached, start_time, 'unchanged')
+            
+            self.content_cache.record('misses')
             
-            for extractor_name, extractor_func in extractors:
-                if not self._is_extractor_available(extractor_name):
-                    continue
+            with self._stats_lock:
+                self.stats['total_extractions'] += 1
+            
+            # 3. Cascata de extratores na ordem aprendida para o domínio (no pool de processos, se habilitado)
+            outcome = self.extraction_executor.run(
+                html_content, url, self.extractor_selector.order_for(url, self._get_available_extractors()),
+                self.min_content_length, self.max_content_length
+            )
+            extraction_time = time.time() - start_time
+            self.extractor_selector.record(url, outcome['attempts'])
+            
+            with self._stats_lock:
+                for attempt in outcome['attempts']:
+                    if not attempt['success']:
+                        self.stats[attempt['extractor']]['failed'] += 1
+            
+            content = outcome['content']
+            extractor_name = outcome['extractor']
+            if content:
+                with self._stats_lock:
+                    self.stats[extractor_name]['success'] += 1
+                    self.stats[extractor_name]['total_time'] += extraction_time
+                    self.stats['successful_extractions'] += 1
                 
-                try:
-                    logger.info(f"🔍 Tentando extração com {extractor_name}...")
-                    content = extractor_func(html_content, url)
-                    
-                    if self._validate_content(content, url):
-                        extraction_time = time.time() - start_time
-                        self.stats[extractor_name]['success'] += 1
-                        self.stats[extractor_name]['total_time'] += extraction_time
-                        self.stats['successful_extractions'] += 1
-                        
-                        logger.info(f"✅ Extração bem-sucedida com {extractor_name}: {len(content)} caracteres em {extraction_time:.2f}s")
-                        return content
-                    else:
-                        self.stats[extractor_name]['failed'] += 1
-                        logger.warning(f"⚠️ Conteúdo insuficiente com {extractor_name}: {len(content) if content else 0} caracteres")
-                        
-                except Exception as e:
-                    self.stats[extractor_name]['failed'] += 1
-                    logger.error(f"❌ Erro com {extractor_name}: {str(e)}")
-                    continue
+                logger.info(f"✅ Extração bem-sucedida com {extractor_name}: {len(content)} caracteres em {extraction_time:.2f}s")
+                self.content_cache.set(url, content, extractor_name, page['etag'], page['last_modified'], html_hash)
+                return self._build_result(original_url, url, content, extractor_name, extraction_time)
+            
+            if outcome.get('error'):
+                return self._build_result(original_url, url, None, None, extraction_time, outcome['error'])
             
             # Todos os extratores falharam
             logger.error(f"❌ FALHA CRÍTICA: Todos os extratores falharam para {url}")
-            return None
+            return self._build_result(original_url, url, None, None, time.time() - start_time, 'all_extractors_failed')
             
         except Exception as e:
             logger.error(f"❌ Erro crítico na extração de {url}: {str(e)}")
-            return None
+            return self._build_result(original_url, url, None, None, time.time() - start_time, str(e))
+    
+    @staticmethod
+    def _build_result(
+        url: str,
+        resolved_url: str,
+        content: Optional[str],
+        extractor: Optional[str],
+        elapsed: float,
+        error: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Monta o resultado detalhado de uma extração"""
+        return {
+            'url': url,
+            'resolved_url': resolved_url,
+            'success': content is not None,
+            'content': content,
+            'content_length': len(content) if content else 0,
+            'extractor': extractor,
+            'elapsed': elapsed,
+            'error': error
+        }
     
     def _fetch_html(self, url: str) -> Optional[str]:
         """Baixa conteúdo HTML da URL"""
+        page = self._fetch_page(url)
+        return page['html'] if page else None
+    
+    def _fetch_page(self, url: str, cached: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Baixa a página, usando GET condicional quando há validadores em cache
+        
+        Returns:
+            Dict: html, not_modified, etag e last_modified; None se falhar
+        """
+        headers = dict(self.headers)
+        if cached:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+        
         try:
-            response = self.session.get(
+            response = fetch_engine.get(
                 url,
+                headers=headers,
                 timeout=self.timeout,
                 verify=False,  # Para evitar problemas de SSL
-                allow_redirects=True
+                allow_redirects=True,
+                max_bytes=self.max_html_bytes,
+                content_types=self.accepted_content_types
             )
             
+            page = {
+                'html': None,
+                'not_modified': response.status_code == 304,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified')
+            }
+            if page['not_modified']:
+                logger.info(f"♻️ Página não modificada (304): {url}")
+                return page
+            
             response.raise_for_status()
             
-            # Detecta encoding
-            if response.encoding is None:
-                response.encoding = 'utf-8'
+            if response.truncated:
+                with self._stats_lock:
+                    self.stats['truncated'] += 1
+                logger.info(f"✂️ Download interrompido no limite de {self.max_html_bytes:,} bytes: {url}")
             
+            # Texto já decodificado durante o streaming (charset do header ou detectado no início)
             html = response.text
             
             if len(html) < 1000:
                 logger.warning(f"⚠️ HTML muito pequeno: {len(html)} caracteres")
                 return None
             
-            return html
+            page['html'] = html
+            return page
             
+        except FetchRejected as e:
+            with self._stats_lock:
+                self.stats['rejected'][e.reason] = self.stats['rejected'].get(e.reason, 0) + 1
+            logger.warning(f"🚫 {e}")
+            return {'html': None, 'not_modified': False, 'etag': None, 'last_modified': None, 'rejected': e.reason}
         except Exception as e:
             logger.error(f"❌ Erro ao baixar {url}: {str(e)}")
             return None
     
-    def _extract_with_trafilatura(self, html: str, url: str) -> Optional[str]:
-        """Extrai com Trafilatura (prioridade 1)"""
-        if not HAS_TRAFILATURA:
-            return None
-        
-        try:
-            content = trafilatura.extract(
-                html, 
-                include_comments=False,
-                include_tables=True,
-                include_formatting=False,
-                favor_precision=True,
-                url=url
-            )
-            
-            if content:
-                # Limpa conteúdo
-                content = self._clean_content(content)
-                return content
-            
-            return None
-            
-        except Exception as e:
-            logger.error(f"Erro Trafilatura: {e}")
-            return None
-    
-    def _extract_with_readability(self, html: str, url: str) -> Optional[str]:
-        """Extrai com Readability (prioridade 2)"""
-        if not HAS_READABILITY:
-            return None
-        
-        try:
-            doc = Document(html)
-            content = doc.summary()
-            
-            if content:
-                # Remove tags HTML
-                if HAS_BEAUTIFULSOUP:
-                    soup = BeautifulSoup(content, 'html.parser')
-                    content = soup.get_text()
-                else:
-                    # Remove tags manualmente
-                    content = re.sub(r'<[^>]+>', '', content)
-                
-                content = self._clean_content(content)
-                return content
-            
-            return None
-            
-        except Exception as e:
-            logger.error(f"Erro Readability: {e}")
-            return None
-    
-    def _extract_with_newspaper(self, html: str, url: str) -> Optional[str]:
-        """Extrai com Newspaper3k (prioridade 3)"""
-        if not HAS_NEWSPAPER:
-            return None
-        
-        try:
-            article = Article(url)
-            article.set_html(html)
-            article.parse()
-            
-            content = article.text
-            if content:
-                content = self._clean_content(content)
-                return content
-            
-            return None
-            
-        except Exception as e:
-            logger.error(f"Erro Newspaper: {e}")
-            return None
-    
-    def _extract_with_beautifulsoup(self, html: str, url: str) -> Optional[str]:
-        """Extrai com BeautifulSoup (fallback final)"""
-        if not HAS_BEAUTIFULSOUP:
-            return None
-        
-        try:
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # Remove scripts e styles
-            for script in soup(["script", "style", "nav", "header", "footer", "aside"]):
-                script.decompose()
-            
-            # Procura pelo conteúdo principal
-            main_content = None
-            
-            # Tenta encontrar containers de conteúdo
-            content_selectors = [
-                'article', 'main', '.content', '#content', '.post', '.article',
-                '.entry', '.text', '.body', '.container', 'div[role="main"]'
-            ]
-            
-            for selector in content_selectors:
-                try:
-                    element = soup.select_one(selector)
-                    if element:
-                        main_content = element.get_text()
-                        break
-                except:
-                    continue
-            
-            # Se não encontrou, pega o body
-            if not main_content:
-                body = soup.find('body')
-                if body:
-                    main_content = body.get_text()
-                else:
-                    main_content = soup.get_text()
-            
-            if main_content:
-                content = self._clean_content(main_content)
-                return content
-            
-            return None
-            
-        except Exception as e:
-            logger.error(f"Erro BeautifulSoup: {e}")
-            return None
-    
     def _clean_content(self, content: str) -> str:
         """Limpa e normaliza o conteúdo extraído"""
-        if not content:
-            return ""
-        
-        # Remove quebras de linha excessivas
-        content = re.sub(r'\n\s*\n\s*\n', '\n\n', content)
-        
-        # Remove espaços excessivos
-        content = re.sub(r'[ \t]+', ' ', content)
-        
-        # Remove caracteres de controle
-        content = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', content)
-        
-        # Normaliza
-        content = content.strip()
-        
-        # Limita tamanho
-        if len(content) > self.max_content_length:
-            content = content[:self.max_content_length] + "..."
-        
-        return content
+        return clean_content(content, self.max_content_length)
     
     def _validate_content(self, content: str, url: str) -> bool:
         """Valida se o conteúdo extraído é válido"""
-        if not content:
-            return False
-        
-        # Verifica tamanho mínimo
-        if len(content) < self.min_content_length:
-            logger.warning(f"⚠️ Conteúdo muito pequeno para {url}: {len(content)} < {self.min_content_length}")
-            return False
-        
-        # Verifica se não é só lixo
-        words = content.split()
-        if len(words) < 50:  # Mínimo 50 palavras
-            logger.warning(f"⚠️ Muito poucas palavras para {url}: {len(words)}")
-            return False
-        
-        # Verifica se tem conteúdo real (não só navegação)
-        common_words = ['o', 'a', 'de', 'da', 'do', 'e', 'em', 'um', 'uma', 'com', 'não', 'para', 'que', 'se']
-        real_words = sum(1 for word in words if any(common in word.lower() for common in common_words))
-        
-        if real_words / len(words) < 0.1:  # Pelo menos 10% de palavras comuns
-            logger.warning(f"⚠️ Conteúdo suspeito para {url}: poucos conectivos")
-            return False
-        
-        logger.info(f"✅ Conteúdo válido para {url}: {len(content)} caracteres, {len(words)} palavras")
-        return True
+        return is_valid_content(content, url, self.min_content_length)
     
     def _is_extractor_available(self, extractor_name: str) -> bool:
         """Verifica se o extrator está disponível"""
-        availability = {
-            'trafilatura': HAS_TRAFILATURA,
-            'readability': HAS_READABILITY,
-            'newspaper': HAS_NEWSPAPER,
-            'beautifulsoup': HAS_BEAUTIFULSOUP
-        }
-        return availability.get(extractor_name, False)
+        return AVAILABILITY.get(extractor_name, False)
     
     def _get_available_extractors(self) -> List[str]:
         """Retorna lista de extratores disponíveis"""
-        available = []
-        if HAS_TRAFILATURA:
-            available.append('trafilatura')
-        if HAS_READABILITY:
-            available.append('readability')
-        if HAS_NEWSPAPER:
-            available.append('newspaper')
-        if HAS_BEAUTIFULSOUP:
-            available.append('beautifulsoup')
-        return available
+        return available_extractors()
     
     def get_extractor_stats(self) -> Dict[str, Any]:
         """Retorna estatísticas dos extratores"""
-        stats_copy = self.stats.copy()
+        with self._stats_lock:
+            stats_copy = {
+                key: value.copy() if isinstance(value, dict) else value
+                for key, value in self.stats.items()
+            }
         
         # Calcula percentuais de sucesso
         for extractor in ['trafilatura', 'readability', 'newspaper', 'beautifulsoup']:
@@ -381,6 +453,12 @@ class RobustContentExtractor:
                 stats_copy[extractor]['success_rate'] = 0
                 stats_copy[extractor]['avg_time'] = 0
         
+        stats_copy['single_flight'] = self.extraction_flight.get_stats()
+        stats_copy['content_cache'] = self.content_cache.get_stats()
+        stats_copy['process_pool'] = self.extraction_executor.get_stats()
+        stats_copy['domain_selector'] = self.extractor_selector.get_stats()
+        stats_copy['url_resolver'] = url_resolver.get_stats()
+        
         # Taxa geral de sucesso
         if stats_copy['total_extractions'] > 0:
             stats_copy['overall_success_rate'] = (stats_copy['successful_extractions'] / stats_copy['total_extractions']) * 100
@@ -400,15 +478,14 @@ class RobustContentExtractor:
                 self.stats[extractor] = {'success': 0, 'failed': 0, 'total_time': 0}
             self.stats['total_extractions'] = 0
             self.stats['successful_extractions'] = 0
+            self.stats['rejected'] = {'content_type': 0, 'too_large': 0}
+            self.stats['truncated'] = 0
+            self.stats['last_batch'] = None
             logger.info("🔄 Reset estatísticas de todos os extratores")
     
     def clear_cache(self):
-        """Limpa cache de sessão"""
-        self.session.close()
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        })
+        """Limpa cache de conteúdo extraído"""
+        self.content_cache.clear()
         logger.info("🧹 Cache de extração limpo")
 
 # Instância global
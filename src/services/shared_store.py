@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Shared Store
+Conexões SQLite por thread e armazenamento chave-valor atômico compartilhado entre workers
+"""
+
+import os
+import json
+import logging
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis
+    HAS_REDIS = True
+except ImportError:
+    HAS_REDIS = False
+
+Record = Dict[str, Any]
+Mutation = Callable[[Optional[Record]], Tuple[Optional[Record], Any]]
+
+
+class ThreadLocalSQLite:
+    """Conexão SQLite persistente por thread (e por processo) em modo WAL
+
+    Após o fork do gunicorn cada worker abre suas próprias conexões; as
+    instruções SQL são constantes, então o cache de statements do sqlite3
+    reaproveita as consultas já compiladas em cada conexão.
+    """
+
+    def __init__(self, db_path: str, row_factory: Optional[Callable] = None):
+        self.db_path = db_path
+        self.row_factory = row_factory
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+            if self.row_factory is not None:
+                conn.row_factory = self.row_factory
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+
+class AtomicStore:
+    """Interface de armazenamento de registros JSON por chave
+
+    ``update`` executa ``mutate(record) -> (record, resultado)`` de forma
+    atômica entre processos; ``mutate`` recebe None quando a chave não existe
+    e devolve record None quando não há nada a gravar.
+    """
+
+    name = 'base'
+
+    def get(self, key: str) -> Optional[Record]:
+        raise NotImplementedError
+
+    def update(self, key: str, mutate: Mutation) -> Any:
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def keys(self, prefix: str) -> List[str]:
+        raise NotImplementedError
+
+
+class MemoryStore(AtomicStore):
+    """Registros em memória (apenas um processo)"""
+
+    name = 'memory'
+
+    def __init__(self):
+        self._records: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            raw = self._records.get(key)
+        return json.loads(raw) if raw else None
+
+    def update(self, key, mutate):
+        # Serializa como os outros backends: quem chama nunca divide o objeto guardado
+        with self._lock:
+            raw = self._records.get(key)
+            record, result = mutate(json.loads(raw) if raw else None)
+            if record is not None:
+                self._records[key] = json.dumps(record)
+            return result
+
+    def delete(self, key):
+        with self._lock:
+            self._records.pop(key, None)
+
+    def keys(self, prefix):
+        with self._lock:
+            return [key for key in self._records if key.startswith(prefix)]
+
+
+class SQLiteStore(AtomicStore):
+    """Registros em SQLite compartilhados pelos workers da máquina"""
+
+    name = 'sqlite'
+
+    def __init__(self, db_path: str, table: str):
+        self.table = table
+        self._db = ThreadLocalSQLite(db_path)
+        self.db_path = db_path
+        self._db.connection().execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                key TEXT PRIMARY KEY,
+                record TEXT NOT NULL
+            )
+        """)
+
+    def get(self, key):
+        row = self._db.connection().execute(f"SELECT record FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def update(self, key, mutate):
+        conn = self._db.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(f"SELECT record FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            record, result = mutate(json.loads(row[0]) if row else None)
+            if record is not None:
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, record) VALUES (?, ?)",
+                    (key, json.dumps(record))
+                )
+            conn.execute("COMMIT")
+            return result
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete(self, key):
+        self._db.connection().execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def keys(self, prefix):
+        rows = self._db.connection().execute(
+            f"SELECT key FROM {self.table} WHERE key LIKE ? ESCAPE '\\'",
+            (prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%',)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+
+class RedisStore(AtomicStore):
+    """Registros no Redis (workers em várias máquinas)"""
+
+    name = 'redis'
+
+    def __init__(self, prefix: str, url: Optional[str] = None):
+        self.url = url or os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+        self.prefix = prefix
+        self.client = redis.Redis.from_url(self.url, decode_responses=True)
+        self.client.ping()
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    def get(self, key):
+        raw = self.client.get(self._key(key))
+        return json.loads(raw) if raw else None
+
+    def update(self, key, mutate):
+        redis_key = self._key(key)
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(redis_key)
+                    raw = pipe.get(redis_key)
+                    record, result = mutate(json.loads(raw) if raw else None)
+                    pipe.multi()
+                    if record is not None:
+                        pipe.set(redis_key, json.dumps(record))
+                    pipe.execute()
+                    return result
+                except redis.WatchError:
+                    continue
+
+    def delete(self, key):
+        self.client.delete(self._key(key))
+
+    def keys(self, prefix):
+        start = len(self.prefix) + 1
+        return [key[start:] for key in self.client.scan_iter(match=f"{self._key(prefix)}*")]
+
+
+def create_store(
+    label: str,
+    backend: str,
+    sqlite_path: str,
+    sqlite_table: str,
+    redis_prefix: str
+) -> AtomicStore:
+    """
+    Cria o armazenamento configurado, caindo de redis para SQLite e de SQLite para memória
+
+    Args:
+        label: Nome do componente nos logs (ex.: "circuit breaker")
+        backend: memory, sqlite ou redis
+        sqlite_path: Arquivo SQLite
+        sqlite_table: Tabela (chave, registro JSON)
+        redis_prefix: Prefixo das chaves no Redis
+    """
+    backend = (backend or 'sqlite').lower()
+
+    if backend == 'redis':
+        if HAS_REDIS:
+            try:
+                return RedisStore(redis_prefix)
+            except Exception as e:
+                logger.warning(f"⚠️ Redis indisponível para {label} ({e}), usando SQLite")
+        else:
+            logger.warning(f"⚠️ Biblioteca redis não instalada, usando SQLite para {label}")
+        backend = 'sqlite'
+
+    if backend == 'sqlite':
+        try:
+            return SQLiteStore(sqlite_path, sqlite_table)
+        except Exception as e:
+            logger.warning(f"⚠️ SQLite indisponível para {label} ({e}), usando memória")
+
+    return MemoryStore()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Single Flight
+Coalescência de requisições idênticas simultâneas, no processo e entre workers
+"""
+
+import os
+import copy
+import time
+import uuid
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+
+try:
+    import redis
+    HAS_REDIS = True
+except ImportError:
+    HAS_REDIS = False
+
+
+class FileLockBackend:
+    """Lock entre processos via flock em arquivos (chaves distribuídas em faixas fixas)"""
+
+    name = 'file'
+
+    def __init__(self, lock_dir: Optional[str] = None, stripes: int = 1024):
+        self.lock_dir = lock_dir or os.getenv('SINGLE_FLIGHT_LOCK_DIR', os.path.join('cache', 'locks'))
+        self.stripes = max(1, int(stripes))
+        os.makedirs(self.lock_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        stripe = int(hashlib.sha1(key.encode('utf-8')).hexdigest()[:8], 16) % self.stripes
+        return os.path.join(self.lock_dir, f"{stripe}.lock")
+
+    @contextmanager
+    def acquire(self, key: str, timeout: float) -> Iterator[bool]:
+        """Tenta obter o lock por até ``timeout`` segundos; entrega True se obteve"""
+        fd = os.open(self._path(key), os.O_RDWR | os.O_CREAT, 0o644)
+        acquired = False
+        try:
+            deadline = time.time() + timeout
+            delay = 0.05
+            while True:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    acquired = True
+                    break
+                except (BlockingIOError, PermissionError):
+                    if time.time() >= deadline:
+                        break
+                    time.sleep(delay)
+                    delay = min(delay * 2, 0.5)
+            yield acquired
+        finally:
+            if acquired:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+
+class RedisLockBackend:
+    """Lock entre processos/máquinas via SET NX PX no Redis"""
+
+    name = 'redis'
+
+    _RELEASE_SCRIPT = """
+        if redis.call('get', KEYS[1]) == ARGV[1] then
+            return redis.call('del', KEYS[1])
+        end
+        return 0
+    """
+
+    def __init__(self, url: Optional[str] = None):
+        self.url = url or os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+        self.prefix = os.getenv('SINGLE_FLIGHT_REDIS_PREFIX', 'arqv30:flight')
+        self.lock_ttl_ms = int(float(os.getenv('SINGLE_FLIGHT_LOCK_TTL', 120)) * 1000)
+        self.client = redis.Redis.from_url(self.url)
+        self.client.ping()
+        self._release = self.client.register_script(self._RELEASE_SCRIPT)
+
+    @contextmanager
+    def acquire(self, key: str, timeout: float) -> Iterator[bool]:
+        lock_key = f"{self.prefix}:{hashlib.sha1(key.encode('utf-8')).hexdigest()}"
+        token = uuid.uuid4().hex
+        acquired = False
+        try:
+            deadline = time.time() + timeout
+            delay = 0.05
+            while True:
+                if self.client.set(lock_key, token, nx=True, px=self.lock_ttl_ms):
+                    acquired = True
+                    break
+                if time.time() >= deadline:
+                    break
+                time.sleep(delay)
+                delay = min(delay * 2, 0.5)
+            yield acquired
+        finally:
+            if acquired:
+                try:
+                    self._release(keys=[lock_key], args=[token])
+                except Exception as e:
+                    logger.warning(f"⚠️ Erro ao liberar lock {lock_key}: {e}")
+
+
+def create_lock_backend(name: Optional[str] = None):
+    """Cria o backend de lock configurado em SINGLE_FLIGHT_BACKEND (file, redis ou none)"""
+    name = (name or os.getenv('SINGLE_FLIGHT_BACKEND', 'file')).lower()
+
+    if name == 'redis':
+        if HAS_REDIS:
+            try:
+                return RedisLockBackend()
+            except Exception as e:
+                logger.warning(f"⚠️ Redis indisponível para single-flight ({e}), usando lock em arquivo")
+        else:
+            logger.warning("⚠️ Biblioteca redis não instalada, usando lock em arquivo")
+        name = 'file'
+
+    if name == 'file':
+        if HAS_FCNTL:
+            try:
+                return FileLockBackend()
+            except Exception as e:
+                logger.warning(f"⚠️ Lock em arquivo indisponível ({e}), single-flight apenas no processo")
+        else:
+            logger.warning("⚠️ fcntl indisponível nesta plataforma, single-flight apenas no processo")
+
+    return None
+
+
+class _Call:
+    """Chamada em andamento compartilhada pelos solicitantes da mesma chave"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Executa uma única vez chamadas simultâneas com a mesma chave
+
+    No processo, quem chega primeiro executa e os demais aguardam o mesmo
+    resultado. Entre processos, o executor obtém um lock da chave e consulta
+    ``cache_lookup`` antes de executar, aproveitando o que outro worker acabou
+    de gravar no cache compartilhado. Cada solicitante (inclusive o executor)
+    recebe sua própria cópia do resultado, feita por ``copy_result``.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        lock_backend=None,
+        lock_timeout: Optional[float] = None,
+        copy_result: Callable[[Any], Any] = copy.deepcopy
+    ):
+        self.namespace = namespace
+        self.copy_result = copy_result
+        self.lock_backend = lock_backend
+        self.lock_timeout = lock_timeout if lock_timeout is not None else float(os.getenv('SINGLE_FLIGHT_LOCK_TIMEOUT', 90))
+
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            'executed': 0,
+            'coalesced': 0,
+            'shared_cache_hits': 0,
+            'lock_timeouts': 0
+        }
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def do(self, key: str, fn: Callable[[], Any], cache_lookup: Optional[Callable[[], Any]] = None) -> Any:
+        """Executa ``fn`` ou aguarda a execução em andamento da mesma chave
+
+        Args:
+            key: Identificador da requisição (query, URL...)
+            fn: Função que produz o resultado
+            cache_lookup: Consulta ao cache compartilhado; habilita o lock entre processos
+
+        Returns:
+            Cópia própria do resultado de ``fn`` (alterá-la não afeta os demais solicitantes)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.stats['coalesced'] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return self.copy_result(call.result)
+
+        try:
+            call.result = self._execute(key, fn, cache_lookup)
+            return self.copy_result(call.result)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+            if call.waiters:
+                logger.info(f"🔗 {call.waiters} requisições coalescidas em {self.namespace}: {key[:60]}")
+
+    def _execute(self, key: str, fn: Callable[[], Any], cache_lookup: Optional[Callable[[], Any]]) -> Any:
+        # Sem cache compartilhado não há o que reaproveitar de outro processo
+        if self.lock_backend is None or cache_lookup is None:
+            self._count('executed')
+            return fn()
+
+        with self.lock_backend.acquire(f"{self.namespace}:{key}", self.lock_timeout) as acquired:
+            if not acquired:
+                self._count('lock_timeouts')
+                logger.warning(f"⚠️ Timeout aguardando lock de {self.namespace}, executando sem coalescer: {key[:60]}")
+            else:
+                # Outro worker pode ter preenchido o cache enquanto aguardávamos
+                cached = cache_lookup()
+                if cached:
+                    self._count('shared_cache_hits')
+                    return cached
+
+            self._count('executed')
+            return fn()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores de execuções e coalescências"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['in_flight'] = len(self._calls)
+        stats['lock_backend'] = self.lock_backend.name if self.lock_backend else 'process'
+        return stats
+
+
+# Backend de lock compartilhado pelos serviços
+flight_lock_backend = create_lock_backend()
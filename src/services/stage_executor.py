@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Stage Executor
+Executa etapas com dependências (DAG) em paralelo, com timeout e tempos por etapa
+"""
+
+import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StageTimeout(Exception):
+    """Etapa excedeu o tempo máximo"""
+
+
+class StageFailed(Exception):
+    """Etapa obrigatória falhou (ou dependência falhou)"""
+
+    def __init__(self, stage: str, error: BaseException):
+        super().__init__(str(error))
+        self.stage = stage
+        self.error = error
+        self.timings: Dict[str, Dict[str, Any]] = {}
+
+
+@dataclass
+class Stage:
+    """Etapa do pipeline
+
+    ``fn`` recebe um dict com os resultados das etapas listadas em ``depends_on``.
+    ``step``/``message`` são reportados ao progress_callback quando a etapa
+    passa a ser a próxima pendente na ordem declarada.
+    """
+    name: str
+    fn: Callable[[Dict[str, Any]], Any]
+    depends_on: Tuple[str, ...] = ()
+    timeout: Optional[float] = None
+    step: Optional[int] = None
+    message: Optional[str] = None
+    required: bool = True
+
+
+@dataclass
+class _StageRun:
+    stage: Stage
+    status: str = 'pending'  # pending, running, done, failed, timeout, skipped
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    reported: bool = False
+
+
+class StageExecutor:
+    """Executor de etapas dependentes
+
+    Etapas sem dependência pendente rodam simultaneamente em threads. O
+    progresso é reportado na ordem declarada das etapas: o passo de uma etapa
+    só é anunciado depois que todas as anteriores terminaram (etapas já
+    concluídas são anunciadas em sequência), de modo que os passos são sempre
+    crescentes, como na execução sequencial.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, default_timeout: Optional[float] = None):
+        self.enabled = os.getenv('STAGE_EXECUTOR_PARALLEL', 'true').lower() == 'true'
+        self.max_workers = max_workers or int(os.getenv('STAGE_EXECUTOR_MAX_WORKERS', 5))
+        self.default_timeout = default_timeout if default_timeout is not None else float(os.getenv('STAGE_TIMEOUT_SECONDS', 180))
+
+    def run(
+        self,
+        stages: List[Stage],
+        progress_callback: Optional[Callable] = None
+    ) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+        """
+        Executa as etapas respeitando dependências
+
+        Args:
+            stages: Etapas na ordem em que o progresso deve ser reportado
+            progress_callback: Callback (step, message) do progresso da análise
+
+        Returns:
+            (resultados por etapa, tempos/status por etapa)
+
+        Raises:
+            StageFailed: Etapa obrigatória falhou, expirou ou teve dependência falha
+        """
+        runs = {stage.name: _StageRun(stage) for stage in stages}
+        order = [stage.name for stage in stages]
+        self._validate(stages)
+
+        results: Dict[str, Any] = {}
+        phase_start = time.time()
+        workers = max(1, min(self.max_workers, len(stages))) if self.enabled else 1
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='stage')
+        running = {}
+        cursor = 0
+        failure: Optional[StageFailed] = None
+
+        def report_next():
+            # Anuncia as etapas na ordem declarada até a primeira não concluída (passos sempre crescentes)
+            nonlocal cursor
+            while cursor < len(order):
+                run = runs[order[cursor]]
+                if not run.reported:
+                    run.reported = True
+                    if progress_callback and run.stage.step is not None:
+                        progress_callback(run.stage.step, run.stage.message or run.stage.name)
+                if run.status not in ('done', 'failed', 'timeout', 'skipped'):
+                    break
+                cursor += 1
+
+        try:
+            report_next()
+            while True:
+                # Agenda etapas prontas (dependências concluídas), até o limite de workers
+                for name in order:
+                    run = runs[name]
+                    if run.status != 'pending' or len(running) >= workers:
+                        continue
+                    deps = [runs[dep] for dep in run.stage.depends_on]
+                    if any(dep.status in ('failed', 'timeout', 'skipped') for dep in deps):
+                        run.status = 'skipped'
+                        run.error = 'dependência falhou'
+                        logger.warning(f"⏭️ Etapa {name} ignorada: dependência falhou")
+                        if run.stage.required and failure is None:
+                            failure = StageFailed(name, Exception(f"Dependência de {name} falhou"))
+                        continue
+                    if all(dep.status == 'done' for dep in deps):
+                        run.status = 'running'
+                        run.started_at = time.time()
+                        running[executor.submit(run.stage.fn, {dep: results[dep] for dep in run.stage.depends_on})] = name
+
+                report_next()
+                if failure is not None or not running:
+                    break
+
+                # Aguarda a próxima conclusão ou o timeout mais próximo
+                now = time.time()
+                deadlines = [
+                    runs[name].started_at + self._timeout_for(runs[name].stage)
+                    for name in running.values()
+                ]
+                done, _ = wait(list(running), timeout=max(0.0, min(deadlines) - now), return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    name = running.pop(future)
+                    run = runs[name]
+                    run.finished_at = time.time()
+                    try:
+                        results[name] = future.result()
+                        run.status = 'done'
+                        logger.info(f"✅ Etapa {name} concluída em {run.finished_at - run.started_at:.2f}s")
+                    except Exception as e:
+                        run.status = 'failed'
+                        run.error = str(e)
+                        logger.error(f"❌ Etapa {name} falhou: {e}")
+                        if run.stage.required and failure is None:
+                            failure = StageFailed(name, e)
+
+                now = time.time()
+                for future, name in list(running.items()):
+                    run = runs[name]
+                    if now >= run.started_at + self._timeout_for(run.stage):
+                        # A thread não pode ser interrompida; o resultado tardio é descartado
+                        running.pop(future)
+                        future.cancel()
+                        run.status = 'timeout'
+                        run.finished_at = now
+                        run.error = f"timeout após {self._timeout_for(run.stage):.1f}s"
+                        logger.error(f"⏰ Etapa {name} excedeu {self._timeout_for(run.stage):.1f}s")
+                        if run.stage.required and failure is None:
+                            failure = StageFailed(name, StageTimeout(f"Etapa {name} excedeu o tempo limite"))
+
+        finally:
+            for future in running:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+        timings = {
+            name: {
+                'status': runs[name].status,
+                'seconds': round(runs[name].finished_at - runs[name].started_at, 3)
+                if runs[name].started_at and runs[name].finished_at else None,
+                'started_offset': round(runs[name].started_at - phase_start, 3) if runs[name].started_at else None,
+                'depends_on': list(runs[name].stage.depends_on),
+                **({'error': runs[name].error} if runs[name].error else {})
+            }
+            for name in order
+        }
+
+        if failure is not None:
+            failure.timings = timings
+            raise failure
+
+        logger.info(f"🧩 {len(order)} etapas concluídas em {time.time() - phase_start:.2f}s")
+        return results, timings
+
+    def _timeout_for(self, stage: Stage) -> float:
+        return stage.timeout if stage.timeout is not None else self.default_timeout
+
+    @staticmethod
+    def _validate(stages: List[Stage]):
+        """Garante nomes únicos, dependências conhecidas e ausência de ciclos"""
+        names = [stage.name for stage in stages]
+        if len(set(names)) != len(names):
+            raise ValueError("Nomes de etapas duplicados")
+
+        graph = {stage.name: stage.depends_on for stage in stages}
+        for stage in stages:
+            unknown = [dep for dep in stage.depends_on if dep not in graph]
+            if unknown:
+                raise ValueError(f"Etapa {stage.name} depende de etapas desconhecidas: {unknown}")
+
+        visiting, visited = set(), set()
+
+        def visit(name: str):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Ciclo de dependências envolvendo {name}")
+            visiting.add(name)
+            for dep in graph[name]:
+                visit(dep)
+            visiting.discard(name)
+            visited.add(name)
+
+        for name in names:
+            visit(name)
+
+
+# Instância global
+stage_executor = StageExecutor()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Token Bucket
+Rate limiter por token bucket com várias janelas, compartilhado entre workers
+"""
+
+import os
+import re
+import time
+import random
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.shared_store import AtomicStore, create_store
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {
+    's': 1, 'sec': 1, 'second': 1,
+    'm': 60, 'min': 60, 'minute': 60,
+    'h': 3600, 'hour': 3600,
+    'd': 86400, 'day': 86400,
+    'mo': 30 * 86400, 'month': 30 * 86400
+}
+
+_LIMIT_PATTERN = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*/\s*(\d+(?:\.\d+)?)?\s*([a-z]+)\s*$')
+
+
+def parse_limits(spec: str) -> List[Tuple[str, float, float]]:
+    """
+    Converte "1/2s,100/day,2500/month" em [(janela, capacidade, período em segundos)]
+
+    A capacidade é também o burst permitido na janela.
+    """
+    limits = []
+    for part in (spec or '').split(','):
+        if not part.strip():
+            continue
+        match = _LIMIT_PATTERN.match(part.lower())
+        if not match or match.group(3) not in PERIODS:
+            logger.warning(f"⚠️ Limite inválido ignorado: {part.strip()}")
+            continue
+        capacity = float(match.group(1))
+        period = float(match.group(2) or 1) * PERIODS[match.group(3)]
+        if capacity > 0 and period > 0:
+            limits.append((part.strip(), capacity, period))
+    return limits
+
+
+def create_bucket_backend() -> AtomicStore:
+    """Armazenamento configurado em RATE_LIMIT_BACKEND (memory, sqlite ou redis)"""
+    return create_store(
+        'rate limit',
+        os.getenv('RATE_LIMIT_BACKEND', 'sqlite'),
+        os.getenv('RATE_LIMIT_DB', os.path.join('cache', 'rate_limits.db')),
+        'token_buckets',
+        os.getenv('RATE_LIMIT_REDIS_PREFIX', 'arqv30:ratelimit')
+    )
+
+
+class TokenBucketLimiter:
+    """Token buckets por provedor, um por janela (segundo, dia, mês...)
+
+    Uma requisição consome um token de cada janela do provedor, atomicamente
+    e no armazenamento compartilhado, de modo que todos os workers dividem a
+    mesma quota. Quem não encontra token aguarda apenas o tempo até o próximo
+    ficar disponível, limitado por ``max_wait``.
+    """
+
+    def __init__(self, namespace: str, backend: Optional[AtomicStore] = None):
+        self.namespace = namespace
+        self.backend = backend if backend is not None else token_bucket_backend
+        self.max_wait = float(os.getenv('RATE_LIMIT_MAX_WAIT', 10))
+
+        self._limits: Dict[str, List[Tuple[str, float, float]]] = {}
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+    def _key(self, name: str) -> str:
+        return f"{self.namespace}:{name}"
+
+    def configure(self, name: str, spec: str):
+        """Define as janelas do provedor (ex.: "1/second,100/day")"""
+        self._limits[name] = parse_limits(spec)
+        self.stats.setdefault(name, {'acquired': 0, 'rejected': 0, 'waits': 0, 'waited_seconds': 0.0})
+
+    def _count(self, name: str, key: str, amount: float = 1):
+        with self._lock:
+            self.stats.setdefault(name, {'acquired': 0, 'rejected': 0, 'waits': 0, 'waited_seconds': 0.0})
+            self.stats[name][key] += amount
+
+    def _refill(self, name: str, record: Optional[Dict[str, Any]], now: float) -> Dict[str, Any]:
+        """Repõe os tokens proporcionalmente ao tempo decorrido"""
+        record = record or {'windows': {}, 'blocked_until': 0}
+        windows = {}
+        for window, capacity, period in self._limits.get(name, []):
+            tokens, updated = record['windows'].get(window, (capacity, now))
+            tokens = min(capacity, tokens + max(now - updated, 0) * capacity / period)
+            windows[window] = (tokens, now)
+        record['windows'] = windows
+        return record
+
+    def _wait_time(self, name: str, record: Dict[str, Any], now: float) -> float:
+        wait = max(record.get('blocked_until', 0) - now, 0)
+        for window, capacity, period in self._limits.get(name, []):
+            tokens = record['windows'][window][0]
+            if tokens < 1:
+                wait = max(wait, (1 - tokens) * period / capacity)
+        return wait
+
+    def try_acquire(self, name: str) -> float:
+        """Consome um token de cada janela; retorna 0 ou quantos segundos faltam"""
+        if not self._limits.get(name):
+            return 0.0
+
+        def mutate(record):
+            now = time.time()
+            record = self._refill(name, record, now)
+            wait = self._wait_time(name, record, now)
+            if wait <= 0:
+                record['windows'] = {
+                    window: (tokens - 1, updated) for window, (tokens, updated) in record['windows'].items()
+                }
+            return record, wait
+
+        try:
+            return self.backend.update(self._key(name), mutate)
+        except Exception as e:
+            # Falha no armazenamento não bloqueia a busca
+            logger.warning(f"⚠️ Erro no rate limiter {self.namespace}:{name}: {e}")
+            return 0.0
+
+    def acquire(self, name: str, max_wait: Optional[float] = None) -> bool:
+        """
+        Aguarda (no máximo ``max_wait`` segundos) e consome um token
+
+        Returns:
+            False se o próximo token só estaria disponível depois do limite
+        """
+        max_wait = self.max_wait if max_wait is None else max_wait
+        deadline = time.time() + max_wait
+
+        while True:
+            wait = self.try_acquire(name)
+            if wait <= 0:
+                self._count(name, 'acquired')
+                return True
+            if time.time() + wait > deadline:
+                self._count(name, 'rejected')
+                logger.warning(f"⚠️ Rate limit de {name}: próximo token em {wait:.1f}s")
+                return False
+            # Pequeno jitter evita que workers acordem juntos para o mesmo token
+            delay = wait + random.uniform(0, min(0.1, wait * 0.1))
+            self._count(name, 'waits')
+            self._count(name, 'waited_seconds', delay)
+            time.sleep(delay)
+
+    def block(self, name: str, seconds: float):
+        """Suspende o provedor (429 / Retry-After) para todos os workers"""
+        def mutate(record):
+            now = time.time()
+            record = self._refill(name, record, now)
+            record['blocked_until'] = max(record.get('blocked_until', 0), now + seconds)
+            return record, record['blocked_until']
+
+        try:
+            self.backend.update(self._key(name), mutate)
+            logger.warning(f"⏳ {name} suspenso por {seconds:.0f}s (rate limit do provedor)")
+        except Exception as e:
+            logger.warning(f"⚠️ Erro no rate limiter {self.namespace}:{name}: {e}")
+
+    def is_limited(self, name: str) -> bool:
+        """True se uma requisição agora teria que esperar"""
+        return self.status(name)['wait_seconds'] > 0
+
+    def status(self, name: str) -> Dict[str, Any]:
+        """Tokens restantes por janela, sem consumir"""
+        now = time.time()
+        try:
+            record = self._refill(name, self.backend.get(self._key(name)), now)
+        except Exception as e:
+            return {'error': str(e), 'wait_seconds': 0.0}
+        return {
+            'windows': {window: int(tokens) for window, (tokens, _) in record['windows'].items()},
+            'blocked_until': record.get('blocked_until') or None,
+            'wait_seconds': round(self._wait_time(name, record, now), 3)
+        }
+
+    def reset(self, name: Optional[str] = None):
+        """Devolve os tokens (de um provedor ou de todos)"""
+        for provider in ([name] if name else list(self._limits)):
+            try:
+                self.backend.delete(self._key(provider))
+            except Exception as e:
+                logger.warning(f"⚠️ Erro ao resetar rate limit de {provider}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores do processo e tokens restantes por provedor"""
+        with self._lock:
+            counters = {name: dict(values) for name, values in self.stats.items()}
+        return {
+            'backend': self.backend.name,
+            'providers': {
+                name: dict(counters.get(name, {}), **self.status(name))
+                for name in self._limits
+            }
+        }
+
+
+# Backend compartilhado
+token_bucket_backend = create_bucket_backend()
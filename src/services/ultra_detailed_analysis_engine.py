@@ -10,7 +10,8 @@ import logging
 import time
 import json
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from services.ai_manager import ai_manager
 from services.production_search_manager import production_search_manager
 from services.production_content_extractor import production_content_extractor
@@ -19,6 +20,11 @@ from services.visual_proofs_generator import visual_proofs_generator
 from services.anti_objection_system import anti_objection_system
 from services.pre_pitch_architect import pre_pitch_architect
 from services.future_prediction_engine import future_prediction_engine
+from services.concurrency_limiter import HostConcurrencyLimiter
+from services.stage_executor import Stage, StageFailed, stage_executor
+from services.json_stream_parser import JSONSectionStreamParser
+from services.context_builder import research_context_builder
+from services.near_duplicate import near_duplicate_detector
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +37,18 @@ class UltraDetailedAnalysisEngine:
         self.min_sources_threshold = 10     # Mínimo 10 fontes reais
         self.quality_threshold = 85.0       # Score mínimo de qualidade
 
+        # Pesquisa em pipeline (queries paralelas + extração imediata)
+        self.research_pipeline_enabled = os.getenv('RESEARCH_PIPELINE_ENABLED', 'true').lower() == 'true'
+        self.research_max_concurrent_queries = int(os.getenv('RESEARCH_MAX_CONCURRENT_QUERIES', 4))
+        self.research_max_concurrent_extractions = int(os.getenv('RESEARCH_MAX_CONCURRENT_EXTRACTIONS', 8))
+        self.research_max_per_domain = int(os.getenv('RESEARCH_MAX_PER_DOMAIN', 2))
+
+        # Sistemas avançados (drivers, provas, anti-objeção, pré-pitch, predições)
+        self.advanced_stage_timeout = float(os.getenv('ADVANCED_STAGE_TIMEOUT', 180))
+
+        # Resposta da IA em streaming (seções processadas conforme chegam)
+        self.ai_streaming_enabled = os.getenv('AI_STREAMING_ENABLED', 'true').lower() == 'true'
+
         logger.info("🚀 Ultra Detailed Analysis Engine GIGANTE inicializado - ZERO TOLERÂNCIA A SIMULAÇÃO")
 
     def generate_gigantic_analysis(
@@ -67,45 +85,82 @@ class UltraDetailedAnalysisEngine:
             if progress_callback:
                 progress_callback(4, "🧠 Analisando com múltiplas IAs REAIS...")
 
-            ai_analysis = self._execute_real_ai_analysis(data, research_data, progress_callback)
-
-            # VALIDAÇÃO CRÍTICA - FALHA SE IA NÃO RESPONDER
-            if not ai_analysis or not self._validate_ai_response(ai_analysis):
-                raise Exception("IA FALHOU: Não foi possível gerar análise válida com IA")
-
-            # FASE 3: SISTEMAS AVANÇADOS REAIS
-            if progress_callback:
-                progress_callback(6, "🧠 Gerando drivers mentais customizados...")
-
-            mental_drivers = self._generate_real_mental_drivers(ai_analysis, data)
+            # Drivers mentais podem começar assim que o avatar chega no stream da IA
+            early_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='early-stage')
+            early_stages = {}
 
-            if progress_callback:
-                progress_callback(7, "🎭 Criando provas visuais instantâneas...")
+            def on_section(name: str, value: Any):
+                if name == 'avatar_ultra_detalhado' and value and 'mental_drivers' not in early_stages:
+                    logger.info("⚡ Avatar recebido no stream, iniciando drivers mentais antecipadamente")
+                    early_stages['mental_drivers'] = early_executor.submit(
+                        self._generate_real_mental_drivers, {'avatar_ultra_detalhado': value}, data
+                    )
 
-            visual_proofs = self._generate_real_visual_proofs(ai_analysis, data)
-
-            if progress_callback:
-                progress_callback(8, "🛡️ Construindo sistema anti-objeção...")
-
-            anti_objection = self._generate_real_anti_objection(ai_analysis, data)
-
-            if progress_callback:
-                progress_callback(9, "🎯 Arquitetando pré-pitch invisível...")
-
-            pre_pitch = self._generate_real_pre_pitch(ai_analysis, mental_drivers, data)
-
-            if progress_callback:
-                progress_callback(10, "🔮 Predizendo futuro do mercado...")
-
-            future_predictions = self._generate_real_future_predictions(data, research_data)
+            try:
+                ai_analysis = self._execute_real_ai_analysis(data, research_data, progress_callback, on_section)
+
+                # VALIDAÇÃO CRÍTICA - FALHA SE IA NÃO RESPONDER
+                if not ai_analysis or not self._validate_ai_response(ai_analysis):
+                    raise Exception("IA FALHOU: Não foi possível gerar análise válida com IA")
+            except Exception:
+                # Ninguém vai usar as etapas antecipadas: cancela as que ainda não começaram
+                self._abandon_early_stages(early_stages)
+                raise
+            finally:
+                early_executor.shutdown(wait=False)
+
+            # FASE 3: SISTEMAS AVANÇADOS REAIS (etapas independentes em paralelo)
+            advanced_start = time.time()
+            try:
+                advanced, stage_timings = stage_executor.run([
+                    Stage(
+                        'mental_drivers',
+                        lambda deps: early_stages['mental_drivers'].result()
+                        if 'mental_drivers' in early_stages
+                        else self._generate_real_mental_drivers(ai_analysis, data),
+                        timeout=self.advanced_stage_timeout,
+                        step=6, message="🧠 Gerando drivers mentais customizados..."
+                    ),
+                    Stage(
+                        'visual_proofs',
+                        lambda deps: self._generate_real_visual_proofs(ai_analysis, data),
+                        timeout=self.advanced_stage_timeout,
+                        step=7, message="🎭 Criando provas visuais instantâneas..."
+                    ),
+                    Stage(
+                        'anti_objection',
+                        lambda deps: self._generate_real_anti_objection(ai_analysis, data),
+                        timeout=self.advanced_stage_timeout,
+                        step=8, message="🛡️ Construindo sistema anti-objeção..."
+                    ),
+                    Stage(
+                        'pre_pitch',
+                        lambda deps: self._generate_real_pre_pitch(ai_analysis, deps['mental_drivers'], data),
+                        depends_on=('mental_drivers',),
+                        timeout=self.advanced_stage_timeout,
+                        step=9, message="🎯 Arquitetando pré-pitch invisível..."
+                    ),
+                    Stage(
+                        'future_predictions',
+                        lambda deps: self._generate_real_future_predictions(data, research_data),
+                        timeout=self.advanced_stage_timeout,
+                        step=10, message="🔮 Predizendo futuro do mercado..."
+                    )
+                ], progress_callback)
+            except StageFailed as e:
+                logger.error(f"❌ Sistemas avançados falharam na etapa {e.stage}: {e.timings}")
+                raise e.error
+
+            advanced_seconds = time.time() - advanced_start
 
             # FASE 4: CONSOLIDAÇÃO FINAL
             if progress_callback:
                 progress_callback(12, "✨ Consolidando análise GIGANTE...")
 
             final_analysis = self._consolidate_gigantic_analysis(
-                data, research_data, ai_analysis, mental_drivers, 
-                visual_proofs, anti_objection, pre_pitch, future_predictions
+                data, research_data, ai_analysis, advanced['mental_drivers'],
+                advanced['visual_proofs'], advanced['anti_objection'],
+                advanced['pre_pitch'], advanced['future_predictions']
             )
 
             # VALIDAÇÃO FINAL CRÍTICA
@@ -128,7 +183,11 @@ class UltraDetailedAnalysisEngine:
                 'real_data_sources': len(research_data.get('sources', [])),
                 'total_content_analyzed': research_data.get('total_content_length', 0),
                 'ai_models_used': 3,
-                'advanced_systems_included': True
+                'advanced_systems_included': True,
+                'advanced_systems_seconds': round(advanced_seconds, 3),
+                'stage_timings': stage_timings,
+                'early_stages': sorted(early_stages),
+                'context_stats': research_data.get('context_stats')
             }
 
             if progress_callback:
@@ -142,6 +201,16 @@ class UltraDetailedAnalysisEngine:
             # NÃO GERA FALLBACK - FALHA EXPLICITAMENTE
             raise Exception(f"ANÁLISE FALHOU: {str(e)}. Configure APIs corretamente e tente novamente.")
 
+    def _abandon_early_stages(self, early_stages: Dict[str, Any]):
+        """Cancela etapas antecipadas cujo resultado não será usado"""
+        for name, future in early_stages.items():
+            if future.cancel():
+                logger.info(f"🛑 Etapa antecipada {name} cancelada antes de iniciar")
+            elif not future.done():
+                # Já em execução não há como interromper; o resultado é descartado
+                logger.info(f"🗑️ Etapa antecipada {name} já em execução, resultado será descartado")
+        early_stages.clear()
+
     def _validate_input_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Valida dados de entrada - FALHA SE INSUFICIENTE"""
 
@@ -176,60 +245,22 @@ class UltraDetailedAnalysisEngine:
         # Gera queries de pesquisa inteligentes
         queries = self._generate_intelligent_queries(data)
 
+        if self.research_pipeline_enabled:
+            query_outcomes = self._run_pipelined_research(queries, progress_callback)
+        else:
+            query_outcomes = self._run_sequential_research(queries, progress_callback)
+
         all_results = []
         extracted_content = []
         total_content_length = 0
 
-        for i, query in enumerate(queries):
-            if progress_callback:
-                progress_callback(2, f"🔍 Pesquisando: {query[:50]}...", f"Query {i+1}/{len(queries)}")
-
-            try:
-                # Busca com múltiplos provedores
-                search_results = production_search_manager.search_with_fallback(query, max_results=15)
+        # Consolida na ordem original das queries
+        for search_results, extracted_contents in query_outcomes:
+            all_results.extend(search_results)
 
-                if not search_results:
-                    logger.warning(f"⚠️ Query '{query}' retornou 0 resultados")
-                    continue
-
-                all_results.extend(search_results)
-
-                # Extrai conteúdo das URLs encontradas
-                logger.info(f"📄 Extraindo conteúdo de {len(search_results)} URLs...")
-                extracted_contents = []
-
-                for result in search_results[:15]:  # Limita a 15 URLs para performance
-                    try:
-                        # Usa o novo extrator robusto
-                        content = production_content_extractor.extract_content(result['url'])
-                        if content and len(content) >= 500:  # Mínimo 500 caracteres
-                            extracted_contents.append({
-                                'url': result['url'],
-                                'title': result.get('title', 'Sem título'),
-                                'content': content[:3000],  # Limita tamanho
-                                'snippet': result.get('snippet', '')
-                            })
-                            logger.info(f"✅ Conteúdo extraído de {result['url']}: {len(content)} caracteres")
-                        else:
-                            logger.warning(f"⚠️ Conteúdo insuficiente de {result['url']}: {len(content) if content else 0} < 500")
-                    except Exception as e:
-                        logger.error(f"❌ Erro ao extrair {result['url']}: {str(e)}")
-                        continue
-
-                if len(extracted_contents) == 0:
-                    logger.error("❌ FALHA CRÍTICA: Nenhum conteúdo extraído das URLs de busca")
-                    raise RuntimeError(f"Falha crítica: não foi possível extrair conteúdo real de nenhuma URL para '{query}'. Sistema não pode gerar análise com dados insuficientes.")
-
-                # Adiciona conteúdo extraído
-                for item in extracted_contents:
-                    total_content_length += len(item['content'])
-                    extracted_content.append(item)
-
-                time.sleep(1)  # Rate limiting
-
-            except Exception as e:
-                logger.error(f"❌ Erro na query '{query}': {str(e)}")
-                continue
+            for item in extracted_contents:
+                total_content_length += len(item['content'])
+                extracted_content.append(item)
 
         # Remove duplicatas
         unique_content = []
@@ -239,6 +270,9 @@ class UltraDetailedAnalysisEngine:
                 seen_urls.add(content_item['url'])
                 unique_content.append(content_item)
 
+        # Matérias replicadas em vários sites: mantém só a melhor cópia
+        unique_content, near_duplicates = near_duplicate_detector.deduplicate(unique_content)
+
         # Ordena por relevância
         unique_content.sort(key=lambda x: x['relevance_score'], reverse=True)
 
@@ -249,6 +283,7 @@ class UltraDetailedAnalysisEngine:
             'unique_sources': len(unique_content),
             'total_content_length': total_content_length,
             'extracted_content': unique_content,
+            'near_duplicates': near_duplicates,
             'sources': [{'url': item['url'], 'title': item['title'], 'source': item['source']} for item in unique_content],
             'research_timestamp': datetime.now().isoformat()
         }
@@ -256,6 +291,164 @@ class UltraDetailedAnalysisEngine:
         logger.info(f"✅ Pesquisa massiva: {len(unique_content)} páginas, {total_content_length:,} caracteres")
         return research_data
 
+    def _run_sequential_research(
+        self,
+        queries: List[str],
+        progress_callback: Optional[callable] = None
+    ) -> List[Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]]:
+        """Executa as queries uma a uma (modo legado)"""
+
+        query_outcomes = []
+
+        for i, query in enumerate(queries):
+            if progress_callback:
+                progress_callback(2, f"🔍 Pesquisando: {query[:50]}...", f"Query {i+1}/{len(queries)}")
+
+            try:
+                # Busca com múltiplos provedores
+                search_results = production_search_manager.search_with_fallback(query, max_results=15)
+
+                if not search_results:
+                    logger.warning(f"⚠️ Query '{query}' retornou 0 resultados")
+                    continue
+
+                # Extrai conteúdo das URLs encontradas
+                query_outcomes.append(self._extract_query_contents(query, search_results, max_workers=1))
+
+                time.sleep(1)  # Rate limiting
+
+            except Exception as e:
+                logger.error(f"❌ Erro na query '{query}': {str(e)}")
+                continue
+
+        return query_outcomes
+
+    def _run_pipelined_research(
+        self,
+        queries: List[str],
+        progress_callback: Optional[callable] = None
+    ) -> List[Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]]:
+        """Executa queries em paralelo e extrai URLs assim que cada busca retorna"""
+
+        limiter = HostConcurrencyLimiter(
+            max_total=self.research_max_concurrent_extractions,
+            max_per_host=self.research_max_per_domain
+        )
+        pending_extractions = {}
+
+        logger.info(
+            f"⚡ Pesquisa em pipeline: {self.research_max_concurrent_queries} queries e "
+            f"{self.research_max_concurrent_extractions} extrações simultâneas "
+            f"({self.research_max_per_domain} por domínio)"
+        )
+
+        with ThreadPoolExecutor(
+            max_workers=self.research_max_concurrent_queries,
+            thread_name_prefix='research-extract'
+        ) as extract_pool, ThreadPoolExecutor(
+            max_workers=self.research_max_concurrent_queries,
+            thread_name_prefix='research-search'
+        ) as search_pool:
+
+            search_futures = {
+                search_pool.submit(production_search_manager.search_with_fallback, query, max_results=15): i
+                for i, query in enumerate(queries)
+            }
+
+            for completed, future in enumerate(as_completed(search_futures), 1):
+                i = search_futures[future]
+                query = queries[i]
+
+                if progress_callback:
+                    progress_callback(2, f"🔍 Pesquisando: {query[:50]}...", f"Query {completed}/{len(queries)}")
+
+                try:
+                    search_results = future.result()
+                except Exception as e:
+                    logger.error(f"❌ Erro na query '{query}': {str(e)}")
+                    continue
+
+                if not search_results:
+                    logger.warning(f"⚠️ Query '{query}' retornou 0 resultados")
+                    continue
+
+                # Extração começa imediatamente, sem esperar as demais queries
+                pending_extractions[i] = extract_pool.submit(
+                    self._extract_query_contents,
+                    query,
+                    search_results,
+                    self.research_max_concurrent_extractions,
+                    limiter
+                )
+
+            query_outcomes = []
+            for i in sorted(pending_extractions):
+                try:
+                    query_outcomes.append(pending_extractions[i].result())
+                except Exception as e:
+                    logger.error(f"❌ Erro na query '{queries[i]}': {str(e)}")
+
+        return query_outcomes
+
+    def _extract_query_contents(
+        self,
+        query: str,
+        search_results: List[Dict[str, Any]],
+        max_workers: int,
+        limiter: Optional[HostConcurrencyLimiter] = None
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Extrai em lote as URLs de uma query mantendo a ordem dos resultados"""
+
+        results = search_results[:15]  # Limita a 15 URLs para performance
+
+        logger.info(f"📄 Extraindo conteúdo de {len(search_results)} URLs...")
+        contents = production_content_extractor.batch_extract(
+            [result['url'] for result in results],
+            max_workers=max_workers,
+            max_per_host=self.research_max_per_domain,
+            limiter=limiter
+        )
+
+        items = [self._build_research_item(result, contents.get(result['url'])) for result in results]
+        return self._finalize_query_research(query, search_results, items)
+
+    def _build_research_item(
+        self,
+        result: Dict[str, Any],
+        content: Optional[str]
+    ) -> Optional[Dict[str, Any]]:
+        """Monta o item de pesquisa a partir do conteúdo extraído de um resultado"""
+
+        if content and len(content) >= 500:  # Mínimo 500 caracteres
+            logger.info(f"✅ Conteúdo extraído de {result['url']}: {len(content)} caracteres")
+            return {
+                'url': result['url'],
+                'title': result.get('title', 'Sem título'),
+                'content': content[:3000],  # Limita tamanho
+                'snippet': result.get('snippet', ''),
+                'source': result.get('source', ''),
+                'relevance_score': result.get('relevance_score', 0.0)
+            }
+
+        logger.warning(f"⚠️ Conteúdo insuficiente de {result['url']}: {len(content) if content else 0} < 500")
+        return None
+
+    def _finalize_query_research(
+        self,
+        query: str,
+        search_results: List[Dict[str, Any]],
+        items: List[Optional[Dict[str, Any]]]
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Consolida os itens extraídos de uma query mantendo a ordem dos resultados"""
+
+        extracted_contents = [item for item in items if item]
+
+        if len(extracted_contents) == 0:
+            logger.error("❌ FALHA CRÍTICA: Nenhum conteúdo extraído das URLs de busca")
+            logger.error(f"❌ Erro na query '{query}': não foi possível extrair conteúdo real de nenhuma URL")
+
+        return search_results, extracted_contents
+
     def _generate_intelligent_queries(self, data: Dict[str, Any]) -> List[str]:
         """Gera queries inteligentes para pesquisa"""
 
@@ -317,12 +510,17 @@ class UltraDetailedAnalysisEngine:
         self, 
         data: Dict[str, Any], 
         research_data: Dict[str, Any],
-        progress_callback: Optional[callable] = None
+        progress_callback: Optional[callable] = None,
+        on_section: Optional[callable] = None
     ) -> Dict[str, Any]:
-        """Executa análise com IA REAL - FALHA SE IA NÃO RESPONDER"""
+        """Executa análise com IA REAL - FALHA SE IA NÃO RESPONDER
+
+        Com streaming, cada seção de primeiro nível é repassada a ``on_section``
+        e reportada no progresso assim que o JSON dela fecha.
+        """
 
         # Prepara contexto de pesquisa REAL
-        search_context = self._prepare_search_context(research_data)
+        search_context = self._prepare_search_context(research_data, data)
 
         # Constrói prompt ULTRA-DETALHADO
         prompt = self._build_gigantic_analysis_prompt(data, search_context)
@@ -330,7 +528,10 @@ class UltraDetailedAnalysisEngine:
         logger.info("🤖 Executando análise com IA REAL...")
 
         # Executa com AI Manager (sistema de fallback automático)
-        ai_response = ai_manager.generate_analysis(prompt, max_tokens=8192)
+        if self.ai_streaming_enabled:
+            ai_response = self._stream_ai_analysis(prompt, progress_callback, on_section)
+        else:
+            ai_response = ai_manager.generate_analysis(prompt, max_tokens=8192)
 
         if not ai_response:
             raise Exception("IA NÃO RESPONDEU: Nenhum provedor de IA disponível ou funcionando")
@@ -340,22 +541,53 @@ class UltraDetailedAnalysisEngine:
 
         return processed_analysis
 
-    def _prepare_search_context(self, research_data: Dict[str, Any]) -> str:
-        """Prepara contexto de pesquisa para IA"""
+    def _stream_ai_analysis(
+        self,
+        prompt: str,
+        progress_callback: Optional[callable] = None,
+        on_section: Optional[callable] = None
+    ) -> str:
+        """Consome o stream da IA emitindo seções concluídas; retorna o texto completo"""
+
+        parser = JSONSectionStreamParser()
+
+        for chunk in ai_manager.generate_analysis_stream(prompt, max_tokens=8192):
+            for name, value in parser.feed(chunk):
+                logger.info(f"📥 Seção recebida da IA: {name}")
+                if progress_callback:
+                    progress_callback(4, f"🧠 Seção recebida: {name}", f"{len(parser.sections)} seções, {len(parser.text):,} caracteres")
+                if on_section:
+                    try:
+                        on_section(name, value)
+                    except Exception as e:
+                        logger.warning(f"⚠️ Erro ao processar seção {name} antecipadamente: {e}")
+
+        return parser.text
+
+    def _prepare_search_context(self, research_data: Dict[str, Any], data: Optional[Dict[str, Any]] = None) -> str:
+        """Prepara contexto de pesquisa para IA
+
+        Em vez de cortar cada página em tamanho fixo, seleciona as passagens
+        mais relevantes para o projeto dentro do orçamento de tokens
+        (CONTEXT_TOKEN_BUDGET), mantendo título e URL de cada fonte.
+        """
 
         extracted_content = research_data.get('extracted_content', [])
 
         if not extracted_content:
             raise Exception("NENHUM CONTEÚDO EXTRAÍDO: Pesquisa web falhou completamente")
 
-        # Combina conteúdo das páginas mais relevantes
-        context = "PESQUISA WEB MASSIVA REAL EXECUTADA:\n\n"
+        data = data or {}
+        query = ' '.join(
+            str(data[field]) for field in ('segmento', 'produto', 'publico', 'concorrentes', 'dados_adicionais')
+            if data.get(field)
+        ) or ' '.join(research_data.get('queries_executed', []))
 
-        for i, content_item in enumerate(extracted_content[:15], 1):  # Top 15 páginas
-            context += f"--- FONTE REAL {i}: {content_item['title']} ---\n"
-            context += f"URL: {content_item['url']}\n"
-            context += f"Relevância: {content_item['relevance_score']:.2f}\n"
-            context += f"Conteúdo: {content_item['content'][:2000]}\n\n"
+        compressed = research_context_builder.build(query, extracted_content)
+        research_data['context_stats'] = compressed['stats']
+
+        context = "PESQUISA WEB MASSIVA REAL EXECUTADA:\n\n"
+        context += compressed['context'] + "\n\n"
 
         # Adiciona estatísticas da pesquisa
         context += f"\n=== ESTATÍSTICAS DA PESQUISA REAL ===\n"
@@ -387,7 +619,7 @@ Você é o DIRETOR SUPREMO DE ANÁLISE DE MERCADO GIGANTE, especialista de elite
 - **Dados Adicionais**: {data.get('dados_adicionais', 'Não informado')}
 
 ## CONTEXTO DE PESQUISA REAL:
-{search_context[:15000]}
+{search_context}
 
 ## INSTRUÇÕES CRÍTICAS:
 
@@ -734,8 +966,7 @@ Se não houver dados suficientes para uma seção, retorne "DADOS_INSUFICIENTES"
         """Gera sistema anti-objeção REAL"""
 
         try:
-            avatar_data =
- data.get("avatar_data", {})
+            avatar_data = data.get("avatar_data", {})
             context_data = data.get("context_data", {})
             
             # Implementação do sistema anti-objeção
@@ -751,6 +982,162 @@ Se não houver dados suficientes para uma seção, retorne "DADOS_INSUFICIENTES"
                 "message": f"Erro ao gerar sistema anti-objeção: {str(e)}"
             }
 
+    def _generate_real_pre_pitch(
+        self,
+        ai_analysis: Dict[str, Any],
+        mental_drivers: Dict[str, Any],
+        data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Gera pré-pitch invisível REAL a partir dos drivers mentais"""
+
+        try:
+            drivers_list = mental_drivers.get('drivers_customizados', [])
+            if not drivers_list:
+                raise Exception("DRIVERS INSUFICIENTES: Pré-pitch depende dos drivers mentais customizados")
+
+            pre_pitch = pre_pitch_architect.generate_complete_pre_pitch_system(
+                drivers_list, ai_analysis.get('avatar_ultra_detalhado', {}), data
+            )
+
+            if not pre_pitch:
+                raise Exception("PRÉ-PITCH FALHOU: Sistema de pré-pitch não retornou roteiro")
+
+            return pre_pitch
+
+        except Exception as e:
+            logger.error(f"❌ Erro ao gerar pré-pitch: {str(e)}")
+            raise Exception(f"PRÉ-PITCH FALHOU: {str(e)}")
+
+    def _generate_real_future_predictions(
+        self,
+        data: Dict[str, Any],
+        research_data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Gera predições de futuro do mercado REAIS"""
+
+        try:
+            context_data = dict(data)
+            context_data['research_summary'] = {
+                'queries_executed': research_data.get('queries_executed', []),
+                'unique_sources': research_data.get('unique_sources', 0),
+                'total_content_length': research_data.get('total_content_length', 0)
+            }
+
+            predictions = future_prediction_engine.predict_market_future(
+                data.get('segmento', ''), context_data, horizon_months=36
+            )
+
+            if not predictions:
+                raise Exception("PREDIÇÕES FALHARAM: Motor de predição não retornou dados")
+
+            return predictions
+
+        except Exception as e:
+            logger.error(f"❌ Erro ao gerar predições do futuro: {str(e)}")
+            raise Exception(f"PREDIÇÕES DO FUTURO FALHARAM: {str(e)}")
+
+    def _extract_concepts_for_visual_proof(
+        self,
+        ai_analysis: Dict[str, Any],
+        data: Dict[str, Any]
+    ) -> List[str]:
+        """Extrai conceitos da análise que precisam de prova visual"""
+
+        avatar = ai_analysis.get('avatar_ultra_detalhado', {})
+        escopo = ai_analysis.get('escopo', {})
+
+        concepts: List[str] = []
+        for value in (escopo.get('proposta_valor'), escopo.get('mensagem_central')):
+            if isinstance(value, str) and value.strip():
+                concepts.append(value.strip())
+
+        concepts.extend(item for item in escopo.get('diferenciais_competitivos', []) if isinstance(item, str))
+
+        for key in ('dores_viscerais', 'objecoes_reais', 'desejos_secretos'):
+            concepts.extend(item for item in avatar.get(key, [])[:5] if isinstance(item, str))
+
+        concepts.extend(item for item in ai_analysis.get('insights_exclusivos', [])[:5] if isinstance(item, str))
+
+        if data.get('produto'):
+            concepts.append(f"Eficácia de {data['produto']}")
+
+        # Remove duplicatas mantendo a ordem
+        unique_concepts = list(dict.fromkeys(concept.strip() for concept in concepts if concept.strip()))
+        return unique_concepts[:20]
+
+    def _consolidate_gigantic_analysis(
+        self,
+        data: Dict[str, Any],
+        research_data: Dict[str, Any],
+        ai_analysis: Dict[str, Any],
+        mental_drivers: Dict[str, Any],
+        visual_proofs: List[Dict[str, Any]],
+        anti_objection: Dict[str, Any],
+        pre_pitch: Dict[str, Any],
+        future_predictions: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Consolida análise da IA, pesquisa e sistemas avançados no relatório final"""
+
+        final_analysis = dict(ai_analysis)
+
+        final_analysis['pesquisa_web_massiva'] = {
+            'queries_executadas': research_data.get('queries_executed', []),
+            'total_queries': research_data.get('total_queries', 0),
+            'total_resultados': research_data.get('total_results', 0),
+            'fontes_unicas': research_data.get('unique_sources', 0),
+            'conteudo_extraido_chars': research_data.get('total_content_length', 0),
+            'resultados_detalhados': research_data.get('sources', []),
+            'timestamp': research_data.get('research_timestamp')
+        }
+
+        final_analysis['drivers_mentais_sistema_completo'] = mental_drivers
+        final_analysis['drivers_mentais_customizados'] = mental_drivers.get('drivers_customizados', [])
+        final_analysis['provas_visuais_sugeridas'] = visual_proofs
+        final_analysis['sistema_anti_objecao'] = anti_objection
+        final_analysis['pre_pitch_invisivel'] = pre_pitch
+        final_analysis['predicoes_futuro_completas'] = future_predictions
+
+        final_analysis['projeto_dados'] = {
+            'segmento': data.get('segmento'),
+            'produto': data.get('produto'),
+            'publico': data.get('publico'),
+            'preco': data.get('preco')
+        }
+
+        return final_analysis
+
+    def _calculate_final_quality_score(self, final_analysis: Dict[str, Any]) -> float:
+        """Calcula score final de qualidade (0-100)"""
+
+        score = 0.0
+
+        # Seções da IA (40 pontos)
+        ai_sections = [
+            'avatar_ultra_detalhado', 'escopo', 'analise_concorrencia_detalhada',
+            'estrategia_palavras_chave', 'metricas_performance_detalhadas',
+            'funil_vendas_detalhado', 'plano_acao_detalhado', 'insights_exclusivos'
+        ]
+        score += sum(5.0 for section in ai_sections if final_analysis.get(section))
+
+        # Sistemas avançados (40 pontos)
+        advanced_sections = [
+            'drivers_mentais_customizados', 'provas_visuais_sugeridas', 'sistema_anti_objecao',
+            'pre_pitch_invisivel', 'predicoes_futuro_completas'
+        ]
+        for section in advanced_sections:
+            value = final_analysis.get(section)
+            if value and not (isinstance(value, dict) and value.get('status') == 'error'):
+                score += 8.0
+
+        # Pesquisa real (20 pontos)
+        research = final_analysis.get('pesquisa_web_massiva', {})
+        if research.get('fontes_unicas', 0) >= self.min_sources_threshold:
+            score += 10.0
+        if research.get('conteudo_extraido_chars', 0) >= self.min_content_threshold:
+            score += 10.0
+
+        return min(score, 100.0)
+
 # Instância global
 ultra_detailed_analysis_engine = UltraDetailedAnalysisEngine()
 
@@ -2,298 +2,298 @@
 # -*- coding: utf-8 -*-
 """
 ARQV30 Enhanced v2.0 - URL Resolver
-Resolve URLs de redirecionamento do Bing, Google e outros serviços
+Resolve URLs de redirecionamento (Bing, Google, Yahoo, DuckDuckGo) e encurtadores
 """
+
+import os
+import re
+import time
 import base64
 import logging
+import threading
+from collections import OrderedDict
 from urllib.parse import parse_qs, urlparse, unquote
-from typing import Optional
-
-logger = logging.getLogger(__name__)
-
-
-class URLResolver:
-    """Classe para resolução de URLs de redirecionamento"""
-
-    @staticmethod
-    def resolve_url(url: str) -> str:
-        """Resolve URLs de redirecionamento"""
-        try:
-            # Bing redirect URLs
-            if "bing.com/ck/a?!" in url:
-                return URLResolver._resolve_bing_url(url)
-
-            # Google redirect URLs
-            elif "/url?q=" in url:
-                return URLResolver._resolve_google_url(url)
-
-            # Yahoo redirect URLs
-            elif "r.search.yahoo.com" in url:
-                return URLResolver._resolve_yahoo_url(url)
+from typing import Dict, List, Optional, Tuple
 
-            # DuckDuckGo redirect URLs
-            elif "duckduckgo.com/l/" in url:
-                return URLResolver._resolve_duckduckgo_url(url)
+from services.fetch_engine import fetch_engine
 
-            # URL já é direta
-            return url
+logger = logging.getLogger(__name__)
 
-        except Exception as e:
-            logger.warning(f"⚠️ Erro ao resolver URL: {str(e)}")
-            return url
+SHORT_DOMAINS = frozenset([
+    'bit.ly', 'tinyurl.com', 'goo.gl', 't.co', 'short.link',
+    'ow.ly', 'buff.ly', 'tiny.cc', 'is.gd', 'v.gd'
+])
 
-    @staticmethod
-    def _resolve_bing_url(url: str) -> str:
-        """Resolve URLs de redirecionamento do Bing"""
-        try:
-            parsed = urlparse(url)
-            query_params = parse_qs(parsed.query)
+_YAHOO_RU = re.compile(r'/RU=([^/]+)/')
 
-            if 'u' in query_params:
-                encoded = query_params['u'][0]
 
-                # Remove prefixo 'a1' se presente
-                if encoded.startswith("a1"):
-                    encoded = encoded[2:]
+class TTLCache:
+    """Cache LRU limitado com expiração por entrada (thread-safe)"""
 
-                # Adiciona padding se necessário
-                missing_padding = len(encoded) % 4
-                if missing_padding:
-                    encoded += '=' * (4 - missing_padding)
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: 'OrderedDict[str, Tuple[str, float]]' = OrderedDict()
+        self._lock = threading.Lock()
 
-                try:
-                    # Primeira decodificação Base64
-                    first_decode = base64.b64decode(encoded)
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
 
-                    # Segunda decodificação Base64
-                    missing_padding = len(first_decode) % 4
-                    if missing_padding:
-                        first_decode += b'=' * (4 - missing_padding)
+    def set(self, key: str, value: str, ttl: Optional[float] = None):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
 
-                    decoded_url = base64.b64decode(first_decode).decode('utf-8')
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
 
-                    logger.info(f"🔗 URL Bing resolvida: {url[:50]}... → {decoded_url[:50]}...")
-                    return decoded_url
+    def __len__(self) -> int:
+        return len(self._entries)
 
-                except Exception as decode_error:
-                    logger.warning(f"⚠️ Falha na decodificação Bing: {str(decode_error)}")
-                    # Tenta decodificação simples
-                    try:
-                        simple_decode = base64.b64decode(encoded).decode('utf-8')
-                        return simple_decode
-                    except:
-                        pass
 
-        except Exception as e:
-            logger.warning(f"⚠️ Erro ao resolver URL Bing: {str(e)}")
+class URLResolver:
+    """Resolvedor de URLs de redirecionamento
 
-        return url
+    Links de buscadores (Bing ``u=a1...``, Google ``/url?q=``, Yahoo ``RU=``,
+    DuckDuckGo ``uddg=``) são decodificados em memória, sem rede. Só
+    encurtadores e links que não decodificam seguem redirects via HEAD, e
+    o destino fica em um cache LRU com TTL: o mesmo link nunca é resolvido
+    duas vezes pela rede dentro do TTL.
+    """
 
-    @staticmethod
-    def _resolve_google_url(url: str) -> str:
-        """Resolve URLs de redirecionamento do Google"""
+    def __init__(self):
+        self.headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+        }
+        self.timeout = 10
+        self.max_unwrap = 3
+        self.negative_ttl = float(os.getenv('URL_RESOLVER_NEGATIVE_TTL', 300))
+        self.cache = TTLCache(
+            int(os.getenv('URL_RESOLVER_CACHE_SIZE', 5000)),
+            float(os.getenv('URL_RESOLVER_CACHE_TTL', 86400))
+        )
+
+        self._stats_lock = threading.Lock()
+        self.stats = {'decoded': 0, 'cache_hits': 0, 'network': 0, 'network_errors': 0}
+
+    def _count(self, key: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    # ------------------------------------------------------------------
+    # Decodificação em memória
+    # ------------------------------------------------------------------
+
+    def decode(self, url: str) -> str:
+        """Desembrulha links de buscadores em memória (inclusive aninhados)"""
+        current = url
+        for _ in range(self.max_unwrap):
+            decoded = self._decode_once(current)
+            if not decoded or decoded == current:
+                break
+            current = decoded
+
+        if current != url:
+            self._count('decoded')
+            logger.debug(f"🔗 URL decodificada: {url[:80]}... → {current[:80]}")
+        return current
+
+    def _decode_once(self, url: str) -> Optional[str]:
         try:
             parsed = urlparse(url)
-            query_params = parse_qs(parsed.query)
-
-            if 'q' in query_params:
-                resolved = unquote(query_params['q'][0])
-                logger.info(f"🔗 URL Google resolvida: {url[:50]}... → {resolved[:50]}...")
-                return resolved
-
-        except Exception as e:
-            logger.warning(f"⚠️ Erro ao resolver URL Google: {str(e)}")
-
-        return url
+        except ValueError:
+            return None
+
+        host = (parsed.hostname or '').lower()
+        if host.endswith('bing.com') and parsed.path.startswith('/ck/a'):
+            return self._decode_bing(parse_qs(parsed.query))
+        if 'google.' in host and parsed.path == '/url' or '/url?q=' in url:
+            return self._decode_google(parse_qs(parsed.query))
+        if host.endswith('search.yahoo.com'):
+            return self._decode_yahoo(url, parse_qs(parsed.query))
+        if host.endswith('duckduckgo.com') and parsed.path.startswith('/l/'):
+            return self._decode_query_url(parse_qs(parsed.query), 'uddg')
+        return None
 
     @staticmethod
-    def _resolve_yahoo_url(url: str) -> str:
-        """Resolve URLs de redirecionamento do Yahoo"""
-        try:
-            parsed = urlparse(url)
-            query_params = parse_qs(parsed.query)
-
-            if 'RU' in query_params:
-                encoded_url = query_params['RU'][0]
-                resolved = unquote(encoded_url)
-                logger.info(f"🔗 URL Yahoo resolvida: {url[:50]}... → {resolved[:50]}...")
-                return resolved
-
-        except Exception as e:
-            logger.warning(f"⚠️ Erro ao resolver URL Yahoo: {str(e)}")
-
-        return url
+    def _is_http(url: Optional[str]) -> bool:
+        return bool(url) and url.startswith(('http://', 'https://'))
+
+    def _decode_bing(self, query: Dict[str, List[str]]) -> Optional[str]:
+        """Bing: u=a1 + base64 (url-safe, sem padding), às vezes codificado duas vezes"""
+        value = (query.get('u') or [''])[0]
+        if not value.startswith('a1'):
+            return None
+
+        encoded = value[2:]
+        for _ in range(2):
+            try:
+                decoded = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)).decode('utf-8')
+            except (ValueError, UnicodeDecodeError):
+                return None
+            if self._is_http(decoded):
+                return decoded
+            if not decoded.startswith('aHR0'):
+                return None
+            encoded = decoded
+        return None
+
+    def _decode_google(self, query: Dict[str, List[str]]) -> Optional[str]:
+        for key in ('q', 'url'):
+            candidate = (query.get(key) or [''])[0]
+            if self._is_http(candidate):
+                return candidate
+        return None
+
+    def _decode_yahoo(self, url: str, query: Dict[str, List[str]]) -> Optional[str]:
+        """Yahoo: RU=<url codificada> nos segmentos do caminho (ou na query)"""
+        match = _YAHOO_RU.search(url)
+        candidate = unquote(match.group(1)) if match else (query.get('RU') or [''])[0]
+        return candidate if self._is_http(candidate) else None
+
+    def _decode_query_url(self, query: Dict[str, List[str]], key: str) -> Optional[str]:
+        candidate = (query.get(key) or [''])[0]
+        return candidate if self._is_http(candidate) else None
+
+    # ------------------------------------------------------------------
+    # Resolução com rede (encurtadores e links não decodificáveis)
+    # ------------------------------------------------------------------
 
     @staticmethod
-    def _resolve_duckduckgo_url(url: str) -> str:
-        """Resolve URLs de redirecionamento do DuckDuckGo"""
-        try:
-            # DuckDuckGo usa formato: https://duckduckgo.com/l/?uddg=...
-            parsed = urlparse(url)
-            query_params = parse_qs(parsed.query)
+    def _is_short_url(url: str) -> bool:
+        """Verifica se é URL encurtada"""
+        host = (urlparse(url).hostname or '').lower()
+        return host in SHORT_DOMAINS or host.startswith('www.') and host[4:] in SHORT_DOMAINS
+
+    def _needs_network(self, url: str) -> bool:
+        """Encurtadores e links de buscador que não foram decodificados em memória"""
+        if self._is_short_url(url):
+            return True
+        host = (urlparse(url).hostname or '').lower()
+        return host.endswith('bing.com') and '/ck/a' in url or 'google.' in host and '/url' in url
+
+    def _head_spec(self, url: str) -> Dict[str, object]:
+        return {
+            'method': 'HEAD',
+            'url': url,
+            'headers': self.headers,
+            'allow_redirects': True,
+            'timeout': self.timeout,
+            'verify': False  # Para evitar problemas de SSL
+        }
+
+    def _store_outcome(self, url: str, outcome) -> str:
+        """Cacheia o destino (ou a própria URL por NEGATIVE_TTL quando falhou)"""
+        if isinstance(outcome, Exception):
+            self._count('network_errors')
+            logger.warning(f"⚠️ Erro ao seguir redirects para {url}: {outcome}")
+            self.cache.set(url, url, self.negative_ttl)
+            return url
 
-            if 'uddg' in query_params:
-                encoded_url = query_params['uddg'][0]
-                resolved = unquote(encoded_url)
-                logger.info(f"🔗 URL DuckDuckGo resolvida: {url[:50]}... → {resolved[:50]}...")
-                return resolved
+        final_url = self.decode(outcome.url) if outcome.url else url
+        if final_url != url:
+            logger.info(f"🔄 Redirect seguido: {url} -> {final_url}")
+        self.cache.set(url, final_url, None if final_url != url else self.negative_ttl)
+        return final_url
 
+    def _follow_redirects(self, url: str) -> str:
+        """Segue redirects até a URL final"""
+        self._count('network')
+        try:
+            response = fetch_engine.request(**self._head_spec(url))
         except Exception as e:
-            logger.warning(f"⚠️ Erro ao resolver URL DuckDuckGo: {str(e)}")
-
-        return url
+            return self._store_outcome(url, e)
+        return self._store_outcome(url, response)
 
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
 
-# Função de conveniência
-def resolve_url(url: str) -> str:
-    """Função de conveniência para resolver URLs"""
-    return URLResolver.resolve_url(url)
-#!/usr/bin/env python3
-# -*- coding: utf-8 -*-
-"""
-ARQV30 Enhanced v2.0 - URL Resolver
-Resolve URLs de redirecionamento e encurtadores
-"""
-
-import os
-import logging
-import base64
-import requests
-from urllib.parse import parse_qs, urlparse, unquote
-from typing import Optional
-
-logger = logging.getLogger(__name__)
-
-class URLResolver:
-    """Resolvedor robusto de URLs de redirecionamento"""
-    
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        })
-        self.timeout = 10
-        
     def resolve_redirect_url(self, url: str) -> str:
         """
-        Resolve URLs de redirecionamento do Bing, Google e encurtadores.
+        Resolve URLs de redirecionamento do Bing, Google, Yahoo, DuckDuckGo e encurtadores.
         """
-        try:
-            original_url = url
-            
-            # Bing: URLs com u=a1aHR0c...
-            if "bing.com/ck/a" in url and "u=a1" in url:
-                logger.info(f"🔄 Resolvendo URL do Bing: {url[:100]}...")
-                resolved = self._resolve_bing_url(url)
-                if resolved and resolved != url:
-                    logger.info(f"✅ URL Bing resolvida: {resolved}")
-                    return resolved
-            
-            # Google: URLs com /url?q=
-            elif "/url?q=" in url or "google." in url and "url?q=" in url:
-                logger.info(f"🔄 Resolvendo URL do Google: {url[:100]}...")
-                resolved = self._resolve_google_url(url)
-                if resolved and resolved != url:
-                    logger.info(f"✅ URL Google resolvida: {resolved}")
-                    return resolved
-            
-            # Encurtadores conhecidos
-            elif self._is_short_url(url):
-                logger.info(f"🔄 Resolvendo URL encurtada: {url}")
-                resolved = self._resolve_short_url(url)
-                if resolved and resolved != url:
-                    logger.info(f"✅ URL encurtada resolvida: {resolved}")
-                    return resolved
-            
-            # URL já está limpa
+        if not url:
             return url
-            
+
+        try:
+            decoded = self.decode(url)
+            if not self._needs_network(decoded):
+                return decoded
+
+            cached = self.cache.get(decoded)
+            if cached is not None:
+                self._count('cache_hits')
+                return cached
+
+            return self._follow_redirects(decoded)
+
         except Exception as e:
             logger.error(f"❌ Erro ao resolver URL {url}: {str(e)}")
             return url  # Retorna a original se falhar
-    
-    def _resolve_bing_url(self, url: str) -> str:
-        """Resolve URLs específicas do Bing"""
-        try:
-            # Extrai parâmetro u=
-            if "u=a1" in url:
-                # Formato: u=a1aHR0c...
-                u_param = url.split("u=a1")[1].split("&")[0]
-                
-                # Decodifica base64 duplo
-                try:
-                    # Primeiro decode
-                    decoded_once = base64.b64decode(u_param + "==").decode('utf-8', errors='ignore')
-                    # Segundo decode se necessário
-                    if decoded_once.startswith('aHR0'):
-                        decoded_twice = base64.b64decode(decoded_once + "==").decode('utf-8', errors='ignore')
-                        if decoded_twice.startswith('http'):
-                            return decoded_twice
-                    elif decoded_once.startswith('http'):
-                        return decoded_once
-                except:
-                    pass
-            
-            # Método alternativo: follow redirects
-            return self._follow_redirects(url)
-            
-        except Exception as e:
-            logger.error(f"Erro ao resolver Bing URL: {e}")
-            return url
-    
-    def _resolve_google_url(self, url: str) -> str:
-        """Resolve URLs do Google"""
-        try:
-            parsed = urlparse(url)
-            
-            if "url?q=" in url:
-                # Extrai parâmetro q
-                query_params = parse_qs(parsed.query)
-                q_param = query_params.get('q')
-                if q_param:
-                    decoded_url = unquote(q_param[0])
-                    if decoded_url.startswith('http'):
-                        return decoded_url
-            
-            # Follow redirects se não conseguir extrair
-            return self._follow_redirects(url)
-            
-        except Exception as e:
-            logger.error(f"Erro ao resolver Google URL: {e}")
-            return url
-    
-    def _is_short_url(self, url: str) -> bool:
-        """Verifica se é URL encurtada"""
-        short_domains = [
-            'bit.ly', 'tinyurl.com', 'goo.gl', 't.co', 'short.link',
-            'ow.ly', 'buff.ly', 'tiny.cc', 'is.gd', 'v.gd'
-        ]
-        return any(domain in url for domain in short_domains)
-    
-    def _resolve_short_url(self, url: str) -> str:
-        """Resolve URLs encurtadas seguindo redirects"""
-        return self._follow_redirects(url)
-    
-    def _follow_redirects(self, url: str, max_redirects: int = 5) -> str:
-        """Segue redirects até a URL final"""
-        try:
-            response = self.session.head(
-                url, 
-                allow_redirects=True, 
-                timeout=self.timeout,
-                verify=False  # Para evitar problemas de SSL
+
+    def resolve_many(self, urls: List[str], max_concurrency: int = 16) -> Dict[str, str]:
+        """
+        Resolve várias URLs; as que precisam de rede seguem redirects em paralelo
+
+        Returns:
+            Dict: URL original -> URL resolvida
+        """
+        resolved: Dict[str, str] = {}
+        pending: Dict[str, List[str]] = {}
+
+        for url in dict.fromkeys(url for url in urls if url):
+            decoded = self.decode(url)
+            if not self._needs_network(decoded):
+                resolved[url] = decoded
+                continue
+
+            cached = self.cache.get(decoded)
+            if cached is not None:
+                self._count('cache_hits')
+                resolved[url] = cached
+            else:
+                pending.setdefault(decoded, []).append(url)
+
+        if pending:
+            targets = list(pending)
+            self._count('network', len(targets))
+            logger.info(f"🔄 Seguindo redirects de {len(targets)} URLs em paralelo")
+            outcomes = fetch_engine.fetch_many(
+                [self._head_spec(target) for target in targets],
+                max_concurrency=max_concurrency
             )
-            
-            final_url = response.url
-            if final_url and final_url != url:
-                logger.info(f"🔄 Redirect seguido: {url} -> {final_url}")
-                return final_url
-            
-            return url
-            
-        except Exception as e:
-            logger.warning(f"⚠️ Erro ao seguir redirects para {url}: {e}")
-            return url
+            for target, outcome in zip(targets, outcomes):
+                final_url = self._store_outcome(target, outcome)
+                for url in pending[target]:
+                    resolved[url] = final_url
+
+        return resolved
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats['cache_entries'] = len(self.cache)
+        return stats
+
 
 # Instância global
 url_resolver = URLResolver()
+
+
+# Função de conveniência
+def resolve_url(url: str) -> str:
+    """Função de conveniência para resolver URLs"""
+    return url_resolver.resolve_redirect_url(url)
@@ -8,13 +8,15 @@ Navegação web REAL sem cache ou simulação - DADOS 100% REAIS
 import os
 import logging
 import time
-import requests
 from typing import Dict, List, Optional, Any
 from urllib.parse import quote_plus, urljoin
 import json
 import re
 from datetime import datetime
 from bs4 import BeautifulSoup
+from services.fetch_engine import fetch_engine
+from services.near_duplicate import near_duplicate_detector
+from services.crawl_scheduler import crawl_scheduler
 import random
 
 logger = logging.getLogger(__name__)
@@ -32,6 +34,10 @@ class WebSailorAgent:
         # URLs das APIs
         self.google_search_url = "https://www.googleapis.com/customsearch/v1"
         self.jina_reader_url = "https://r.jina.ai/"
+        # Todas as páginas passam pelo mesmo host do Jina: limite e espaçamento próprios
+        self.jina_max_concurrency = int(os.getenv("JINA_MAX_CONCURRENCY", 1))
+        self.jina_min_interval = float(os.getenv("JINA_MIN_INTERVAL", 0.5))
+        self.jina_max_wait = float(os.getenv("JINA_MAX_WAIT", 30))
         
         # Headers REAIS para requisições
         self.headers = {
@@ -79,78 +85,102 @@ class WebSailorAgent:
                 self._yahoo_search_real
             ]
             
+            engine_results = []
             for search_engine in search_engines:
                 try:
                     results = search_engine(query, max_pages)
                     if results:
                         logger.info(f"✅ {search_engine.__name__}: {len(results)} resultados REAIS")
-                        
-                        # Extrai conteúdo REAL de cada página
-                        for result in results[:10]:  # Top 10 por engine
-                            content = self._extract_real_page_content(result["url"])
-                            if content and len(content) > 100:  # Só conteúdo substancial
-                                all_page_contents.append({
-                                    "url": result["url"],
-                                    "title": result["title"],
-                                    "content": content,
-                                    "relevance_score": self._calculate_real_relevance(content, query, context),
-                                    "source_type": "real_search",
-                                    "search_engine": search_engine.__name__
-                                })
-                                
-                                # Delay para não sobrecarregar
-                                time.sleep(0.5)
+                        engine_results.extend((search_engine.__name__, result) for result in results[:10])  # Top 10 por engine
                     
                 except Exception as e:
                     logger.warning(f"Erro em {search_engine.__name__}: {str(e)}")
                     continue
             
+            # Extrai conteúdo REAL de cada página (hosts em paralelo, educado com cada site)
+            contents = crawl_scheduler.run(
+                self._extract_real_page_content,
+                [result["url"] for _, result in engine_results]
+            )
+            for engine_name, result in engine_results:
+                content = contents.get(result["url"])
+                if content and len(content) > 100:  # Só conteúdo substancial
+                    all_page_contents.append({
+                        "url": result["url"],
+                        "title": result["title"],
+                        "content": content,
+                        "relevance_score": self._calculate_real_relevance(content, query, context),
+                        "source_type": "real_search",
+                        "search_engine": engine_name
+                    })
+            
             # 2. PESQUISA EM PROFUNDIDADE REAL
             if depth > 1 and all_page_contents:
                 logger.info(f"🔍 PESQUISA EM PROFUNDIDADE REAL (nível {depth})...")
                 top_pages = sorted(all_page_contents, key=lambda x: x["relevance_score"], reverse=True)[:5]
                 
-                for page in top_pages:
-                    internal_links = self._extract_real_internal_links(page["url"], page["content"])
-                    for link in internal_links[:3]:  # Top 3 links internos
-                        internal_content = self._extract_real_page_content(link)
-                        if internal_content and len(internal_content) > 100:
-                            all_page_contents.append({
-                                "url": link,
-                                "title": f"Link interno de {page['title']}",
-                                "content": internal_content,
-                                "relevance_score": self._calculate_real_relevance(internal_content, query, context) * 0.8,
-                                "source_type": "internal_link",
-                                "parent_url": page["url"]
-                            })
-                            time.sleep(0.3)
+                pages_by_url = {page["url"]: page for page in top_pages}
+                page_links = crawl_scheduler.run(
+                    lambda url: self._extract_real_internal_links(url, pages_by_url[url]["content"]),
+                    list(pages_by_url)
+                )
+                
+                internal_links = [
+                    (link, page)
+                    for page in top_pages
+                    for link in (page_links.get(page["url"]) or [])[:3]  # Top 3 links internos
+                ]
+                internal_contents = crawl_scheduler.run(
+                    self._extract_real_page_content,
+                    [link for link, _ in internal_links]
+                )
+                
+                for link, page in internal_links:
+                    internal_content = internal_contents.get(link)
+                    if internal_content and len(internal_content) > 100:
+                        all_page_contents.append({
+                            "url": link,
+                            "title": f"Link interno de {page['title']}",
+                            "content": internal_content,
+                            "relevance_score": self._calculate_real_relevance(internal_content, query, context) * 0.8,
+                            "source_type": "internal_link",
+                            "parent_url": page["url"]
+                        })
             
             # 3. PESQUISA DE QUERIES RELACIONADAS REAIS
             if aggressive_mode:
                 logger.info("🎯 PESQUISA AGRESSIVA COM QUERIES RELACIONADAS REAIS...")
                 related_queries = self._generate_real_related_queries(query, context)
                 
+                related_results = []
                 for related_query in related_queries[:3]:
                     try:
-                        related_results = self._google_search_real(related_query, 5)
-                        for result in related_results:
-                            content = self._extract_real_page_content(result["url"])
-                            if content and len(content) > 100:
-                                all_page_contents.append({
-                                    "url": result["url"],
-                                    "title": result["title"],
-                                    "content": content,
-                                    "relevance_score": self._calculate_real_relevance(content, query, context) * 0.7,
-                                    "source_type": "related_query",
-                                    "original_query": related_query
-                                })
-                                time.sleep(0.4)
+                        related_results.extend(
+                            (related_query, result) for result in self._google_search_real(related_query, 5)
+                        )
                     except Exception as e:
                         logger.warning(f"Erro em query relacionada '{related_query}': {str(e)}")
                         continue
+                
+                related_contents = crawl_scheduler.run(
+                    self._extract_real_page_content,
+                    [result["url"] for _, result in related_results]
+                )
+                for related_query, result in related_results:
+                    content = related_contents.get(result["url"])
+                    if content and len(content) > 100:
+                        all_page_contents.append({
+                            "url": result["url"],
+                            "title": result["title"],
+                            "content": content,
+                            "relevance_score": self._calculate_real_relevance(content, query, context) * 0.7,
+                            "source_type": "related_query",
+                            "original_query": related_query
+                        })
             
             # 4. FILTRA E ORDENA POR RELEVÂNCIA REAL
             all_page_contents = [p for p in all_page_contents if p["relevance_score"] > 1.0]
+            all_page_contents, _ = near_duplicate_detector.deduplicate(all_page_contents)
             all_page_contents.sort(key=lambda x: x["relevance_score"], reverse=True)
             
             # 5. CONSOLIDA INFORMAÇÕES REAIS
@@ -188,7 +218,7 @@ class WebSailorAgent:
                 "sort": "date"
             }
             
-            response = requests.get(
+            response = fetch_engine.get(
                 self.google_search_url,
                 params=params,
                 headers=self.headers,
@@ -224,7 +254,7 @@ class WebSailorAgent:
             # Bing search via scraping
             search_url = f"https://www.bing.com/search?q={quote_plus(query)}&cc=br&setlang=pt-br"
             
-            response = requests.get(
+            response = fetch_engine.get(
                 search_url,
                 headers=self.headers,
                 timeout=10
@@ -269,7 +299,7 @@ class WebSailorAgent:
         try:
             search_url = f"https://html.duckduckgo.com/html/?q={quote_plus(query)}"
             
-            response = requests.get(
+            response = fetch_engine.get(
                 search_url,
                 headers=self.headers,
                 timeout=10
@@ -311,7 +341,7 @@ class WebSailorAgent:
         try:
             search_url = f"https://br.search.yahoo.com/search?p={quote_plus(query)}"
             
-            response = requests.get(
+            response = fetch_engine.get(
                 search_url,
                 headers=self.headers,
                 timeout=10
@@ -380,11 +410,22 @@ class WebSailorAgent:
             
             jina_url = f"{self.jina_reader_url}{url}"
             
-            response = requests.get(
+            # O scheduler enfileira pelo host da página; o host contatado é o do Jina
+            with crawl_scheduler.slot(
                 jina_url,
-                headers=headers,
-                timeout=30
-            )
+                min_interval=self.jina_min_interval,
+                concurrency=self.jina_max_concurrency,
+                max_wait=self.jina_max_wait
+            ) as acquired:
+                if not acquired:
+                    return None
+                response = fetch_engine.get(
+                    jina_url,
+                    headers=headers,
+                    timeout=30
+                )
+            # 429 adia o Jina para todas as tarefas; esta segue pela extração direta
+            crawl_scheduler.observe(jina_url, response, retry=False)
             
             if response.status_code == 200:
                 content = response.text
@@ -403,15 +444,16 @@ class WebSailorAgent:
             return None
     
     def _extract_direct_real(self, url: str) -> Optional[str]:
-        """Extração REAL direta usando requests + BeautifulSoup"""
+        """Extração REAL direta usando fetch engine + BeautifulSoup"""
         
         try:
-            response = requests.get(
+            response = fetch_engine.get(
                 url,
                 headers=self.headers,
                 timeout=20,
                 allow_redirects=True
             )
+            crawl_scheduler.observe(url, response)
             
             if response.status_code == 200:
                 soup = BeautifulSoup(response.content, "html.parser")
@@ -452,7 +494,8 @@ class WebSailorAgent:
         links = []
         try:
             # Faz nova requisição para obter HTML completo
-            response = requests.get(base_url, headers=self.headers, timeout=10)
+            response = fetch_engine.get(base_url, headers=self.headers, timeout=10)
+            crawl_scheduler.observe(base_url, response)
             if response.status_code == 200:
                 soup = BeautifulSoup(response.content, "html.parser")
                 base_domain = base_url.split('/')[2]
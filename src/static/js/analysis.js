@@ -5,6 +5,9 @@ class AnalysisManager {
         this.sessionId = window.app?.sessionId || this.generateSessionId();
         this.isAnalyzing = false;
         this.progressInterval = null;
+        this.currentJobId = null;
+        this.progressStream = null;
+        this.jobWakeup = null;
         this.currentAnalysis = null;
         this.extractorStats = {};
         
@@ -30,6 +33,12 @@ class AnalysisManager {
             });
         }
 
+        // Cancelamento do job em background
+        const cancelBtn = document.getElementById('cancelAnalysisBtn');
+        if (cancelBtn) {
+            cancelBtn.addEventListener('click', () => this.cancelAnalysis());
+        }
+
         // Test buttons
         this.setupTestButtons();
     }
@@ -478,9 +487,23 @@ class AnalysisManager {
                 body: JSON.stringify(formData)
             });
 
-            const result = await response.json();
-
-            if (response.ok && result) {
+            let result = await response.json();
+
+            // Análise enfileirada: aguarda o job em background
+            if (response.status === 202 && result.job_id) {
+                this.currentJobId = result.job_id;
+                this.setCancelButtonVisible(true);
+                this.openProgressStream(result.session_id || this.sessionId);
+                const job = await this.waitForJob(result.job_id);
+
+                if (job.status === 'completed') {
+                    this.onAnalysisSuccess(job.result);
+                } else if (job.status === 'cancelled') {
+                    this.onAnalysisError('Análise cancelada', job);
+                } else {
+                    this.onAnalysisError(job.error?.message || job.error?.error || 'Erro desconhecido', job.error);
+                }
+            } else if (response.ok && result) {
                 this.onAnalysisSuccess(result);
             } else {
                 this.onAnalysisError(result.error || 'Erro desconhecido', result);
@@ -491,7 +514,123 @@ class AnalysisManager {
             this.onAnalysisError(error.message);
         } finally {
             this.isAnalyzing = false;
+            this.currentJobId = null;
+            this.setCancelButtonVisible(false);
             this.stopProgressTracking();
+            this.closeProgressStream();
+        }
+    }
+
+    openProgressStream(sessionId) {
+        // Sem suporte a SSE, o progresso vem do polling do job
+        if (!window.EventSource || !sessionId) {
+            return false;
+        }
+
+        this.closeProgressStream();
+
+        const source = new EventSource(`/api/progress/stream/${encodeURIComponent(sessionId)}`);
+
+        source.addEventListener('update_progress', (event) => {
+            const progress = JSON.parse(event.data);
+            this.stopProgressTracking();
+            this.updateProgress(progress.current_step, progress.current_message);
+        });
+
+        source.addEventListener('complete', () => {
+            this.closeProgressStream();
+            this.wakeJobPolling();
+        });
+
+        source.onerror = () => {
+            // CONNECTING = reconexão automática; CLOSED = stream indisponível, volta ao polling
+            if (source.readyState === EventSource.CLOSED) {
+                this.closeProgressStream();
+                this.wakeJobPolling();
+            }
+        };
+
+        this.progressStream = source;
+        return true;
+    }
+
+    closeProgressStream() {
+        if (this.progressStream) {
+            this.progressStream.close();
+            this.progressStream = null;
+        }
+    }
+
+    wakeJobPolling() {
+        if (this.jobWakeup) {
+            this.jobWakeup();
+        }
+    }
+
+    waitForJobPoll(delay) {
+        return new Promise(resolve => {
+            const timer = setTimeout(resolve, delay);
+            this.jobWakeup = () => {
+                clearTimeout(timer);
+                resolve();
+            };
+        });
+    }
+
+    async waitForJob(jobId) {
+        const finishedStatuses = ['completed', 'failed', 'cancelled'];
+
+        while (true) {
+            // Com SSE ativo o fim do job chega pelo evento 'complete'; o polling lento é só uma rede de segurança
+            await this.waitForJobPoll(this.progressStream ? 60000 : 3000);
+            this.jobWakeup = null;
+
+            const response = await fetch(`/api/analyze/jobs/${jobId}`);
+            const data = await response.json();
+
+            if (!response.ok || !data.job) {
+                throw new Error(data.error || 'Falha ao consultar análise');
+            }
+
+            const job = data.job;
+
+            // Progresso real substitui a simulação
+            if (job.progress && !this.progressStream) {
+                this.stopProgressTracking();
+                this.updateProgress(job.progress.current_step, job.progress.current_message);
+            }
+
+            if (finishedStatuses.includes(job.status)) {
+                this.currentJobId = null;
+                return job;
+            }
+        }
+    }
+
+    async cancelAnalysis() {
+        if (!this.currentJobId) {
+            return;
+        }
+
+        const cancelBtn = document.getElementById('cancelAnalysisBtn');
+        if (cancelBtn) {
+            cancelBtn.disabled = true;
+        }
+
+        try {
+            await fetch(`/api/analyze/jobs/${this.currentJobId}/cancel`, { method: 'POST' });
+            window.app?.showWarning('Cancelamento solicitado');
+            this.wakeJobPolling();
+        } catch (error) {
+            console.error('Erro ao cancelar análise:', error);
+        }
+    }
+
+    setCancelButtonVisible(visible) {
+        const cancelBtn = document.getElementById('cancelAnalysisBtn');
+        if (cancelBtn) {
+            cancelBtn.style.display = visible ? 'inline-flex' : 'none';
+            cancelBtn.disabled = false;
         }
     }
 
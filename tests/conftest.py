@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Configuração dos testes unitários
+"""
+
+import os
+import sys
+import tempfile
+
+# Os serviços são importados como em produção (PYTHONPATH=src)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+# Breakers e rate limits globais ficam em memória durante os testes
+os.environ.setdefault('CIRCUIT_BREAKER_BACKEND', 'memory')
+os.environ.setdefault('RATE_LIMIT_BACKEND', 'memory')
+
+# Instâncias globais com SQLite não gravam no diretório de trabalho
+_TEST_DB_DIR = tempfile.mkdtemp(prefix='arqv30-tests-')
+os.environ.setdefault('ANALYSIS_JOB_DB', os.path.join(_TEST_DB_DIR, 'analysis_jobs.db'))
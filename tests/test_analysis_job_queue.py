@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Testes da Analysis Job Queue
+Devolução à fila dos jobs de um worker encerrado (worker_exit roda no master)
+"""
+
+import os
+import time
+import socket
+
+import pytest
+
+from services.analysis_job_queue import JOB_QUEUED, JOB_RUNNING, AnalysisJobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return AnalysisJobQueue(str(tmp_path / 'analysis_jobs.db'))
+
+
+def _insert_running(queue, job_id, worker, attempts=1):
+    now = time.time()
+    queue._db.connection().execute(
+        """
+        INSERT INTO analysis_jobs (job_id, session_id, status, payload, attempts, worker, created_at, started_at, heartbeat_at)
+        VALUES (?, ?, ?, '{}', ?, ?, ?, ?, ?)
+        """,
+        (job_id, f"session_{job_id}", JOB_RUNNING, attempts, worker, now, now, now)
+    )
+
+
+def test_release_running_jobs_of_another_pid(queue):
+    host = socket.gethostname()
+    dead_pid = os.getpid() + 100000
+    _insert_running(queue, 'dead-1', f"{host}:{dead_pid}:analysis-job-worker-0", attempts=2)
+    _insert_running(queue, 'dead-2', f"{host}:{dead_pid}:analysis-job-worker-1")
+    _insert_running(queue, 'alive', f"{host}:{os.getpid()}:analysis-job-worker-0")
+    # Prefixo de pid não pode casar com outro pid que começa igual
+    _insert_running(queue, 'other', f"{host}:{dead_pid}1:analysis-job-worker-0")
+
+    # Como o worker_exit do gunicorn, chamado no master com o pid do worker
+    assert queue.release_running_jobs(dead_pid) == 2
+
+    dead = queue.get_job('dead-1')
+    assert dead['status'] == JOB_QUEUED
+    assert dead['attempts'] == 1
+    assert queue.get_job('dead-2')['status'] == JOB_QUEUED
+    assert queue.get_job('alive')['status'] == JOB_RUNNING
+    assert queue.get_job('other')['status'] == JOB_RUNNING
+
+
+def test_release_running_jobs_defaults_to_current_process(queue):
+    _insert_running(queue, 'mine', queue._worker_id())
+
+    assert queue.release_running_jobs() == 1
+    assert queue.get_job('mine')['status'] == JOB_QUEUED
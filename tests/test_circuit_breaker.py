@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Testes do Circuit Breaker
+Transições fechado → aberto → meio-aberto → fechado com armazenamento compartilhado
+"""
+
+import pytest
+
+from services import circuit_breaker as breaker_module
+from services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+from services.shared_store import MemoryStore, SQLiteStore
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(breaker_module.time, 'time', fake.time)
+    return fake
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryStore()
+    return SQLiteStore(str(tmp_path / 'circuit_breakers.db'), 'circuit_breakers')
+
+
+@pytest.fixture
+def breaker(monkeypatch, store, clock):
+    monkeypatch.setenv('CIRCUIT_FAILURE_THRESHOLD', '3')
+    monkeypatch.setenv('CIRCUIT_RECOVERY_TIMEOUT', '10')
+    monkeypatch.setenv('CIRCUIT_MAX_RECOVERY_TIMEOUT', '40')
+    monkeypatch.setenv('CIRCUIT_PROBE_TIMEOUT', '5')
+    return CircuitBreaker('test', store)
+
+
+def _open(breaker, name='serper'):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure(name, 'HTTP 503')
+
+
+def test_failures_below_threshold_keep_circuit_closed(breaker):
+    breaker.record_failure('serper', 'HTTP 503')
+    breaker.record_failure('serper', 'HTTP 503')
+    assert breaker.state('serper')['state'] == CLOSED
+    assert breaker.allow('serper')
+
+    breaker.record_success('serper')
+    breaker.record_failure('serper', 'HTTP 503')
+    assert breaker.state('serper')['failures'] == 1
+
+
+def test_closed_open_half_open_closed(breaker, clock):
+    _open(breaker)
+    state = breaker.state('serper')
+    assert state['state'] == OPEN
+    assert state['retry_at'] == pytest.approx(clock.now + 10)
+    assert not breaker.allow('serper')
+    with pytest.raises(CircuitOpenError):
+        breaker.check('serper')
+
+    clock.advance(10)
+    assert breaker.is_available('serper')
+    assert breaker.allow('serper')
+    assert breaker.state('serper')['state'] == HALF_OPEN
+    # Só a sonda passa
+    assert not breaker.allow('serper')
+
+    breaker.record_success('serper')
+    assert breaker.state('serper') == {
+        'state': CLOSED, 'failures': 0, 'open_count': 0, 'retry_at': None, 'last_error': 'HTTP 503'
+    }
+    assert breaker.allow('serper')
+
+
+def test_failed_probe_reopens_with_doubled_recovery(breaker, clock):
+    _open(breaker)
+    clock.advance(10)
+    assert breaker.allow('serper')
+
+    breaker.record_failure('serper', 'HTTP 502')
+    state = breaker.state('serper')
+    assert state['state'] == OPEN
+    assert state['open_count'] == 2
+    assert state['retry_at'] == pytest.approx(clock.now + 20)
+
+    # O tempo de recuperação dobra até o máximo
+    for _ in range(3):
+        clock.advance(breaker.state('serper')['retry_at'] - clock.now)
+        assert breaker.allow('serper')
+        breaker.record_failure('serper', 'HTTP 502')
+    assert breaker.state('serper')['retry_at'] == pytest.approx(clock.now + 40)
+
+
+def test_lost_probe_releases_a_new_one_after_probe_timeout(breaker, clock):
+    _open(breaker)
+    clock.advance(10)
+    assert breaker.allow('serper')
+    assert not breaker.allow('serper')
+
+    clock.advance(5)
+    assert breaker.allow('serper')
+
+
+def test_released_probe_lets_the_next_call_probe(breaker, clock):
+    _open(breaker)
+    clock.advance(10)
+    assert breaker.allow('serper')
+    assert not breaker.allow('serper')
+
+    # 429 ou 4xx: sem desfecho, a sonda volta sem esperar probe_timeout
+    breaker.release('serper')
+    assert breaker.state('serper')['state'] == HALF_OPEN
+    assert breaker.allow('serper')
+    breaker.record_success('serper')
+    assert breaker.state('serper')['state'] == CLOSED
+
+    # Fora do meio-aberto, release não muda nada
+    breaker.release('serper')
+    assert breaker.state('serper')['state'] == CLOSED
+
+
+def test_trip_opens_immediately_with_custom_recovery(breaker, clock):
+    breaker.trip('serper', 'quota esgotada', recovery=3600)
+    state = breaker.state('serper')
+    assert state['state'] == OPEN
+    assert state['retry_at'] == pytest.approx(clock.now + 3600)
+
+
+def test_breakers_sharing_a_store_share_the_state(tmp_path, monkeypatch, clock):
+    monkeypatch.setenv('CIRCUIT_FAILURE_THRESHOLD', '2')
+    path = str(tmp_path / 'circuit_breakers.db')
+    first = CircuitBreaker('shared', SQLiteStore(path, 'circuit_breakers'))
+    second = CircuitBreaker('shared', SQLiteStore(path, 'circuit_breakers'))
+
+    first.record_failure('exa', 'timeout')
+    second.record_failure('exa', 'timeout')
+    assert first.state('exa')['state'] == OPEN
+    assert not second.allow('exa')
+
+    clock.advance(first.recovery_timeout)
+    assert first.allow('exa')
+    assert not second.allow('exa')
+
+
+def test_reset_and_stats(breaker):
+    _open(breaker, 'serper')
+    breaker.record_failure('exa', 'timeout')
+    assert set(breaker.get_stats()['circuits']) == {'serper', 'exa'}
+
+    breaker.reset('serper')
+    assert breaker.state('serper')['state'] == CLOSED
+    breaker.reset()
+    assert breaker.get_stats()['circuits'] == {}
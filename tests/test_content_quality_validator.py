@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Testes do Content Quality Validator
+PhraseMatcher com autômato Aho-Corasick e com busca por ``in`` dão o mesmo resultado
+"""
+
+import pytest
+
+from services import content_quality_validator as validator_module
+from services.content_quality_validator import ContentQualityValidator, PhraseMatcher
+
+ERROR_INDICATORS = ContentQualityValidator().error_indicators
+
+TEXTS = [
+    "",
+    "o mercado de cursos online cresceu 27% no último ano segundo a associação.",
+    "erro 404 not found: página não encontrada. enable javascript para continuar.",
+    "500 internal server error - service unavailable (bad gateway timeout)",
+    "403 forbidden 403 forbidden acesso negado acesso negado",
+    "navegador não suportado; cookies disabled; conexão expirou; serviço indisponível",
+]
+
+
+@pytest.fixture(params=[
+    'scan',
+    pytest.param('automaton', marks=pytest.mark.skipif(not validator_module.HAS_AHOCORASICK, reason='pyahocorasick não instalado'))
+])
+def make_matcher(request, monkeypatch):
+    monkeypatch.setattr(validator_module, 'HAS_AHOCORASICK', request.param == 'automaton')
+
+    def factory(phrases):
+        matcher = PhraseMatcher(phrases)
+        assert (matcher._automaton is not None) == (request.param == 'automaton')
+        return matcher
+
+    return factory
+
+
+@pytest.mark.parametrize('text', TEXTS)
+def test_find_all_matches_substring_scan(make_matcher, text):
+    matcher = make_matcher(ERROR_INDICATORS)
+    assert matcher.find_all(text) == [phrase for phrase in ERROR_INDICATORS if phrase in text]
+
+
+def test_overlapping_and_nested_phrases_keep_list_order(make_matcher):
+    matcher = make_matcher(['gateway timeout', 'forbidden', '403 forbidden', 'bad gateway'])
+    assert matcher.find_all("bad gateway timeout e 403 forbidden") == [
+        'gateway timeout', 'forbidden', '403 forbidden', 'bad gateway'
+    ]
+
+
+def test_validator_flags_error_pages(make_matcher):
+    validator = ContentQualityValidator()
+    validator.error_matcher = make_matcher(validator.error_indicators)
+
+    result = validator.validate_content("404 Not Found. A página não encontrada foi removida. " * 20, 'https://exemplo.com/x')
+
+    assert result['details']['error_page_check']['value'] == ['página não encontrada', '404 not found']
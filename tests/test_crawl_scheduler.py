@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Testes do Crawl Scheduler
+Vagas para o host contatado (proxy de leitura) e respostas 429 reportadas
+"""
+
+import time
+import threading
+
+import pytest
+
+from services.crawl_scheduler import CrawlScheduler
+
+PROXY = 'https://r.jina.ai/'
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, retry_after: str = None):
+        self.status_code = status_code
+        self.headers = {'Retry-After': retry_after} if retry_after else {}
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    monkeypatch.setenv('CRAWL_MAX_CONCURRENCY', '8')
+    monkeypatch.setenv('CRAWL_HOST_MIN_INTERVAL', '0')
+    monkeypatch.setenv('CRAWL_MAX_RETRIES', '1')
+    return CrawlScheduler()
+
+
+def _proxied_fetch(scheduler, log, lock, min_interval=0.1, concurrency=1):
+    """Tarefa como a do Jina: a página é de um host, a chamada vai para o proxy"""
+    active = [0]
+
+    def fetch(url):
+        with scheduler.slot(PROXY + url, min_interval=min_interval, concurrency=concurrency, max_wait=5) as acquired:
+            assert acquired
+            with lock:
+                active[0] += 1
+                log.append((time.monotonic(), active[0]))
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+        return url
+
+    return fetch
+
+
+def test_proxy_calls_are_spaced_even_when_page_hosts_differ(scheduler):
+    log, lock = [], threading.Lock()
+    urls = [f"https://site{i}.com.br/materia" for i in range(5)]
+
+    results = scheduler.run(_proxied_fetch(scheduler, log, lock, min_interval=0.1), urls)
+
+    assert sorted(results) == sorted(urls)
+    starts = sorted(start for start, _ in log)
+    assert all(later - earlier >= 0.09 for earlier, later in zip(starts, starts[1:]))
+    assert max(active for _, active in log) == 1
+
+
+def test_proxy_concurrency_cap(scheduler):
+    log, lock = [], threading.Lock()
+    urls = [f"https://site{i}.com.br/materia" for i in range(8)]
+
+    scheduler.run(_proxied_fetch(scheduler, log, lock, min_interval=0, concurrency=2), urls)
+
+    assert max(active for _, active in log) <= 2
+    assert scheduler.get_stats()['slots'] == 8
+
+
+def test_proxy_retry_after_is_respected_and_slot_can_be_skipped(scheduler):
+    scheduler.observe(PROXY + 'https://a.com/', FakeResponse(429, '30'), retry=False)
+
+    with scheduler.slot(PROXY + 'https://b.com/', min_interval=0, max_wait=0.2) as acquired:
+        assert not acquired
+    assert scheduler.get_stats()['slots_skipped'] == 1
+    # Outros hosts não são afetados
+    with scheduler.slot('https://outro-proxy.com/x', min_interval=0, max_wait=0.2) as acquired:
+        assert acquired
+
+
+def test_observe_without_retry_does_not_requeue_the_page(scheduler):
+    calls = []
+
+    def fetch(url):
+        calls.append(url)
+        # Proxy limitou, a tarefa seguiu pela extração direta
+        scheduler.observe(PROXY + url, FakeResponse(429, '1'), retry=False)
+        return 'conteúdo'
+
+    results = scheduler.run(fetch, ['https://a.com/1'])
+
+    assert results == {'https://a.com/1': 'conteúdo'}
+    assert calls == ['https://a.com/1']
+
+
+def test_observe_with_retry_requeues_the_page(scheduler):
+    calls = []
+
+    def fetch(url):
+        calls.append(url)
+        if len(calls) == 1:
+            scheduler.observe(url, FakeResponse(429, '1'))
+            return None
+        return 'conteúdo'
+
+    results = scheduler.run(fetch, ['https://a.com/1'])
+
+    assert results == {'https://a.com/1': 'conteúdo'}
+    assert len(calls) == 2
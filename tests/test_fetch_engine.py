@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Testes do Fetch Engine
+Retries, orçamento de tempo, limite por host e fachada síncrona contra um servidor HTTP local
+"""
+
+import json
+import time
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+requests = pytest.importorskip('requests')
+
+from services import fetch_engine as fetch_module
+from services.fetch_engine import (
+    FetchConnectionError, FetchEngine, FetchHTTPError, FetchRejected, FetchResponse, FetchTimeout
+)
+
+BACKENDS = ['requests', pytest.param('httpx', marks=pytest.mark.skipif(not fetch_module.HAS_HTTPX, reason='httpx não instalado'))]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Rotas de teste; o estado fica em ``self.server``"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: bytes = b'', headers: dict = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self):
+        parsed = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        server = self.server
+        with server.lock:
+            server.hits[parsed.path] += 1
+            hits = server.hits[parsed.path]
+
+        if parsed.path == '/ok':
+            self._send(200, json.dumps({'method': self.command, 'path': parsed.path}).encode(),
+                       {'Content-Type': 'application/json; charset=utf-8'})
+        elif parsed.path.startswith('/flaky'):
+            # Falha ``fail`` vezes e depois responde 200
+            if hits <= int(query.get('fail', 2)):
+                self._send(int(query.get('status', 503)), b'indisponivel')
+            else:
+                self._send(200, b'recuperado')
+        elif parsed.path.startswith('/status'):
+            headers = {'Retry-After': query['retry_after']} if 'retry_after' in query else {}
+            self._send(int(query.get('code', 500)), b'erro', headers)
+        elif parsed.path.startswith('/slow'):
+            time.sleep(float(query.get('delay', 1)))
+            self._send(200, b'lento')
+        elif parsed.path.startswith('/big'):
+            # Corpo de ``size`` bytes com Content-Length declarado
+            body = (b'<p>' + b'a' * 96 + b'</p>\n') * (int(query.get('size', 100000)) // 104)
+            self._send(200, body, {'Content-Type': query.get('type', 'text/html; charset=utf-8')})
+        elif parsed.path.startswith('/concurrent'):
+            with server.lock:
+                server.active += 1
+                server.max_active = max(server.max_active, server.active)
+            time.sleep(float(query.get('delay', 0.2)))
+            with server.lock:
+                server.active -= 1
+            self._send(200, parsed.path.encode())
+        else:
+            self._send(404, b'nao encontrado')
+
+    def do_GET(self):
+        self._handle()
+
+    def do_HEAD(self):
+        self._handle()
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        self._handle()
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    httpd.daemon_threads = True
+    httpd.lock = threading.Lock()
+    httpd.hits = defaultdict(int)
+    httpd.active = 0
+    httpd.max_active = 0
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.base_url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture(params=BACKENDS)
+def make_engine(request, monkeypatch):
+    engines = []
+
+    def factory(**env):
+        monkeypatch.setenv('FETCH_ASYNC_ENABLED', 'true' if request.param == 'httpx' else 'false')
+        monkeypatch.setenv('FETCH_BACKOFF_BASE', '0.01')
+        for name, value in env.items():
+            monkeypatch.setenv(name, str(value))
+        engine = FetchEngine()
+        assert engine.use_async == (request.param == 'httpx')
+        engines.append(engine)
+        return engine
+
+    yield factory
+    for engine in engines:
+        engine.close()
+
+
+# ----------------------------------------------------------------------
+# Fachada síncrona
+# ----------------------------------------------------------------------
+
+def test_get_returns_requests_like_response(server, make_engine):
+    engine = make_engine()
+    response = engine.get(f"{server.base_url}/ok")
+
+    assert isinstance(response, FetchResponse)
+    assert response.ok and response.status_code == 200
+    assert response.headers['Content-Type'].startswith('application/json')
+    assert response.json() == {'method': 'GET', 'path': '/ok'}
+    assert response.encoding == 'utf-8'
+    response.raise_for_status()
+
+
+def test_raise_for_status_is_a_requests_http_error(server, make_engine):
+    engine = make_engine()
+    response = engine.get(f"{server.base_url}/missing")
+
+    assert response.status_code == 404 and not response.ok
+    with pytest.raises(requests.exceptions.HTTPError) as info:
+        response.raise_for_status()
+    assert isinstance(info.value, FetchHTTPError)
+    assert info.value.response is response
+
+
+def test_submit_and_fetch_many_keep_order_and_errors(server, make_engine):
+    engine = make_engine()
+    assert engine.submit('GET', f"{server.base_url}/ok").result().status_code == 200
+
+    outcomes = engine.fetch_many([
+        f"{server.base_url}/concurrent/1",
+        {'url': 'http://127.0.0.1:9/closed', 'retries': 0, 'timeout': 2},
+        {'method': 'HEAD', 'url': f"{server.base_url}/concurrent/3"}
+    ])
+
+    assert outcomes[0].content == b'/concurrent/1'
+    assert isinstance(outcomes[1], FetchConnectionError)
+    assert outcomes[2].status_code == 200 and outcomes[2].content == b''
+
+
+def test_connection_error_is_a_requests_connection_error(make_engine):
+    engine = make_engine()
+    with pytest.raises(requests.exceptions.ConnectionError):
+        engine.get('http://127.0.0.1:9/closed', retries=0, timeout=2)
+    assert engine.get_stats()['errors'] == 1
+
+
+# ----------------------------------------------------------------------
+# Política de retries
+# ----------------------------------------------------------------------
+
+def test_idempotent_request_retries_retryable_status(server, make_engine):
+    engine = make_engine(FETCH_MAX_RETRIES=2)
+    response = engine.get(f"{server.base_url}/flaky?fail=2")
+
+    assert response.status_code == 200 and response.text == 'recuperado'
+    assert server.hits['/flaky'] == 3
+    assert engine.get_stats()['retries'] == 2
+
+
+def test_retries_stop_after_max_retries(server, make_engine):
+    engine = make_engine(FETCH_MAX_RETRIES=1)
+    response = engine.get(f"{server.base_url}/flaky?fail=5")
+
+    assert response.status_code == 503
+    assert server.hits['/flaky'] == 2
+
+
+def test_post_is_not_retried_by_default(server, make_engine):
+    engine = make_engine(FETCH_MAX_RETRIES=3)
+    response = engine.post(f"{server.base_url}/flaky?fail=1", json={'q': 1})
+
+    assert response.status_code == 503
+    assert server.hits['/flaky'] == 1
+
+
+def test_explicit_retries_apply_to_post(server, make_engine):
+    engine = make_engine()
+    response = engine.post(f"{server.base_url}/flaky?fail=1", data='x', retries=1)
+
+    assert response.status_code == 200
+    assert server.hits['/flaky'] == 2
+
+
+def test_non_retryable_status_is_returned_immediately(server, make_engine):
+    engine = make_engine(FETCH_MAX_RETRIES=3)
+    response = engine.get(f"{server.base_url}/status?code=500")
+
+    assert response.status_code == 500
+    assert server.hits['/status'] == 1
+
+
+def test_retry_after_beyond_budget_is_not_waited(server, make_engine):
+    engine = make_engine(FETCH_MAX_RETRIES=3)
+    started = time.monotonic()
+    response = engine.get(f"{server.base_url}/status?code=503&retry_after=30", budget=2)
+
+    assert response.status_code == 503
+    assert server.hits['/status'] == 1
+    assert time.monotonic() - started < 1.5
+
+
+# ----------------------------------------------------------------------
+# Orçamento de tempo
+# ----------------------------------------------------------------------
+
+def test_timeout_budget_bounds_total_time_across_retries(server, make_engine):
+    engine = make_engine(FETCH_MAX_RETRIES=5)
+    started = time.monotonic()
+    with pytest.raises(FetchTimeout):
+        engine.get(f"{server.base_url}/slow?delay=3", timeout=0.3, budget=1.0)
+    elapsed = time.monotonic() - started
+
+    assert isinstance(FetchTimeout('x'), requests.exceptions.Timeout)
+    assert elapsed < 1.6
+    assert engine.get_stats()['timeouts'] >= 1
+
+
+def test_per_attempt_timeout_is_clipped_to_remaining_budget(server, make_engine):
+    engine = make_engine(FETCH_MAX_RETRIES=0)
+    started = time.monotonic()
+    with pytest.raises(FetchTimeout):
+        engine.get(f"{server.base_url}/slow?delay=3", timeout=10, budget=0.5)
+    assert time.monotonic() - started < 1.2
+
+
+# ----------------------------------------------------------------------
+# Limite de conexões por host
+# ----------------------------------------------------------------------
+
+def test_per_host_cap_limits_simultaneous_requests(server, make_engine):
+    engine = make_engine(FETCH_MAX_PER_HOST=2)
+    urls = [f"{server.base_url}/concurrent/{i}?delay=0.2" for i in range(6)]
+
+    outcomes = engine.fetch_many(urls, max_concurrency=6)
+
+    assert [outcome.status_code for outcome in outcomes] == [200] * 6
+    assert server.max_active == 2
+
+
+def test_per_host_cap_is_per_host(server, make_engine):
+    engine = make_engine(FETCH_MAX_PER_HOST=1)
+    port = server.server_address[1]
+    urls = [f"http://{host}:{port}/concurrent/{i}?delay=0.3" for i in range(2) for host in ('127.0.0.1', 'localhost')]
+
+    started = time.monotonic()
+    outcomes = engine.fetch_many(urls, max_concurrency=4)
+    elapsed = time.monotonic() - started
+
+    assert all(outcome.status_code == 200 for outcome in outcomes)
+    assert server.max_active == 2
+    assert elapsed < 1.1
+
+
+# ----------------------------------------------------------------------
+# Limite de bytes
+# ----------------------------------------------------------------------
+
+def test_oversized_html_is_read_up_to_the_limit(server, make_engine):
+    engine = make_engine()
+    response = engine.get(f"{server.base_url}/big?size=200000", max_bytes=10000,
+                          content_types=('text/html', 'application/xhtml+xml'))
+
+    assert response.status_code == 200
+    assert response.truncated
+    assert len(response.content) == 10000
+    assert response.text.startswith('<p>aaa')
+    assert engine.get_stats()['truncated'] == 1
+
+
+def test_oversized_non_html_is_rejected_before_download(server, make_engine):
+    engine = make_engine()
+    with pytest.raises(FetchRejected) as error:
+        engine.get(f"{server.base_url}/big?size=200000&type=application/pdf", max_bytes=10000)
+
+    assert error.value.reason == 'too_large'
+
+
+def test_body_within_the_limit_is_not_truncated(server, make_engine):
+    engine = make_engine()
+    response = engine.get(f"{server.base_url}/big?size=5200", max_bytes=10000)
+
+    assert not response.truncated
+    assert len(response.content) == 5200
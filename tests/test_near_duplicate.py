@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Testes do Near Duplicate Detector
+Matérias replicadas com cabeçalho, rodapé e pequenas edições diferentes
+"""
+
+import pytest
+
+from services.near_duplicate import MinHashIndex, NearDuplicateDetector, containment, shingle_set
+
+ARTICLE = (
+    "O mercado brasileiro de cursos online cresceu 27% no último ano, segundo levantamento divulgado "
+    "nesta terça-feira pela Associação Brasileira de Educação a Distância. O estudo ouviu mais de "
+    "duas mil empresas do setor e mostra que a procura por formações rápidas em marketing digital, "
+    "programação e finanças pessoais puxou o resultado. De acordo com a entidade, o faturamento "
+    "somado das plataformas chegou a 4,2 bilhões de reais, impulsionado principalmente por alunos "
+    "entre 25 e 40 anos que buscam uma segunda fonte de renda. A pesquisa também aponta que o "
+    "ticket médio caiu de 480 para 390 reais, reflexo da concorrência maior e da popularização de "
+    "assinaturas mensais. Para os especialistas ouvidos no relatório, a tendência é que os "
+    "produtores invistam em comunidades fechadas e mentorias em grupo para reduzir a evasão, que "
+    "ainda passa de 60% nos cursos gravados. O documento destaca ainda que as regiões Nordeste e "
+    "Centro-Oeste registraram o maior avanço proporcional, com destaque para cidades médias do "
+    "interior, onde a oferta presencial de qualificação profissional é limitada. A associação "
+    "prevê novo crescimento de dois dígitos no próximo ano, mas alerta para o risco de saturação "
+    "em nichos como tráfego pago e lançamentos, em que a quantidade de cursos praticamente dobrou."
+)
+
+SYNDICATED = (
+    "Publicado originalmente pela Agência Estado. Compartilhe esta notícia com seus amigos. "
+    + ARTICLE.replace("nesta terça-feira", "na terça-feira (12)")
+             .replace("4,2 bilhões de reais", "R$ 4,2 bilhões")
+             .replace("Para os especialistas ouvidos no relatório", "Segundo especialistas")
+    + " Leia também: como escolher uma plataforma de cursos e quanto cobrar pelo seu primeiro produto digital."
+)
+
+OTHER_ARTICLE = (
+    "O mercado de infoprodutos vive uma fase de ajuste depois de anos de crescimento acelerado. "
+    "Produtores que dependiam de lançamentos sucessivos relatam custo de aquisição maior e taxas "
+    "de conversão menores, enquanto plataformas de assinatura ganham espaço entre os alunos. "
+    "Consultores do setor recomendam que os criadores diversifiquem os canais de venda, invistam "
+    "em conteúdo gratuito de qualidade e acompanhem de perto indicadores como evasão, reembolso e "
+    "satisfação. A tendência de comunidades fechadas e mentorias em grupo também aparece nas "
+    "entrevistas, assim como a busca por nichos menos disputados fora do eixo Rio-São Paulo."
+)
+
+
+def _page(url, content, relevance):
+    return {'url': url, 'content': content, 'relevance_score': relevance}
+
+
+@pytest.fixture
+def detector(monkeypatch):
+    monkeypatch.setenv('NEAR_DUPLICATE_ENABLED', 'true')
+    monkeypatch.setenv('NEAR_DUPLICATE_MIN_WORDS', '50')
+    return NearDuplicateDetector()
+
+
+def test_syndicated_copy_is_dropped_and_best_copy_kept(detector):
+    items = [
+        _page('https://portal-regional.com.br/cursos', SYNDICATED, 0.6),
+        _page('https://estadao.com.br/cursos-online', ARTICLE, 0.9),
+        _page('https://blog.exemplo.com/infoprodutos', OTHER_ARTICLE, 0.7),
+    ]
+
+    kept, duplicates = detector.deduplicate(items)
+
+    assert [item['url'] for item in kept] == [
+        'https://estadao.com.br/cursos-online', 'https://blog.exemplo.com/infoprodutos'
+    ]
+    assert len(duplicates) == 1
+    assert duplicates[0]['url'] == 'https://portal-regional.com.br/cursos'
+    assert duplicates[0]['duplicate_of'] == 'https://estadao.com.br/cursos-online'
+    assert duplicates[0]['similarity'] >= detector.min_containment
+
+
+def test_quality_decides_which_copy_survives(detector):
+    items = [
+        _page('https://estadao.com.br/cursos-online', ARTICLE, 0.4),
+        _page('https://portal-regional.com.br/cursos', SYNDICATED, 0.8),
+    ]
+
+    kept, duplicates = detector.deduplicate(items)
+
+    assert [item['url'] for item in kept] == ['https://portal-regional.com.br/cursos']
+    assert duplicates[0]['duplicate_of'] == 'https://portal-regional.com.br/cursos'
+
+
+def test_page_quoting_another_keeps_its_own_content(detector):
+    quoting = OTHER_ARTICLE + " Um levantamento recente resume o cenário: " + ARTICLE[:400]
+    items = [
+        _page('https://estadao.com.br/cursos-online', ARTICLE, 0.9),
+        _page('https://blog.exemplo.com/analise', quoting, 0.5),
+    ]
+
+    kept, duplicates = detector.deduplicate(items)
+
+    assert len(kept) == 2
+    assert duplicates == []
+
+
+def test_short_texts_are_never_dropped(detector):
+    short = "Cursos online crescem 27% no Brasil, diz associação."
+    items = [_page('https://a.com/1', short, 0.9), _page('https://b.com/1', short, 0.1)]
+
+    kept, duplicates = detector.deduplicate(items)
+
+    assert len(kept) == 2
+    assert duplicates == []
+
+
+def test_containment_threshold_separates_copies_from_same_topic_articles():
+    article, _ = shingle_set(ARTICLE)
+    syndicated, _ = shingle_set(SYNDICATED)
+    other, _ = shingle_set(OTHER_ARTICLE)
+
+    assert containment(syndicated, article) > 0.8
+    assert containment(other, article) < 0.1
+
+
+def test_minhash_lsh_finds_syndicated_candidate():
+    index = MinHashIndex(num_perm=64, bands=32)
+    article, _ = shingle_set(ARTICLE)
+    other, _ = shingle_set(OTHER_ARTICLE)
+    index.add('article', index.signature(article))
+    index.add('other', index.signature(other))
+
+    syndicated, _ = shingle_set(SYNDICATED)
+    assert 'article' in index.candidates(index.signature(syndicated))
+    assert len(index) == 2
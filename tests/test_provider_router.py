@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Testes do Provider Router
+Quota diária compartilhada entre workers e ordenação por custo esperado
+"""
+
+from datetime import date
+
+from services import provider_router as router_module
+from services.provider_router import ProviderRouter
+from services.shared_store import MemoryStore, SQLiteStore
+
+
+def test_daily_quota_is_shared_between_workers(tmp_path, monkeypatch):
+    monkeypatch.setenv('GEMINI_DAILY_QUOTA', '3')
+    path = str(tmp_path / 'rate_limits.db')
+    first = ProviderRouter('ai', quota_store=SQLiteStore(path, 'token_buckets'))
+    second = ProviderRouter('ai', quota_store=SQLiteStore(path, 'token_buckets'))
+
+    first.record('gemini', 1.0, success=True)
+    second.record('gemini', 1.0, success=False)
+    assert first.remaining_quota('gemini') == 1
+    assert second.remaining_quota('gemini') == 1
+
+    second.record('gemini', 1.0, success=True)
+    assert not first.is_routable('gemini')
+    assert first.rank({'gemini': {'priority': 1}}) == []
+
+
+def test_quota_resets_on_a_new_day(monkeypatch):
+    class Yesterday(date):
+        @classmethod
+        def today(cls):
+            return date(2024, 1, 1)
+
+    monkeypatch.setenv('OPENAI_DAILY_QUOTA', '1')
+    router = ProviderRouter('ai', quota_store=MemoryStore())
+    monkeypatch.setattr(router_module, 'date', Yesterday)
+    router.record('openai', 1.0, success=True)
+    assert router.remaining_quota('openai') == 0
+
+    monkeypatch.setattr(router_module, 'date', date)
+    assert router.remaining_quota('openai') == 1
+
+
+def test_providers_without_quota_are_not_counted(monkeypatch):
+    monkeypatch.delenv('HUGGINGFACE_DAILY_QUOTA', raising=False)
+    store = MemoryStore()
+    router = ProviderRouter('ai', quota_store=store)
+    router.record('huggingface', 1.0, success=True)
+    assert router.remaining_quota('huggingface') is None
+    assert store.keys('quota:') == []
+
+
+def test_rank_prefers_lower_expected_cost():
+    router = ProviderRouter('ai', alpha=0.5, quota_store=MemoryStore())
+    router.record('gemini', 4.0, success=True)
+    router.record('openai', 1.0, success=True)
+    router.record('openai', 1.0, success=False)
+
+    # openai: 1.0 / 0.5 = 2.0 < gemini: 4.0 / 1.0
+    assert router.rank({'gemini': {'priority': 1}, 'openai': {'priority': 2}}) == ['openai', 'gemini']
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Testes do Token Bucket
+Reposição, consumo em várias janelas e bloqueio compartilhado
+"""
+
+import pytest
+
+from services import token_bucket as bucket_module
+from services.shared_store import MemoryStore, SQLiteStore
+from services.token_bucket import TokenBucketLimiter, parse_limits
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(bucket_module.time, 'time', fake.time)
+    return fake
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryStore()
+    return SQLiteStore(str(tmp_path / 'rate_limits.db'), 'token_buckets')
+
+
+def test_parse_limits():
+    assert parse_limits('1/2s, 100/day,2500/month') == [
+        ('1/2s', 1.0, 2.0), ('100/day', 100.0, 86400.0), ('2500/month', 2500.0, 30 * 86400.0)
+    ]
+    assert parse_limits('abc,5/fortnight,0/s') == []
+
+
+def test_capacity_is_burst_then_waits_for_refill(store, clock):
+    limiter = TokenBucketLimiter('test', store)
+    limiter.configure('serper', '2/second')
+
+    assert limiter.try_acquire('serper') == 0
+    assert limiter.try_acquire('serper') == 0
+    assert limiter.try_acquire('serper') == pytest.approx(0.5)
+
+    clock.advance(0.25)
+    assert limiter.try_acquire('serper') == pytest.approx(0.25)
+
+    clock.advance(0.25)
+    assert limiter.try_acquire('serper') == 0
+    assert limiter.try_acquire('serper') > 0
+
+
+def test_refill_never_exceeds_capacity(store, clock):
+    limiter = TokenBucketLimiter('test', store)
+    limiter.configure('serper', '3/minute')
+    limiter.try_acquire('serper')
+
+    clock.advance(3600)
+    assert limiter.status('serper')['windows'] == {'3/minute': 3}
+
+
+def test_every_window_is_consumed_and_the_tightest_one_blocks(store, clock):
+    limiter = TokenBucketLimiter('test', store)
+    limiter.configure('exa', '10/second,3/day')
+
+    for _ in range(3):
+        assert limiter.try_acquire('exa') == 0
+        clock.advance(1)
+
+    status = limiter.status('exa')
+    assert status['windows']['10/second'] == 10
+    assert status['windows']['3/day'] == 0
+    # Próximo token da janela diária: 1/3 de dia menos os 3s já decorridos
+    assert limiter.try_acquire('exa') == pytest.approx(86400 / 3 - 3)
+    assert limiter.is_limited('exa')
+
+
+def test_rejected_attempt_consumes_nothing(store, clock):
+    limiter = TokenBucketLimiter('test', store)
+    limiter.configure('exa', '5/second,1/hour')
+    limiter.try_acquire('exa')
+
+    assert limiter.try_acquire('exa') > 0
+    assert limiter.status('exa')['windows']['5/second'] == 4
+
+
+def test_limiters_sharing_a_store_share_the_quota(tmp_path, clock):
+    path = str(tmp_path / 'rate_limits.db')
+    first = TokenBucketLimiter('shared', SQLiteStore(path, 'token_buckets'))
+    second = TokenBucketLimiter('shared', SQLiteStore(path, 'token_buckets'))
+    for limiter in (first, second):
+        limiter.configure('serper', '2/day')
+
+    assert first.try_acquire('serper') == 0
+    assert second.try_acquire('serper') == 0
+    assert first.try_acquire('serper') > 0
+    assert second.try_acquire('serper') > 0
+
+
+def test_block_suspends_until_retry_after(store, clock):
+    limiter = TokenBucketLimiter('test', store)
+    limiter.configure('serper', '100/second')
+
+    limiter.block('serper', 30)
+    assert limiter.try_acquire('serper') == pytest.approx(30)
+    assert limiter.acquire('serper', max_wait=1) is False
+
+    clock.advance(30)
+    assert limiter.acquire('serper', max_wait=0) is True
+
+
+def test_unconfigured_provider_is_never_limited(store):
+    limiter = TokenBucketLimiter('test', store)
+    assert limiter.try_acquire('unknown') == 0
+    assert limiter.acquire('unknown', max_wait=0) is True